@@ -56,6 +56,8 @@ class Settings:
     POLYMARKET_API_URL: str = os.getenv("POLYMARKET_API_URL", "https://api.polymarket.com")
     # Public Polymarket data API (used for trades instead of direct CLOB calls)
     POLYMARKET_DATA_API_URL: str = os.getenv("POLYMARKET_DATA_API_URL", "https://data-api.polymarket.com")
+    # Gamma API (market metadata lookups by slug)
+    POLYMARKET_GAMMA_API_URL: str = os.getenv("POLYMARKET_GAMMA_API_URL", "https://gamma-api.polymarket.com")
     # Dome API base URL (used for market research / wallet analytics)
     DOME_API_URL: str = os.getenv("DOME_API_URL", "https://api.domeapi.io/v1")
     
@@ -65,6 +67,86 @@ class Settings:
         "0x56687bf447db6ffa42ffe2204a05edaa20f55839"
     )
     
+    # Scoring
+    # Check every incremental leaderboard rescore against an exact full recomputation
+    SCORING_VERIFY_INCREMENTAL: bool = os.getenv("SCORING_VERIFY_INCREMENTAL", "false").lower() == "true"
+    # Worker processes for sharded scoring (0 = one per CPU core)
+    SCORING_WORKERS: int = int(os.getenv("SCORING_WORKERS", "0"))
+    # Populations below this size are scored in a single worker thread
+    SCORING_PARALLEL_MIN_TRADERS: int = int(os.getenv("SCORING_PARALLEL_MIN_TRADERS", "50000"))
+    SCORING_SHARD_SIZE: int = int(os.getenv("SCORING_SHARD_SIZE", "25000"))
+    
+    # Mark-to-market price cache
+    # Token IDs per CLOB /midpoints request and concurrent requests per refresh
+    PRICE_REFRESH_BATCH_SIZE: int = int(os.getenv("PRICE_REFRESH_BATCH_SIZE", "200"))
+    PRICE_REFRESH_CONCURRENCY: int = int(os.getenv("PRICE_REFRESH_CONCURRENCY", "4"))
+    
+    # Local market catalog
+    # Seconds between background market syncs (0 disables the background sync)
+    MARKET_SYNC_INTERVAL_SECONDS: int = int(os.getenv("MARKET_SYNC_INTERVAL_SECONDS", "900"))
+    MARKET_SYNC_PAGE_SIZE: int = int(os.getenv("MARKET_SYNC_PAGE_SIZE", "500"))
+    # Concurrent lookups when prefetching markets missing from the catalog, and how long
+    # a market that was not found (or not yet resolved) is left alone before retrying
+    MARKET_RESOLVER_CONCURRENCY: int = int(os.getenv("MARKET_RESOLVER_CONCURRENCY", "8"))
+    MARKET_RESOLVER_NEGATIVE_TTL_SECONDS: int = int(os.getenv("MARKET_RESOLVER_NEGATIVE_TTL_SECONDS", "3600"))
+    
+    # Per-wallet trades cache used by trader detail / basic info
+    # Memory budget in bytes (approximate) and seconds before cached trades are refetched
+    TRADER_TRADES_CACHE_MAX_BYTES: int = int(os.getenv("TRADER_TRADES_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    TRADER_TRADES_CACHE_TTL_SECONDS: int = int(os.getenv("TRADER_TRADES_CACHE_TTL_SECONDS", "300"))
+    
+    # Trader discovery
+    # Seconds between background crawls of catalog market trades (0 disables the crawler),
+    # markets crawled per run, concurrent market crawls, and trades per page / pages per market
+    TRADER_DISCOVERY_INTERVAL_SECONDS: int = int(os.getenv("TRADER_DISCOVERY_INTERVAL_SECONDS", "1800"))
+    TRADER_DISCOVERY_MARKETS_PER_RUN: int = int(os.getenv("TRADER_DISCOVERY_MARKETS_PER_RUN", "200"))
+    TRADER_DISCOVERY_CONCURRENCY: int = int(os.getenv("TRADER_DISCOVERY_CONCURRENCY", "8"))
+    TRADER_DISCOVERY_PAGE_SIZE: int = int(os.getenv("TRADER_DISCOVERY_PAGE_SIZE", "500"))
+    TRADER_DISCOVERY_MAX_PAGES: int = int(os.getenv("TRADER_DISCOVERY_MAX_PAGES", "20"))
+
+    # Upstream request scheduling
+    # Concurrent upstream requests per process, slots refresh + backfill may hold together
+    # (the rest stay free for interactive requests), slots backfill may hold, and the
+    # weighted fair queuing weights of the interactive / refresh / backfill classes
+    UPSTREAM_MAX_CONCURRENCY: int = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+    UPSTREAM_BACKGROUND_MAX_SLOTS: int = int(os.getenv("UPSTREAM_BACKGROUND_MAX_SLOTS", "12"))
+    UPSTREAM_BACKFILL_MAX_SLOTS: int = int(os.getenv("UPSTREAM_BACKFILL_MAX_SLOTS", "4"))
+    UPSTREAM_WEIGHT_INTERACTIVE: float = float(os.getenv("UPSTREAM_WEIGHT_INTERACTIVE", "8"))
+    UPSTREAM_WEIGHT_REFRESH: float = float(os.getenv("UPSTREAM_WEIGHT_REFRESH", "3"))
+    UPSTREAM_WEIGHT_BACKFILL: float = float(os.getenv("UPSTREAM_WEIGHT_BACKFILL", "1"))
+
+    # Live leaderboard fan-out
+    # Seconds a live leaderboard build may spend fetching wallets (0 waits for every wallet);
+    # wallets not fetched in time are served from their last fetched metrics, kept for
+    # LIVE_METRICS_CACHE_TTL_SECONDS within an approximate memory budget in bytes
+    LIVE_LEADERBOARD_DEADLINE_SECONDS: float = float(os.getenv("LIVE_LEADERBOARD_DEADLINE_SECONDS", "20"))
+    LIVE_METRICS_CACHE_MAX_BYTES: int = int(os.getenv("LIVE_METRICS_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    LIVE_METRICS_CACHE_TTL_SECONDS: int = int(os.getenv("LIVE_METRICS_CACHE_TTL_SECONDS", "86400"))
+
+    # Local equity curve
+    # Samples one build may add (a finer resolution over a longer history is rejected)
+    EQUITY_CURVE_MAX_SAMPLES: int = int(os.getenv("EQUITY_CURVE_MAX_SAMPLES", "100000"))
+
+    # Tracked wallet refresh scheduler
+    # Seconds between scheduler ticks (0 disables it), seconds between activity tier
+    # reclassifications, upstream calls per minute shared by all syncs, and concurrent syncs
+    WALLET_REFRESH_TICK_SECONDS: int = int(os.getenv("WALLET_REFRESH_TICK_SECONDS", "60"))
+    WALLET_REFRESH_RECLASSIFY_SECONDS: int = int(os.getenv("WALLET_REFRESH_RECLASSIFY_SECONDS", "3600"))
+    WALLET_REFRESH_CALLS_PER_MINUTE: int = int(os.getenv("WALLET_REFRESH_CALLS_PER_MINUTE", "60"))
+    WALLET_REFRESH_CONCURRENCY: int = int(os.getenv("WALLET_REFRESH_CONCURRENCY", "4"))
+    # Refresh interval in seconds per activity tier (closed positions use 4x these)
+    WALLET_REFRESH_HOT_SECONDS: int = int(os.getenv("WALLET_REFRESH_HOT_SECONDS", "300"))
+    WALLET_REFRESH_WARM_SECONDS: int = int(os.getenv("WALLET_REFRESH_WARM_SECONDS", "3600"))
+    WALLET_REFRESH_COLD_SECONDS: int = int(os.getenv("WALLET_REFRESH_COLD_SECONDS", "86400"))
+    # Tier thresholds: trades in the last 7 days or open positions (either one is enough)
+    WALLET_TIER_HOT_TRADES_7D: int = int(os.getenv("WALLET_TIER_HOT_TRADES_7D", "35"))
+    WALLET_TIER_HOT_OPEN_POSITIONS: int = int(os.getenv("WALLET_TIER_HOT_OPEN_POSITIONS", "25"))
+    WALLET_TIER_WARM_TRADES_7D: int = int(os.getenv("WALLET_TIER_WARM_TRADES_7D", "1"))
+    WALLET_TIER_WARM_OPEN_POSITIONS: int = int(os.getenv("WALLET_TIER_WARM_OPEN_POSITIONS", "1"))
+    # Activity rows per page when syncing only activity newer than the last sync
+    WALLET_REFRESH_ACTIVITY_PAGE_SIZE: int = int(os.getenv("WALLET_REFRESH_ACTIVITY_PAGE_SIZE", "100"))
+    WALLET_REFRESH_ACTIVITY_MAX_PAGES: int = int(os.getenv("WALLET_REFRESH_ACTIVITY_MAX_PAGES", "10"))
+
     # Testing/Development limits
     MARKETS_FETCH_LIMIT: int = int(os.getenv("MARKETS_FETCH_LIMIT", "50"))  # Limit to 50 for testing
 
@@ -42,6 +42,12 @@ class ScoringConfig:
     shrink_kp: float = 50.0             # Shrink constant for PnL
     shrink_alpha: float = 4.0           # Whale penalty strength for PnL
     
+    # === Population Statistics Method ===
+    # "exact" sorts the whole population; "sketch" uses mergeable KLL quantile
+    # sketches for the ROI/PnL medians and the percentile anchors
+    anchor_method: str = "exact"
+    sketch_rank_error: float = 0.005    # Target normalized rank error for sketches
+    
     def validate(self) -> None:
         """Validate configuration values."""
         # Weights should sum to approximately 1.0 (allow small floating point errors)
@@ -57,6 +63,12 @@ class ScoringConfig:
         
         if self.risk_n_worst_losses < 1:
             raise ValueError("risk_n_worst_losses must be >= 1")
+        
+        if self.anchor_method not in ("exact", "sketch"):
+            raise ValueError(f"anchor_method must be 'exact' or 'sketch', got {self.anchor_method}")
+        
+        if not (0 < self.sketch_rank_error < 1):
+            raise ValueError("sketch_rank_error must be in (0, 1)")
     
     def get_weights_dict(self) -> dict:
         """Get weights as a dictionary for easy access."""
@@ -0,0 +1,39 @@
+"""
+Batched multi-row statements.
+
+A multi-row INSERT (or UPDATE ... IN) binds one parameter per value, and
+asyncpg rejects statements with more than 32,767 of them. Writers build one
+statement per batch of rows and run them through execute_in_batches.
+"""
+
+from typing import Any, Callable, List, Sequence
+
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows per multi-row statement (stays well below the Postgres bind parameter limit)
+BATCH_SIZE = 2000
+
+
+async def execute_in_batches(
+    session: AsyncSession,
+    rows: Sequence[Any],
+    build_statement: Callable[[Sequence[Any]], Any],
+    batch_size: int = BATCH_SIZE
+) -> List[Result]:
+    """
+    Execute build_statement(batch) for each batch of rows (staged, committed by the caller).
+
+    Args:
+        session: Database session
+        rows: Rows (or keys) to write
+        build_statement: Builds the statement for one batch
+        batch_size: Rows per statement
+
+    Returns:
+        Result of every statement, in order
+    """
+    results = []
+    for start in range(0, len(rows), batch_size):
+        results.append(await session.execute(build_statement(rows[start:start + batch_size])))
+    return results
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Text, UniqueConstraint, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Numeric, Boolean, DateTime, Text, UniqueConstraint, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -107,6 +107,28 @@ class UserPnL(Base):
     )
 
 
+class PnLSeriesChunk(Base):
+    __tablename__ = "pnl_series_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_address = Column(String(42), nullable=False, index=True)  # Wallet address
+    interval = Column(String(10), nullable=False)  # Interval (1m, 5m, local, etc.)
+    fidelity = Column(String(10), nullable=False)  # Fidelity (1d, 1w, etc.)
+    chunk_start = Column(Integer, nullable=False)  # Unix timestamp of the first second of the UTC month
+    level = Column(Integer, nullable=False, default=0)  # 0 = raw points, n = LTTB pyramid level n
+    point_count = Column(Integer, nullable=False, default=0)
+    first_timestamp = Column(Integer, nullable=False)  # Oldest point in the chunk
+    last_timestamp = Column(Integer, nullable=False)  # Newest point in the chunk
+    timestamps = Column(LargeBinary, nullable=False)  # Delta-encoded zigzag varint Unix timestamps, ascending
+    pnl_values = Column(LargeBinary, nullable=False)  # Delta-encoded zigzag varint PnL in 1e-8 units
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_address', 'interval', 'fidelity', 'chunk_start', 'level', name='uq_pnl_series_chunk'),
+    )
+
+
 class ProfileStats(Base):
     __tablename__ = "profile_stats"
 
@@ -193,6 +215,7 @@ class Trade(Base):
     
     __table_args__ = (
         UniqueConstraint('proxy_wallet', 'transaction_hash', 'timestamp', 'asset', name='uq_trade_unique'),
+        Index('ix_trades_wallet_asset_timestamp', 'proxy_wallet', 'asset', 'timestamp', 'id'),  # FIFO recompute order
     )
 
 
@@ -224,6 +247,97 @@ class AggregatedMetrics(Base):
     )
 
 
+class OpenLot(Base):
+    __tablename__ = "open_lots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    proxy_wallet = Column(String(42), nullable=False, index=True)
+    asset = Column(String, nullable=False, index=True)
+    method = Column(String(16), nullable=False, default="fifo")  # Cost-basis method (fifo, lifo, average)
+    lots = Column(JSON, nullable=False)  # Engine state, oldest first: [[size, price], ...] in micro-units
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('proxy_wallet', 'asset', 'method', name='uq_open_lot_wallet_asset_method'),
+    )
+
+
+class LotWatermark(Base):
+    __tablename__ = "lot_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    proxy_wallet = Column(String(42), nullable=False, unique=True, index=True)
+    last_timestamp = Column(Integer, nullable=False)  # Newest trade timestamp matched into open_lots
+    trade_count = Column(Integer, nullable=False)  # Trades matched with timestamp <= last_timestamp
+    methods = Column(String(64), nullable=False, default="fifo")  # Comma-separated cost-basis methods stored
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class TokenPrice(Base):
+    __tablename__ = "token_prices"
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset = Column(String, nullable=False, unique=True, index=True)  # Outcome token ID (Position.asset)
+    price = Column(Numeric(10, 6), nullable=False)  # Mark price (CLOB midpoint)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # When the price was fetched
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class PriceHistory(Base):
+    __tablename__ = "price_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset = Column(String, nullable=False, unique=True, index=True)  # Outcome token ID
+    timestamps = Column(LargeBinary, nullable=False)  # Packed little-endian int64 Unix timestamps, ascending
+    prices = Column(LargeBinary, nullable=False)  # Packed little-endian int32 prices in micro-USDC
+    point_count = Column(Integer, nullable=False, default=0)
+    last_timestamp = Column(BigInteger, nullable=False)  # Newest point stored
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class EquityCurveState(Base):
+    __tablename__ = "equity_curve_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    proxy_wallet = Column(String(42), nullable=False, index=True)
+    resolution = Column(String(10), nullable=False)  # Sample spacing (e.g. 1h, 1d)
+    last_sample = Column(BigInteger, nullable=False)  # Timestamp of the newest stored sample
+    event_count = Column(Integer, nullable=False)  # Trades + activities with timestamp <= last_sample
+    state = Column(JSON, nullable=False)  # Cash, holdings, marks and conditions at last_sample
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('proxy_wallet', 'resolution', name='uq_equity_curve_state_wallet_resolution'),
+    )
+
+
+class CostBasisPnL(Base):
+    __tablename__ = "cost_basis_pnl"
+
+    id = Column(Integer, primary_key=True, index=True)
+    proxy_wallet = Column(String(42), nullable=False, index=True)
+    method = Column(String(16), nullable=False)  # Cost-basis method (fifo, lifo, average)
+    realized_pnl = Column(Numeric(20, 8), nullable=False, default=0)  # Realized PnL of matched sells
+    closed_trades = Column(Integer, nullable=False, default=0)  # Sells matched against open size
+    winning_trades = Column(Integer, nullable=False, default=0)
+    losing_trades = Column(Integer, nullable=False, default=0)
+    unmatched_sells = Column(Integer, nullable=False, default=0)  # Sells without open size to match
+    open_positions = Column(Integer, nullable=False, default=0)  # Assets with open size
+    open_cost = Column(Numeric(20, 8), nullable=False, default=0)  # Cost basis of open size
+    last_timestamp = Column(Integer, nullable=False, default=0)  # Newest trade included
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('proxy_wallet', 'method', name='uq_cost_basis_pnl_wallet_method'),
+    )
+
+
 class ClosedPosition(Base):
     __tablename__ = "closed_positions"
 
@@ -251,3 +365,79 @@ class ClosedPosition(Base):
     __table_args__ = (
         UniqueConstraint('proxy_wallet', 'asset', 'condition_id', 'timestamp', name='uq_closed_position_unique'),
     )
+
+
+class Market(Base):
+    __tablename__ = "markets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    condition_id = Column(String(66), nullable=False, unique=True, index=True)
+    market_id = Column(String(100), nullable=True, index=True)  # Upstream market id (if different from condition_id)
+    slug = Column(String(255), nullable=True, index=True)  # Market slug
+    event_slug = Column(String(255), nullable=True, index=True)
+    question = Column(Text, nullable=True)
+    category = Column(String(255), nullable=True, index=True)
+    outcomes = Column(JSON, nullable=True)  # Outcome labels, e.g. ["Yes", "No"]
+    token_ids = Column(JSON, nullable=True)  # Outcome token IDs, in outcome order
+    resolution = Column(String(20), nullable=True, index=True)  # YES / NO / winning outcome, null while unresolved
+    active = Column(Boolean, default=True)
+    closed = Column(Boolean, default=False, index=True)
+    end_date = Column(String(50), nullable=True)
+    content_hash = Column(String(40), nullable=False)  # SHA-1 of the synced fields, to skip unchanged rows
+    trades_crawled_until = Column(Integer, nullable=True)  # Newest trade timestamp seen by trader discovery
+    trades_crawled_at = Column(DateTime, nullable=True, index=True)  # When trader discovery last crawled this market
+    trades_crawled_keys = Column(JSON, nullable=True)  # Keys of the crawled trades at trades_crawled_until
+    trades_crawl_resume = Column(JSON(none_as_null=True), nullable=True)  # Cursor of a crawl cut short by the page limit
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class DiscoveredTrader(Base):
+    __tablename__ = "discovered_traders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    wallet_address = Column(String(42), nullable=False, unique=True, index=True)  # Lowercased proxy wallet
+    first_seen_at = Column(Integer, nullable=False)  # Unix timestamp of the earliest crawled trade
+    last_seen_at = Column(Integer, nullable=False, index=True)  # Unix timestamp of the latest crawled trade
+    trade_count = Column(Integer, nullable=False, default=0)  # Crawled trades
+    market_count = Column(Integer, nullable=False, default=0)  # Distinct crawled markets traded
+    total_volume = Column(Numeric(20, 8), nullable=False, default=0)  # Sum of size * price over crawled trades
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_discovered_traders_volume', 'total_volume'),
+    )
+
+
+class DiscoveredTraderMarket(Base):
+    __tablename__ = "discovered_trader_markets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    wallet_address = Column(String(42), nullable=False)
+    condition_id = Column(String(66), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('wallet_address', 'condition_id', name='uq_discovered_trader_market'),
+    )
+
+
+class TrackedWallet(Base):
+    __tablename__ = "tracked_wallets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    wallet_address = Column(String(42), nullable=False, unique=True, index=True)  # Lowercased proxy wallet
+    status = Column(String(20), nullable=False, default="active")  # active, paused or removed
+    tags = Column(JSON, nullable=True)  # Free-form labels, e.g. ["whale", "politics"]
+    source = Column(String(20), nullable=True)  # How the wallet was first added: api, ingest or import
+    activity_tier = Column(String(10), nullable=True, index=True)  # Refresh tier (hot / warm / cold)
+    trades_synced_at = Column(DateTime, nullable=True)  # Last trades ingest
+    positions_synced_at = Column(DateTime, nullable=True)  # Last positions ingest
+    activities_synced_at = Column(DateTime, nullable=True)  # Last activity ingest
+    closed_positions_synced_at = Column(DateTime, nullable=True)  # Last closed positions ingest
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_tracked_wallets_status_wallet', 'status', 'wallet_address'),  # Enumerate wallets by status
+    )
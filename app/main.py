@@ -2,11 +2,17 @@
 FastAPI application main file.
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.routers import general, markets, analytics, traders, positions, orders, pnl, profile_stats, activity, trades, leaderboard, closed_positions, scoring
 from app.db.session import init_db
+from app.services.scoring_executor import scoring_executor
+from app.services.market_catalog_service import run_market_sync_loop
+from app.services.trader_discovery_service import run_trader_discovery_loop
+from app.services.wallet_refresh_scheduler import run_wallet_refresh_loop
 
 app = FastAPI(
     title=settings.API_TITLE,
@@ -39,8 +45,32 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on application startup."""
+    """Initialize database and start the background market catalog sync, trader discovery and wallet refresh."""
     await init_db()
+    app.state.market_sync_task = None
+    app.state.trader_discovery_task = None
+    app.state.wallet_refresh_task = None
+    if settings.MARKET_SYNC_INTERVAL_SECONDS > 0:
+        app.state.market_sync_task = asyncio.create_task(
+            run_market_sync_loop(settings.MARKET_SYNC_INTERVAL_SECONDS)
+        )
+    if settings.TRADER_DISCOVERY_INTERVAL_SECONDS > 0:
+        app.state.trader_discovery_task = asyncio.create_task(
+            run_trader_discovery_loop(settings.TRADER_DISCOVERY_INTERVAL_SECONDS)
+        )
+    if settings.WALLET_REFRESH_TICK_SECONDS > 0:
+        app.state.wallet_refresh_task = asyncio.create_task(
+            run_wallet_refresh_loop(settings.WALLET_REFRESH_TICK_SECONDS)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the market sync, trader discovery, wallet refresh and scoring worker processes."""
+    for task_name in ("market_sync_task", "trader_discovery_task", "wallet_refresh_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    scoring_executor.shutdown()
 
 # Include routers
 app.include_router(general.router)
@@ -1,5 +1,7 @@
 """General API routes."""
 
+import asyncio
+
 from fastapi import APIRouter, Query, HTTPException, status
 from typing import Optional
 from app.schemas.general import HealthResponse, ErrorResponse
@@ -80,7 +82,7 @@ async def get_user_leaderboard_data(
         )
     
     try:
-        user_data = fetch_user_leaderboard_data(user, category=category)
+        user_data = await asyncio.to_thread(fetch_user_leaderboard_data, user, category=category)
         
         if not user_data:
             raise HTTPException(
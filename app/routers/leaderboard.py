@@ -1,20 +1,27 @@
 """Leaderboard API routes."""
 
+import asyncio
 from fastapi import APIRouter, Query, HTTPException, status, Depends, Body
 from fastapi.responses import JSONResponse
-from typing import Literal, List
+from typing import Literal, List, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
-from app.schemas.leaderboard import LeaderboardResponse, LeaderboardEntry, AllLeaderboardsResponse, PercentileInfo, MedianInfo
+from app.schemas.leaderboard import LeaderboardResponse, LeaderboardEntry, AllLeaderboardsResponse, LiveFetchStatus, PercentileInfo, MedianInfo, WalletRankResponse
 from app.schemas.general import ErrorResponse
-from app.services.leaderboard_service import (
-    calculate_scores_and_rank_with_percentiles
-)
+from app.services.leaderboard_service import compare_sketch_anchors
 from app.core.scoring_config import default_scoring_config
-from app.services.live_leaderboard_service import fetch_live_leaderboard_from_file
+from app.services.live_leaderboard_service import (
+    fetch_live_leaderboard_from_registry,
+    fetch_live_leaderboard_from_registry_with_status,
+    refresh_wallet_in_live_leaderboard,
+)
+from app.services.leaderboard_snapshot import get_current_snapshot
+from app.services.scoring_sweep import expand_config_grid, run_scoring_sweep
+from app.services.scoring_executor import scoring_executor
 from app.services.trade_service import fetch_and_save_trades
 from app.services.position_service import fetch_and_save_positions
 from app.services.activity_service import fetch_and_save_activities
+from app.services.wallet_registry_service import track_wallets
 from app.db.session import get_db
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboards"])
@@ -38,11 +45,24 @@ def validate_wallet(wallet_address: str) -> bool:
 class AddWalletRequest(BaseModel):
     """Request model for adding wallet to leaderboard."""
     wallet_address: str = Field(..., description="Wallet address to add", example="0x17db3fcd93ba12d38382a0cade24b200185c5f6d")
+    tags: Optional[List[str]] = Field(None, description="Tags to attach to the tracked wallet", example=["whale"])
 
 
 class AddWalletsRequest(BaseModel):
     """Request model for adding multiple wallets to leaderboard."""
     wallet_addresses: List[str] = Field(..., description="List of wallet addresses to add", min_items=1, max_items=100)
+    tags: Optional[List[str]] = Field(None, description="Tags to attach to every tracked wallet")
+
+
+class ScoringSweepRequest(BaseModel):
+    """Request model for a multi-config scoring sweep."""
+    grid: Dict[str, List] = Field(
+        ...,
+        description="ScoringConfig fields (or 'weights' / 'percentiles') mapped to lists of values; the cartesian product is evaluated",
+        example={"weights": [[0.3, 0.3, 0.3, 0.1], [0.4, 0.2, 0.3, 0.1]], "shrink_kr": [25, 50]}
+    )
+    top_k: int = Field(10, ge=1, le=1000, description="Top-K size used for overlap")
+    include_scores: bool = Field(False, description="Include every trader's final score per variant")
 
 
 class AddWalletResponse(BaseModel):
@@ -52,6 +72,7 @@ class AddWalletResponse(BaseModel):
     trades_saved: int = 0
     positions_saved: int = 0
     activities_saved: int = 0
+    rescored_traders: int = 0
     message: str
 
 
@@ -75,17 +96,17 @@ async def get_pnl_leaderboard(
         ge=1,
         le=1000,
         description="Maximum number of traders to return"
-    )
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get leaderboard sorted by Total PnL using live Polymarket API data.
     
     Returns traders ranked by their total profit and loss (PnL).
-    Uses wallet_address.txt file and fetches fresh data from Polymarket API.
+    Uses the tracked wallets registry and fetches fresh data from Polymarket API.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by total_pnl (descending - highest PnL = rank 1)
         entries_data.sort(key=lambda x: x.get('total_pnl', float('-inf')), reverse=True)
@@ -103,7 +124,8 @@ async def get_pnl_leaderboard(
             period=period,
             metric="pnl",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -132,17 +154,17 @@ async def get_roi_leaderboard(
         ge=1,
         le=1000,
         description="Maximum number of traders to return"
-    )
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get leaderboard sorted by ROI using live Polymarket API data.
     
     Returns traders ranked by their return on investment percentage.
-    Uses wallet_address.txt file and fetches fresh data from Polymarket API.
+    Uses the tracked wallets registry and fetches fresh data from Polymarket API.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by roi (descending - highest ROI = rank 1)
         entries_data.sort(key=lambda x: x.get('roi', float('-inf')), reverse=True)
@@ -160,7 +182,8 @@ async def get_roi_leaderboard(
             period=period,
             metric="roi",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -189,17 +212,17 @@ async def get_win_rate_leaderboard(
         ge=1,
         le=1000,
         description="Maximum number of traders to return"
-    )
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get leaderboard sorted by Win Rate using live Polymarket API data.
     
     Returns traders ranked by their win rate percentage.
-    Uses wallet_address.txt file and fetches fresh data from Polymarket API.
+    Uses the tracked wallets registry and fetches fresh data from Polymarket API.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by win_rate (descending - highest win rate = rank 1)
         entries_data.sort(key=lambda x: x.get('win_rate', float('-inf')), reverse=True)
@@ -217,7 +240,8 @@ async def get_win_rate_leaderboard(
             period=period,
             metric="win_rate",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -226,6 +250,129 @@ async def get_win_rate_leaderboard(
         )
 
 
+@router.get(
+    "/rank/{wallet}",
+    response_model=WalletRankResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid wallet address"},
+        404: {"model": ErrorResponse, "description": "Wallet not in leaderboard"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Get a wallet's rank and percentile",
+    description="Get a single wallet's rank and percentile on every scoring metric without downloading the leaderboard"
+)
+async def get_wallet_rank(wallet: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get rank and percentile of one wallet on every scoring metric.
+    
+    Answered by bisection over the per-metric sorted arrays of the current
+    leaderboard snapshot. The snapshot is built on the first request if no
+    live leaderboard has been scored yet.
+    """
+    if not validate_wallet(wallet):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid wallet address format: {wallet}. Must be 42 characters starting with 0x"
+        )
+    
+    try:
+        snapshot = get_current_snapshot()
+        if snapshot is None:
+            await fetch_live_leaderboard_from_registry(db)
+            snapshot = get_current_snapshot()
+        
+        ranks = snapshot.lookup(wallet) if snapshot else None
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error looking up wallet rank: {str(e)}"
+        )
+    
+    if ranks is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Wallet {wallet} is not in the current leaderboard"
+        )
+    
+    return WalletRankResponse(
+        wallet_address=wallet,
+        total_traders=snapshot.size,
+        snapshot_built_at=snapshot.built_at.isoformat(),
+        ranks=ranks
+    )
+
+
+@router.get(
+    "/anchors/report",
+    response_model=Dict,
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Compare sketch and exact percentile anchors",
+    description="Report how far the quantile-sketch medians and percentile anchors are from the exact values on the live leaderboard"
+)
+async def get_anchor_report(
+    rank_error: Optional[float] = Query(
+        default=None,
+        gt=0,
+        lt=1,
+        description="Sketch rank error to evaluate (defaults to the scoring config value)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Compare sketch-based and exact population medians and anchors.
+    
+    Used to check that anchor_method="sketch" stays within its error bound
+    before switching scoring over to it.
+    """
+    try:
+        traders = await fetch_live_leaderboard_from_registry(db)
+        return compare_sketch_anchors(traders, default_scoring_config, rank_error)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building anchor report: {str(e)}"
+        )
+
+
+@router.post(
+    "/sweep",
+    response_model=Dict,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid parameter grid"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Evaluate many scoring configs in one pass",
+    description="Score the live leaderboard under every config of a parameter grid and compare rankings (Spearman correlation and top-K overlap)"
+)
+async def scoring_sweep(request: ScoringSweepRequest = Body(...), db: AsyncSession = Depends(get_db)):
+    """
+    Evaluate a grid of ScoringConfig variants against the live population.
+    
+    The first variant of the grid is the baseline. Shared intermediates are
+    computed once, so weight-only variants cost a single weighted sum each.
+    """
+    try:
+        configs = expand_config_grid(request.grid, default_scoring_config)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid parameter grid: {str(e)}"
+        )
+    
+    try:
+        traders = await fetch_live_leaderboard_from_registry(db)
+        return await asyncio.to_thread(
+            run_scoring_sweep, traders, configs, request.top_k, request.include_scores
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error running scoring sweep: {str(e)}"
+        )
+
+
 @router.post(
     "/add-wallet",
     response_model=AddWalletResponse,
@@ -244,7 +391,7 @@ async def add_wallet_to_leaderboard(
     Add a wallet address to the leaderboard by fetching and saving its data.
     
     This endpoint:
-    1. Validates the wallet address
+    1. Validates the wallet address and registers it in the tracked wallets registry
     2. Fetches trades, positions, and activities from Polymarket API
     3. Saves all data to the database
     4. The wallet will now appear in leaderboards
@@ -265,6 +412,10 @@ async def add_wallet_to_leaderboard(
         )
     
     try:
+        # Register (or reactivate) the wallet in the tracked wallets registry
+        await track_wallets(db, [wallet_address], source="api", tags=request.tags)
+        await db.commit()
+        
         trades_saved = 0
         positions_saved = 0
         activities_saved = 0
@@ -298,6 +449,13 @@ async def add_wallet_to_leaderboard(
                 message=f"No data found for wallet. Errors: {', '.join(errors) if errors else 'No trades, positions, or activities found'}"
             )
         
+        # Rescore the live leaderboard incrementally for this wallet
+        rescored_traders = 0
+        try:
+            rescored_traders = await refresh_wallet_in_live_leaderboard(wallet_address)
+        except Exception as e:
+            errors.append(f"Scoring: {str(e)}")
+        
         message = f"Successfully added wallet. Saved: {trades_saved} trades, {positions_saved} positions, {activities_saved} activities"
         if errors:
             message += f". Warnings: {', '.join(errors)}"
@@ -308,6 +466,7 @@ async def add_wallet_to_leaderboard(
             trades_saved=trades_saved,
             positions_saved=positions_saved,
             activities_saved=activities_saved,
+            rescored_traders=rescored_traders,
             message=message
         )
     except Exception as e:
@@ -359,6 +518,9 @@ async def add_wallets_to_leaderboard(
             continue
         
         try:
+            await track_wallets(db, [wallet_address], source="api", tags=request.tags)
+            await db.commit()
+            
             trades_saved = 0
             positions_saved = 0
             activities_saved = 0
@@ -392,6 +554,12 @@ async def add_wallets_to_leaderboard(
                     message=f"No data found. Errors: {', '.join(errors) if errors else 'No data available'}"
                 ))
             else:
+                rescored_traders = 0
+                try:
+                    rescored_traders = await refresh_wallet_in_live_leaderboard(wallet_address)
+                except Exception as e:
+                    errors.append(f"Scoring: {str(e)}")
+                
                 message = f"Successfully added. Saved: {trades_saved} trades, {positions_saved} positions, {activities_saved} activities"
                 if errors:
                     message += f". Warnings: {', '.join(errors)}"
@@ -402,6 +570,7 @@ async def add_wallets_to_leaderboard(
                     trades_saved=trades_saved,
                     positions_saved=positions_saved,
                     activities_saved=activities_saved,
+                    rescored_traders=rescored_traders,
                     message=message
                 ))
         except Exception as e:
@@ -419,22 +588,21 @@ async def add_wallets_to_leaderboard(
 @router.post(
     "/live",
     response_model=LeaderboardResponse,
-    summary="Get Live Leaderboard from wallet_address.txt",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt"
+    summary="Get Live Leaderboard for tracked wallets",
+    description="Calculate live leaderboard scores for tracked wallets"
 )
-async def get_live_leaderboard_from_file():
+async def get_live_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file.
+    Generate a live leaderboard using the tracked wallets registry.
     
     This endpoint:
-    1. Reads wallet_address.txt from the server.
+    1. Reads the active wallets from the tracked wallets registry.
     2. Fetches LIVE data from Polymarket API (bypassing DB).
     3. Calculates advanced scores (Win Rate, ROI, PnL, Risk).
     4. Returns ranked results.
     """
     try:
-        file_path = "wallet_address.txt" # Relative to root where app runs
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         entries = [LeaderboardEntry(**e) for e in entries_data]
         
@@ -442,7 +610,8 @@ async def get_live_leaderboard_from_file():
             period="all",
             metric="score_pnl",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -455,15 +624,14 @@ async def get_live_leaderboard_from_file():
     "/live-roi",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by ROI Score",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by ROI Score"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by ROI Score"
 )
-async def get_live_roi_leaderboard_from_file():
+async def get_live_roi_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by ROI Score.
+    Generate a live leaderboard using the tracked wallets registry, sorted by ROI Score.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by ROI Score
         # Note: keys in dictionary from fetch_live_leaderboard might need checking
@@ -479,7 +647,8 @@ async def get_live_roi_leaderboard_from_file():
             period="all",
             metric="roi_shrunk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -492,15 +661,14 @@ async def get_live_roi_leaderboard_from_file():
     "/live-pnl",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by PnL Score",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by PnL Score"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by PnL Score"
 )
-async def get_live_pnl_leaderboard_from_file():
+async def get_live_pnl_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by PnL Score.
+    Generate a live leaderboard using the tracked wallets registry, sorted by PnL Score.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by PNL_shrunk in ascending order (best = lowest shrunk value = rank 1)
         entries_data.sort(key=lambda x: x.get('pnl_shrunk', float('inf')))
@@ -511,7 +679,8 @@ async def get_live_pnl_leaderboard_from_file():
             period="all",
             metric="pnl_shrunk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -523,15 +692,14 @@ async def get_live_pnl_leaderboard_from_file():
     "/live-risk",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by Risk Score",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by Risk Score"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by Risk Score"
 )
-async def get_live_risk_leaderboard_from_file():
+async def get_live_risk_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by Risk Score.
+    Generate a live leaderboard using the tracked wallets registry, sorted by Risk Score.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by Risk Score
         entries_data.sort(key=lambda x: x.get('score_risk', 0), reverse=True)
@@ -542,7 +710,8 @@ async def get_live_risk_leaderboard_from_file():
             period="all",
             metric="score_risk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -555,16 +724,15 @@ async def get_live_risk_leaderboard_from_file():
     "/w-shrunk",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by W Shrunk",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by W_shrunk (ascending - best = rank 1)"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by W_shrunk (ascending - best = rank 1)"
 )
-async def get_live_w_shrunk_leaderboard_from_file():
+async def get_live_w_shrunk_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by W_shrunk in ascending order.
+    Generate a live leaderboard using the tracked wallets registry, sorted by W_shrunk in ascending order.
     Lower W_shrunk = better performance = rank 1.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by W_shrunk in ascending order (best = lowest shrunk value = rank 1)
         entries_data.sort(key=lambda x: x.get('W_shrunk', float('inf')))
@@ -575,7 +743,8 @@ async def get_live_w_shrunk_leaderboard_from_file():
             period="all",
             metric="W_shrunk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -588,15 +757,14 @@ async def get_live_w_shrunk_leaderboard_from_file():
     "/roi-raw",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by Raw ROI",
-    description="Calculate live leaderboard for wallets listed in wallet_address.txt, ranked by raw ROI (before shrinkage)"
+    description="Calculate live leaderboard for tracked wallets, ranked by raw ROI (before shrinkage)"
 )
-async def get_live_roi_raw_leaderboard_from_file():
+async def get_live_roi_raw_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by raw ROI (before shrinkage).
+    Generate a live leaderboard using the tracked wallets registry, sorted by raw ROI (before shrinkage).
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by raw ROI in descending order (highest ROI = rank 1)
         entries_data.sort(key=lambda x: x.get('roi', float('-inf')), reverse=True)
@@ -607,7 +775,8 @@ async def get_live_roi_raw_leaderboard_from_file():
             period="all",
             metric="roi",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -620,16 +789,15 @@ async def get_live_roi_raw_leaderboard_from_file():
     "/roi-shrunk",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by ROI Shrunk",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by ROI_shrunk (ascending - best = rank 1)"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by ROI_shrunk (ascending - best = rank 1)"
 )
-async def get_live_roi_shrunk_leaderboard_from_file():
+async def get_live_roi_shrunk_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by ROI_shrunk in ascending order.
+    Generate a live leaderboard using the tracked wallets registry, sorted by ROI_shrunk in ascending order.
     Lower ROI_shrunk = better performance = rank 1.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by ROI_shrunk in ascending order (best = lowest shrunk value = rank 1)
         entries_data.sort(key=lambda x: x.get('roi_shrunk', float('inf')))
@@ -640,7 +808,8 @@ async def get_live_roi_shrunk_leaderboard_from_file():
             period="all",
             metric="roi_shrunk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -653,16 +822,15 @@ async def get_live_roi_shrunk_leaderboard_from_file():
     "/pnl-shrunk",
     response_model=LeaderboardResponse,
     summary="Get Live Leaderboard by PnL Shrunk",
-    description="Calculate live leaderboard scores for wallets listed in wallet_address.txt, ranked by PNL_shrunk (ascending - best = rank 1)"
+    description="Calculate live leaderboard scores for tracked wallets, ranked by PNL_shrunk (ascending - best = rank 1)"
 )
-async def get_live_pnl_shrunk_leaderboard_from_file():
+async def get_live_pnl_shrunk_leaderboard_from_file(db: AsyncSession = Depends(get_db)):
     """
-    Generate a live leaderboard using the wallet_address.txt file, sorted by PNL_shrunk in ascending order.
+    Generate a live leaderboard using the tracked wallets registry, sorted by PNL_shrunk in ascending order.
     Lower PNL_shrunk = better performance = rank 1.
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         # Sort by PNL_shrunk in ascending order (best = lowest shrunk value = rank 1)
         entries_data.sort(key=lambda x: x.get('pnl_shrunk', float('inf')))
@@ -673,7 +841,8 @@ async def get_live_pnl_shrunk_leaderboard_from_file():
             period="all",
             metric="pnl_shrunk",
             count=len(entries),
-            entries=entries
+            entries=entries,
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -688,7 +857,7 @@ async def get_live_pnl_shrunk_leaderboard_from_file():
     summary="Get All Leaderboards with Percentile Information",
     description="Get all leaderboards (sorted by different metrics) along with percentile anchors and median values used in calculations"
 )
-async def get_all_leaderboards_with_percentiles():
+async def get_all_leaderboards_with_percentiles(db: AsyncSession = Depends(get_db)):
     """
     Generate all leaderboards with percentile information.
     
@@ -699,8 +868,7 @@ async def get_all_leaderboards_with_percentiles():
     - Population statistics
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         if not entries_data:
             return AllLeaderboardsResponse(
@@ -719,11 +887,12 @@ async def get_all_leaderboards_with_percentiles():
                 ),
                 leaderboards={},
                 total_traders=0,
-                population_traders=0
+                population_traders=0,
+                live_status=LiveFetchStatus(**live_status)
             )
         
         # Calculate scores with percentile information using configurable scoring
-        result = calculate_scores_and_rank_with_percentiles(entries_data, default_scoring_config)
+        result = await scoring_executor.score_with_percentiles(entries_data, default_scoring_config)
         traders = result["traders"]
         percentiles_data = result["percentiles"]
         medians_data = result["medians"]
@@ -812,7 +981,8 @@ async def get_all_leaderboards_with_percentiles():
             ),
             leaderboards=leaderboards,
             total_traders=result["total_traders"],
-            population_traders=result["population_size"]
+            population_traders=result["population_size"],
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
@@ -830,7 +1000,7 @@ async def get_all_leaderboards_with_percentiles():
     summary="View All Leaderboards (JSON)",
     description="Get all leaderboards and percentile information in JSON format"
 )
-async def view_all_leaderboards():
+async def view_all_leaderboards(db: AsyncSession = Depends(get_db)):
     """
     Get all leaderboards and percentile information in JSON format.
     
@@ -841,8 +1011,7 @@ async def view_all_leaderboards():
     - Population statistics
     """
     try:
-        file_path = "wallet_address.txt"
-        entries_data = await fetch_live_leaderboard_from_file(file_path)
+        entries_data, live_status = await fetch_live_leaderboard_from_registry_with_status(db)
         
         if not entries_data:
             return AllLeaderboardsResponse(
@@ -861,11 +1030,12 @@ async def view_all_leaderboards():
                 ),
                 leaderboards={},
                 total_traders=0,
-                population_traders=0
+                population_traders=0,
+                live_status=LiveFetchStatus(**live_status)
             )
         
         # Calculate scores with percentile information using configurable scoring
-        result = calculate_scores_and_rank_with_percentiles(entries_data, default_scoring_config)
+        result = await scoring_executor.score_with_percentiles(entries_data, default_scoring_config)
         traders = result["traders"]
         percentiles_data = result["percentiles"]
         medians_data = result["medians"]
@@ -954,7 +1124,8 @@ async def view_all_leaderboards():
             ),
             leaderboards=leaderboards,
             total_traders=result["total_traders"],
-            population_traders=result["population_size"]
+            population_traders=result["population_size"],
+            live_status=LiveFetchStatus(**live_status)
         )
     except Exception as e:
         raise HTTPException(
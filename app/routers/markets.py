@@ -1,9 +1,14 @@
 """Markets API routes."""
 
-from fastapi import APIRouter, HTTPException, status, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import Optional
-from app.schemas.markets import MarketsResponse, PaginationInfo
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.schemas.markets import MarketsResponse, PaginationInfo, MarketSyncResponse
 from app.services.data_fetcher import fetch_markets, fetch_market_orders
+from app.services.market_catalog_service import count_catalog_markets, list_catalog_markets, sync_markets
 
 router = APIRouter(prefix="/markets", tags=["Markets"])
 
@@ -12,11 +17,26 @@ router = APIRouter(prefix="/markets", tags=["Markets"])
 async def get_markets(
     status: str = Query("active", description="Market status: 'active', 'resolved', 'closed', etc."),
     limit: Optional[int] = Query(20, ge=1, le=100, description="Maximum number of markets to return"),
-    offset: Optional[int] = Query(0, ge=0, description="Offset for pagination")
+    offset: Optional[int] = Query(0, ge=0, description="Offset for pagination"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Fetch markets from Polymarket API with pagination."""
+    """
+    List markets from the local catalog with pagination.
+    
+    Falls back to the Polymarket API while the catalog is still empty
+    (before the first background sync has finished).
+    """
     try:
-        markets, pagination_dict = fetch_markets(status=status, limit=limit, offset=offset)
+        if await count_catalog_markets(db) > 0:
+            markets, total = await list_catalog_markets(db, status=status, limit=limit, offset=offset)
+            pagination_dict = {
+                "limit": limit,
+                "offset": offset,
+                "total": total,
+                "has_more": offset + len(markets) < total
+            }
+        else:
+            markets, pagination_dict = await asyncio.to_thread(fetch_markets, status=status, limit=limit, offset=offset)
         
         pagination_info = None
         if pagination_dict:
@@ -39,6 +59,22 @@ async def get_markets(
         )
 
 
+@router.post("/sync", response_model=MarketSyncResponse)
+async def sync_market_catalog(
+    max_pages: Optional[int] = Query(None, ge=1, description="Stop each status after this many pages (optional)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Pull new and changed markets into the local catalog now (the background sync does this periodically)."""
+    try:
+        result = await sync_markets(db, max_pages=max_pages)
+        return MarketSyncResponse(**result, catalog_size=await count_catalog_markets(db))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error syncing markets: {str(e)}"
+        )
+
+
 @router.get("/orders")
 async def get_market_orders(
     market_slug: str = Query(..., description="Market slug identifier"),
@@ -47,7 +83,7 @@ async def get_market_orders(
 ):
     """Fetch orders for a specific market from Polymarket CLOB API."""
     try:
-        result = fetch_market_orders(market_slug=market_slug, limit=limit, offset=offset)
+        result = await asyncio.to_thread(fetch_market_orders, market_slug=market_slug, limit=limit, offset=offset)
         return result
     except Exception as e:
         raise HTTPException(
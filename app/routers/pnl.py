@@ -1,12 +1,16 @@
 """User PnL API routes."""
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query, status, Depends
 from typing import Optional
-from app.schemas.pnl import UserPnLResponse, PnLDataPoint
+from app.schemas.pnl import UserPnLResponse, PnLDataPoint, CostBasisPnLResponse, CostBasisPnLEntry
 from app.schemas.pnl_calculation import PnLCalculationResponse
 from app.schemas.general import ErrorResponse
 from app.services.pnl_service import fetch_and_save_pnl, get_pnl_from_db
-from app.services.pnl_calculator_service import calculate_user_pnl
+from app.services.equity_curve_service import LOCAL_INTERVAL, build_equity_curve
+from app.services.pnl_calculator_service import calculate_user_pnl_aggregated
+from app.services.cost_basis_service import get_cost_basis_pnl
+from app.services.lot_engine import COST_BASIS_ENGINES
 from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
@@ -120,7 +124,7 @@ async def get_pnl_from_db_endpoint(
     ),
     interval: Optional[str] = Query(
         None,
-        description="Filter by time interval (optional)"
+        description=f"Filter by time interval (optional; local equity curves are only returned for interval={LOCAL_INTERVAL})"
     ),
     fidelity: Optional[str] = Query(
         None,
@@ -131,6 +135,22 @@ async def get_pnl_from_db_endpoint(
         ge=1,
         description="Maximum number of data points to return (optional)"
     ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=3,
+        le=10000,
+        description="Downsample to at most this many points with Largest-Triangle-Three-Buckets (optional)"
+    ),
+    from_ts: Optional[int] = Query(
+        None,
+        alias="from",
+        description="Only points with timestamp >= from (Unix seconds, optional)"
+    ),
+    to_ts: Optional[int] = Query(
+        None,
+        alias="to",
+        description="Only points with timestamp <= to (Unix seconds, optional)"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
    
@@ -139,11 +159,19 @@ async def get_pnl_from_db_endpoint(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid wallet address format: {user_address}. Must be 42 characters starting with 0x"
         )
+    if from_ts is not None and to_ts is not None and from_ts > to_ts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid range: from ({from_ts}) is after to ({to_ts})"
+        )
     
     try:
         # Get PnL data from database
+        # Local equity curves share the series store; leave them out unless asked for
         pnl_records = await get_pnl_from_db(
-            db, user_address, interval=interval, fidelity=fidelity, limit=limit
+            db, user_address, interval=interval, fidelity=fidelity, limit=limit,
+            max_points=max_points, from_ts=from_ts, to_ts=to_ts,
+            exclude_intervals=() if interval else (LOCAL_INTERVAL,)
         )
         
         if not pnl_records:
@@ -181,6 +209,103 @@ async def get_pnl_from_db_endpoint(
         )
 
 
+@router.get(
+    "/local",
+    response_model=UserPnLResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid wallet address, or resolution malformed or too fine for the history"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Get locally reconstructed user PnL",
+    description="Rebuild the user's PnL time series from stored trades, activities and token price history (no user-pnl API call)"
+)
+async def get_local_pnl_endpoint(
+    user_address: str = Query(
+        ...,
+        description="Wallet address to build PnL for (must be 42 characters starting with 0x)",
+        example="0x554ad2bc8a8f372d7e3376918fcb6e284387859a",
+        min_length=42,
+        max_length=42
+    ),
+    resolution: str = Query(
+        "1d",
+        description="Sample spacing: <n><unit> with unit s, m, h, d or w (e.g. '1h', '1d'); "
+                    "a build may add at most EQUITY_CURVE_MAX_SAMPLES samples",
+        example="1d"
+    ),
+    rebuild: bool = Query(
+        False,
+        description="Ignore the stored curve state and sweep the whole history"
+    ),
+    refresh_prices: bool = Query(
+        False,
+        description="Fetch new CLOB price history for the wallet's tokens before building"
+    ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=3,
+        le=10000,
+        description="Downsample to at most this many points with Largest-Triangle-Three-Buckets (optional)"
+    ),
+    from_ts: Optional[int] = Query(
+        None,
+        alias="from",
+        description="Only points with timestamp >= from (Unix seconds, optional)"
+    ),
+    to_ts: Optional[int] = Query(
+        None,
+        alias="to",
+        description="Only points with timestamp <= to (Unix seconds, optional)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a wallet's PnL series reconstructed locally.
+    
+    The stored series is extended with fills, activities and prices that
+    arrived since the last call (or rebuilt if older data changed), then
+    returned. Trades and activities must have been synced to the database.
+    """
+    if not validate_wallet(user_address):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid wallet address format: {user_address}. Must be 42 characters starting with 0x"
+        )
+    if from_ts is not None and to_ts is not None and from_ts > to_ts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid range: from ({from_ts}) is after to ({to_ts})"
+        )
+    
+    try:
+        await build_equity_curve(
+            db, user_address, resolution=resolution, rebuild=rebuild, refresh_prices=refresh_prices
+        )
+        pnl_records = await get_pnl_from_db(
+            db, user_address, interval=LOCAL_INTERVAL, fidelity=resolution,
+            max_points=max_points, from_ts=from_ts, to_ts=to_ts
+        )
+        
+        data_points = [PnLDataPoint(t=record.timestamp, p=record.pnl) for record in pnl_records]
+        return UserPnLResponse(
+            user_address=user_address,
+            interval=LOCAL_INTERVAL,
+            fidelity=resolution,
+            count=len(data_points),
+            data=data_points
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building local PnL: {str(e)}"
+        )
+
+
 @router.get(
     "/calculate",
     response_model=PnLCalculationResponse,
@@ -205,9 +330,9 @@ async def calculate_pnl_from_db_endpoint(
     Calculate comprehensive PnL for a user by aggregating data from the database.
     
     This endpoint:
-    1. Fetches all trades from the database
-    2. Fetches all positions from the database
-    3. Fetches all activities from the database
+    1. Aggregates trades, positions and activities in one database query
+    2. Backfills any of them missing from the database from the API (concurrently)
+    3. Re-aggregates once if anything was backfilled
     4. Calculates:
        - Total invested (from positions initial values)
        - Total current value (from positions current values)
@@ -233,8 +358,8 @@ async def calculate_pnl_from_db_endpoint(
         )
     
     try:
-        # Calculate PnL from database
-        pnl_data = await calculate_user_pnl(db, user)
+        # Calculate PnL from database (aggregated in one query)
+        pnl_data = await calculate_user_pnl_aggregated(db, user)
         
         return PnLCalculationResponse(**pnl_data)
     except Exception as e:
@@ -246,6 +371,75 @@ async def calculate_pnl_from_db_endpoint(
         )
 
 
+@router.get(
+    "/cost-basis",
+    response_model=CostBasisPnLResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid wallet address or method"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Get realized PnL per cost-basis method",
+    description="Get realized PnL under FIFO, LIFO and weighted-average cost basis, as stored by trade processing"
+)
+async def get_cost_basis_pnl_endpoint(
+    user: str = Query(
+        ...,
+        description="Wallet address (must be 42 characters starting with 0x)",
+        example="0x17db3fcd93ba12d38382a0cade24b200185c5f6d",
+        min_length=42,
+        max_length=42
+    ),
+    method: Optional[str] = Query(
+        None,
+        description="Cost-basis method: fifo, lifo or average (all methods if omitted)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get stored per-method realized PnL for a wallet.
+    
+    All methods are computed in the same pass when trades are processed
+    (POST /trades/process), so no trades are re-read here.
+    """
+    if not validate_wallet(user):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid wallet address format: {user}. Must be 42 characters starting with 0x"
+        )
+    if method is not None and method not in COST_BASIS_ENGINES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cost basis method: {method}. Must be one of {', '.join(COST_BASIS_ENGINES)}"
+        )
+    
+    try:
+        records = await get_cost_basis_pnl(db, user, method)
+        entries = [
+            CostBasisPnLEntry(
+                method=record.method,
+                realized_pnl=record.realized_pnl,
+                closed_trades=record.closed_trades,
+                winning_trades=record.winning_trades,
+                losing_trades=record.losing_trades,
+                unmatched_sells=record.unmatched_sells,
+                open_positions=record.open_positions,
+                open_cost=record.open_cost,
+                last_timestamp=record.last_timestamp
+            )
+            for record in records
+        ]
+        return CostBasisPnLResponse(
+            user_address=user,
+            count=len(entries),
+            methods=entries
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving cost-basis PnL: {str(e)}"
+        )
+
+
 @router.get(
     "/portfolio",
     summary="Get Portfolio Stats",
@@ -265,7 +459,8 @@ async def get_portfolio_stats(
         )
     
     try:
-        return PolymarketService.calculate_portfolio_stats(user_address)
+        # Blocking upstream calls run in a thread so they don't stall other requests
+        return await asyncio.to_thread(PolymarketService.calculate_portfolio_stats, user_address)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
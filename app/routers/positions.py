@@ -2,9 +2,10 @@
 
 from fastapi import APIRouter, HTTPException, Query, status, Depends
 from typing import List, Optional
-from app.schemas.positions import PositionsListResponse, PositionResponse
+from app.schemas.positions import PositionsListResponse, PositionResponse, PriceRefreshResponse
 from app.schemas.general import ErrorResponse
 from app.services.position_service import fetch_and_save_positions, get_positions_from_db
+from app.services.price_cache_service import refresh_and_revalue
 from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
@@ -247,3 +248,38 @@ async def get_positions_from_db_endpoint(
             detail=f"Error retrieving positions from database: {str(e)}"
         )
 
+
+
+@router.post(
+    "/prices/refresh",
+    response_model=PriceRefreshResponse,
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="Refresh mark-to-market prices",
+    description="Refresh cached prices for every open position asset and revalue all open positions from them"
+)
+async def refresh_position_prices_endpoint(
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Refresh the shared token price cache and revalue open positions.
+    
+    Prices are fetched once per distinct open asset (in concurrent batches),
+    then current value and cash PnL of every wallet's open positions are
+    updated in a single statement - no per-wallet position sync needed.
+    
+    Args:
+        db: Database session (injected)
+    
+    Returns:
+        PriceRefreshResponse with refresh and revaluation counts
+    """
+    try:
+        result = await refresh_and_revalue(db)
+        return PriceRefreshResponse(**result)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error refreshing position prices: {str(e)}"
+        )
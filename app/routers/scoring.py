@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 
@@ -20,7 +22,8 @@ async def get_user_scores(user_address: str):
             # Basic validation
             raise HTTPException(status_code=400, detail="Invalid wallet address format")
             
-        scores = UserScoringService.calculate_all_scores(user_address)
+        # Blocking upstream calls run in a thread so they don't stall other requests
+        scores = await asyncio.to_thread(UserScoringService.calculate_all_scores, user_address)
         return scores
     except Exception as e:
         import traceback
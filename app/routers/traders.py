@@ -1,12 +1,18 @@
 """Traders API routes."""
 
-from fastapi import APIRouter, HTTPException, Query, Path, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.schemas.traders import (
     TraderBasicInfo,
     TraderDetail,
+    TraderDiscoveryResponse,
     TradersListResponse,
-    TraderTradesResponse
+    TraderTradesResponse,
+    TradesCacheStatsResponse
 )
 from app.schemas.general import ErrorResponse
 from app.services.trader_service import (
@@ -15,6 +21,9 @@ from app.services.trader_service import (
     get_traders_list as fetch_traders_list
 )
 from app.services.data_fetcher import fetch_resolved_markets, fetch_trades_for_wallet
+from app.services.trader_discovery_service import count_discovered_traders, discover_traders
+from app.services.trade_cache import trader_trades_cache
+from app.services.upstream_scheduler import PRIORITY_BACKFILL, upstream_priority
 
 router = APIRouter(prefix="/traders", tags=["Traders"])
 
@@ -38,21 +47,20 @@ def validate_wallet(wallet_address: str) -> bool:
     "",
     response_model=TradersListResponse,
     summary="Get list of traders",
-    description="Get a list of traders extracted from markets with basic information"
+    description="Get a list of discovered traders, ranked by traded volume, with basic information"
 )
 async def get_traders(
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of traders to return")
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of traders to return"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a list of traders with basic information.
     
-    This endpoint:
-    1. Fetches resolved markets
-    2. Extracts unique trader wallet addresses from market trades
-    3. Returns basic information for each trader
+    Traders come from the registry filled by the background trader discovery,
+    which crawls the trades of catalog markets; this endpoint makes no upstream calls.
     """
     try:
-        traders = await fetch_traders_list(limit=limit)
+        traders = await fetch_traders_list(db, limit=limit)
         return TradersListResponse(
             count=len(traders),
             traders=[TraderBasicInfo(**trader) for trader in traders]
@@ -64,6 +72,30 @@ async def get_traders(
         )
 
 
+@router.post("/discover", response_model=TraderDiscoveryResponse)
+async def run_trader_discovery(
+    max_markets: Optional[int] = Query(None, ge=1, le=5000, description="Markets to crawl (optional)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Crawl due catalog markets for traders now (the background discovery does this periodically)."""
+    try:
+        # Crawl pages queue behind interactive upstream requests
+        with upstream_priority(PRIORITY_BACKFILL):
+            result = await discover_traders(db, max_markets=max_markets)
+        return TraderDiscoveryResponse(**result, registry_size=await count_discovered_traders(db))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error discovering traders: {str(e)}"
+        )
+
+
+@router.get("/cache/stats", response_model=TradesCacheStatsResponse)
+async def get_trades_cache_stats():
+    """Size and hit / miss / eviction counters of the per-wallet trades cache (this worker)."""
+    return TradesCacheStatsResponse(**trader_trades_cache.stats())
+
+
 @router.get(
     "/{wallet}",
     response_model=TraderDetail,
@@ -76,7 +108,8 @@ async def get_traders(
     description="Get detailed information and analytics for a specific trader"
 )
 async def get_trader(
-    wallet: str = Path(..., description="Wallet address of the trader")
+    wallet: str = Path(..., description="Wallet address of the trader"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get detailed trader information including full analytics.
@@ -95,7 +128,7 @@ async def get_trader(
         )
     
     try:
-        trader_data = await get_trader_detail(wallet)
+        trader_data = await get_trader_detail(wallet, db)
         
         # Check if trader has any data
         if trader_data.get("total_trades", 0) == 0:
@@ -152,7 +185,7 @@ async def get_trader_basic(
         )
     
     try:
-        markets = fetch_resolved_markets()
+        markets = await asyncio.to_thread(fetch_resolved_markets)
         trader_data = await get_trader_basic_info(wallet, markets)
         return TraderBasicInfo(**trader_data)
     except Exception as e:
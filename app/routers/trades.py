@@ -230,6 +230,10 @@ async def process_trade_data_endpoint(
         min_length=42,
         max_length=42
     ),
+    full_replay: bool = Query(
+        False,
+        description="Ignore stored open lots and re-match the wallet's full trade history"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -245,6 +249,7 @@ async def process_trade_data_endpoint(
     
     Args:
         user: Wallet address (query parameter)
+        full_replay: Re-match the full history instead of only new trades
         db: Database session (injected)
     
     Returns:
@@ -257,7 +262,7 @@ async def process_trade_data_endpoint(
         )
     
     try:
-        result = await process_and_insert_trade_data(db, user)
+        result = await process_and_insert_trade_data(db, user, full_replay=full_replay)
         return result
     except Exception as e:
         raise HTTPException(
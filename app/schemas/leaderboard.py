@@ -1,6 +1,7 @@
 """Leaderboard-related schemas."""
 
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Optional, List, Dict
 
 
@@ -27,6 +28,8 @@ class LeaderboardEntry(BaseModel):
     W_shrunk: Optional[float] = Field(None, description="W shrunk value (before final score)")
     roi_shrunk: Optional[float] = Field(None, description="ROI shrunk value (before final score)")
     pnl_shrunk: Optional[float] = Field(None, description="PnL shrunk value (before final score)")
+    data_status: Optional[str] = Field(None, description="Live data freshness: fresh, or stale if served from the last fetch because the live fetch missed its deadline or failed")
+    data_as_of: Optional[datetime] = Field(None, description="When this trader's live metrics were fetched (UTC)")
 
 
 class PercentileInfo(BaseModel):
@@ -46,6 +49,15 @@ class MedianInfo(BaseModel):
     pnl_median: float = Field(..., description="Median adjusted PnL across population")
 
 
+class LiveFetchStatus(BaseModel):
+    """Outcome of the live metrics fetch behind a leaderboard."""
+    fresh: int = Field(..., description="Wallets fetched within the deadline")
+    stale: int = Field(..., description="Wallets served from their last fetched metrics (data_status='stale')")
+    missing: List[str] = Field(..., description="Wallets left out: not fetched in time and nothing cached")
+    deadline_seconds: float = Field(..., description="Time budget of the fetch in seconds (0 = none)")
+    fetched_at: datetime = Field(..., description="When the fetch finished (UTC)")
+
+
 class AllLeaderboardsResponse(BaseModel):
     """Response model containing all leaderboards and percentile information."""
     percentiles: PercentileInfo = Field(..., description="Percentile anchors for normalization")
@@ -53,6 +65,7 @@ class AllLeaderboardsResponse(BaseModel):
     leaderboards: Dict[str, List[LeaderboardEntry]] = Field(..., description="All leaderboards keyed by metric type")
     total_traders: int = Field(..., description="Total number of traders")
     population_traders: int = Field(..., description="Number of traders with >= 5 trades")
+    live_status: Optional[LiveFetchStatus] = Field(None, description="Fresh / stale / missing wallets of the live fetch")
 
 
 class LeaderboardResponse(BaseModel):
@@ -61,6 +74,7 @@ class LeaderboardResponse(BaseModel):
     metric: str = Field(..., description="Metric used for ranking (pnl, roi, win_rate)")
     count: int = Field(..., description="Number of traders in leaderboard")
     entries: List[LeaderboardEntry] = Field(..., description="List of leaderboard entries")
+    live_status: Optional[LiveFetchStatus] = Field(None, description="Fresh / stale / missing wallets of the live fetch")
 
     class Config:
         json_schema_extra = {
@@ -87,3 +101,19 @@ class LeaderboardResponse(BaseModel):
             }
         }
 
+
+
+class MetricRank(BaseModel):
+    """Rank of a single wallet on one scoring metric."""
+    value: Optional[float] = Field(None, description="Wallet's value for this metric")
+    rank: int = Field(..., description="Rank on this metric (1-based, ties share the best rank)")
+    top_percent: float = Field(..., description="Rank as a share of the population (e.g. 5.0 = top 5%)")
+    percentile: float = Field(..., description="Percentage of traders ranked strictly below this wallet")
+
+
+class WalletRankResponse(BaseModel):
+    """Response model for a single wallet's rank on every scoring metric."""
+    wallet_address: str = Field(..., description="Wallet address")
+    total_traders: int = Field(..., description="Number of traders in the leaderboard snapshot")
+    snapshot_built_at: str = Field(..., description="When the leaderboard snapshot was scored (UTC, ISO 8601)")
+    ranks: Dict[str, MetricRank] = Field(..., description="Rank information keyed by metric")
@@ -52,3 +52,9 @@ class MarketsResponse(BaseModel):
             }
         }
 
+
+class MarketSyncResponse(BaseModel):
+    """Response model for a market catalog sync."""
+    fetched: int = Field(..., description="Markets fetched from the upstream API")
+    written: int = Field(..., description="Catalog rows inserted or changed")
+    catalog_size: int = Field(..., description="Markets in the local catalog after the sync")
@@ -38,3 +38,28 @@ class UserPnLResponse(BaseModel):
             }
         }
 
+
+
+class CostBasisPnLEntry(BaseModel):
+    """Realized PnL of a wallet under one cost-basis method."""
+    method: str = Field(..., description="Cost-basis method (fifo, lifo, average)")
+    realized_pnl: Decimal = Field(..., description="Realized PnL of matched sells")
+    closed_trades: int = Field(..., description="Sells matched against open size")
+    winning_trades: int = Field(..., description="Matched sells with positive PnL")
+    losing_trades: int = Field(..., description="Matched sells with negative PnL")
+    unmatched_sells: int = Field(..., description="Sells without open size to match")
+    open_positions: int = Field(..., description="Assets with open size")
+    open_cost: Decimal = Field(..., description="Cost basis of the open size")
+    last_timestamp: int = Field(..., description="Newest trade included (Unix timestamp)")
+
+    class Config:
+        json_encoders = {
+            Decimal: str
+        }
+
+
+class CostBasisPnLResponse(BaseModel):
+    """Response model for stored cost-basis PnL."""
+    user_address: str = Field(..., description="Wallet address")
+    count: int = Field(..., description="Number of methods returned")
+    methods: List[CostBasisPnLEntry] = Field(..., description="Realized PnL per cost-basis method")
@@ -55,3 +55,11 @@ class PositionsListResponse(BaseModel):
             }
         }
 
+
+
+class PriceRefreshResponse(BaseModel):
+    """Response model for a mark-to-market price refresh."""
+    requested: int = Field(..., description="Open position assets to price")
+    priced: int = Field(..., description="Assets with a fresh price in the cache")
+    failed_batches: int = Field(..., description="Price request batches that failed")
+    revalued_positions: int = Field(..., description="Open positions re-marked from the cache (all wallets)")
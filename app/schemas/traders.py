@@ -12,6 +12,7 @@ class TraderBasicInfo(BaseModel):
     total_positions: int = Field(..., description="Total number of positions", example=5)
     first_trade_date: Optional[str] = Field(None, description="Date of first trade")
     last_trade_date: Optional[str] = Field(None, description="Date of last trade")  
+    total_volume: Optional[float] = Field(None, description="Traded volume (size * price) across crawled markets")
 
     class Config:
         json_schema_extra = {
@@ -88,3 +89,27 @@ class TraderTradesResponse(BaseModel):
             }
         }
 
+
+class TraderDiscoveryResponse(BaseModel):
+    """Response for a trader discovery crawl."""
+    markets: int = Field(..., description="Markets crawled")
+    failed: int = Field(..., description="Markets whose crawl failed")
+    trades: int = Field(..., description="New trades crawled")
+    wallets: int = Field(..., description="Distinct wallets in the new trades")
+    new_market_wallets: int = Field(..., description="Wallets seen in a crawled market for the first time")
+    registry_size: int = Field(..., description="Traders in the registry after the crawl")
+
+
+class TradesCacheStatsResponse(BaseModel):
+    """Statistics of the per-wallet trades cache."""
+    entries: int = Field(..., description="Wallets currently cached")
+    bytes: int = Field(..., description="Approximate memory used by cached trades, in bytes")
+    max_bytes: int = Field(..., description="Memory budget in bytes")
+    max_entry_bytes: int = Field(..., description="Largest single entry that is cached, in bytes")
+    ttl_seconds: float = Field(..., description="Seconds before cached trades are refetched")
+    hits: int = Field(..., description="Lookups served from the cache")
+    misses: int = Field(..., description="Lookups not in the cache (or expired)")
+    loads: int = Field(..., description="Upstream fetches made on a miss")
+    evictions: int = Field(..., description="Entries evicted to stay within the memory budget")
+    expirations: int = Field(..., description="Entries dropped after their TTL")
+    rejected: int = Field(..., description="Entries too large to cache")
@@ -6,6 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.db.models import Activity
 from app.services.data_fetcher import fetch_user_activity
+from app.services.wallet_registry_service import mark_wallet_synced
 from decimal import Decimal
 
 
@@ -83,6 +84,7 @@ async def save_activities_to_db(
         await session.execute(stmt)
         saved_count += 1
     
+    await mark_wallet_synced(session, wallet_address, "activities")
     await session.commit()
     return saved_count
 
@@ -1,33 +1,51 @@
-import requests
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.db.models import ClosedPosition
-from typing import List
+from app.services.upstream_scheduler import upstream_get
+from app.services.wallet_registry_service import mark_wallet_synced
+from typing import TYPE_CHECKING, List, Optional
 
-async def fetch_and_store_closed_positions(user_address: str, db: AsyncSession) -> List[ClosedPosition]:
+if TYPE_CHECKING:
+    from app.services.wallet_refresh_scheduler import UpstreamBudget
+
+
+def _fetch_closed_positions_page(user_address: str, limit: int, offset: int) -> List[dict]:
+    """One page of a wallet's closed positions (blocking; run in a thread)."""
+    url = "https://data-api.polymarket.com/closed-positions"
+    params = {"user": user_address, "limit": limit, "offset": offset}
+    
+    response = upstream_get(url, params=params, timeout=30)
+    
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch data from Polymarket API: {response.text}")
+    
+    data = response.json()
+    return data if isinstance(data, list) else []
+
+
+async def fetch_and_store_closed_positions(
+    user_address: str,
+    db: AsyncSession,
+    budget: Optional["UpstreamBudget"] = None
+) -> List[ClosedPosition]:
     """
     Fetch all closed positions from Polymarket API using pagination and store them in the database.
     This ensures we get ALL closed positions, not just the first batch.
-    """
-    url = "https://data-api.polymarket.com/closed-positions"
-    params = {"user": user_address}
     
+    budget (scheduled syncs) is charged for every page after the first.
+    """
     # Fetch ALL data using pagination (similar to fetch_closed_positions in data_fetcher.py)
     all_positions_data = []
     fetch_limit = 1000  # Fetch in chunks
     current_offset = 0
     
     while True:
-        params["limit"] = fetch_limit
-        params["offset"] = current_offset
-        
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch data from Polymarket API: {response.text}")
-        
-        data = response.json()
-        if not isinstance(data, list) or not data:
+        if all_positions_data and budget is not None:
+            await budget.acquire()
+        # Blocking HTTP runs in a thread so background syncs don't stall the event loop
+        data = await asyncio.to_thread(_fetch_closed_positions_page, user_address, fetch_limit, current_offset)
+        if not data:
             # Only break when we get 0 items (empty list)
             # Don't break if we get fewer items than requested, as the API might cap the limit
             break
@@ -38,9 +56,6 @@ async def fetch_and_store_closed_positions(user_address: str, db: AsyncSession)
         # Polymarket API might cap limit at 50 even if we ask for 1000
         # So we only stop if we get 0 items (handled above)
         current_offset += len(data)
-        
-        # Continue fetching until we get an empty response
-        # Don't break on len(data) < fetch_limit because the API might have server-side limits
     
     stored_positions = []
     
@@ -79,6 +94,7 @@ async def fetch_and_store_closed_positions(user_address: str, db: AsyncSession)
             db.add(position)
             stored_positions.append(position)
     
+    await mark_wallet_synced(db, user_address, "closed_positions")
     await db.commit()
     
     # Return all positions for this user
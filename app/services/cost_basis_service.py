@@ -0,0 +1,251 @@
+"""
+Cost-basis PnL for several methods in one pass.
+
+run_cost_basis_pass streams time-sorted trades once through one engine per
+method (FIFO, LIFO, weighted average). The primary method's entry price and
+PnL are written onto the trade dicts (what the trades table stores), and
+realized totals are accumulated for every method. Totals are stored per
+wallet and method in cost_basis_pnl, so the API can serve any method
+without re-reading trades.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import CostBasisPnL
+from app.services.lot_engine import (
+    CostBasisEngine,
+    COST_BASIS_ENGINES,
+    SCALE,
+    average_entry_price,
+    create_cost_basis_engine,
+    realized_pnl,
+    to_micro,
+)
+
+DEFAULT_METHODS = tuple(COST_BASIS_ENGINES)
+PRIMARY_METHOD = "fifo"
+
+
+class CostBasisTotals:
+    """Realized PnL counters of one cost-basis method."""
+
+    __slots__ = ("realized_pnl", "closed_trades", "winning_trades", "losing_trades", "unmatched_sells")
+
+    def __init__(self):
+        self.realized_pnl = Decimal("0")
+        self.closed_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.unmatched_sells = 0
+
+    def record(self, pnl: Optional[Decimal]) -> None:
+        if pnl is None:
+            self.unmatched_sells += 1
+            return
+        self.realized_pnl += pnl
+        self.closed_trades += 1
+        if pnl > 0:
+            self.winning_trades += 1
+        elif pnl < 0:
+            self.losing_trades += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "realized_pnl": self.realized_pnl,
+            "closed_trades": self.closed_trades,
+            "winning_trades": self.winning_trades,
+            "losing_trades": self.losing_trades,
+            "unmatched_sells": self.unmatched_sells,
+        }
+
+
+def create_engines(methods: Iterable[str] = DEFAULT_METHODS) -> Dict[str, CostBasisEngine]:
+    """Fresh engine per cost-basis method."""
+    return {method: create_cost_basis_engine(method) for method in methods}
+
+
+def run_cost_basis_pass(
+    sorted_trades: List[Dict],
+    engines: Dict[str, CostBasisEngine],
+    primary: Optional[str] = PRIMARY_METHOD
+) -> Dict[str, CostBasisTotals]:
+    """
+    Match time-sorted trades through every engine in a single pass.
+
+    Args:
+        sorted_trades: Trades sorted by timestamp (asset, side, size, price)
+        engines: Engine per method, updated in place
+        primary: Method whose entry_price / exit_price / pnl are written onto
+            the trade dicts (None to leave trades untouched)
+
+    Returns:
+        Realized totals per method
+    """
+    totals = {method: CostBasisTotals() for method in engines}
+    others = [(method, engine) for method, engine in engines.items() if method != primary]
+    primary_engine = engines.get(primary) if primary else None
+
+    for trade in sorted_trades:
+        side = trade["side"]
+        price = trade["price"]
+        if primary_engine is not None:
+            # Initialize entry/exit/pnl
+            trade["entry_price"] = None
+            trade["exit_price"] = None
+            trade["pnl"] = None
+
+        if side == "BUY":
+            asset = trade["asset"]
+            size = to_micro(trade["size"])
+            price_micro = to_micro(price)
+            for engine in engines.values():
+                engine.buy(asset, size, price_micro)
+            if primary_engine is not None:
+                # Entry price is the buy price
+                trade["entry_price"] = price
+
+        elif side == "SELL":
+            asset = trade["asset"]
+            size = to_micro(trade["size"])
+            price_micro = to_micro(price)
+
+            if primary_engine is not None:
+                matched_size, matched_cost = primary_engine.sell(asset, size)
+                trade["exit_price"] = price
+                pnl = None
+                if matched_size > 0:
+                    trade["entry_price"] = average_entry_price(matched_size, matched_cost)
+                    # PnL = (exit_price - entry_price) * size
+                    pnl = realized_pnl(size, price_micro, matched_size, matched_cost)
+                    trade["pnl"] = pnl
+                # else: no matching BUY position - standalone SELL, PnL unknown
+                totals[primary].record(pnl)
+
+            for method, engine in others:
+                matched_size, matched_cost = engine.sell(asset, size)
+                totals[method].record(
+                    realized_pnl(size, price_micro, matched_size, matched_cost) if matched_size > 0 else None
+                )
+
+    return totals
+
+
+def open_position_totals(engine: CostBasisEngine) -> Dict:
+    """Open size and cost basis across all assets of an engine."""
+    open_cost = sum(engine.open_cost(asset) for asset in engine.assets())
+    return {
+        "open_positions": len(engine.assets()),
+        "open_cost": Decimal(open_cost) / Decimal(SCALE * SCALE),
+    }
+
+
+def summarize_cost_basis(
+    trades: List[Dict],
+    methods: Iterable[str] = DEFAULT_METHODS,
+    as_float: bool = False
+) -> Dict[str, Dict]:
+    """
+    Realized PnL of a trade list under every method (for scripts and reports).
+
+    Args:
+        trades: Trade dicts with asset, side, size, price and timestamp
+            (sizes/prices may be floats, strings or Decimals); not modified
+        methods: Cost-basis methods to evaluate
+        as_float: Return amounts as floats rounded to cents (for JSON reports)
+
+    Returns:
+        Dict per method with realized totals, open positions and open cost
+    """
+    sorted_trades = sorted(trades, key=lambda t: t["timestamp"])
+    engines = create_engines(methods)
+    totals = run_cost_basis_pass(sorted_trades, engines, primary=None)
+    summary = {
+        method: {**totals[method].to_dict(), **open_position_totals(engines[method])}
+        for method in engines
+    }
+    if as_float:
+        summary = {
+            method: {
+                key: round(float(value), 2) if isinstance(value, Decimal) else value
+                for key, value in method_summary.items()
+            }
+            for method, method_summary in summary.items()
+        }
+    return summary
+
+
+async def save_cost_basis_pnl(
+    session: AsyncSession,
+    wallet_address: str,
+    totals: Dict[str, CostBasisTotals],
+    engines: Dict[str, CostBasisEngine],
+    last_timestamp: int,
+    incremental: bool = False
+) -> None:
+    """
+    Stage per-method realized totals of a wallet (committed by the caller).
+
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        totals: Totals from run_cost_basis_pass
+        engines: Engines after the pass (for open positions)
+        last_timestamp: Newest trade timestamp included
+        incremental: Add totals to the stored ones instead of replacing them
+    """
+    wallet = wallet_address.lower()
+    for method, method_totals in totals.items():
+        values = {
+            "proxy_wallet": wallet,
+            "method": method,
+            **method_totals.to_dict(),
+            **open_position_totals(engines[method]),
+            "last_timestamp": last_timestamp,
+        }
+        stmt = pg_insert(CostBasisPnL).values(**values)
+        if incremental:
+            counters = {
+                column: getattr(CostBasisPnL, column) + getattr(stmt.excluded, column)
+                for column in method_totals.to_dict()
+            }
+        else:
+            counters = {column: getattr(stmt.excluded, column) for column in method_totals.to_dict()}
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_cost_basis_pnl_wallet_method",
+            set_={
+                **counters,
+                "open_positions": stmt.excluded.open_positions,
+                "open_cost": stmt.excluded.open_cost,
+                "last_timestamp": stmt.excluded.last_timestamp,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        await session.execute(stmt)
+
+
+async def get_cost_basis_pnl(
+    session: AsyncSession,
+    wallet_address: str,
+    method: Optional[str] = None
+) -> List[CostBasisPnL]:
+    """
+    Get stored per-method realized PnL of a wallet.
+
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        method: Only this method (all methods if not provided)
+
+    Returns:
+        List of CostBasisPnL records
+    """
+    stmt = select(CostBasisPnL).where(CostBasisPnL.proxy_wallet == wallet_address.lower())
+    if method:
+        stmt = stmt.where(CostBasisPnL.method == method)
+    result = await session.execute(stmt.order_by(CostBasisPnL.method))
+    return list(result.scalars().all())
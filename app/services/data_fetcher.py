@@ -7,6 +7,8 @@ import httpx
 from typing import List, Dict, Optional, Any
 
 from app.core.config import settings
+from app.services.trade_cache import trader_trades_cache
+from app.services.upstream_scheduler import upstream_get, upstream_scheduler, upstream_timeout
 
 
 def get_polymarket_headers() -> Dict[str, str]:
@@ -79,12 +81,12 @@ def fetch_markets(
                 
                 # Try with auth headers first
                 try:
-                    response = requests.get(url, headers=headers, params=params, timeout=10)
+                    response = upstream_get(url, headers=headers, params=params, timeout=10)
                     response.raise_for_status()
                 except requests.exceptions.RequestException:
                     # If auth fails, try without headers (public API)
                     try:
-                        response = requests.get(url, params=params, timeout=10)
+                        response = upstream_get(url, params=params, timeout=10)
                         response.raise_for_status()
                     except requests.exceptions.RequestException as e:
                         # If this endpoint fails, try next one
@@ -163,12 +165,14 @@ def fetch_markets(
         
         # If we got markets from this endpoint, process them
         if all_markets:
-            # Apply offset and limit
-            total_available = len(all_markets)
-            paginated_markets = all_markets[offset:offset + limit]
+            # all_markets starts at start_page, not at market 0: slice relative to that page
+            page_start_offset = (start_page - 1) * per_page
+            skip = offset - page_start_offset
+            total_available = page_start_offset + len(all_markets)
+            paginated_markets = all_markets[skip:skip + limit]
             
-            # Determine if there are more markets
-            has_more = (offset + limit) < total_available or len(paginated_markets) == limit
+            # One extra page was requested, so anything past the slice means more markets
+            has_more = len(all_markets) > skip + limit
             
             pagination_info = {
                 "limit": limit,
@@ -206,6 +210,43 @@ def fetch_markets(
     return [], pagination_info
 
 
+def fetch_markets_page(status: str = "active", limit: int = 500, offset: int = 0) -> List[Dict]:
+    """
+    Fetch one page of markets from the Gamma API (single endpoint, offset pagination).
+    
+    Used by the market catalog sync; unlike fetch_markets there is no
+    fallback across base URLs and the offset is passed straight upstream.
+    
+    Args:
+        status: "active" for open markets, "resolved" or "closed" for closed ones
+        limit: Markets per page
+        offset: Markets to skip
+    
+    Returns:
+        List of market dictionaries (Gamma shape): open markets newest first,
+        closed ones most recently closed first
+    """
+    try:
+        url = f"{settings.POLYMARKET_GAMMA_API_URL}/markets"
+        params = {
+            "limit": limit,
+            "offset": offset,
+            "closed": "false" if status == "active" else "true",
+            # A long-open market keeps its old id when it closes; ordering closed
+            # markets by close time puts it ahead of everything the catalog has seen
+            "order": "id" if status == "active" else "closedTime",
+            "ascending": "false",
+        }
+        response = upstream_get(url, params=params, timeout=30)
+        response.raise_for_status()
+        markets = response.json()
+        return markets if isinstance(markets, list) else []
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Error fetching markets from Gamma API: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unexpected error fetching markets: {str(e)}")
+
+
 def fetch_resolved_markets(limit: Optional[int] = None) -> List[Dict]:
     """
     Fetch resolved markets from Polymarket API (wrapper for backward compatibility).
@@ -223,24 +264,15 @@ async def fetch_trades_for_wallet(wallet_address: str) -> List[Dict]:
     
     This uses the Polymarket Data API to fetch user trades.
     
-    First checks an in-memory cache from trader extraction to avoid API calls.
+    Results are kept in the bounded trader_trades_cache for
+    TRADER_TRADES_CACHE_TTL_SECONDS, so repeat trader page views skip the
+    upstream fetch. The returned list is shared with the cache and must not
+    be modified.
     """
-    # Check cache first (orders collected during trader extraction)
-    # Use a function to avoid circular import
-    try:
-        import app.services.trader_service as trader_service_module
-        if hasattr(trader_service_module, '_trader_orders_cache'):
-            cache = getattr(trader_service_module, '_trader_orders_cache')
-            if wallet_address in cache:
-                cached_orders = cache[wallet_address]
-                if cached_orders:
-                    print(f"✓ Using {len(cached_orders)} cached orders for wallet {wallet_address}")
-                    return cached_orders
-    except:
-        pass  # If cache not available, continue with API call
-    
-    # Use Polymarket Data API
-    return await fetch_user_trades(wallet_address)
+    return await trader_trades_cache.get_or_load(
+        wallet_address.lower(),
+        lambda: fetch_user_trades(wallet_address)
+    )
 
 
 def fetch_wallet_performance_dome(wallet_address: str) -> Optional[Dict]:
@@ -292,6 +324,11 @@ def get_market_resolution(market_id: str, markets: List[Dict]) -> Optional[str]:
     if not market:
         return None
     
+    return extract_market_resolution(market)
+
+
+def extract_market_resolution(market: Dict) -> Optional[str]:
+    """Get the resolution (YES/NO) from market data, or None if unresolved."""
     # Check various resolution field formats
     resolution = (
         market.get("resolution") or 
@@ -394,7 +431,7 @@ def fetch_positions_for_wallet(
             if offset is not None:
                 params["offset"] = offset
             
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get(url, params=params, timeout=30)
             response.raise_for_status()
             positions = response.json()
             return positions if isinstance(positions, list) else []
@@ -408,7 +445,7 @@ def fetch_positions_for_wallet(
             params["limit"] = fetch_limit
             params["offset"] = current_offset
             
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get(url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -467,7 +504,7 @@ def fetch_user_pnl(
             "fidelity": fidelity
         }
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         
         pnl_data = response.json()
@@ -497,7 +534,7 @@ def fetch_profile_stats(proxy_address: str, username: Optional[str] = None) -> O
         if username:
             params["username"] = username
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
@@ -540,7 +577,7 @@ def fetch_user_activity(
         if offset:
             params["offset"] = offset
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         
         activity = response.json()
@@ -567,7 +604,7 @@ async def fetch_user_trades(wallet_address: str) -> List[Dict]:
         url = f"{settings.POLYMARKET_DATA_API_URL}/trades"
         params = {"user": wallet_address}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient(timeout=upstream_timeout(30.0)) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
             
@@ -581,6 +618,166 @@ async def fetch_user_trades(wallet_address: str) -> List[Dict]:
         raise Exception(f"Unexpected error fetching user trades: {str(e)}")
 
 
+async def fetch_token_midpoints(token_ids: List[str], client: Optional[httpx.AsyncClient] = None) -> Dict[str, float]:
+    """
+    Fetch CLOB midpoint prices for a batch of outcome tokens (async version).
+    
+    Args:
+        token_ids: Outcome token IDs (Position.asset)
+        client: Shared HTTP client (a new one is created if not provided)
+    
+    Returns:
+        Dictionary mapping token ID to midpoint price; tokens without an
+        order book (e.g. resolved markets) are omitted
+    """
+    if not token_ids:
+        return {}
+    try:
+        url = f"{settings.POLYMARKET_BASE_URL}/midpoints"
+        payload = [{"token_id": token_id} for token_id in token_ids]
+        
+        async with upstream_scheduler.slot():
+            if client is None:
+                async with httpx.AsyncClient(timeout=upstream_timeout(30.0)) as own_client:
+                    response = await own_client.post(url, json=payload)
+            else:
+                response = await client.post(url, json=payload, timeout=upstream_timeout(30.0))
+        response.raise_for_status()
+        
+        # Response: {"<token_id>": "0.525", ...}
+        data = response.json()
+        prices = {}
+        if isinstance(data, dict):
+            for token_id, mid in data.items():
+                try:
+                    prices[str(token_id)] = float(mid)
+                except (TypeError, ValueError):
+                    continue
+        return prices
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Error fetching token midpoints from CLOB API: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unexpected error fetching token midpoints: {str(e)}")
+
+
+async def fetch_market_by_identifier(market_id: str, client: Optional[httpx.AsyncClient] = None) -> Optional[Dict]:
+    """
+    Fetch one market by condition ID or slug (async version).
+    
+    Condition IDs (0x + 64 hex chars) are looked up on the CLOB API, anything
+    else as a slug on the Gamma API.
+    
+    Args:
+        market_id: Condition ID or market slug
+        client: Shared HTTP client (a new one is created if not provided)
+    
+    Returns:
+        Market dictionary, or None if the market does not exist
+    """
+    is_condition_id = market_id.startswith("0x") and len(market_id) == 66
+    if is_condition_id:
+        url = f"{settings.POLYMARKET_BASE_URL}/markets/{market_id}"
+        params = None
+    else:
+        url = f"{settings.POLYMARKET_GAMMA_API_URL}/markets"
+        params = {"slug": market_id}
+    try:
+        async with upstream_scheduler.slot():
+            if client is None:
+                async with httpx.AsyncClient(timeout=upstream_timeout(30.0)) as own_client:
+                    response = await own_client.get(url, params=params)
+            else:
+                response = await client.get(url, params=params, timeout=upstream_timeout(30.0))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        
+        data = response.json()
+        if isinstance(data, list):
+            return data[0] if data else None
+        return data if isinstance(data, dict) and data else None
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Error fetching market {market_id}: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unexpected error fetching market {market_id}: {str(e)}")
+
+
+async def fetch_market_trades(
+    condition_id: str,
+    limit: int = 500,
+    offset: int = 0,
+    client: Optional[httpx.AsyncClient] = None
+) -> List[Dict]:
+    """
+    Fetch one page of a market's trades from Polymarket Data API, newest first (async version).
+    
+    Args:
+        condition_id: Market condition ID
+        limit: Trades per page
+        offset: Offset for pagination
+        client: Shared HTTP client (a new one is created if not provided)
+    
+    Returns:
+        List of trade dictionaries (maker and taker fills)
+    """
+    try:
+        url = f"{settings.POLYMARKET_DATA_API_URL}/trades"
+        params = {"market": condition_id, "limit": limit, "offset": offset, "takerOnly": "false"}
+        
+        async with upstream_scheduler.slot():
+            if client is None:
+                async with httpx.AsyncClient(timeout=upstream_timeout(30.0)) as own_client:
+                    response = await own_client.get(url, params=params)
+            else:
+                response = await client.get(url, params=params, timeout=upstream_timeout(30.0))
+        response.raise_for_status()
+        
+        trades = response.json()
+        return trades if isinstance(trades, list) else []
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Error fetching trades for market {condition_id}: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unexpected error fetching trades for market {condition_id}: {str(e)}")
+
+
+async def fetch_token_price_history(
+    token_id: str,
+    start_ts: Optional[int] = None,
+    fidelity: int = 60
+) -> List[Dict]:
+    """
+    Fetch the CLOB price history of an outcome token (async version).
+    
+    Args:
+        token_id: Outcome token ID (Position.asset)
+        start_ts: Only points at or after this Unix timestamp (full history if not provided)
+        fidelity: Resolution in minutes
+    
+    Returns:
+        List of price points with 't' (timestamp) and 'p' (price) fields
+    """
+    try:
+        url = f"{settings.POLYMARKET_BASE_URL}/prices-history"
+        params = {"market": token_id, "fidelity": fidelity}
+        if start_ts is not None:
+            params["startTs"] = start_ts
+        else:
+            params["interval"] = "max"
+        
+        async with upstream_scheduler.slot(), httpx.AsyncClient(timeout=upstream_timeout(30.0)) as client:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            
+            # Response: {"history": [{"t": 1700000000, "p": 0.52}, ...]}
+            data = response.json()
+            history = data.get("history", []) if isinstance(data, dict) else []
+            return history if isinstance(history, list) else []
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Error fetching token price history from CLOB API: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Unexpected error fetching token price history: {str(e)}")
+
+
 def fetch_closed_positions(
     wallet_address: str,
     limit: Optional[int] = None,
@@ -607,7 +804,7 @@ def fetch_closed_positions(
             if offset is not None:
                 params["offset"] = offset
             
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get(url, params=params, timeout=30)
             response.raise_for_status()
             positions = response.json()
             return positions if isinstance(positions, list) else []
@@ -621,7 +818,7 @@ def fetch_closed_positions(
             params["limit"] = fetch_limit
             params["offset"] = current_offset
             
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get(url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -661,7 +858,7 @@ def fetch_portfolio_value(wallet_address: str) -> float:
         url = f"{settings.POLYMARKET_DATA_API_URL}/value"
         params = {"user": wallet_address}
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
@@ -696,7 +893,7 @@ def fetch_leaderboard_stats(wallet_address: str) -> Dict[str, float]:
             "user": wallet_address
         }
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
@@ -738,7 +935,7 @@ def fetch_market_orders(market_slug: str, limit: int = 100, offset: int = 0) ->
             "limit": fetch_limit
         }
         
-        response = requests.get(trades_url, params=trades_params, timeout=30)
+        response = upstream_get(trades_url, params=trades_params, timeout=30)
         response.raise_for_status()
         
         trades_data = response.json()
@@ -848,7 +1045,7 @@ def fetch_user_leaderboard_data(wallet_address: str, category: str = "politics")
                 "user": wallet_address
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get(url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -0,0 +1,200 @@
+"""
+Local PnL time series built from stored trades, activities and price history.
+
+Replaces per-wallet calls to the remote user-pnl API: the curve is swept by
+equity_curve from the trades and REWARD/REDEEM activities already in the
+database and the shared price_history store, at any resolution. Samples are
+stored in the PnL series store (interval "local", fidelity = resolution) and the
+engine state at the newest sample is kept in equity_curve_states, so later
+calls only sweep fills and prices that arrived since. If fills turn up at or
+before the stored sample (late data), the curve is rebuilt.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Activity, EquityCurveState, Trade
+from app.services.equity_curve import (
+    EquityCurveEngine,
+    activity_event,
+    parse_resolution,
+    sample_grid,
+    sweep_equity_curve,
+    trade_event,
+)
+from app.services.pnl_series_store import delete_series
+from app.services.pnl_service import save_pnl_to_db
+from app.services.price_history_service import load_price_histories, refresh_price_histories
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INTERVAL = "local"
+CURVE_ACTIVITY_TYPES = ("REWARD", "REDEEM")
+
+
+async def load_curve_events(
+    session: AsyncSession,
+    wallet_address: str,
+    after: Optional[int] = None,
+    until: Optional[int] = None
+) -> Tuple[List[Tuple], Set[str]]:
+    """
+    Load a wallet's trades and REWARD/REDEEM activities as time-ordered sweep events.
+
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        after: Only events with timestamp > after
+        until: Only events with timestamp <= until
+
+    Returns:
+        (events, assets traded)
+    """
+    trade_stmt = select(
+        Trade.asset, Trade.condition_id, Trade.side, Trade.size, Trade.price, Trade.timestamp
+    ).where(Trade.proxy_wallet == wallet_address)
+    activity_stmt = select(
+        Activity.type, Activity.condition_id, Activity.usdc_size, Activity.timestamp
+    ).where(Activity.proxy_wallet == wallet_address, Activity.type.in_(CURVE_ACTIVITY_TYPES))
+    if after is not None:
+        trade_stmt = trade_stmt.where(Trade.timestamp > after)
+        activity_stmt = activity_stmt.where(Activity.timestamp > after)
+    if until is not None:
+        trade_stmt = trade_stmt.where(Trade.timestamp <= until)
+        activity_stmt = activity_stmt.where(Activity.timestamp <= until)
+
+    trade_rows = (await session.execute(trade_stmt)).mappings().all()
+    activity_rows = (await session.execute(activity_stmt)).mappings().all()
+
+    events = [trade_event(row) for row in trade_rows] + [activity_event(row) for row in activity_rows]
+    events.sort(key=lambda e: (e[0], e[1]))
+    return events, {str(row["asset"]) for row in trade_rows}
+
+
+async def count_curve_events(session: AsyncSession, wallet_address: str, until: int) -> int:
+    """Number of trades and REWARD/REDEEM activities with timestamp <= until."""
+    trades = select(func.count()).select_from(Trade).where(
+        Trade.proxy_wallet == wallet_address, Trade.timestamp <= until
+    ).scalar_subquery()
+    activities = select(func.count()).select_from(Activity).where(
+        Activity.proxy_wallet == wallet_address,
+        Activity.type.in_(CURVE_ACTIVITY_TYPES),
+        Activity.timestamp <= until
+    ).scalar_subquery()
+    result = await session.execute(select(trades + activities))
+    return int(result.scalar_one())
+
+
+async def build_equity_curve(
+    session: AsyncSession,
+    wallet_address: str,
+    resolution: str = "1d",
+    rebuild: bool = False,
+    refresh_prices: bool = False,
+    now: Optional[int] = None
+) -> Dict:
+    """
+    Build or extend a wallet's local PnL series up to the last complete sample.
+
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        resolution: Sample spacing, e.g. "1h" or "1d"
+        rebuild: Ignore stored state and sweep the whole history
+        refresh_prices: Fetch new CLOB price history for the wallet's tokens first
+        now: Current Unix time (defaults to time.time())
+
+    Returns:
+        Dictionary with mode ("incremental" / "full"), new sample count and last_sample
+
+    Raises:
+        ValueError: If the resolution is malformed or gives more than
+            settings.EQUITY_CURVE_MAX_SAMPLES new samples
+    """
+    step = parse_resolution(resolution)
+    end = (int(now if now is not None else time.time()) // step) * step
+
+    state = None
+    if not rebuild:
+        result = await session.execute(
+            select(EquityCurveState).where(
+                EquityCurveState.proxy_wallet == wallet_address,
+                EquityCurveState.resolution == resolution
+            )
+        )
+        state = result.scalar_one_or_none()
+        if state is not None and await count_curve_events(session, wallet_address, state.last_sample) != state.event_count:
+            logger.info(f"Equity curve state of {wallet_address} is out of date, rebuilding")
+            state = None
+
+    if state is not None:
+        mode = "incremental"
+        engine = EquityCurveEngine.from_state(state.state)
+        after = state.last_sample
+        event_count = state.event_count
+        start = state.last_sample + step
+    else:
+        mode = "full"
+        engine = EquityCurveEngine()
+        after = None
+        event_count = 0
+        start = None
+
+    events, assets = await load_curve_events(session, wallet_address, after=after, until=end)
+    if start is None:
+        if not events:
+            return {"wallet_address": wallet_address, "resolution": resolution, "mode": mode, "samples": 0, "last_sample": None}
+        start = events[0][0]
+
+    assets |= set(engine.holdings)
+    if refresh_prices:
+        await refresh_price_histories(session, assets)
+    histories = await load_price_histories(session, assets)
+
+    samples = sweep_equity_curve(engine, events, histories, sample_grid(start, end, step, settings.EQUITY_CURVE_MAX_SAMPLES), prices_after=after)
+    if not samples:
+        return {
+            "wallet_address": wallet_address, "resolution": resolution, "mode": mode,
+            "samples": 0, "last_sample": state.last_sample if state is not None else None
+        }
+
+    if mode == "full":
+        await delete_series(session, wallet_address, LOCAL_INTERVAL, resolution, commit=False)
+    await save_pnl_to_db(
+        session, wallet_address, [{"t": t, "p": p} for t, p in samples],
+        interval=LOCAL_INTERVAL, fidelity=resolution
+    )
+
+    last_sample = samples[-1][0]
+    stmt = pg_insert(EquityCurveState).values(
+        proxy_wallet=wallet_address,
+        resolution=resolution,
+        last_sample=last_sample,
+        event_count=event_count + len(events),
+        state=engine.to_state()
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_equity_curve_state_wallet_resolution",
+        set_={
+            "last_sample": stmt.excluded.last_sample,
+            "event_count": stmt.excluded.event_count,
+            "state": stmt.excluded.state,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+    return {
+        "wallet_address": wallet_address,
+        "resolution": resolution,
+        "mode": mode,
+        "samples": len(samples),
+        "last_sample": last_sample,
+    }
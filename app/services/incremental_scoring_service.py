@@ -0,0 +1,409 @@
+"""
+Incremental leaderboard scoring.
+
+calculate_scores_and_rank recomputes population medians, percentile anchors
+and every trader's scores from scratch. IncrementalScorer keeps the population
+values in order-statistic structures (SortedList) so that adding, refreshing
+or removing one wallet updates the medians and anchors in O(log n), and only
+the trader rows whose scores actually change are rewritten.
+
+The roi/pnl shrunk values depend on the population medians. When a change
+moves a median, those shrunk values are recomputed for every trader (O(n));
+otherwise only the changed wallet is touched. Exact full recomputation via
+calculate_scores_and_rank is kept as a verification mode.
+"""
+
+import logging
+from dataclasses import replace
+from typing import List, Dict, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from app.core.scoring_config import ScoringConfig, default_scoring_config
+from app.services.leaderboard_service import (
+    calculate_scores_and_rank,
+    calculate_risk_score,
+    clamp,
+    get_sorted_percentile_value,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fields written onto each trader dict, in the order they are stored
+SCORE_FIELDS = (
+    "W_shrunk",
+    "roi_shrunk",
+    "pnl_shrunk",
+    "score_risk",
+    "score_win_rate",
+    "score_roi",
+    "score_pnl",
+    "final_score",
+)
+
+
+class _TraderState:
+    """Per-wallet values derived from the raw metrics."""
+    __slots__ = (
+        "active", "n_eff", "roi", "pnl_adj", "w_shrunk", "score_risk",
+        "roi_shrunk", "pnl_shrunk", "output",
+    )
+
+
+class IncrementalScorer:
+    """
+    Maintains a scored trader population under single-wallet updates.
+
+    Produces the same W_shrunk, roi_shrunk, pnl_shrunk, score_* and
+    final_score values as calculate_scores_and_rank for the same population.
+    """
+
+    def __init__(self, config: Optional[ScoringConfig] = None, verify: bool = False):
+        """
+        Args:
+            config: Scoring configuration (uses default if not provided)
+            verify: If True, every update is checked against an exact full
+                recomputation and mismatches are logged
+        """
+        # Order statistics are maintained exactly, so sketch anchors don't apply
+        self.config = replace(config or default_scoring_config, anchor_method="exact")
+        self.config.validate()
+        self.verify_updates = verify
+        self._reset()
+
+    def _reset(self) -> None:
+        self._traders: Dict[str, Dict] = {}
+        self._states: Dict[str, _TraderState] = {}
+        self._active_count = 0
+        self._roi_pop = SortedList()
+        self._pnl_adj_pop = SortedList()
+        self._w_shrunk_pop = SortedList()
+        self._roi_shrunk_pop = SortedList()
+        self._pnl_shrunk_pop = SortedList()
+        self.roi_m = 0.0
+        self.pnl_m = 0.0
+        self._anchors: Tuple[float, ...] = (0.0,) * 6
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def traders(self) -> List[Dict]:
+        """Scored trader dicts (the same objects that were passed in)."""
+        return list(self._traders.values())
+
+    @property
+    def population_size(self) -> int:
+        """Number of traders used for medians and percentile anchors."""
+        return len(self._roi_pop)
+
+    def __len__(self) -> int:
+        return len(self._traders)
+
+    def get_medians(self) -> Dict[str, float]:
+        return {"roi_median": self.roi_m, "pnl_median": self.pnl_m}
+
+    def get_percentiles(self) -> Dict[str, float]:
+        """Current anchors, keyed like calculate_scores_and_rank_with_percentiles."""
+        w_1, w_99, r_1, r_99, p_1, p_99 = self._anchors
+        lower, upper = self.config.percentile_lower, self.config.percentile_upper
+        return {
+            f"w_shrunk_{lower}_percent": w_1,
+            f"w_shrunk_{upper}_percent": w_99,
+            f"roi_shrunk_{lower}_percent": r_1,
+            f"roi_shrunk_{upper}_percent": r_99,
+            f"pnl_shrunk_{lower}_percent": p_1,
+            f"pnl_shrunk_{upper}_percent": p_99,
+        }
+
+    def load(self, traders_metrics: List[Dict]) -> List[Dict]:
+        """
+        Score a full population from scratch (trader dicts are updated in place).
+
+        Returns:
+            List of scored trader dicts
+        """
+        self._reset()
+        for trader in traders_metrics:
+            wallet = trader.get("wallet_address")
+            if not wallet:
+                continue
+            key = wallet.lower()
+            state = self._derive_state(trader)
+            self._traders[key] = trader
+            self._states[key] = state
+            if state.active:
+                self._active_count += 1
+
+        self._rebuild_population()
+        self._refresh_all()
+        return self.traders
+
+    def upsert(self, metrics: Dict) -> List[Dict]:
+        """
+        Add a wallet or replace its metrics and rescore incrementally.
+
+        Args:
+            metrics: Trader metrics dict (same shape as calculate_scores_and_rank input)
+
+        Returns:
+            Trader dicts whose scores changed (always includes the upserted wallet)
+        """
+        wallet = metrics.get("wallet_address")
+        if not wallet:
+            raise ValueError("metrics must include wallet_address")
+        return self._replace(wallet.lower(), metrics)
+
+    def remove(self, wallet_address: str) -> List[Dict]:
+        """
+        Remove a wallet and rescore incrementally.
+
+        Returns:
+            Trader dicts whose scores changed
+        """
+        key = wallet_address.lower()
+        if key not in self._traders:
+            return []
+        return self._replace(key, None)
+
+    def verify(self, tolerance: float = 1e-9) -> Dict:
+        """
+        Compare incremental scores with an exact full recomputation.
+
+        Returns:
+            Dict with max_abs_diff and the list of mismatching wallets
+        """
+        copies = [dict(t) for t in self._traders.values()]
+        exact = calculate_scores_and_rank(copies, self.config)
+
+        max_abs_diff = 0.0
+        mismatches = []
+        for expected in exact:
+            actual = self._traders[expected["wallet_address"].lower()]
+            worst = max(abs(actual[f] - expected[f]) for f in SCORE_FIELDS)
+            max_abs_diff = max(max_abs_diff, worst)
+            if worst > tolerance:
+                mismatches.append(expected["wallet_address"])
+
+        return {"max_abs_diff": max_abs_diff, "mismatches": mismatches}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _derive_state(self, t: Dict) -> _TraderState:
+        """Compute everything about a trader that doesn't depend on the population."""
+        config = self.config
+        state = _TraderState()
+        state.active = t.get('total_trades', 0) >= config.min_trades_threshold
+
+        S = t.get('total_stakes', 0.0)
+        sum_sq_s = t.get('sum_sq_stakes', 0.0)
+        state.n_eff = (S**2) / sum_sq_s if sum_sq_s > 0 else 0.0
+
+        s_w = t.get('winning_stakes', 0.0)
+        W = (s_w / S) if S > 0 else 0.0
+        state.w_shrunk = (W * state.n_eff + config.shrink_baseline_win_rate * config.shrink_kw) / (state.n_eff + config.shrink_kw)
+
+        state.roi = t.get('roi', 0.0)
+
+        max_s = t.get('max_stake', 0.0)
+        ratio = (max_s / S) if S > 0 else 0.0
+        state.pnl_adj = t.get('total_pnl', 0.0) / (1 + config.shrink_alpha * ratio)
+
+        state.score_risk = calculate_risk_score(
+            t.get('worst_loss', 0.0), S, config, t.get('all_losses', None)
+        )
+        state.roi_shrunk = None
+        state.pnl_shrunk = None
+        state.output = None
+        return state
+
+    def _in_population(self, state: _TraderState) -> bool:
+        # Same fallback as calculate_scores_and_rank: everyone counts when
+        # nobody meets the activity threshold
+        return state.active or self._active_count == 0
+
+    def _roi_shrunk(self, state: _TraderState) -> float:
+        kr = self.config.shrink_kr
+        return (state.roi * state.n_eff + self.roi_m * kr) / (state.n_eff + kr)
+
+    def _pnl_shrunk(self, state: _TraderState) -> float:
+        kp = self.config.shrink_kp
+        return (state.pnl_adj * state.n_eff + self.pnl_m * kp) / (state.n_eff + kp)
+
+    @staticmethod
+    def _median(sorted_values: SortedList) -> float:
+        return sorted_values[len(sorted_values) // 2] if sorted_values else 0.0
+
+    def _rebuild_population(self) -> None:
+        """Rebuild every order-statistic structure (O(n log n))."""
+        members = [s for s in self._states.values() if self._in_population(s)]
+        self._roi_pop = SortedList(s.roi for s in members)
+        self._pnl_adj_pop = SortedList(s.pnl_adj for s in members)
+        self._w_shrunk_pop = SortedList(s.w_shrunk for s in members)
+        self.roi_m = self._median(self._roi_pop)
+        self.pnl_m = self._median(self._pnl_adj_pop)
+        self._reshrink_roi()
+        self._reshrink_pnl()
+
+    def _reshrink_roi(self) -> None:
+        for state in self._states.values():
+            state.roi_shrunk = self._roi_shrunk(state)
+        self._roi_shrunk_pop = SortedList(
+            s.roi_shrunk for s in self._states.values() if self._in_population(s)
+        )
+
+    def _reshrink_pnl(self) -> None:
+        for state in self._states.values():
+            state.pnl_shrunk = self._pnl_shrunk(state)
+        self._pnl_shrunk_pop = SortedList(
+            s.pnl_shrunk for s in self._states.values() if self._in_population(s)
+        )
+
+    def _compute_anchors(self) -> Tuple[float, ...]:
+        lower, upper = self.config.percentile_lower, self.config.percentile_upper
+        return (
+            get_sorted_percentile_value(self._w_shrunk_pop, lower),
+            get_sorted_percentile_value(self._w_shrunk_pop, upper),
+            get_sorted_percentile_value(self._roi_shrunk_pop, lower),
+            get_sorted_percentile_value(self._roi_shrunk_pop, upper),
+            get_sorted_percentile_value(self._pnl_shrunk_pop, lower),
+            get_sorted_percentile_value(self._pnl_shrunk_pop, upper),
+        )
+
+    def _score(self, state: _TraderState) -> Tuple[float, ...]:
+        """Normalize one trader against the current anchors."""
+        config = self.config
+        w_1, w_99, r_1, r_99, p_1, p_99 = self._anchors
+
+        w_score = (state.w_shrunk - w_1) / (w_99 - w_1) if w_99 - w_1 != 0 else 0.5
+        r_score = (state.roi_shrunk - r_1) / (r_99 - r_1) if r_99 - r_1 != 0 else 0.5
+        p_score = (state.pnl_shrunk - p_1) / (p_99 - p_1) if p_99 - p_1 != 0 else 0.5
+        w_score = clamp(w_score, 0, 1)
+        r_score = clamp(r_score, 0, 1)
+        p_score = clamp(p_score, 0, 1)
+
+        final_score = 100.0 * (
+            config.weight_win_rate * w_score +
+            config.weight_roi * r_score +
+            config.weight_pnl * p_score +
+            config.weight_risk * (1.0 - state.score_risk)
+        )
+        return (
+            state.w_shrunk,
+            state.roi_shrunk,
+            state.pnl_shrunk,
+            state.score_risk,
+            w_score,
+            r_score,
+            p_score,
+            clamp(final_score, 0, 100),
+        )
+
+    def _write(self, key: str) -> bool:
+        """Rescore one trader; write its dict only if the output changed."""
+        state = self._states[key]
+        output = self._score(state)
+        if output == state.output:
+            return False
+        state.output = output
+        self._traders[key].update(zip(SCORE_FIELDS, output))
+        return True
+
+    def _refresh_all(self) -> List[Dict]:
+        self._anchors = self._compute_anchors()
+        return [self._traders[key] for key in self._states if self._write(key)]
+
+    def _pop_remove(self, state: _TraderState) -> None:
+        self._roi_pop.remove(state.roi)
+        self._pnl_adj_pop.remove(state.pnl_adj)
+        self._w_shrunk_pop.remove(state.w_shrunk)
+        self._roi_shrunk_pop.remove(state.roi_shrunk)
+        self._pnl_shrunk_pop.remove(state.pnl_shrunk)
+
+    def _replace(self, key: str, metrics: Optional[Dict]) -> List[Dict]:
+        old_state = self._states.get(key)
+        new_state = self._derive_state(metrics) if metrics is not None else None
+
+        active_count = self._active_count
+        if old_state is not None and old_state.active:
+            active_count -= 1
+        if new_state is not None and new_state.active:
+            active_count += 1
+
+        # Population membership of everyone flips when the "nobody is active"
+        # fallback switches on or off, so fall back to a full rebuild
+        fallback_switched = (self._active_count == 0) != (active_count == 0)
+
+        if old_state is not None and not fallback_switched and self._in_population(old_state):
+            self._pop_remove(old_state)
+
+        self._active_count = active_count
+        if new_state is None:
+            del self._states[key]
+            del self._traders[key]
+        else:
+            self._states[key] = new_state
+            if old_state is not None:
+                # Keep the caller's dict as the row object for this wallet
+                self._traders[key].update(metrics)
+            else:
+                self._traders[key] = metrics
+
+        if fallback_switched:
+            self._rebuild_population()
+            changed = self._refresh_all()
+        else:
+            changed = self._apply_incremental(key, new_state)
+
+        if self.verify_updates:
+            report = self.verify()
+            if report["mismatches"]:
+                logger.warning(
+                    f"Incremental scoring diverged for {len(report['mismatches'])} traders "
+                    f"(max diff {report['max_abs_diff']}); rebuilding"
+                )
+                self.load(list(self._traders.values()))
+
+        return changed
+
+    def _apply_incremental(self, key: str, new_state: Optional[_TraderState]) -> List[Dict]:
+        """Insert the new state into the order statistics and rescore what changed."""
+        if new_state is not None and self._in_population(new_state):
+            self._roi_pop.add(new_state.roi)
+            self._pnl_adj_pop.add(new_state.pnl_adj)
+            self._w_shrunk_pop.add(new_state.w_shrunk)
+
+        old_roi_m, old_pnl_m = self.roi_m, self.pnl_m
+        self.roi_m = self._median(self._roi_pop)
+        self.pnl_m = self._median(self._pnl_adj_pop)
+
+        roi_m_changed = self.roi_m != old_roi_m
+        pnl_m_changed = self.pnl_m != old_pnl_m
+
+        if roi_m_changed:
+            self._reshrink_roi()
+        elif new_state is not None:
+            new_state.roi_shrunk = self._roi_shrunk(new_state)
+            if self._in_population(new_state):
+                self._roi_shrunk_pop.add(new_state.roi_shrunk)
+
+        if pnl_m_changed:
+            self._reshrink_pnl()
+        elif new_state is not None:
+            new_state.pnl_shrunk = self._pnl_shrunk(new_state)
+            if self._in_population(new_state):
+                self._pnl_shrunk_pop.add(new_state.pnl_shrunk)
+
+        old_anchors = self._anchors
+        self._anchors = self._compute_anchors()
+
+        if roi_m_changed or pnl_m_changed or self._anchors != old_anchors:
+            return [self._traders[k] for k in self._states if self._write(k)]
+
+        if new_state is None:
+            return []
+        self._write(key)
+        return [self._traders[key]]
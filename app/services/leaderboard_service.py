@@ -1,13 +1,15 @@
 """Leaderboard service for ranking traders by various metrics."""
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from dataclasses import replace
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, distinct
 from decimal import Decimal
 import math
-from app.db.models import Trade, Position, Activity
+from bisect import bisect_left
 from app.core.scoring_config import ScoringConfig, default_scoring_config
+from app.services.quantile_sketch import KLLSketch
+from app.services.wallet_registry_service import list_tracked_wallets
 
 
 def get_time_filter(timestamp: int, period: str) -> bool:
@@ -38,7 +40,10 @@ def get_time_filter(timestamp: int, period: str) -> bool:
 
 async def get_unique_wallet_addresses(session: AsyncSession) -> List[str]:
     """
-    Get all unique wallet addresses from trades, positions, and activities.
+    Get all active tracked wallet addresses.
+    
+    Wallets are registered in tracked_wallets on ingest of trades, positions
+    and activities, so this is one index scan instead of three DISTINCT scans.
     
     Args:
         session: Database session
@@ -46,27 +51,7 @@ async def get_unique_wallet_addresses(session: AsyncSession) -> List[str]:
     Returns:
         List of unique wallet addresses
     """
-    wallets = set()
-    
-    # Get from trades
-    stmt = select(distinct(Trade.proxy_wallet))
-    result = await session.execute(stmt)
-    trade_wallets = [row[0] for row in result.all()]
-    wallets.update(trade_wallets)
-    
-    # Get from positions
-    stmt = select(distinct(Position.proxy_wallet))
-    result = await session.execute(stmt)
-    position_wallets = [row[0] for row in result.all()]
-    wallets.update(position_wallets)
-    
-    # Get from activities
-    stmt = select(distinct(Activity.proxy_wallet))
-    result = await session.execute(stmt)
-    activity_wallets = [row[0] for row in result.all()]
-    wallets.update(activity_wallets)
-    
-    return list(wallets)
+    return await list_tracked_wallets(session)
 
 
 async def calculate_trader_metrics_with_time_filter(
@@ -381,7 +366,18 @@ def get_percentile_value(values: List[float], percentile: float) -> float:
     """
     if not values:
         return 0.0
-    sorted_values = sorted(values)
+    return get_sorted_percentile_value(sorted(values), percentile)
+
+
+def get_sorted_percentile_value(sorted_values, percentile: float) -> float:
+    """
+    Get the value at a specific percentile (0-100) from an already sorted sequence.
+    
+    Accepts any indexable sorted container (list, array, SortedList) so callers
+    that maintain order incrementally don't need to re-sort.
+    """
+    if not sorted_values:
+        return 0.0
     k = (len(sorted_values) - 1) * (percentile / 100.0)
     f = math.floor(k)
     c = math.ceil(k)
@@ -392,6 +388,34 @@ def get_percentile_value(values: List[float], percentile: float) -> float:
     return d0 + d1
 
 
+def get_population_median(values: List[float], config: ScoringConfig) -> float:
+    """
+    Get the population median used for shrinkage (upper middle element).
+    
+    Uses a KLL sketch when config.anchor_method is "sketch".
+    """
+    if not values:
+        return 0.0
+    if config.anchor_method == "sketch":
+        return KLLSketch(config.sketch_rank_error).update(values).median()
+    return sorted(values)[len(values) // 2]
+
+
+def get_population_anchors(values: List[float], config: ScoringConfig) -> Tuple[float, float]:
+    """
+    Get the (lower, upper) percentile anchors used for score normalization.
+    
+    Uses a KLL sketch when config.anchor_method is "sketch".
+    """
+    if config.anchor_method == "sketch":
+        sketch = KLLSketch(config.sketch_rank_error).update(values)
+        return sketch.percentile(config.percentile_lower), sketch.percentile(config.percentile_upper)
+    return (
+        get_percentile_value(values, config.percentile_lower),
+        get_percentile_value(values, config.percentile_upper),
+    )
+
+
 def clamp(n: float, minn: float, maxn: float) -> float:
     return max(min(n, maxn), minn)
 
@@ -487,11 +511,11 @@ def calculate_scores_and_rank(
         pnl_adj = pnl_total / (1 + config.shrink_alpha * ratio)
         pnl_adjs_pop.append(pnl_adj)
         
-    pnl_m = sorted(pnl_adjs_pop)[len(pnl_adjs_pop) // 2] if pnl_adjs_pop else 0.0
+    pnl_m = get_population_median(pnl_adjs_pop, config)
 
     # --- ROI Population Median (for Formula 2) ---
     rois_pop = [t.get('roi', 0.0) for t in population_metrics]
-    roi_m = sorted(rois_pop)[len(rois_pop) // 2] if rois_pop else 0.0
+    roi_m = get_population_median(rois_pop, config)
 
     # Calculate Shrunk Values for ALL traders
     for t in traders_metrics:
@@ -532,14 +556,9 @@ def calculate_scores_and_rank(
     pnl_shrunk_pop = [t['pnl_shrunk'] for t in population_metrics]
     
     # Anchors (using configurable percentiles)
-    w_1 = get_percentile_value(w_shrunk_pop, config.percentile_lower)
-    w_99 = get_percentile_value(w_shrunk_pop, config.percentile_upper)
-    
-    r_1 = get_percentile_value(roi_shrunk_pop, config.percentile_lower)
-    r_99 = get_percentile_value(roi_shrunk_pop, config.percentile_upper)
-    
-    p_1 = get_percentile_value(pnl_shrunk_pop, config.percentile_lower)
-    p_99 = get_percentile_value(pnl_shrunk_pop, config.percentile_upper)
+    w_1, w_99 = get_population_anchors(w_shrunk_pop, config)
+    r_1, r_99 = get_population_anchors(roi_shrunk_pop, config)
+    p_1, p_99 = get_population_anchors(pnl_shrunk_pop, config)
     
     # Final Normalization
     for t in traders_metrics:
@@ -649,11 +668,11 @@ def calculate_scores_and_rank_with_percentiles(
         pnl_adj = pnl_total / (1 + config.shrink_alpha * ratio)
         pnl_adjs_pop.append(pnl_adj)
         
-    pnl_m = sorted(pnl_adjs_pop)[len(pnl_adjs_pop) // 2] if pnl_adjs_pop else 0.0
+    pnl_m = get_population_median(pnl_adjs_pop, config)
 
     # --- ROI Population Median (for Formula 2) ---
     rois_pop = [t.get('roi', 0.0) for t in population_metrics]
-    roi_m = sorted(rois_pop)[len(rois_pop) // 2] if rois_pop else 0.0
+    roi_m = get_population_median(rois_pop, config)
 
     # Calculate Shrunk Values for ALL traders
     for t in traders_metrics:
@@ -694,14 +713,9 @@ def calculate_scores_and_rank_with_percentiles(
     pnl_shrunk_pop = [t['pnl_shrunk'] for t in population_metrics]
     
     # Anchors (using configurable percentiles)
-    w_1 = get_percentile_value(w_shrunk_pop, config.percentile_lower)
-    w_99 = get_percentile_value(w_shrunk_pop, config.percentile_upper)
-    
-    r_1 = get_percentile_value(roi_shrunk_pop, config.percentile_lower)
-    r_99 = get_percentile_value(roi_shrunk_pop, config.percentile_upper)
-    
-    p_1 = get_percentile_value(pnl_shrunk_pop, config.percentile_lower)
-    p_99 = get_percentile_value(pnl_shrunk_pop, config.percentile_upper)
+    w_1, w_99 = get_population_anchors(w_shrunk_pop, config)
+    r_1, r_99 = get_population_anchors(roi_shrunk_pop, config)
+    p_1, p_99 = get_population_anchors(pnl_shrunk_pop, config)
     
     # Final Normalization
     for t in traders_metrics:
@@ -759,3 +773,178 @@ def calculate_scores_and_rank_with_percentiles(
         "total_traders": len(traders_metrics)
     }
 
+
+
+def build_population_sketches(
+    traders_metrics: List[Dict],
+    config: Optional[ScoringConfig] = None,
+    roi_m: Optional[float] = None,
+    pnl_m: Optional[float] = None,
+    active_only: bool = True
+) -> Dict[str, KLLSketch]:
+    """
+    Build mergeable sketches of the population values for one partition of traders.
+    
+    Sketching is two-phase because shrunk ROI/PnL depend on the global medians:
+    1. Without medians: sketches "roi", "pnl_adj" and "w_shrunk".
+       Merge across partitions and read the medians.
+    2. With roi_m and pnl_m: additionally sketches "roi_shrunk" and "pnl_shrunk".
+       Merge across partitions and read the percentile anchors.
+    
+    Sketches serialize with serialize_population_sketches and combine with
+    merge_population_sketches, so partitions can be processed on different workers.
+    If the merged population is empty (no trader meets the activity threshold),
+    rebuild with active_only=False to match calculate_scores_and_rank's fallback.
+    
+    Args:
+        traders_metrics: Trader metrics for this partition
+        config: Scoring configuration (uses default if not provided)
+        roi_m: Global ROI median (phase 2 only)
+        pnl_m: Global adjusted PnL median (phase 2 only)
+        active_only: Only include traders meeting the minimum activity threshold
+    
+    Returns:
+        Dict of sketches keyed by population value name
+    """
+    if config is None:
+        config = default_scoring_config
+    
+    names = ["roi", "pnl_adj", "w_shrunk"]
+    with_shrunk = roi_m is not None and pnl_m is not None
+    if with_shrunk:
+        names += ["roi_shrunk", "pnl_shrunk"]
+    sketches = {name: KLLSketch(config.sketch_rank_error) for name in names}
+    
+    for t in traders_metrics:
+        if active_only and t.get('total_trades', 0) < config.min_trades_threshold:
+            continue
+        
+        S = t.get('total_stakes', 0.0)
+        sum_sq_s = t.get('sum_sq_stakes', 0.0)
+        N_eff = (S**2) / sum_sq_s if sum_sq_s > 0 else 0.0
+        
+        s_w = t.get('winning_stakes', 0.0)
+        W = (s_w / S) if S > 0 else 0.0
+        W_shrunk = (W * N_eff + config.shrink_baseline_win_rate * config.shrink_kw) / (N_eff + config.shrink_kw)
+        
+        roi_raw = t.get('roi', 0.0)
+        max_s = t.get('max_stake', 0.0)
+        ratio = (max_s / S) if S > 0 else 0.0
+        pnl_adj = t.get('total_pnl', 0.0) / (1 + config.shrink_alpha * ratio)
+        
+        sketches["roi"].add(roi_raw)
+        sketches["pnl_adj"].add(pnl_adj)
+        sketches["w_shrunk"].add(W_shrunk)
+        
+        if with_shrunk:
+            sketches["roi_shrunk"].add((roi_raw * N_eff + roi_m * config.shrink_kr) / (N_eff + config.shrink_kr))
+            sketches["pnl_shrunk"].add((pnl_adj * N_eff + pnl_m * config.shrink_kp) / (N_eff + config.shrink_kp))
+    
+    return sketches
+
+
+def merge_population_sketches(partitions: List[Dict[str, KLLSketch]]) -> Dict[str, KLLSketch]:
+    """Merge population sketches from several partitions (first partition is reused)."""
+    if not partitions:
+        return {}
+    merged = partitions[0]
+    for partition in partitions[1:]:
+        for name, sketch in partition.items():
+            if name in merged:
+                merged[name].merge(sketch)
+            else:
+                merged[name] = sketch
+    return merged
+
+
+def serialize_population_sketches(sketches: Dict[str, KLLSketch]) -> Dict[str, Dict]:
+    """JSON-serializable form of population sketches."""
+    return {name: sketch.to_dict() for name, sketch in sketches.items()}
+
+
+def deserialize_population_sketches(data: Dict[str, Dict]) -> Dict[str, KLLSketch]:
+    """Inverse of serialize_population_sketches."""
+    return {name: KLLSketch.from_dict(sketch) for name, sketch in data.items()}
+
+
+def compare_sketch_anchors(
+    traders_metrics: List[Dict],
+    config: Optional[ScoringConfig] = None,
+    rank_error: Optional[float] = None
+) -> Dict:
+    """
+    Compare sketch-based medians and percentile anchors with the exact ones.
+    
+    Scores are computed on copies, so the input trader dicts are not modified.
+    
+    Args:
+        traders_metrics: List of trader metrics dictionaries
+        config: Scoring configuration (uses default if not provided)
+        rank_error: Sketch rank error to evaluate (defaults to config.sketch_rank_error)
+    
+    Returns:
+        Dict with per-quantity exact value, sketch value, absolute difference and
+        observed normalized rank error, plus the largest rank error seen
+    """
+    if config is None:
+        config = default_scoring_config
+    exact_config = replace(config, anchor_method="exact")
+    sketch_config = replace(
+        config,
+        anchor_method="sketch",
+        sketch_rank_error=rank_error if rank_error is not None else config.sketch_rank_error
+    )
+    
+    exact = calculate_scores_and_rank_with_percentiles([dict(t) for t in traders_metrics], exact_config)
+    sketch = calculate_scores_and_rank_with_percentiles([dict(t) for t in traders_metrics], sketch_config)
+    
+    # Exact population values, used to express differences as rank distance
+    population = [
+        t for t in exact["traders"] if t.get('total_trades', 0) >= config.min_trades_threshold
+    ] or exact["traders"]
+    
+    def pnl_adj(t: Dict) -> float:
+        S = t.get('total_stakes', 0.0)
+        ratio = (t.get('max_stake', 0.0) / S) if S > 0 else 0.0
+        return t.get('total_pnl', 0.0) / (1 + config.shrink_alpha * ratio)
+    
+    pop_values = {
+        "roi": sorted(t.get('roi', 0.0) for t in population),
+        "pnl": sorted(pnl_adj(t) for t in population),
+        "w_shrunk": sorted(t['W_shrunk'] for t in population),
+        "roi_shrunk": sorted(t['roi_shrunk'] for t in population),
+        "pnl_shrunk": sorted(t['pnl_shrunk'] for t in population),
+    }
+    
+    def observed_rank_error(values: List[float], exact_value: float, sketch_value: float) -> float:
+        if len(values) < 2:
+            return 0.0
+        return abs(bisect_left(values, sketch_value) - bisect_left(values, exact_value)) / len(values)
+    
+    quantities = {}
+    for key in exact["medians"]:
+        population_key = key.replace("_median", "")
+        quantities[key] = (population_key, exact["medians"][key], sketch["medians"][key])
+    for key in exact["percentiles"]:
+        population_key = key.split("_shrunk")[0] + "_shrunk"
+        quantities[key] = (population_key, exact["percentiles"][key], sketch["percentiles"][key])
+    
+    report = {}
+    max_rank_error = 0.0
+    for key, (population_key, exact_value, sketch_value) in quantities.items():
+        err = observed_rank_error(pop_values[population_key], exact_value, sketch_value)
+        max_rank_error = max(max_rank_error, err)
+        report[key] = {
+            "exact": exact_value,
+            "sketch": sketch_value,
+            "abs_diff": abs(sketch_value - exact_value),
+            "rank_error": err,
+        }
+    
+    return {
+        "population_size": exact["population_size"],
+        "total_traders": exact["total_traders"],
+        "target_rank_error": sketch_config.sketch_rank_error,
+        "max_rank_error": max_rank_error,
+        "quantities": report,
+    }
@@ -0,0 +1,129 @@
+"""
+Leaderboard snapshot with per-metric sorted arrays for fast rank lookups.
+
+A snapshot is published every time the live leaderboard is scored. It keeps
+one sorted array per scoring metric plus each wallet's own metric values, so
+"rank X / top Y%" for a single wallet is answered by bisection without
+touching or serializing any other entry.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+# Metrics produced by calculate_scores_and_rank and their ranking direction.
+# True = descending (highest value is rank 1), False = ascending (lowest value
+# is rank 1). Directions mirror the sort order used by the leaderboard router.
+RANK_METRICS: Dict[str, bool] = {
+    "W_shrunk": False,
+    "roi_shrunk": False,
+    "pnl_shrunk": False,
+    "score_win_rate": True,
+    "score_roi": True,
+    "score_pnl": True,
+    "score_risk": True,
+    "final_score": True,
+}
+
+
+class LeaderboardSnapshot:
+    """
+    Immutable view of a scored leaderboard, indexed for rank lookups.
+
+    Values are stored "oriented" (negated for descending metrics) so that
+    every metric array is sorted ascending and better always means smaller.
+    """
+
+    def __init__(self, traders: List[Dict]):
+        self.built_at = datetime.utcnow()
+        self._values: Dict[str, Tuple[float, ...]] = {}
+        columns: Dict[str, List[float]] = {metric: [] for metric in RANK_METRICS}
+
+        for trader in traders:
+            wallet = trader.get("wallet_address")
+            if not wallet:
+                continue
+            key = wallet.lower()
+            if key in self._values:
+                continue
+
+            oriented = tuple(
+                _orient(trader.get(metric), descending)
+                for metric, descending in RANK_METRICS.items()
+            )
+            self._values[key] = oriented
+            for metric, value in zip(RANK_METRICS, oriented):
+                columns[metric].append(value)
+
+        self._sorted: Dict[str, array] = {
+            metric: array("d", sorted(values)) for metric, values in columns.items()
+        }
+        self.size = len(self._values)
+
+    def __contains__(self, wallet_address: str) -> bool:
+        return bool(wallet_address) and wallet_address.lower() in self._values
+
+    def lookup(self, wallet_address: str) -> Optional[Dict[str, Dict]]:
+        """
+        Get rank and percentile of a wallet on every metric.
+
+        Args:
+            wallet_address: Wallet address (case-insensitive)
+
+        Returns:
+            Dict keyed by metric with value, rank, top_percent and percentile,
+            or None if the wallet is not in the snapshot
+        """
+        if not wallet_address:
+            return None
+        oriented = self._values.get(wallet_address.lower())
+        if oriented is None:
+            return None
+
+        n = self.size
+        result = {}
+        for (metric, descending), value in zip(RANK_METRICS.items(), oriented):
+            sorted_values = self._sorted[metric]
+            # Entries strictly better than this wallet; ties share the best rank
+            better = bisect_left(sorted_values, value)
+            # Entries strictly worse than this wallet
+            worse = n - bisect_right(sorted_values, value)
+            rank = better + 1
+            if value == float("inf"):
+                display_value = None
+            else:
+                display_value = -value if descending else value
+            result[metric] = {
+                "value": display_value,
+                "rank": rank,
+                "top_percent": 100.0 * rank / n,
+                "percentile": 100.0 * worse / n,
+            }
+        return result
+
+
+def _orient(value: Optional[float], descending: bool) -> float:
+    """Map a metric value onto an ascending, better-is-smaller scale."""
+    if value is None:
+        # Missing values rank last in either direction
+        return float("inf")
+    value = float(value)
+    return -value if descending else value
+
+
+_current_snapshot: Optional[LeaderboardSnapshot] = None
+
+
+def publish_snapshot(traders: List[Dict]) -> LeaderboardSnapshot:
+    """Build a snapshot from scored traders and make it the current one."""
+    global _current_snapshot
+    snapshot = LeaderboardSnapshot(traders)
+    # Single reference swap so readers never observe a half-built snapshot
+    _current_snapshot = snapshot
+    return snapshot
+
+
+def get_current_snapshot() -> Optional[LeaderboardSnapshot]:
+    """Get the most recently published snapshot (None if none published yet)."""
+    return _current_snapshot
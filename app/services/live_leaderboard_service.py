@@ -1,8 +1,30 @@
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.services.polymarket_service import PolymarketService
-from app.services.leaderboard_service import calculate_scores_and_rank
+from app.services.incremental_scoring_service import IncrementalScorer
+from app.services.leaderboard_snapshot import publish_snapshot
+from app.services.trade_cache import LRUTTLCache
+from app.services.upstream_scheduler import remaining_time, request_deadline
+from app.services.wallet_registry_service import list_tracked_wallets
+
+logger = logging.getLogger(__name__)
+
+# Scored live population, kept so single-wallet refreshes can rescore incrementally
+live_scorer = IncrementalScorer(verify=settings.SCORING_VERIFY_INCREMENTAL)
+
+# Last successfully fetched (unscored) metrics per wallet, used for wallets that miss the deadline
+live_metrics_cache = LRUTTLCache(
+    max_bytes=settings.LIVE_METRICS_CACHE_MAX_BYTES,
+    ttl_seconds=settings.LIVE_METRICS_CACHE_TTL_SECONDS,
+)
+
+# Outcome of the latest live fetch: fresh / stale counts and wallets left out
+last_live_fetch: Dict = {}
 
 async def fetch_live_leaderboard_from_file(file_path: str) -> List[Dict]:
     """
@@ -16,11 +38,52 @@ async def fetch_live_leaderboard_from_file(file_path: str) -> List[Dict]:
         
     return await fetch_live_leaderboard(wallets)
 
-async def fetch_live_leaderboard(wallets: List[str]) -> List[Dict]:
+async def fetch_live_leaderboard_from_registry(session: AsyncSession) -> List[Dict]:
+    """
+    Fetch live leaderboard data for the active wallets in the tracked_wallets registry.
+    """
+    entries, _ = await fetch_live_leaderboard_from_registry_with_status(session)
+    return entries
+
+async def fetch_live_leaderboard_from_registry_with_status(session: AsyncSession) -> Tuple[List[Dict], Dict]:
+    """
+    Fetch live leaderboard data for the tracked wallets, with the fetch status.
+    
+    Returns:
+        (ranked entries, fetch status as returned by fetch_live_leaderboard_with_status)
+    """
+    wallets = await list_tracked_wallets(session)
+    return await fetch_live_leaderboard_with_status(wallets)
+
+async def fetch_live_leaderboard(wallets: List[str], deadline_seconds: Optional[float] = None) -> List[Dict]:
+    """
+    Fetch live metrics for a list of wallets and calculate scores.
+    
+    See fetch_live_leaderboard_with_status.
+    """
+    entries, _ = await fetch_live_leaderboard_with_status(wallets, deadline_seconds)
+    return entries
+
+async def fetch_live_leaderboard_with_status(
+    wallets: List[str],
+    deadline_seconds: Optional[float] = None
+) -> Tuple[List[Dict], Dict]:
     """
     Fetch live metrics for a list of wallets and calculate scores.
     Uses concurrency limit to avoid rate limiting.
+    
+    The fetch has a time budget (settings.LIVE_LEADERBOARD_DEADLINE_SECONDS
+    unless deadline_seconds is given) that upstream page fetches inherit.
+    Wallets not fetched in time, or whose fetch failed, are filled from
+    their last fetched metrics and marked data_status="stale"; wallets with
+    nothing cached are left out.
+    
+    Returns:
+        (ranked entries, status with fresh / stale counts, missing wallets,
+        deadline_seconds and fetched_at; also kept in last_live_fetch)
     """
+    if deadline_seconds is None:
+        deadline_seconds = settings.LIVE_LEADERBOARD_DEADLINE_SECONDS
     semaphore = asyncio.Semaphore(5) # Limit concurrency
     
     async def fetch_wallet_safe(wallet: str):
@@ -31,17 +94,49 @@ async def fetch_live_leaderboard(wallets: List[str]) -> List[Dict]:
                 stats = await asyncio.to_thread(PolymarketService.calculate_portfolio_stats, wallet)
                 return transform_stats_for_scoring(stats)
             except Exception as e:
-                print(f"Error fetching stats for {wallet}: {e}")
+                logger.warning(f"Error fetching stats for {wallet}: {e}")
                 return None
 
-    tasks = [fetch_wallet_safe(w) for w in wallets]
-    results = await asyncio.gather(*tasks)
+    # Tasks copy the deadline context, so page fetches in their threads stop once it has passed
+    with request_deadline(deadline_seconds):
+        tasks = {asyncio.create_task(fetch_wallet_safe(w)): w for w in wallets}
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=remaining_time())
+    for task in pending:
+        task.cancel()
     
-    # Filter None results
-    valid_metrics = [r for r in results if r is not None]
+    valid_metrics = []
+    status = {"fresh": 0, "stale": 0, "missing": []}
+    now = datetime.utcnow()
+    for task, wallet in tasks.items():
+        metrics = None if task in pending else task.result()
+        if metrics is not None:
+            if not metrics.get('wallet_address'):
+                metrics['wallet_address'] = wallet
+            metrics['data_status'] = "fresh"
+            metrics['data_as_of'] = now
+            live_metrics_cache.put(wallet.lower(), dict(metrics))
+            status["fresh"] += 1
+        else:
+            cached = live_metrics_cache.get(wallet.lower())
+            if cached is None:
+                status["missing"].append(wallet)
+                continue
+            metrics = dict(cached, data_status="stale")
+            status["stale"] += 1
+        valid_metrics.append(metrics)
     
-    # Calculate scores
-    ranked_leaderboard = calculate_scores_and_rank(valid_metrics)
+    if status["stale"] or status["missing"]:
+        logger.warning(
+            f"Live leaderboard: {status['fresh']} fresh, {status['stale']} stale, "
+            f"{len(status['missing'])} missing after {deadline_seconds}s deadline"
+        )
+    status.update(deadline_seconds=deadline_seconds, fetched_at=now)
+    last_live_fetch.update(status)
+    
+    # Calculate scores (full rebuild of the live population)
+    ranked_leaderboard = live_scorer.load(valid_metrics)
     
     # Sort by PnL Score (default) or PnL
     ranked_leaderboard.sort(key=lambda x: x.get('score_pnl', 0), reverse=True)
@@ -49,8 +144,37 @@ async def fetch_live_leaderboard(wallets: List[str]) -> List[Dict]:
     # Add rank
     for i, entry in enumerate(ranked_leaderboard, 1):
         entry['rank'] = i
+    
+    # Index the scored population for single-wallet rank lookups
+    publish_snapshot(ranked_leaderboard)
         
-    return ranked_leaderboard
+    return ranked_leaderboard, status
+
+async def refresh_wallet_in_live_leaderboard(wallet: str) -> int:
+    """
+    Re-fetch live metrics for one wallet and rescore the live population incrementally.
+    
+    Only traders whose scores change are rewritten; the rank snapshot is
+    republished when anything changed.
+    
+    Returns:
+        Number of traders whose scores changed (0 if no live leaderboard is loaded yet)
+    """
+    if not len(live_scorer):
+        return 0
+    
+    stats = await asyncio.to_thread(PolymarketService.calculate_portfolio_stats, wallet)
+    metrics = transform_stats_for_scoring(stats)
+    if not metrics.get('wallet_address'):
+        metrics['wallet_address'] = wallet
+    metrics['data_status'] = "fresh"
+    metrics['data_as_of'] = datetime.utcnow()
+    live_metrics_cache.put(wallet.lower(), dict(metrics))
+    
+    changed = live_scorer.upsert(metrics)
+    if changed:
+        publish_snapshot(live_scorer.traders)
+    return len(changed)
 
 def transform_stats_for_scoring(stats: Dict) -> Dict:
     """
@@ -0,0 +1,312 @@
+"""
+Cost-basis lot-matching engines on integer fixed-point units.
+
+Sizes are held in micro-shares and prices in micro-USDC per share
+(both scaled by SCALE = 10**6, the USDC / conditional-token precision), so
+lot matching is pure integer arithmetic. Open lots are kept per asset in a
+deque of (size, price) tuples; consuming the oldest lot is O(1) instead of
+list.pop(0)'s O(n).
+
+FifoLotEngine, LifoLotEngine and AverageCostEngine share the
+CostBasisEngine interface, so several cost-basis methods can be evaluated
+side by side in one pass over the same fills.
+
+Converting to fixed point rounds to the nearest micro-unit; trade sizes and
+prices from the Polymarket APIs carry at most 6 decimals, so this is exact
+for real fills.
+"""
+
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+SCALE_DIGITS = 6
+SCALE = 10 ** SCALE_DIGITS
+_SCALE_DECIMAL = Decimal(SCALE)
+_MICRO = Decimal("0.000001")
+
+# Open lot: (size in micro-shares, price in micro-USDC per share)
+Lot = Tuple[int, int]
+
+
+def to_micro(value) -> int:
+    """Convert a Decimal/float/str/int amount to integer micro-units."""
+    if not isinstance(value, Decimal):
+        if isinstance(value, int):
+            return value * SCALE
+        value = Decimal(str(value))
+    numerator, denominator = value.as_integer_ratio()
+    if SCALE % denominator == 0:
+        # At most SCALE_DIGITS decimals: exact without rounding
+        return numerator * (SCALE // denominator)
+    return int(value.scaleb(SCALE_DIGITS).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def from_micro(value: int) -> Decimal:
+    """Convert integer micro-units back to a Decimal amount."""
+    return (Decimal(value) / _SCALE_DECIMAL).quantize(_MICRO)
+
+
+def average_entry_price(matched_size: int, matched_cost: int) -> Decimal:
+    """
+    Average entry price (USDC per share) of a matched sell.
+
+    Args:
+        matched_size: Matched size in micro-shares
+        matched_cost: Sum of size * price over consumed lots (micro-shares * micro-USDC)
+    """
+    return Decimal(matched_cost) / Decimal(matched_size * SCALE)
+
+
+def realized_pnl(sell_size: int, sell_price: int, matched_size: int, matched_cost: int) -> Decimal:
+    """
+    PnL of a sell: (exit_price - average entry price) * sell size, in USDC.
+
+    Matches trade_data_processor semantics: the full sell size is used even
+    when only part of it was matched against open lots.
+    """
+    numerator = (sell_price * matched_size - matched_cost) * sell_size
+    return Decimal(numerator) / Decimal(matched_size * SCALE * SCALE)
+
+
+class CostBasisEngine(ABC):
+    """
+    Interface of a cost-basis engine.
+
+    Engines hold per-asset open position state and answer, for each sell,
+    how much size was matched and at what total cost. State is exposed as a
+    list of integer pairs per asset so it can be persisted and restored.
+    """
+
+    __slots__ = ()
+    method = ""
+
+    @abstractmethod
+    def buy(self, asset: str, size: int, price: int) -> None:
+        """Open size (micro-shares) at price (micro-USDC per share)."""
+
+    @abstractmethod
+    def sell(self, asset: str, size: int) -> Tuple[int, int]:
+        """
+        Close size (micro-shares).
+
+        Returns:
+            (matched size in micro-shares, matched cost in micro-shares * micro-USDC)
+        """
+
+    @abstractmethod
+    def open_lots(self, asset: str) -> List[Lot]:
+        """Persistable state of an asset."""
+
+    @abstractmethod
+    def open_size(self, asset: str) -> int:
+        """Total open size of an asset in micro-shares."""
+
+    @abstractmethod
+    def open_cost(self, asset: str) -> int:
+        """Cost basis of the open position (micro-shares * micro-USDC)."""
+
+    @abstractmethod
+    def assets(self) -> List[str]:
+        """Assets with an open position."""
+
+    def snapshot(self) -> Dict[str, List[Lot]]:
+        """Copy of all state, keyed by asset (for persisting the engine)."""
+        return {asset: self.open_lots(asset) for asset in self.assets()}
+
+
+class FifoLotEngine(CostBasisEngine):
+    """
+    Per-asset FIFO queues of open lots.
+    """
+
+    __slots__ = ("_lots",)
+    method = "fifo"
+
+    def __init__(self, lots: Optional[Dict[str, Iterable[Lot]]] = None):
+        """
+        Args:
+            lots: Optional initial open lots per asset (oldest first)
+        """
+        self._lots: Dict[str, Deque[Lot]] = defaultdict(deque)
+        if lots:
+            for asset, asset_lots in lots.items():
+                queue = deque((int(size), int(price)) for size, price in asset_lots if size > 0)
+                if queue:
+                    self._lots[asset] = queue
+
+    def buy(self, asset: str, size: int, price: int) -> None:
+        """Open a lot (size in micro-shares, price in micro-USDC)."""
+        if size > 0:
+            self._lots[asset].append((size, price))
+
+    def sell(self, asset: str, size: int) -> Tuple[int, int]:
+        """
+        Consume open lots oldest-first.
+
+        Args:
+            asset: Asset ID
+            size: Sell size in micro-shares
+
+        Returns:
+            (matched size in micro-shares, matched cost in micro-shares * micro-USDC).
+            Matched size is less than size when the open lots run out.
+        """
+        queue = self._lots.get(asset)
+        if not queue:
+            return 0, 0
+
+        remaining = size
+        matched_cost = 0
+        while remaining > 0 and queue:
+            lot_size, lot_price = queue[0]
+            if lot_size <= remaining:
+                matched_cost += lot_size * lot_price
+                remaining -= lot_size
+                queue.popleft()
+            else:
+                matched_cost += remaining * lot_price
+                queue[0] = (lot_size - remaining, lot_price)
+                remaining = 0
+
+        if not queue:
+            del self._lots[asset]
+        return size - remaining, matched_cost
+
+    def open_lots(self, asset: str) -> List[Lot]:
+        """Open lots of an asset, oldest first."""
+        return list(self._lots.get(asset, ()))
+
+    def open_size(self, asset: str) -> int:
+        """Total open size of an asset in micro-shares."""
+        return sum(size for size, _ in self._lots.get(asset, ()))
+
+    def open_cost(self, asset: str) -> int:
+        """Cost basis of the open lots of an asset (micro-shares * micro-USDC)."""
+        return sum(size * price for size, price in self._lots.get(asset, ()))
+
+    def assets(self) -> List[str]:
+        """Assets with open lots."""
+        return list(self._lots)
+
+    def snapshot(self) -> Dict[str, List[Lot]]:
+        """Copy of all open lots, keyed by asset (for persisting engine state)."""
+        return {asset: list(queue) for asset, queue in self._lots.items()}
+
+
+class LifoLotEngine(FifoLotEngine):
+    """
+    Per-asset open lots consumed newest-first.
+    """
+
+    __slots__ = ()
+    method = "lifo"
+
+    def sell(self, asset: str, size: int) -> Tuple[int, int]:
+        """Consume open lots newest-first (see FifoLotEngine.sell)."""
+        queue = self._lots.get(asset)
+        if not queue:
+            return 0, 0
+
+        remaining = size
+        matched_cost = 0
+        while remaining > 0 and queue:
+            lot_size, lot_price = queue[-1]
+            if lot_size <= remaining:
+                matched_cost += lot_size * lot_price
+                remaining -= lot_size
+                queue.pop()
+            else:
+                matched_cost += remaining * lot_price
+                queue[-1] = (lot_size - remaining, lot_price)
+                remaining = 0
+
+        if not queue:
+            del self._lots[asset]
+        return size - remaining, matched_cost
+
+
+class AverageCostEngine(CostBasisEngine):
+    """
+    Per-asset pooled position at weighted-average cost.
+
+    State per asset is a single (size, cost) pair: open micro-shares and their
+    total cost in micro-shares * micro-USDC. Sells are charged the average
+    cost of the pool (rounded to the nearest cost unit).
+    """
+
+    __slots__ = ("_pools",)
+    method = "average"
+
+    def __init__(self, lots: Optional[Dict[str, Iterable[Lot]]] = None):
+        """
+        Args:
+            lots: Optional initial state per asset, as returned by snapshot()
+        """
+        self._pools: Dict[str, List[int]] = {}
+        if lots:
+            for asset, pool in lots.items():
+                for size, cost in pool:
+                    if size > 0:
+                        self._pools[asset] = [int(size), int(cost)]
+
+    def buy(self, asset: str, size: int, price: int) -> None:
+        if size <= 0:
+            return
+        pool = self._pools.get(asset)
+        if pool is None:
+            self._pools[asset] = [size, size * price]
+        else:
+            pool[0] += size
+            pool[1] += size * price
+
+    def sell(self, asset: str, size: int) -> Tuple[int, int]:
+        pool = self._pools.get(asset)
+        if pool is None or size <= 0:
+            return 0, 0
+
+        pool_size, pool_cost = pool
+        if size >= pool_size:
+            del self._pools[asset]
+            return pool_size, pool_cost
+
+        matched_cost = (pool_cost * size * 2 + pool_size) // (pool_size * 2)
+        pool[0] = pool_size - size
+        pool[1] = pool_cost - matched_cost
+        return size, matched_cost
+
+    def open_lots(self, asset: str) -> List[Lot]:
+        pool = self._pools.get(asset)
+        return [tuple(pool)] if pool else []
+
+    def open_size(self, asset: str) -> int:
+        pool = self._pools.get(asset)
+        return pool[0] if pool else 0
+
+    def open_cost(self, asset: str) -> int:
+        pool = self._pools.get(asset)
+        return pool[1] if pool else 0
+
+    def assets(self) -> List[str]:
+        return list(self._pools)
+
+
+COST_BASIS_ENGINES = {
+    FifoLotEngine.method: FifoLotEngine,
+    LifoLotEngine.method: LifoLotEngine,
+    AverageCostEngine.method: AverageCostEngine,
+}
+
+
+def create_cost_basis_engine(method: str, lots: Optional[Dict[str, Iterable[Lot]]] = None) -> CostBasisEngine:
+    """
+    Create a cost-basis engine by method name ("fifo", "lifo" or "average").
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    engine_class = COST_BASIS_ENGINES.get(method)
+    if engine_class is None:
+        raise ValueError(f"Unknown cost basis method: {method}. Must be one of {', '.join(COST_BASIS_ENGINES)}")
+    return engine_class(lots)
@@ -0,0 +1,167 @@
+"""
+Persistence of open cost-basis lots between trade processing runs.
+
+After each run the state of every cost-basis engine (open lots per
+(wallet, asset, method)) is stored together with a per-wallet watermark: the
+newest trade timestamp matched, how many trades at or before it were matched,
+and which methods were stored. The next run only matches trades newer than
+the watermark against the stored lots. If the number of fetched trades at or
+before the watermark differs from the stored count (out-of-order or late
+fills), or the requested methods changed, the stored state is not trusted and
+the full history is replayed.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import OpenLot, LotWatermark
+from app.services.lot_engine import CostBasisEngine, create_cost_basis_engine
+
+
+class LotState:
+    """Cost-basis engines and watermark of one wallet, as loaded from the database."""
+
+    __slots__ = ("engines", "last_timestamp", "trade_count")
+
+    def __init__(self, engines: Dict[str, CostBasisEngine], last_timestamp: int, trade_count: int):
+        self.engines = engines
+        self.last_timestamp = last_timestamp
+        self.trade_count = trade_count
+
+    @property
+    def engine(self) -> Optional[CostBasisEngine]:
+        """FIFO engine (the method stored on trades)."""
+        return self.engines.get("fifo")
+
+    def is_consistent_with(self, trades: List[Dict], methods: Optional[Iterable[str]] = None) -> bool:
+        """
+        Check that the fetched history up to the watermark is what was matched.
+
+        Args:
+            trades: All cleaned trades of the wallet
+            methods: Cost-basis methods the caller needs (any stored set if not provided)
+
+        Returns:
+            True if exactly trade_count trades are at or before the watermark
+            and every requested method was stored
+        """
+        if methods is not None and set(methods) != set(self.engines):
+            return False
+        seen = sum(1 for t in trades if t["timestamp"] <= self.last_timestamp)
+        return seen == self.trade_count
+
+
+async def load_lot_state(session: AsyncSession, wallet_address: str) -> Optional[LotState]:
+    """
+    Load the stored engine state and watermark of a wallet.
+
+    Returns:
+        LotState, or None if the wallet has never been processed
+    """
+    wallet = wallet_address.lower()
+    result = await session.execute(
+        select(LotWatermark).where(LotWatermark.proxy_wallet == wallet)
+    )
+    watermark = result.scalar_one_or_none()
+    if watermark is None:
+        return None
+
+    result = await session.execute(
+        select(OpenLot.method, OpenLot.asset, OpenLot.lots).where(OpenLot.proxy_wallet == wallet)
+    )
+    lots_by_method: Dict[str, Dict] = defaultdict(dict)
+    for method, asset, asset_lots in result.all():
+        lots_by_method[method][asset] = asset_lots
+
+    methods = [m for m in (watermark.methods or "fifo").split(",") if m]
+    engines = {method: create_cost_basis_engine(method, lots_by_method.get(method)) for method in methods}
+    return LotState(engines, watermark.last_timestamp, watermark.trade_count)
+
+
+async def save_lot_state(
+    session: AsyncSession,
+    wallet_address: str,
+    engines: Dict[str, CostBasisEngine],
+    last_timestamp: int,
+    trade_count: int,
+    changed_assets: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Stage the engine state and watermark of a wallet (committed by the caller).
+
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        engines: Engines after matching, keyed by method
+        last_timestamp: Newest trade timestamp matched
+        trade_count: Trades matched with timestamp <= last_timestamp
+        changed_assets: Assets touched by this run; None rewrites every asset
+            (used after a full replay)
+    """
+    wallet = wallet_address.lower()
+
+    if changed_assets is None:
+        await session.execute(delete(OpenLot).where(OpenLot.proxy_wallet == wallet))
+    else:
+        changed_assets = set(changed_assets)
+
+    for method, engine in engines.items():
+        assets = engine.assets() if changed_assets is None else changed_assets
+        for asset in assets:
+            lots = engine.open_lots(asset)
+            if not lots:
+                await session.execute(
+                    delete(OpenLot).where(
+                        OpenLot.proxy_wallet == wallet,
+                        OpenLot.asset == asset,
+                        OpenLot.method == method
+                    )
+                )
+                continue
+
+            stmt = pg_insert(OpenLot).values(
+                proxy_wallet=wallet,
+                asset=asset,
+                method=method,
+                lots=[list(lot) for lot in lots]
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_open_lot_wallet_asset_method",
+                set_={"lots": stmt.excluded.lots, "updated_at": stmt.excluded.updated_at}
+            )
+            await session.execute(stmt)
+
+    stmt = pg_insert(LotWatermark).values(
+        proxy_wallet=wallet,
+        last_timestamp=last_timestamp,
+        trade_count=trade_count,
+        methods=",".join(sorted(engines))
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["proxy_wallet"],
+        set_={
+            "last_timestamp": stmt.excluded.last_timestamp,
+            "trade_count": stmt.excluded.trade_count,
+            "methods": stmt.excluded.methods,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    await session.execute(stmt)
+
+
+def next_watermark(state: Optional[LotState], new_trades: List[Dict]) -> Tuple[int, int]:
+    """
+    Watermark after matching new_trades (all newer than state's watermark) on top of state.
+
+    Returns:
+        (last_timestamp, trade_count)
+    """
+    last_timestamp = state.last_timestamp if state is not None else 0
+    trade_count = state.trade_count if state is not None else 0
+    if not new_trades:
+        return last_timestamp, trade_count
+    return max(t["timestamp"] for t in new_trades), trade_count + len(new_trades)
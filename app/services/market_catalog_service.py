@@ -0,0 +1,282 @@
+"""
+Local market catalog.
+
+Markets are synced from the Polymarket Gamma markets API (one endpoint,
+offset pagination) into the markets table
+(condition_id, slug, event slug, category, outcomes, token ids, resolution,
+end date), so scoring, trader detail and the markets router read market
+metadata and resolutions from the database instead of refetching them per
+request.
+
+The sync is incremental: each row carries a hash of its synced fields and
+the upsert only writes rows that are new or changed. Resolved markets are
+paged most recently closed first and do not change afterwards, so paging
+through them stops at the first page that brings nothing new; active markets
+are paged through in full.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Market
+from app.services.data_fetcher import extract_market_resolution, fetch_markets_page, get_market_category
+from app.services.market_index import MarketIndex
+from app.services.upstream_scheduler import PRIORITY_REFRESH, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATUSES = ("active", "resolved")
+_SYNCED_FIELDS = (
+    "market_id", "slug", "event_slug", "question", "category", "outcomes",
+    "token_ids", "resolution", "active", "closed", "end_date",
+)
+
+
+def _json_list(value) -> Optional[List]:
+    """Lists may arrive as JSON-encoded strings (e.g. outcomes, clobTokenIds)."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return list(value) if isinstance(value, (list, tuple)) else None
+
+
+def normalize_market(raw: Dict) -> Optional[Dict]:
+    """
+    Convert an upstream market dict into a markets row.
+
+    Returns:
+        Row dictionary, or None if the market has no condition id
+    """
+    condition_id = raw.get("condition_id") or raw.get("conditionId")
+    if not condition_id:
+        return None
+
+    tokens = raw.get("tokens") if isinstance(raw.get("tokens"), list) else []
+    outcomes = _json_list(raw.get("outcomes")) or [t.get("outcome") for t in tokens if t.get("outcome")] or None
+    token_ids = (
+        _json_list(raw.get("clobTokenIds") or raw.get("clob_token_ids"))
+        or [str(t.get("token_id")) for t in tokens if t.get("token_id")]
+        or None
+    )
+
+    resolution = extract_market_resolution(raw)
+    if resolution is None:
+        winner = next((t.get("outcome") for t in tokens if t.get("winner")), None)
+        if winner:
+            resolution = str(winner).upper()
+    if resolution is None and raw.get("closed"):
+        # Gamma markets: a closed market's winning outcome settles at price 1
+        prices = _json_list(raw.get("outcomePrices")) or []
+        if outcomes and len(prices) == len(outcomes):
+            try:
+                winners = [o for o, p in zip(outcomes, prices) if float(p) >= 0.999]
+            except (TypeError, ValueError):
+                winners = []
+            if len(winners) == 1:
+                resolution = str(winners[0]).upper()
+
+    events = raw.get("events") if isinstance(raw.get("events"), list) else []
+    event_slug = raw.get("event_slug") or raw.get("eventSlug") or (events[0].get("slug") if events else None)
+    category = get_market_category(raw)
+
+    row = {
+        "condition_id": condition_id,
+        "market_id": str(raw.get("id") or raw.get("market_id") or "") or None,
+        "slug": raw.get("slug") or raw.get("market_slug") or raw.get("marketSlug"),
+        "event_slug": event_slug,
+        "question": raw.get("question") or raw.get("title"),
+        "category": category,
+        "outcomes": outcomes,
+        "token_ids": token_ids,
+        "resolution": resolution,
+        "active": bool(raw.get("active", True)),
+        "closed": bool(raw.get("closed")),
+        "end_date": raw.get("end_date_iso") or raw.get("endDate") or raw.get("end_date"),
+    }
+    row["content_hash"] = hashlib.sha1(
+        json.dumps([row[field] for field in _SYNCED_FIELDS], default=str).encode()
+    ).hexdigest()
+    return row
+
+
+def market_to_dict(market: Market) -> Dict[str, Any]:
+    """Catalog row as a market dict usable by MarketIndex and the markets API."""
+    return {
+        "id": market.market_id or market.condition_id,
+        "market_id": market.market_id,
+        "condition_id": market.condition_id,
+        "slug": market.slug,
+        "market_slug": market.slug,
+        "event_slug": market.event_slug,
+        "question": market.question,
+        "category": market.category,
+        "outcomes": market.outcomes,
+        "token_ids": market.token_ids,
+        "resolution": market.resolution,
+        "resolved": market.resolution is not None,
+        "active": market.active,
+        "closed": market.closed,
+        "end_date": market.end_date,
+    }
+
+
+async def upsert_markets(session: AsyncSession, rows: Iterable[Dict]) -> int:
+    """
+    Insert new markets and update changed ones (staged, committed by the caller).
+
+    Returns:
+        Number of rows inserted or updated (unchanged rows are not written)
+    """
+    # One row per condition id: ON CONFLICT cannot touch the same row twice
+    unique_rows = list({row["condition_id"]: row for row in rows}.values())
+    if not unique_rows:
+        return 0
+
+    stmt = pg_insert(Market).values(unique_rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["condition_id"],
+        set_={
+            **{field: getattr(stmt.excluded, field) for field in _SYNCED_FIELDS},
+            "content_hash": stmt.excluded.content_hash,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=Market.content_hash != stmt.excluded.content_hash
+    )
+    result = await session.execute(stmt)
+    return result.rowcount or 0
+
+
+async def sync_markets(
+    session: AsyncSession,
+    statuses: Tuple[str, ...] = SYNC_STATUSES,
+    page_size: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> Dict:
+    """
+    Pull markets from the upstream API into the catalog.
+
+    Args:
+        session: Database session (committed after every page)
+        statuses: Market statuses to sync
+        page_size: Markets per page (settings.MARKET_SYNC_PAGE_SIZE)
+        max_pages: Stop each status after this many pages
+
+    Returns:
+        Dictionary with fetched and written counts
+    """
+    page_size = page_size or settings.MARKET_SYNC_PAGE_SIZE
+    fetched = 0
+    written = 0
+
+    for status in statuses:
+        offset = 0
+        pages = 0
+        while True:
+            # fetch_markets_page uses blocking requests; keep it off the event loop
+            raw_markets = await asyncio.to_thread(fetch_markets_page, status, page_size, offset)
+            if not raw_markets:
+                break
+            rows = [row for row in (normalize_market(m) for m in raw_markets) if row]
+            changed = await upsert_markets(session, rows)
+            await session.commit()
+
+            fetched += len(raw_markets)
+            written += changed
+            pages += 1
+
+            if status == "resolved" and changed == 0:
+                break
+            if max_pages is not None and pages >= max_pages:
+                break
+            # The API may cap the page size below page_size; continue from what was returned
+            offset += len(raw_markets)
+
+    return {"fetched": fetched, "written": written}
+
+
+async def count_catalog_markets(session: AsyncSession) -> int:
+    result = await session.execute(select(func.count()).select_from(Market))
+    return int(result.scalar_one())
+
+
+def _status_filter(stmt, status: Optional[str]):
+    if status == "resolved":
+        return stmt.where(Market.resolution.isnot(None))
+    if status == "closed":
+        return stmt.where(Market.closed.is_(True))
+    if status == "active":
+        return stmt.where(Market.closed.isnot(True))
+    return stmt
+
+
+async def list_catalog_markets(
+    session: AsyncSession,
+    status: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Dict], int]:
+    """
+    Page through catalog markets.
+
+    Returns:
+        (market dicts, total matching markets)
+    """
+    total = await session.execute(_status_filter(select(func.count()).select_from(Market), status))
+    result = await session.execute(
+        _status_filter(select(Market), status).order_by(Market.id).limit(limit).offset(offset)
+    )
+    return [market_to_dict(m) for m in result.scalars().all()], int(total.scalar_one())
+
+
+async def load_market_index(
+    session: AsyncSession,
+    market_ids: Optional[Iterable[str]] = None,
+    resolved_only: bool = False
+) -> MarketIndex:
+    """
+    Build a MarketIndex over the catalog.
+
+    Args:
+        session: Database session
+        market_ids: Only markets with one of these slugs / condition ids / market ids (whole catalog if not provided)
+        resolved_only: Only resolved markets
+    """
+    stmt = select(Market)
+    if market_ids is not None:
+        keys = {str(m) for m in market_ids if m}
+        keys |= {k.lower() for k in keys}
+        if not keys:
+            return MarketIndex()
+        keys = list(keys)
+        stmt = stmt.where(or_(Market.slug.in_(keys), Market.condition_id.in_(keys), Market.market_id.in_(keys)))
+    if resolved_only:
+        stmt = stmt.where(Market.resolution.isnot(None))
+    result = await session.execute(stmt)
+    return MarketIndex(market_to_dict(m) for m in result.scalars().all())
+
+
+async def run_market_sync_loop(interval_seconds: int) -> None:
+    """Sync the catalog every interval_seconds until cancelled (application background task)."""
+    from app.db.session import AsyncSessionLocal
+
+    with upstream_priority(PRIORITY_REFRESH):
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await sync_markets(session)
+                logger.info(f"Market sync: {result['fetched']} fetched, {result['written']} new or changed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market sync failed: {e}")
+            await asyncio.sleep(interval_seconds)
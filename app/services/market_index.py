@@ -0,0 +1,114 @@
+"""
+Hash-indexed market catalog.
+
+get_market_by_id scans the whole markets list (lowercasing identifiers on
+every comparison) for each lookup, which makes per-wallet scoring
+O(trades x markets). MarketIndex is built once per markets list: every
+market is registered under its case-normalized id, market_id, slug,
+market_slug and condition_id, and its resolution and category are
+computed once, so each lookup is a dict access.
+
+Lookups never touch the network: markets missing from the index are fetched
+up front by market_resolver.prefetch_market_resolutions.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+from app.services.data_fetcher import extract_market_resolution, get_market_category
+
+# Fields get_market_by_id matches on, in its order of precedence
+PRIMARY_ID_FIELDS = ("id", "market_id", "slug", "market_slug", "marketSlug")
+# Further identifiers a trade may reference a market by
+ALIAS_ID_FIELDS = ("id", "market_id", "slug", "market_slug", "marketSlug", "condition_id", "conditionId")
+
+
+def _normalize(market_id) -> str:
+    return str(market_id).lower()
+
+
+class MarketEntry:
+    """A market with its precomputed resolution and category."""
+
+    __slots__ = ("market", "resolution", "category")
+
+    def __init__(self, market: Dict):
+        self.market = market
+        self.resolution = extract_market_resolution(market)
+        self.category = get_market_category(market)
+
+
+class MarketIndex:
+    """O(1) market lookup by any case-normalized identifier."""
+
+    def __init__(self, markets: Iterable[Dict] = ()):
+        self.markets: List[Dict] = []
+        self._entries: Dict[str, MarketEntry] = {}
+        pending = []
+        for market in markets:
+            entry = MarketEntry(market)
+            self.markets.append(market)
+            pending.append(entry)
+            self._register_primary(entry)
+        # Aliases never shadow a primary identifier (or an earlier market)
+        for entry in pending:
+            self._register_aliases(entry)
+
+    @classmethod
+    def of(cls, markets: Union["MarketIndex", Iterable[Dict]]) -> "MarketIndex":
+        """Return markets unchanged if already indexed, else index them."""
+        if isinstance(markets, MarketIndex):
+            return markets
+        return cls(markets)
+
+    def _register_primary(self, entry: MarketEntry, overwrite: bool = False) -> None:
+        market = entry.market
+        primary = next((market.get(field) for field in PRIMARY_ID_FIELDS if market.get(field)), None)
+        if primary:
+            self._register(primary, entry, overwrite)
+
+    def _register_aliases(self, entry: MarketEntry, overwrite: bool = False) -> None:
+        for field in ALIAS_ID_FIELDS:
+            value = entry.market.get(field)
+            if value:
+                self._register(value, entry, overwrite)
+
+    def _register(self, market_id, entry: MarketEntry, overwrite: bool) -> None:
+        if overwrite:
+            self._entries[_normalize(market_id)] = entry
+        else:
+            self._entries.setdefault(_normalize(market_id), entry)
+
+    def add(self, market: Dict, alias: Optional[str] = None) -> MarketEntry:
+        """
+        Add a market fetched after the index was built.
+
+        The fetched data is newer, so it replaces whatever its identifiers
+        (and alias, the id it was requested by) pointed to.
+        """
+        entry = MarketEntry(market)
+        self.markets.append(market)
+        self._register_aliases(entry, overwrite=True)
+        if alias:
+            self._register(alias, entry, overwrite=True)
+        return entry
+
+    def entry(self, market_id) -> Optional[MarketEntry]:
+        if not market_id:
+            return None
+        return self._entries.get(_normalize(market_id))
+
+    def get(self, market_id) -> Optional[Dict]:
+        """Market data by id, slug, market_slug or condition_id (case-insensitive)."""
+        entry = self.entry(market_id)
+        return entry.market if entry is not None else None
+
+    def resolution(self, market_id) -> Optional[str]:
+        """Resolution (YES/NO) of a market, or None if unresolved or unknown."""
+        entry = self.entry(market_id)
+        return entry.resolution if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def __contains__(self, market_id) -> bool:
+        return self.entry(market_id) is not None
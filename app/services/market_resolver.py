@@ -0,0 +1,150 @@
+"""
+Batched prefetch of markets missing from the catalog.
+
+Scoring used to look up unknown markets one at a time, synchronously, in
+the middle of the scoring loop. prefetch_market_resolutions runs before
+scoring instead: it collects every market id of a wallet (or a batch of
+wallets) that the MarketIndex cannot resolve, fetches them concurrently
+with one shared HTTP client, adds the results to the index and the markets
+catalog, and leaves scoring with pure in-memory lookups.
+
+Lookups are deduplicated (also across concurrent prefetches sharing the
+module-level resolver), and markets that were not found or are still
+unresolved are negatively cached for MARKET_RESOLVER_NEGATIVE_TTL_SECONDS.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set, Union
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.data_fetcher import fetch_market_by_identifier
+from app.services.market_catalog_service import normalize_market, upsert_markets
+from app.services.market_index import MarketIndex
+from app.services.trade_record import TradeRecord, normalize_trades
+
+logger = logging.getLogger(__name__)
+
+
+def trade_market_ids(trades: Iterable[Union[TradeRecord, Dict]]) -> Set[str]:
+    """Distinct market identifiers referenced by trades (raw dicts or TradeRecords)."""
+    return {record.market_id for record in normalize_trades(trades) if record.market_id}
+
+
+class MarketResolver:
+    """Concurrent market lookups with in-flight dedup and a negative cache."""
+
+    def __init__(self, concurrency: Optional[int] = None, negative_ttl: Optional[int] = None):
+        self.concurrency = concurrency or settings.MARKET_RESOLVER_CONCURRENCY
+        self.negative_ttl = negative_ttl if negative_ttl is not None else settings.MARKET_RESOLVER_NEGATIVE_TTL_SECONDS
+        self._misses: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _recently_missed(self, key: str, now: float) -> bool:
+        expires = self._misses.get(key)
+        if expires is None:
+            return False
+        if expires <= now:
+            del self._misses[key]
+            return False
+        return True
+
+    async def prefetch(
+        self,
+        market_index: MarketIndex,
+        market_ids: Iterable[str],
+        session: Optional[AsyncSession] = None
+    ) -> Dict:
+        """
+        Fetch every market in market_ids the index cannot resolve yet.
+
+        Args:
+            market_index: Index to fill (updated in place)
+            market_ids: Market identifiers (slugs or condition ids) about to be scored
+            session: If given, fetched markets are also upserted into the catalog
+
+        Returns:
+            Dictionary with requested, fetched, resolved, cached_misses and failed counts
+        """
+        now = time.monotonic()
+        pending: Dict[str, str] = {}
+        cached_misses = 0
+        for market_id in market_ids:
+            if not market_id or market_index.resolution(market_id) is not None:
+                continue
+            key = str(market_id).lower()
+            if key in pending:
+                continue
+            if self._recently_missed(key, now):
+                cached_misses += 1
+                continue
+            pending[key] = str(market_id)
+
+        stats = {"requested": len(pending), "fetched": 0, "resolved": 0, "cached_misses": cached_misses, "failed": 0}
+        if not pending:
+            return stats
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            async def lookup(market_id):
+                async with semaphore:
+                    return await fetch_market_by_identifier(market_id, client)
+
+            waits = {}
+            owned = {}
+            for key, market_id in pending.items():
+                future = self._inflight.get(key)
+                if future is None or future.get_loop() is not loop:
+                    future = asyncio.ensure_future(lookup(market_id))
+                    self._inflight[key] = future
+                    owned[key] = future
+                waits[key] = future
+            try:
+                results = await asyncio.gather(*waits.values(), return_exceptions=True)
+            finally:
+                for key, future in owned.items():
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+        rows = []
+        expires = time.monotonic() + self.negative_ttl
+        for (key, market_id), market in zip(pending.items(), results):
+            if isinstance(market, Exception):
+                stats["failed"] += 1
+                logger.warning(f"Market lookup failed for {market_id}: {market}")
+                continue
+            if not market:
+                self._misses[key] = expires
+                continue
+            stats["fetched"] += 1
+            entry = market_index.add(market, alias=market_id)
+            if entry.resolution is not None:
+                stats["resolved"] += 1
+            else:
+                self._misses[key] = expires
+            row = normalize_market(market)
+            if row:
+                rows.append(row)
+
+        if session is not None and rows:
+            await upsert_markets(session, rows)
+            await session.commit()
+        return stats
+
+
+# Process-wide resolver, so the negative cache and in-flight lookups are shared
+market_resolver = MarketResolver()
+
+
+async def prefetch_market_resolutions(
+    market_index: MarketIndex,
+    market_ids: Iterable[str],
+    session: Optional[AsyncSession] = None
+) -> Dict:
+    """Fill market_index with every market in market_ids it cannot resolve yet (see MarketResolver.prefetch)."""
+    return await market_resolver.prefetch(market_index, market_ids, session)
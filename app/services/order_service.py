@@ -1,5 +1,6 @@
 """Order service for saving and retrieving orders."""
 
+import asyncio
 from typing import List, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -130,7 +131,9 @@ async def fetch_and_save_orders(
         Tuple of (orders list, saved count, pagination info)
     """
     # Fetch orders from API
-    data = fetch_orders_from_dome(limit=limit, status=status, market_slug=market_slug, user=user)
+    data = await asyncio.to_thread(
+        fetch_orders_from_dome, limit=limit, status=status, market_slug=market_slug, user=user
+    )
     
     orders = data.get("orders", [])
     pagination = data.get("pagination", {})
@@ -2,11 +2,13 @@
 
 import asyncio
 from typing import Dict, List
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
+from app.services.data_fetcher import fetch_positions_for_wallet, fetch_user_activity
 from app.services.trade_service import get_trades_from_db, fetch_and_save_trades
-from app.services.position_service import get_positions_from_db, fetch_and_save_positions
-from app.services.activity_service import get_activities_from_db, fetch_and_save_activities
+from app.services.position_service import get_positions_from_db, fetch_and_save_positions, save_positions_to_db
+from app.services.activity_service import get_activities_from_db, fetch_and_save_activities, save_activities_to_db
 from app.db.models import Trade, Position, Activity
 
 
@@ -88,40 +90,98 @@ async def calculate_user_pnl(
             print(f"Warning: Failed to fetch activities from API: {e}")
             activities = []
     
-    # Initialize PnL metrics
+    # Aggregate positions
     total_invested = Decimal('0')
     total_realized_pnl = Decimal('0')
     total_unrealized_pnl = Decimal('0')
-    total_rewards = Decimal('0')
-    total_redemptions = Decimal('0')
     total_current_value = Decimal('0')
-    
-    # Calculate from positions
-    # Calculate from positions
+    active_positions = 0
+    closed_positions = 0
     for position in positions:
-        # Add initial investment
         total_invested += safe_decimal(position.initial_value)
-        
-        # Add realized PnL from positions
         realized = safe_decimal(position.realized_pnl)
         total_realized_pnl += realized
-        
-        # Calculate unrealized PnL (cash_pnl - realized_pnl)
-        # For closed positions, unrealized will be 0 since cash_pnl = realized_pnl
-        cash_pnl = safe_decimal(position.cash_pnl)
-        unrealized = cash_pnl - realized
-        total_unrealized_pnl += unrealized
-        
-        # Add current value
-        total_current_value += safe_decimal(position.current_value)
-    
-    # Calculate from activities (rewards and redemptions)
+        # Unrealized PnL = cash_pnl - realized_pnl (0 for closed positions)
+        total_unrealized_pnl += safe_decimal(position.cash_pnl) - realized
+        current_value = safe_decimal(position.current_value)
+        total_current_value += current_value
+        if current_value > 0:
+            active_positions += 1
+        elif current_value == 0:
+            closed_positions += 1
+    
+    # Aggregate activities (rewards and redemptions)
+    total_rewards = Decimal('0')
+    total_redemptions = Decimal('0')
     for activity in activities:
         if activity.type == "REWARD":
             total_rewards += safe_decimal(activity.usdc_size)
         elif activity.type == "REDEEM":
             total_redemptions += safe_decimal(activity.usdc_size)
     
+    # Aggregate trades
+    total_trade_size = Decimal('0')
+    total_stakes = Decimal('0')
+    total_trade_pnl = Decimal('0')
+    total_trades_with_pnl = 0
+    winning_trades = 0
+    stakes_of_wins = Decimal('0')
+    for trade in trades:
+        size = safe_decimal(trade.size)
+        stake = size * safe_decimal(trade.price)
+        total_trade_size += size
+        total_stakes += stake
+        if trade.pnl is not None:
+            total_trade_pnl += trade.pnl
+            total_trades_with_pnl += 1
+            if trade.pnl > 0:
+                winning_trades += 1
+                stakes_of_wins += stake
+    
+    return summarize_user_pnl(wallet_address, {
+        "total_positions": len(positions),
+        "active_positions": active_positions,
+        "closed_positions": closed_positions,
+        "total_invested": total_invested,
+        "total_realized_pnl": total_realized_pnl,
+        "total_unrealized_pnl": total_unrealized_pnl,
+        "total_current_value": total_current_value,
+        "total_rewards": total_rewards,
+        "total_redemptions": total_redemptions,
+        "total_trades": len(trades),
+        "buy_trades": len([t for t in trades if t.side == "BUY"]),
+        "sell_trades": len([t for t in trades if t.side == "SELL"]),
+        "total_trade_size": total_trade_size,
+        "total_stakes": total_stakes,
+        "total_trade_pnl": total_trade_pnl,
+        "total_trades_with_pnl": total_trades_with_pnl,
+        "winning_trades": winning_trades,
+        "stakes_of_wins": stakes_of_wins,
+    })
+
+
+def summarize_user_pnl(wallet_address: str, totals: Dict) -> Dict:
+    """
+    Build the PnL response from position, activity and trade aggregates.
+    
+    Args:
+        wallet_address: Wallet address
+        totals: Aggregates as returned by load_pnl_aggregates
+    
+    Returns:
+        Dictionary with comprehensive PnL metrics
+    """
+    total_invested = totals["total_invested"]
+    total_realized_pnl = totals["total_realized_pnl"]
+    total_unrealized_pnl = totals["total_unrealized_pnl"]
+    total_rewards = totals["total_rewards"]
+    total_redemptions = totals["total_redemptions"]
+    total_stakes = totals["total_stakes"]
+    total_trade_pnl = totals["total_trade_pnl"]
+    total_trades = totals["total_trades"]
+    total_trades_with_pnl = totals["total_trades_with_pnl"]
+    winning_trades_count = totals["winning_trades"]
+    
     # Calculate total PnL
     total_pnl = total_realized_pnl + total_unrealized_pnl + total_rewards - total_redemptions
     
@@ -130,63 +190,30 @@ async def calculate_user_pnl(
     if total_invested > 0:
         pnl_percentage = (total_pnl / total_invested) * 100
     
-    # Count statistics
-    total_trades = len(trades)
-    buy_trades = len([t for t in trades if t.side == "BUY"])
-    sell_trades = len([t for t in trades if t.side == "SELL"])
-    active_positions = len([p for p in positions if safe_decimal(p.current_value) > 0])
-    closed_positions = len([p for p in positions if safe_decimal(p.current_value) == 0])
-    
     # Calculate average trade size
     avg_trade_size = Decimal('0')
     if total_trades > 0:
-        total_trade_size = sum(safe_decimal(t.size) for t in trades)
-        avg_trade_size = total_trade_size / total_trades
-    
-    # Calculate key metrics from trades
-    # 1. Total PnL from trades = sum of all trade PnLs
-    total_trade_pnl = Decimal('0')
-    total_stakes = Decimal('0')  # Sum of all stakes (size * price)
-    winning_trades_count = 0
-    total_trades_with_pnl = 0
-    stakes_of_wins = Decimal('0')  # Sum of stakes for winning trades
+        avg_trade_size = totals["total_trade_size"] / total_trades
     
-    for trade in trades:
-        # Calculate stake for this trade (initial value invested)
-        size = safe_decimal(trade.size)
-        price = safe_decimal(trade.price)
-        stake = size * price
-        total_stakes += stake
-        
-        # Only count trades with calculated PnL
-        if trade.pnl is not None:
-            total_trade_pnl += trade.pnl
-            total_trades_with_pnl += 1
-            
-            # Check if this is a winning trade (pnl > 0)
-            if trade.pnl > 0:
-                winning_trades_count += 1
-                stakes_of_wins += stake
-    
-    # 2. ROI = (Total PnL from trades / Total stakes) * 100
+    # ROI = (Total PnL from trades / Total stakes) * 100
     roi = Decimal('0')
     if total_stakes > 0:
         roi = (total_trade_pnl / total_stakes) * 100
     
-    # 3. Win Rate = (Winning trades ÷ Total trades) × 100
+    # Win Rate = (Winning trades ÷ Total trades) × 100
     win_rate = Decimal('0')
     if total_trades_with_pnl > 0:
         win_rate = (winning_trades_count / total_trades_with_pnl) * 100
     
-    # 4. Stake-Weighted Win Rate = Sum(stakes of wins) ÷ Sum(stakes of all trades)
+    # Stake-Weighted Win Rate = Sum(stakes of wins) ÷ Sum(stakes of all trades)
     stake_weighted_win_rate = Decimal('0')
     if total_stakes > 0:
-        stake_weighted_win_rate = (stakes_of_wins / total_stakes) * 100
+        stake_weighted_win_rate = (totals["stakes_of_wins"] / total_stakes) * 100
     
     return {
         "wallet_address": wallet_address,
         "total_invested": float(total_invested),
-        "total_current_value": float(total_current_value),
+        "total_current_value": float(totals["total_current_value"]),
         "total_realized_pnl": float(total_realized_pnl),
         "total_unrealized_pnl": float(total_unrealized_pnl),
         "total_rewards": float(total_rewards),
@@ -204,11 +231,11 @@ async def calculate_user_pnl(
         },
         "statistics": {
             "total_trades": total_trades,
-            "buy_trades": buy_trades,
-            "sell_trades": sell_trades,
-            "active_positions": active_positions,
-            "closed_positions": closed_positions,
-            "total_positions": len(positions),
+            "buy_trades": totals["buy_trades"],
+            "sell_trades": totals["sell_trades"],
+            "active_positions": totals["active_positions"],
+            "closed_positions": totals["closed_positions"],
+            "total_positions": totals["total_positions"],
             "avg_trade_size": float(avg_trade_size),
         },
         "breakdown": {
@@ -223,3 +250,159 @@ async def calculate_user_pnl(
         }
     }
 
+
+# Position, activity and trade aggregates of one wallet in a single statement;
+# {trade_pnl} is the trades.pnl column, or NULL on databases created before it existed
+_PNL_AGGREGATES_TEMPLATE = """
+    WITH p AS (
+        SELECT
+            count(*) AS total_positions,
+            count(*) FILTER (WHERE coalesce(current_value, 0) > 0) AS active_positions,
+            count(*) FILTER (WHERE coalesce(current_value, 0) = 0) AS closed_positions,
+            coalesce(sum(initial_value), 0) AS total_invested,
+            coalesce(sum(realized_pnl), 0) AS total_realized_pnl,
+            coalesce(sum(coalesce(cash_pnl, 0) - coalesce(realized_pnl, 0)), 0) AS total_unrealized_pnl,
+            coalesce(sum(current_value), 0) AS total_current_value
+        FROM positions
+        WHERE proxy_wallet = :wallet_address
+    ),
+    a AS (
+        SELECT
+            count(*) AS total_activities,
+            coalesce(sum(usdc_size) FILTER (WHERE type = 'REWARD'), 0) AS total_rewards,
+            coalesce(sum(usdc_size) FILTER (WHERE type = 'REDEEM'), 0) AS total_redemptions
+        FROM activities
+        WHERE proxy_wallet = :wallet_address
+    ),
+    t AS (
+        SELECT
+            count(*) AS total_trades,
+            count(*) FILTER (WHERE side = 'BUY') AS buy_trades,
+            count(*) FILTER (WHERE side = 'SELL') AS sell_trades,
+            coalesce(sum(size), 0) AS total_trade_size,
+            coalesce(sum(coalesce(size, 0) * coalesce(price, 0)), 0) AS total_stakes,
+            coalesce(sum(pnl), 0) AS total_trade_pnl,
+            count(pnl) AS total_trades_with_pnl,
+            count(*) FILTER (WHERE pnl > 0) AS winning_trades,
+            coalesce(sum(coalesce(size, 0) * coalesce(price, 0)) FILTER (WHERE pnl > 0), 0) AS stakes_of_wins
+        FROM (
+            SELECT side, size, price, {trade_pnl} AS pnl
+            FROM trades
+            WHERE proxy_wallet = :wallet_address
+        ) AS wallet_trades
+    )
+    SELECT * FROM p, a, t
+"""
+PNL_AGGREGATES_SQL = text(_PNL_AGGREGATES_TEMPLATE.format(trade_pnl="pnl"))
+PNL_AGGREGATES_WITHOUT_TRADE_PNL_SQL = text(_PNL_AGGREGATES_TEMPLATE.format(trade_pnl="CAST(NULL AS numeric)"))
+
+# Set once trades.pnl is found (columns are added by migrations, never dropped)
+_trades_have_pnl = False
+
+
+async def trades_have_pnl_column(session: AsyncSession) -> bool:
+    """Whether the trades table has the pnl column (older databases may not, see get_trades_from_db)."""
+    global _trades_have_pnl
+    if not _trades_have_pnl:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'trades'
+            AND column_name = 'pnl'
+        """))
+        _trades_have_pnl = bool(result.all())
+    return _trades_have_pnl
+
+
+async def load_pnl_aggregates(session: AsyncSession, wallet_address: str) -> Dict:
+    """
+    Load position, activity and trade aggregates in one database round trip.
+    
+    Databases without trades.pnl (checked until the column is found) get
+    NULL trade PnL, as get_trades_from_db leaves it unset.
+    
+    Returns:
+        Dictionary of totals (Decimal sums and integer counts), including
+        total_activities to detect wallets that were never backfilled
+    """
+    statement = PNL_AGGREGATES_SQL if await trades_have_pnl_column(session) else PNL_AGGREGATES_WITHOUT_TRADE_PNL_SQL
+    result = await session.execute(statement, {"wallet_address": wallet_address})
+    return dict(result.mappings().one())
+
+
+async def backfill_wallet_data(session: AsyncSession, wallet_address: str, sources: List[str]) -> None:
+    """
+    Fetch missing trades / positions / activities from the API concurrently and save them.
+    
+    API calls run concurrently; positions and activities are saved one after
+    another on the session once all calls are done. Trades go through
+    fetch_and_save_trades (the only source saving during the calls), which
+    also refreshes the trades cache. A failed source is logged and skipped,
+    like the sequential fallbacks.
+    
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+        sources: Any of "trades", "positions", "activities"
+    """
+    fetchers = {
+        "trades": lambda: fetch_and_save_trades(session, wallet_address),
+        "positions": lambda: asyncio.to_thread(fetch_positions_for_wallet, wallet_address),
+        "activities": lambda: asyncio.to_thread(fetch_user_activity, wallet_address),
+    }
+    savers = {
+        "positions": save_positions_to_db,
+        "activities": save_activities_to_db,
+    }
+    results = await asyncio.gather(*(fetchers[source]() for source in sources), return_exceptions=True)
+    
+    for source, data in zip(sources, results):
+        if isinstance(data, Exception):
+            if source == "trades":
+                await session.rollback()
+            print(f"Warning: Failed to fetch {source} from API: {data}")
+            continue
+        if source == "trades":
+            continue
+        try:
+            await savers[source](session, wallet_address, data)
+        except Exception as e:
+            await session.rollback()
+            print(f"Warning: Failed to save {source} from API: {e}")
+
+
+async def calculate_user_pnl_aggregated(
+    session: AsyncSession,
+    wallet_address: str
+) -> Dict:
+    """
+    Calculate comprehensive PnL for a user with aggregates computed in the database.
+    
+    Same result as calculate_user_pnl, but positions, activities and trades
+    are summed by a single SQL statement instead of loading ORM objects.
+    Sources with no stored rows are backfilled from the API concurrently,
+    followed by one more aggregate query. A wallet already in the database
+    costs one round trip.
+    
+    Args:
+        session: Database session
+        wallet_address: Wallet address
+    
+    Returns:
+        Dictionary with comprehensive PnL metrics
+    """
+    totals = await load_pnl_aggregates(session, wallet_address)
+    
+    missing = [
+        source for source, count_field in (
+            ("trades", "total_trades"),
+            ("positions", "total_positions"),
+            ("activities", "total_activities"),
+        )
+        if totals[count_field] == 0
+    ]
+    if missing:
+        await backfill_wallet_data(session, wallet_address, missing)
+        totals = await load_pnl_aggregates(session, wallet_address)
+    
+    return summarize_user_pnl(wallet_address, totals)
@@ -0,0 +1,230 @@
+"""
+Set-based FIFO recompute of trade entry price, exit price and PnL.
+
+Re-derives the columns calculate_trade_pnl writes, for every wallet, inside
+Postgres instead of pulling trades into Python. Matching works on cumulative
+quantities per (proxy_wallet, asset), ordered by (timestamp, id):
+
+  - B, S: running buy / sell size up to and including each trade.
+  - A sell can only consume open size, so the cumulative size consumed by
+    sells is C = S + min(0, min over earlier rows of (B - S)); a sell
+    consumes the interval [previous C, C) of the buy queue.
+  - Buy lots occupy [B - size, B) of the same axis. The cost of the first x
+    units bought is looked up by sorting sell breakpoints in among the lot
+    starts and carrying the enclosing lot forward, so the cost of a sell's
+    interval is a difference of two lookups.
+
+Everything is window functions (no per-sell range join), and each partition
+of wallets is written back with a single UPDATE ... FROM. Sizes and prices
+are rounded to 6 decimals exactly like lot_engine's fixed-point units, so
+results agree with calculate_trade_pnl.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITIONS = 16
+
+# :partitions / :partition select a hash bucket of wallets;
+# :wallet (optional) restricts the recompute to one wallet.
+FIFO_RECOMPUTE_SQL = """
+WITH ordered AS (
+    SELECT
+        id, proxy_wallet, asset, side, price, timestamp,
+        round(size, 6) AS qty,
+        round(price, 6) AS px,
+        sum(CASE WHEN side = 'BUY' THEN round(size, 6) ELSE 0 END) OVER w AS cum_buy,
+        sum(CASE WHEN side = 'SELL' THEN round(size, 6) ELSE 0 END) OVER w AS cum_sell
+    FROM trades
+    WHERE (hashtext(proxy_wallet) & 2147483647) % :partitions = :partition
+      AND (CAST(:wallet AS VARCHAR) IS NULL OR proxy_wallet = :wallet)
+    WINDOW w AS (PARTITION BY proxy_wallet, asset ORDER BY timestamp, id ROWS UNBOUNDED PRECEDING)
+),
+consumed AS (
+    SELECT
+        id, proxy_wallet, asset, qty, px, timestamp,
+        cum_sell + LEAST(0, min(cum_buy - cum_sell) OVER w) AS consumed_end
+    FROM ordered
+    WHERE side = 'SELL'
+    WINDOW w AS (PARTITION BY proxy_wallet, asset ORDER BY timestamp, id ROWS UNBOUNDED PRECEDING)
+),
+lots AS (
+    SELECT
+        proxy_wallet, asset, px,
+        cum_buy - qty AS lot_start,
+        coalesce(sum(qty * px) OVER w, 0) AS cost_before
+    FROM ordered
+    WHERE side = 'BUY'
+    WINDOW w AS (
+        PARTITION BY proxy_wallet, asset ORDER BY timestamp, id
+        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+    )
+),
+breakpoints AS (
+    SELECT proxy_wallet, asset, lot_start AS coord, 0 AS kind, NULL::integer AS sell_id,
+           px, lot_start, cost_before
+    FROM lots
+    UNION ALL
+    SELECT proxy_wallet, asset, consumed_end, 1, id, NULL, NULL, NULL
+    FROM consumed
+),
+located AS (
+    SELECT
+        *,
+        count(lot_start) OVER (
+            PARTITION BY proxy_wallet, asset ORDER BY coord, kind, sell_id
+            ROWS UNBOUNDED PRECEDING
+        ) AS lot_group
+    FROM breakpoints
+),
+cost_at AS (
+    SELECT
+        sell_id,
+        coord,
+        CASE WHEN lot_group = 0 THEN 0 ELSE
+            first_value(cost_before) OVER g
+            + (coord - first_value(lot_start) OVER g) * first_value(px) OVER g
+        END AS cum_cost
+    FROM located
+    WINDOW g AS (PARTITION BY proxy_wallet, asset, lot_group ORDER BY coord, kind, sell_id)
+),
+matched AS (
+    SELECT
+        c.id, c.qty, c.px,
+        c.consumed_end - coalesce(lag(c.consumed_end) OVER w, 0) AS matched_size,
+        k.cum_cost - coalesce(lag(k.cum_cost) OVER w, 0) AS matched_cost
+    FROM consumed c
+    JOIN cost_at k ON k.sell_id = c.id
+    WINDOW w AS (PARTITION BY c.proxy_wallet, c.asset ORDER BY c.timestamp, c.id)
+),
+results AS (
+    SELECT
+        o.id,
+        CASE
+            WHEN o.side = 'BUY' THEN o.price
+            WHEN m.matched_size > 0 THEN m.matched_cost / m.matched_size
+        END AS entry_price,
+        CASE WHEN o.side = 'SELL' THEN o.price END AS exit_price,
+        CASE
+            WHEN m.matched_size > 0
+            THEN (m.px * m.matched_size - m.matched_cost) * m.qty / m.matched_size
+        END AS pnl
+    FROM ordered o
+    LEFT JOIN matched m ON m.id = o.id
+)
+UPDATE trades AS t
+SET
+    entry_price = r.entry_price,
+    exit_price = r.exit_price,
+    pnl = r.pnl,
+    updated_at = (now() AT TIME ZONE 'utc')
+FROM results r
+WHERE t.id = r.id
+  AND (
+      t.entry_price IS DISTINCT FROM round(r.entry_price, 8)
+      OR t.exit_price IS DISTINCT FROM r.exit_price
+      OR t.pnl IS DISTINCT FROM round(r.pnl, 8)
+  )
+"""
+
+# Supports the (proxy_wallet, asset) partitions ordered by (timestamp, id)
+TRADES_FIFO_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS ix_trades_wallet_asset_timestamp
+ON trades (proxy_wallet, asset, timestamp, id)
+"""
+
+
+async def ensure_recompute_index(session: AsyncSession) -> None:
+    """Create the (proxy_wallet, asset, timestamp, id) index on existing databases."""
+    await session.execute(text(TRADES_FIFO_INDEX_SQL))
+    await session.commit()
+
+
+async def recompute_partition(
+    session: AsyncSession,
+    partition: int,
+    partitions: int = DEFAULT_PARTITIONS,
+    wallet_address: Optional[str] = None
+) -> int:
+    """
+    Recompute FIFO entry/exit prices and PnL for one hash partition of wallets.
+
+    Args:
+        session: Database session (committed here)
+        partition: Partition number in [0, partitions)
+        partitions: Total number of partitions
+        wallet_address: Only this wallet (it must hash to the given partition)
+
+    Returns:
+        Number of trades whose values changed
+    """
+    result = await session.execute(
+        text(FIFO_RECOMPUTE_SQL),
+        {
+            "partitions": partitions,
+            "partition": partition,
+            "wallet": wallet_address.lower() if wallet_address else None,
+        }
+    )
+    await session.commit()
+    return result.rowcount or 0
+
+
+async def wallet_partition(session: AsyncSession, wallet_address: str, partitions: int = DEFAULT_PARTITIONS) -> int:
+    """Hash partition a wallet falls into."""
+    result = await session.execute(
+        text("SELECT (hashtext(:wallet) & 2147483647) % :partitions"),
+        {"wallet": wallet_address.lower(), "partitions": partitions}
+    )
+    return int(result.scalar_one())
+
+
+async def recompute_trade_pnl(
+    session: AsyncSession,
+    partitions: int = DEFAULT_PARTITIONS,
+    wallet_address: Optional[str] = None,
+    progress: Optional[Callable[[int, int, int], None]] = None
+) -> Dict:
+    """
+    Recompute FIFO entry/exit prices and PnL for every wallet (or one wallet).
+
+    Each partition is one UPDATE ... FROM statement and one transaction, so an
+    interrupted run keeps the partitions already written.
+
+    Args:
+        session: Database session
+        partitions: Number of wallet hash partitions
+        wallet_address: Only recompute this wallet
+        progress: Called with (partition, partitions, updated) after each partition
+
+    Returns:
+        Dictionary with partitions processed, updated trade count and duration
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+
+    start = time.perf_counter()
+    if wallet_address:
+        selected = [await wallet_partition(session, wallet_address, partitions)]
+    else:
+        selected = range(partitions)
+
+    updated = 0
+    for partition in selected:
+        changed = await recompute_partition(session, partition, partitions, wallet_address)
+        updated += changed
+        logger.info(f"FIFO recompute partition {partition + 1}/{partitions}: {changed} trades updated")
+        if progress is not None:
+            progress(partition, partitions, changed)
+
+    return {
+        "partitions": len(selected),
+        "updated_trades": updated,
+        "duration_seconds": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,379 @@
+"""
+Offline re-derivation of trade PnL and aggregated metrics from stored trades.
+
+process_and_insert_trade_data always re-fetches trades from the API. This
+service reruns cleaning, cost-basis matching and aggregation from the rows
+already in the trades table, so PnL rule changes can be applied to every
+stored wallet without network access.
+
+Wallets are streamed from the trades table in keyset order and split into
+chunks. Chunks run in a process pool; each worker owns an event loop and an
+async engine, loads its wallets' trades in one query and writes changed PnL
+values, open lots, cost-basis totals and AggregatedMetrics in batches. A
+checkpoint file records the last wallet below which every chunk has
+finished, so an interrupted job resumes there (re-running a chunk is
+idempotent).
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.models import AggregatedMetrics, Trade, Trader
+from app.services.cost_basis_service import DEFAULT_METHODS, create_engines, run_cost_basis_pass, save_cost_basis_pnl
+from app.services.lot_state_service import next_watermark, save_lot_state
+from app.services.trade_data_processor import aggregate_trade_metrics, clean_trade_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+DEFAULT_WRITE_BATCH_SIZE = 1000
+
+# Stored precision of trades.entry_price / exit_price (Numeric(10, 8)) and pnl (Numeric(20, 8))
+_STORED = Decimal("0.00000001")
+
+_TRADE_COLUMNS = (
+    Trade.id,
+    Trade.proxy_wallet,
+    Trade.side,
+    Trade.asset,
+    Trade.condition_id,
+    Trade.size,
+    Trade.price,
+    Trade.entry_price,
+    Trade.exit_price,
+    Trade.pnl,
+    Trade.timestamp,
+    Trade.transaction_hash,
+)
+
+
+def _stored(value: Optional[Decimal]) -> Optional[Decimal]:
+    return None if value is None else value.quantize(_STORED, rounding=ROUND_HALF_UP)
+
+
+def _trade_key(wallet: str, tx_hash: str, timestamp: int, asset: str) -> Tuple:
+    # Same identity clean_trade_data de-duplicates on
+    return (wallet.lower(), tx_hash.lower(), timestamp, asset.lower())
+
+
+def rederive_wallet_trades(rows: List[Dict]) -> Dict:
+    """
+    Rerun cleaning, cost-basis matching and aggregation for one wallet's stored trades.
+
+    Args:
+        rows: Stored trade rows (id, proxy_wallet, side, asset, condition_id,
+            size, price, entry_price, exit_price, pnl, timestamp, transaction_hash)
+            ordered by (timestamp, id)
+
+    Returns:
+        Dictionary with:
+        - updates: [{"id", "entry_price", "exit_price", "pnl"}] for rows whose values changed
+        - metrics: AggregatedMetrics column values
+        - engines / totals: cost-basis engines and per-method totals after the replay
+        - last_timestamp / trade_count: lot watermark
+    """
+    ids: Dict[Tuple, int] = {}
+    for r in rows:
+        # clean_trade_data keeps the first of duplicate rows
+        ids.setdefault(_trade_key(r["proxy_wallet"], r["transaction_hash"], r["timestamp"], r["asset"]), r["id"])
+    stored = {r["id"]: r for r in rows}
+
+    cleaned = clean_trade_data(rows)
+    trades = sorted(cleaned, key=lambda x: x["timestamp"])
+    engines = create_engines(DEFAULT_METHODS)
+    totals = run_cost_basis_pass(trades, engines)
+    last_timestamp, trade_count = next_watermark(None, trades)
+
+    updates = []
+    derived = []
+    kept = set()
+    for trade in trades:
+        trade_id = ids[_trade_key(trade["proxyWallet"], trade["transactionHash"], trade["timestamp"], trade["asset"])]
+        kept.add(trade_id)
+        values = {
+            "entry_price": _stored(trade["entry_price"]),
+            "exit_price": _stored(trade["exit_price"]),
+            "pnl": _stored(trade["pnl"]),
+        }
+        row = stored[trade_id]
+        if any(row[field] != value for field, value in values.items()):
+            updates.append({"id": trade_id, **values})
+        derived.append({"size": row["size"], "price": row["price"], "pnl": values["pnl"], "exit_price": values["exit_price"]})
+
+    # Rows dropped by cleaning carry no PnL
+    for trade_id, row in stored.items():
+        if trade_id in kept:
+            continue
+        if row["entry_price"] is not None or row["exit_price"] is not None or row["pnl"] is not None:
+            updates.append({"id": trade_id, "entry_price": None, "exit_price": None, "pnl": None})
+        derived.append({"size": row["size"], "price": row["price"], "pnl": None, "exit_price": None})
+
+    return {
+        "updates": updates,
+        "metrics": aggregate_trade_metrics(derived),
+        "engines": engines,
+        "totals": totals,
+        "last_timestamp": last_timestamp,
+        "trade_count": trade_count,
+    }
+
+
+async def rederive_wallets(
+    session: AsyncSession,
+    wallets: List[str],
+    write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE
+) -> Dict:
+    """
+    Re-derive PnL, lot state, cost-basis totals and metrics for a chunk of wallets.
+
+    Args:
+        session: Database session (committed here)
+        wallets: Wallet addresses as stored in trades.proxy_wallet
+        write_batch_size: Trade updates per executemany batch
+
+    Returns:
+        Dictionary with wallets, trades and updated_trades counts
+    """
+    result = await session.execute(
+        select(*_TRADE_COLUMNS)
+        .where(Trade.proxy_wallet.in_(wallets))
+        .order_by(Trade.proxy_wallet, Trade.timestamp, Trade.id)
+    )
+    rows_by_wallet: Dict[str, List[Dict]] = defaultdict(list)
+    trade_count = 0
+    for row in result.mappings():
+        rows_by_wallet[row["proxy_wallet"]].append(dict(row))
+        trade_count += 1
+
+    result = await session.execute(
+        select(Trader.wallet_address, Trader.id).where(Trader.wallet_address.in_(wallets))
+    )
+    trader_ids = dict(result.all())
+
+    pending: List[Dict] = []
+    updated = 0
+    for wallet, rows in rows_by_wallet.items():
+        derived = rederive_wallet_trades(rows)
+        pending.extend(derived["updates"])
+        updated += len(derived["updates"])
+
+        await save_lot_state(
+            session, wallet, derived["engines"], derived["last_timestamp"], derived["trade_count"]
+        )
+        await save_cost_basis_pnl(
+            session, wallet, derived["totals"], derived["engines"], derived["last_timestamp"]
+        )
+
+        trader_id = trader_ids.get(wallet)
+        if trader_id is not None:
+            stmt = pg_insert(AggregatedMetrics).values(trader_id=trader_id, **derived["metrics"])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_aggregated_metrics_trader",
+                set_={
+                    **{field: getattr(stmt.excluded, field) for field in derived["metrics"]},
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            )
+            await session.execute(stmt)
+
+        if len(pending) >= write_batch_size:
+            await session.execute(update(Trade), pending)
+            pending = []
+
+    if pending:
+        await session.execute(update(Trade), pending)
+    await session.commit()
+
+    return {"wallets": len(rows_by_wallet), "trades": trade_count, "updated_trades": updated}
+
+
+async def iter_wallet_chunks(session: AsyncSession, chunk_size: int, after: Optional[str] = None):
+    """Stream distinct trade wallets in keyset order, chunk_size at a time."""
+    while True:
+        stmt = select(Trade.proxy_wallet).distinct().order_by(Trade.proxy_wallet).limit(chunk_size)
+        if after is not None:
+            stmt = stmt.where(Trade.proxy_wallet > after)
+        result = await session.execute(stmt)
+        wallets = list(result.scalars().all())
+        if not wallets:
+            return
+        yield wallets
+        after = wallets[-1]
+
+
+class RederiveCheckpoint:
+    """
+    Resume point of a re-derivation job.
+
+    Chunks finish out of order; last_wallet only advances past a chunk once
+    every earlier chunk has finished too.
+    """
+
+    def __init__(self, path: Optional[str] = None, last_wallet: Optional[str] = None,
+                 wallets_done: int = 0, trades_done: int = 0):
+        self.path = path
+        self.last_wallet = last_wallet
+        self.wallets_done = wallets_done
+        self.trades_done = trades_done
+        self._next_chunk = 0
+        self._finished: Dict[int, Tuple[str, Dict]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "RederiveCheckpoint":
+        """Load a checkpoint file (an empty checkpoint if it doesn't exist)."""
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(path, data.get("last_wallet"), data.get("wallets_done", 0), data.get("trades_done", 0))
+
+    def chunk_finished(self, index: int, last_wallet: str, stats: Dict) -> None:
+        """Record a finished chunk and advance past every contiguous finished chunk."""
+        self._finished[index] = (last_wallet, stats)
+        advanced = False
+        while self._next_chunk in self._finished:
+            wallet, chunk_stats = self._finished.pop(self._next_chunk)
+            self.last_wallet = wallet
+            self.wallets_done += chunk_stats["wallets"]
+            self.trades_done += chunk_stats["trades"]
+            self._next_chunk += 1
+            advanced = True
+        if advanced:
+            self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "last_wallet": self.last_wallet,
+                "wallets_done": self.wallets_done,
+                "trades_done": self.trades_done,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+# Per-process state of pool workers
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_sessionmaker = None
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_loop, _worker_sessionmaker
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    engine = create_async_engine(database_url, echo=False, pool_size=2)
+    _worker_sessionmaker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _rederive_chunk(wallets: List[str], write_batch_size: int) -> Dict:
+    async with _worker_sessionmaker() as session:
+        return await rederive_wallets(session, wallets, write_batch_size)
+
+
+def _run_chunk(wallets: List[str], write_batch_size: int) -> Dict:
+    """Process-pool entry point: re-derive one chunk on the worker's own engine."""
+    return _worker_loop.run_until_complete(_rederive_chunk(wallets, write_batch_size))
+
+
+async def run_rederive_job(
+    workers: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    checkpoint: Optional[RederiveCheckpoint] = None,
+    database_url: Optional[str] = None,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Re-derive PnL and aggregated metrics for every wallet in the trades table.
+
+    Args:
+        workers: Worker processes (0 = one per CPU core)
+        chunk_size: Wallets per chunk
+        write_batch_size: Trade updates per executemany batch
+        checkpoint: Resume after checkpoint.last_wallet and record progress
+        database_url: Database URL (defaults to settings.DATABASE_URL)
+        progress: Called with running totals after each finished chunk
+
+    Returns:
+        Dictionary with wallets, trades and updated_trades processed by this run,
+        duration and throughput
+    """
+    database_url = database_url or settings.DATABASE_URL
+    checkpoint = checkpoint or RederiveCheckpoint()
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+
+    engine = create_async_engine(database_url, echo=False)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(database_url,)
+    )
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    totals = {"wallets": 0, "trades": 0, "updated_trades": 0}
+    in_flight = {}
+
+    def report():
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        if progress is not None:
+            progress({
+                **totals,
+                "last_wallet": checkpoint.last_wallet,
+                "elapsed_seconds": elapsed,
+                "wallets_per_second": totals["wallets"] / elapsed,
+                "trades_per_second": totals["trades"] / elapsed,
+            })
+
+    async def drain(return_when):
+        done, _ = await asyncio.wait(in_flight, return_when=return_when)
+        for future in done:
+            index, last_wallet = in_flight.pop(future)
+            stats = future.result()
+            for key in totals:
+                totals[key] += stats[key]
+            checkpoint.chunk_finished(index, last_wallet, stats)
+            logger.info(f"Re-derived chunk {index} ({stats['wallets']} wallets, {stats['trades']} trades)")
+        report()
+
+    try:
+        async with session_factory() as session:
+            index = 0
+            async for wallets in iter_wallet_chunks(session, chunk_size, checkpoint.last_wallet):
+                future = loop.run_in_executor(pool, _run_chunk, wallets, write_batch_size)
+                in_flight[future] = (index, wallets[-1])
+                index += 1
+                if len(in_flight) >= max_in_flight:
+                    await drain(asyncio.FIRST_COMPLETED)
+        if in_flight:
+            await drain(asyncio.ALL_COMPLETED)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        await engine.dispose()
+
+    duration = time.perf_counter() - start
+    return {
+        **totals,
+        "last_wallet": checkpoint.last_wallet,
+        "duration_seconds": round(duration, 3),
+        "wallets_per_second": round(totals["wallets"] / duration, 2) if duration > 0 else 0.0,
+        "trades_per_second": round(totals["trades"] / duration, 2) if duration > 0 else 0.0,
+    }
@@ -0,0 +1,401 @@
+"""
+Compact storage for PnL time series.
+
+Instead of one user_pnl row per (t, p) point, a series is split into calendar
+month chunks (UTC) and each chunk is one pnl_series_chunks row holding two
+byte strings: timestamps and values (PnL scaled to 1e-8, the precision of
+the old Numeric(20, 8) column), each delta-encoded as zigzag varints.
+Regularly sampled series compress to 1-3 bytes per timestamp.
+
+Writes merge new points into the affected chunks and upsert whole chunks.
+Each chunk also stores an LTTB (Largest-Triangle-Three-Buckets) pyramid:
+level n holds the chunk reduced by PYRAMID_FACTOR ** n, built from level
+n - 1. A downsampled read picks the coarsest level that still has
+PYRAMID_OVERSAMPLE times the requested points in range (chunks partly in
+range count their points pro-rated by time overlap), decodes only those
+chunks and runs LTTB once more to the exact point budget, so a multi-year
+minute series is served from a few thousand decoded points.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PnLSeriesChunk
+
+VALUE_DIGITS = 8
+VALUE_SCALE = 10 ** VALUE_DIGITS
+
+# Each pyramid level keeps 1 / PYRAMID_FACTOR of the level below it
+PYRAMID_FACTOR = 8
+PYRAMID_MAX_LEVEL = 4
+# A chunk gets a level only if it keeps at least this many points
+PYRAMID_MIN_POINTS = 8
+# Pick the coarsest level with at least this multiple of max_points in range
+PYRAMID_OVERSAMPLE = 4
+
+
+class PnLPoint(NamedTuple):
+    """One point of a stored PnL series."""
+    timestamp: int
+    pnl: Decimal
+    interval: str
+    fidelity: str
+
+
+def _encode_deltas(values: Iterable[int]) -> bytes:
+    """Delta-encode integers as zigzag LEB128 varints."""
+    out = bytearray()
+    previous = 0
+    for value in values:
+        delta = value - previous
+        previous = value
+        zigzag = (delta << 1) ^ (delta >> 63) if delta < 0 else delta << 1
+        while zigzag >= 0x80:
+            out.append((zigzag & 0x7F) | 0x80)
+            zigzag >>= 7
+        out.append(zigzag)
+    return bytes(out)
+
+
+def _decode_deltas(data: bytes) -> List[int]:
+    """Inverse of _encode_deltas."""
+    values = []
+    previous = 0
+    shift = 0
+    zigzag = 0
+    for byte in data:
+        zigzag |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        delta = (zigzag >> 1) ^ -(zigzag & 1)
+        previous += delta
+        values.append(previous)
+        shift = 0
+        zigzag = 0
+    return values
+
+
+def encode_chunk(points: List[Tuple[int, int]]) -> Tuple[bytes, bytes]:
+    """Encode (timestamp, scaled value) points, sorted by timestamp."""
+    return _encode_deltas(t for t, _ in points), _encode_deltas(v for _, v in points)
+
+
+def decode_chunk(timestamps: bytes, values: bytes) -> List[Tuple[int, int]]:
+    """Decode a chunk into (timestamp, scaled value) points."""
+    return list(zip(_decode_deltas(timestamps), _decode_deltas(values)))
+
+
+def scale_value(value) -> int:
+    """Scale a PnL value to integer 1e-8 units."""
+    return int(round(Decimal(str(value)).scaleb(VALUE_DIGITS)))
+
+
+def unscale_value(value: int) -> Decimal:
+    return Decimal(value).scaleb(-VALUE_DIGITS)
+
+
+def month_start(timestamp: int) -> int:
+    """Unix timestamp of the first second of the (UTC) month containing timestamp."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def lttb(points: List[Tuple[int, int]], threshold: int) -> List[Tuple[int, int]]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of time-ordered points.
+
+    Keeps the first and last point and, from each of threshold - 2 equal-size
+    buckets, the point forming the largest triangle with the previously kept
+    point and the average of the next bucket, which preserves the visual
+    shape (peaks and drawdowns) of the series.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        count = avg_end - avg_start
+        avg_x = sum(points[j][0] for j in range(avg_start, avg_end)) / count
+        avg_y = sum(points[j][1] for j in range(avg_start, avg_end)) / count
+
+        ax, ay = points[a]
+        max_area = -1.0
+        next_a = int(i * every) + 1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+        sampled.append(points[next_a])
+        a = next_a
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def build_pyramid(points: List[Tuple[int, int]]) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Build the LTTB pyramid levels (1..PYRAMID_MAX_LEVEL) of one chunk.
+
+    Levels that would keep fewer than PYRAMID_MIN_POINTS points are skipped.
+    """
+    levels = {}
+    previous = points
+    for level in range(1, PYRAMID_MAX_LEVEL + 1):
+        target = len(points) // PYRAMID_FACTOR ** level
+        if target < PYRAMID_MIN_POINTS:
+            break
+        previous = lttb(previous, target)
+        levels[level] = previous
+    return levels
+
+
+def estimate_points_in_range(
+    point_count: int,
+    first_timestamp: int,
+    last_timestamp: int,
+    from_ts: Optional[int],
+    to_ts: Optional[int]
+) -> float:
+    """Points of a chunk row expected in [from_ts, to_ts], pro-rated by time overlap."""
+    low = first_timestamp if from_ts is None else max(first_timestamp, from_ts)
+    high = last_timestamp if to_ts is None else min(last_timestamp, to_ts)
+    if high < low:
+        return 0.0
+    span = last_timestamp - first_timestamp
+    if span <= 0:
+        return float(point_count)
+    return point_count * (high - low) / span
+
+
+def choose_pyramid_level(chunk_levels: Dict[int, Dict[int, Tuple[int, int]]], max_points: int) -> Dict[int, int]:
+    """
+    Pick the chunk rows to decode for a downsampled read of one series.
+
+    Args:
+        chunk_levels: chunk_start -> {level: (row id, points in range)} for chunks in range
+        max_points: Requested number of points
+
+    Returns:
+        chunk_start -> row id, all at the coarsest level (or the best each
+        chunk has below it) that keeps PYRAMID_OVERSAMPLE * max_points points
+    """
+    def rows_at(level):
+        chosen = {}
+        for chunk_start, levels in chunk_levels.items():
+            available = max(l for l in levels if l <= level)
+            chosen[chunk_start] = levels[available]
+        return chosen
+
+    wanted = max_points * PYRAMID_OVERSAMPLE
+    for level in range(PYRAMID_MAX_LEVEL, 0, -1):
+        chosen = rows_at(level)
+        if sum(count for _, count in chosen.values()) >= wanted:
+            return {chunk_start: row_id for chunk_start, (row_id, _) in chosen.items()}
+    return {chunk_start: row_id for chunk_start, (row_id, _) in rows_at(0).items()}
+
+
+async def save_series_points(
+    session: AsyncSession,
+    user_address: str,
+    points: Iterable[Tuple[int, object]],
+    interval: str,
+    fidelity: str,
+    replace: bool = False
+) -> int:
+    """
+    Merge points into a user's series and upsert every affected month chunk
+    together with its pyramid levels.
+
+    Args:
+        session: Database session (committed here)
+        user_address: Wallet address
+        points: (timestamp, pnl) pairs; a point replaces a stored point with the same timestamp
+        interval: Series interval
+        fidelity: Series fidelity
+        replace: Drop the stored series first
+
+    Returns:
+        Number of points written
+    """
+    by_chunk: Dict[int, Dict[int, int]] = defaultdict(dict)
+    count = 0
+    for timestamp, value in points:
+        timestamp = int(timestamp)
+        by_chunk[month_start(timestamp)][timestamp] = scale_value(value)
+        count += 1
+
+    if replace:
+        await delete_series(session, user_address, interval, fidelity, commit=False)
+
+    if by_chunk and not replace:
+        result = await session.execute(
+            select(PnLSeriesChunk.chunk_start, PnLSeriesChunk.timestamps, PnLSeriesChunk.pnl_values).where(
+                PnLSeriesChunk.user_address == user_address,
+                PnLSeriesChunk.interval == interval,
+                PnLSeriesChunk.fidelity == fidelity,
+                PnLSeriesChunk.level == 0,
+                PnLSeriesChunk.chunk_start.in_(list(by_chunk))
+            )
+        )
+        for chunk_start, timestamps, values in result.all():
+            merged = dict(decode_chunk(timestamps, values))
+            merged.update(by_chunk[chunk_start])
+            by_chunk[chunk_start] = merged
+
+    rows = []
+    for chunk_start, chunk_points in by_chunk.items():
+        ordered = sorted(chunk_points.items())
+        levels = build_pyramid(ordered)
+        levels[0] = ordered
+        for level, level_points in levels.items():
+            timestamps, values = encode_chunk(level_points)
+            rows.append({
+                "user_address": user_address,
+                "interval": interval,
+                "fidelity": fidelity,
+                "chunk_start": chunk_start,
+                "level": level,
+                "point_count": len(level_points),
+                "first_timestamp": level_points[0][0],
+                "last_timestamp": level_points[-1][0],
+                "timestamps": timestamps,
+                "pnl_values": values,
+            })
+
+    if rows:
+        stmt = pg_insert(PnLSeriesChunk).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_pnl_series_chunk",
+            set_={
+                "point_count": stmt.excluded.point_count,
+                "first_timestamp": stmt.excluded.first_timestamp,
+                "last_timestamp": stmt.excluded.last_timestamp,
+                "timestamps": stmt.excluded.timestamps,
+                "pnl_values": stmt.excluded.pnl_values,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        await session.execute(stmt)
+    await session.commit()
+    return count
+
+
+async def load_series_points(
+    session: AsyncSession,
+    user_address: str,
+    interval: Optional[str] = None,
+    fidelity: Optional[str] = None,
+    from_ts: Optional[int] = None,
+    to_ts: Optional[int] = None,
+    max_points: Optional[int] = None,
+    exclude_intervals: Iterable[str] = ()
+) -> List[PnLPoint]:
+    """
+    Read a user's series, decoding only the chunks that overlap [from_ts, to_ts].
+
+    Args:
+        session: Database session
+        user_address: Wallet address
+        interval: Filter by interval (all series if not provided)
+        fidelity: Filter by fidelity (all series if not provided)
+        from_ts: Only points with timestamp >= from_ts
+        to_ts: Only points with timestamp <= to_ts
+        max_points: LTTB-downsample each series to at most this many points
+        exclude_intervals: Skip series with these intervals
+
+    Returns:
+        List of PnLPoint, ordered by timestamp ascending
+    """
+    filters = [PnLSeriesChunk.user_address == user_address]
+    if interval:
+        filters.append(PnLSeriesChunk.interval == interval)
+    if fidelity:
+        filters.append(PnLSeriesChunk.fidelity == fidelity)
+    exclude_intervals = list(exclude_intervals)
+    if exclude_intervals:
+        filters.append(PnLSeriesChunk.interval.notin_(exclude_intervals))
+    if from_ts is not None:
+        filters.append(PnLSeriesChunk.last_timestamp >= from_ts)
+    if to_ts is not None:
+        filters.append(PnLSeriesChunk.first_timestamp <= to_ts)
+
+    if max_points:
+        # Read the (small) pyramid catalog first, then only the chosen level's chunks
+        result = await session.execute(
+            select(
+                PnLSeriesChunk.id, PnLSeriesChunk.interval, PnLSeriesChunk.fidelity,
+                PnLSeriesChunk.chunk_start, PnLSeriesChunk.level, PnLSeriesChunk.point_count,
+                PnLSeriesChunk.first_timestamp, PnLSeriesChunk.last_timestamp
+            ).where(*filters)
+        )
+        catalog: Dict[Tuple[str, str], Dict[int, Dict[int, Tuple[int, float]]]] = defaultdict(lambda: defaultdict(dict))
+        for row_id, chunk_interval, chunk_fidelity, chunk_start, level, point_count, first, last in result.all():
+            # Chunks only partly inside the range count only their share of points
+            in_range = estimate_points_in_range(point_count, first, last, from_ts, to_ts)
+            catalog[(chunk_interval, chunk_fidelity)][chunk_start][level] = (row_id, in_range)
+        row_ids = []
+        for chunk_levels in catalog.values():
+            row_ids.extend(choose_pyramid_level(chunk_levels, max_points).values())
+        if not row_ids:
+            return []
+        filters = [PnLSeriesChunk.id.in_(row_ids)]
+    else:
+        filters.append(PnLSeriesChunk.level == 0)
+
+    result = await session.execute(
+        select(
+            PnLSeriesChunk.interval, PnLSeriesChunk.fidelity, PnLSeriesChunk.timestamps, PnLSeriesChunk.pnl_values
+        ).where(*filters).order_by(PnLSeriesChunk.interval, PnLSeriesChunk.fidelity, PnLSeriesChunk.chunk_start)
+    )
+    series: Dict[Tuple[str, str], List[Tuple[int, int]]] = defaultdict(list)
+    for chunk_interval, chunk_fidelity, timestamps, values in result.all():
+        points = decode_chunk(timestamps, values)
+        if from_ts is not None or to_ts is not None:
+            low = from_ts if from_ts is not None else points[0][0]
+            high = to_ts if to_ts is not None else points[-1][0]
+            points = [p for p in points if low <= p[0] <= high]
+        series[(chunk_interval, chunk_fidelity)].extend(points)
+
+    output = []
+    for (series_interval, series_fidelity), points in series.items():
+        if max_points:
+            points = lttb(points, max_points)
+        output.extend(
+            PnLPoint(t, unscale_value(v), series_interval, series_fidelity) for t, v in points
+        )
+    if len(series) > 1:
+        output.sort(key=lambda p: p.timestamp)
+    return output
+
+
+async def delete_series(
+    session: AsyncSession,
+    user_address: str,
+    interval: str,
+    fidelity: str,
+    commit: bool = True
+) -> None:
+    """Delete every chunk (all levels) of a user's series."""
+    await session.execute(
+        delete(PnLSeriesChunk).where(
+            PnLSeriesChunk.user_address == user_address,
+            PnLSeriesChunk.interval == interval,
+            PnLSeriesChunk.fidelity == fidelity
+        )
+    )
+    if commit:
+        await session.commit()
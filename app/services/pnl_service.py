@@ -1,12 +1,10 @@
 """User PnL service for saving and retrieving PnL data."""
 
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Iterable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from app.db.models import UserPnL
 from app.services.data_fetcher import fetch_user_pnl
-from decimal import Decimal
+from app.services.pnl_series_store import PnLPoint, load_series_points, save_series_points
 
 
 async def save_pnl_to_db(
@@ -17,7 +15,11 @@ async def save_pnl_to_db(
     fidelity: str = "1d"
 ) -> int:
     """
-    Save PnL data to database. Updates existing records or inserts new ones.
+    Save PnL data to database. Updates existing points or inserts new ones.
+    
+    Points are merged into the user's compact series (one pnl_series_chunks
+    row per month), so a save costs one upsert per affected month rather
+    than one per point.
     
     Args:
         session: Database session
@@ -27,36 +29,10 @@ async def save_pnl_to_db(
         fidelity: Data fidelity
     
     Returns:
-        Number of PnL records saved
+        Number of PnL points saved
     """
-    saved_count = 0
-    
-    for pnl_point in pnl_data:
-        # Convert PnL data to database model
-        pnl_dict = {
-            "user_address": user_address,
-            "timestamp": pnl_point.get("t", 0),
-            "pnl": Decimal(str(pnl_point.get("p", 0))),
-            "interval": interval,
-            "fidelity": fidelity,
-        }
-        
-        # Use PostgreSQL upsert (INSERT ... ON CONFLICT DO UPDATE)
-        # Conflict on unique combination of user_address, timestamp, interval, and fidelity
-        stmt = pg_insert(UserPnL).values(**pnl_dict)
-        stmt = stmt.on_conflict_do_update(
-            constraint="uq_user_pnl_unique",
-            set_={
-                "pnl": stmt.excluded.pnl,
-                "updated_at": stmt.excluded.updated_at,
-            }
-        )
-        
-        await session.execute(stmt)
-        saved_count += 1
-    
-    await session.commit()
-    return saved_count
+    points = ((pnl_point.get("t", 0), pnl_point.get("p", 0)) for pnl_point in pnl_data)
+    return await save_series_points(session, user_address, points, interval, fidelity)
 
 
 async def get_pnl_from_db(
@@ -64,8 +40,12 @@ async def get_pnl_from_db(
     user_address: str,
     interval: Optional[str] = None,
     fidelity: Optional[str] = None,
-    limit: Optional[int] = None
-) -> List[UserPnL]:
+    limit: Optional[int] = None,
+    max_points: Optional[int] = None,
+    from_ts: Optional[int] = None,
+    to_ts: Optional[int] = None,
+    exclude_intervals: Iterable[str] = ()
+) -> List[PnLPoint]:
     """
     Get PnL data from database for a user.
     
@@ -75,24 +55,21 @@ async def get_pnl_from_db(
         interval: Filter by interval (optional)
         fidelity: Filter by fidelity (optional)
         limit: Maximum number of records to return (optional)
+        max_points: LTTB-downsample server-side to at most this many points per series (optional)
+        from_ts: Only points with timestamp >= from_ts (optional)
+        to_ts: Only points with timestamp <= to_ts (optional)
+        exclude_intervals: Skip series with these intervals (optional)
     
     Returns:
-        List of UserPnL objects, ordered by timestamp ascending
+        List of PnLPoint (timestamp, pnl, interval, fidelity), ordered by timestamp ascending
     """
-    stmt = select(UserPnL).where(UserPnL.user_address == user_address)
-    
-    if interval:
-        stmt = stmt.where(UserPnL.interval == interval)
-    if fidelity:
-        stmt = stmt.where(UserPnL.fidelity == fidelity)
-    
-    stmt = stmt.order_by(UserPnL.timestamp.asc())
-    
+    points = await load_series_points(
+        session, user_address, interval=interval, fidelity=fidelity,
+        from_ts=from_ts, to_ts=to_ts, max_points=max_points, exclude_intervals=exclude_intervals
+    )
     if limit:
-        stmt = stmt.limit(limit)
-    
-    result = await session.execute(stmt)
-    return result.scalars().all()
+        points = points[:limit]
+    return points
 
 
 async def fetch_and_save_pnl(
@@ -114,7 +91,7 @@ async def fetch_and_save_pnl(
         Tuple of (pnl data list, saved count)
     """
     # Fetch PnL data from API
-    pnl_data = fetch_user_pnl(user_address, interval=interval, fidelity=fidelity)
+    pnl_data = await asyncio.to_thread(fetch_user_pnl, user_address, interval=interval, fidelity=fidelity)
     
     # Save to database
     saved_count = await save_pnl_to_db(session, user_address, pnl_data, interval=interval, fidelity=fidelity)
@@ -1,13 +1,20 @@
 """Position service for saving and retrieving positions."""
 
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.db.models import Position
 from app.services.data_fetcher import fetch_positions_for_wallet
+from app.services.wallet_registry_service import mark_wallet_synced
 from decimal import Decimal
 
+if TYPE_CHECKING:
+    from app.services.wallet_refresh_scheduler import UpstreamBudget
+
+# Positions per page when a budgeted sync pages itself
+_BUDGETED_PAGE_SIZE = 100
+
 
 async def save_positions_to_db(
     session: AsyncSession,
@@ -94,6 +101,7 @@ async def save_positions_to_db(
         await session.execute(stmt)
         saved_count += 1
     
+    await mark_wallet_synced(session, wallet_address, "positions")
     await session.commit()
     return saved_count
 
@@ -124,7 +132,8 @@ async def fetch_and_save_positions(
     sort_direction: Optional[str] = None,
     size_threshold: Optional[float] = None,
     limit: Optional[int] = None,
-    offset: Optional[int] = None
+    offset: Optional[int] = None,
+    budget: Optional["UpstreamBudget"] = None
 ) -> tuple[List[Dict], int]:
     """
     Fetch positions from API and save to database.
@@ -137,6 +146,7 @@ async def fetch_and_save_positions(
         size_threshold: Minimum size threshold (e.g., 0.1)
         limit: Maximum number of positions to return
         offset: Offset for pagination
+        budget: Upstream call budget charged for every page after the first (all pages only)
     
     Returns:
         Tuple of (positions list, saved count)
@@ -144,15 +154,36 @@ async def fetch_and_save_positions(
     # Fetch positions from API (run in thread pool to avoid blocking async event loop)
     import asyncio
     from app.services.data_fetcher import fetch_positions_for_wallet
-    positions = await asyncio.to_thread(
-        fetch_positions_for_wallet,
-        wallet_address,
-        sort_by,
-        sort_direction,
-        size_threshold,
-        limit,
-        offset
-    )
+    if budget is None or limit is not None:
+        positions = await asyncio.to_thread(
+            fetch_positions_for_wallet,
+            wallet_address,
+            sort_by,
+            sort_direction,
+            size_threshold,
+            limit,
+            offset
+        )
+    else:
+        # Page here so each upstream call is paid for (the caller paid for the first)
+        positions = []
+        current_offset = offset or 0
+        while True:
+            if positions:
+                await budget.acquire()
+            batch = await asyncio.to_thread(
+                fetch_positions_for_wallet,
+                wallet_address,
+                sort_by,
+                sort_direction,
+                size_threshold,
+                _BUDGETED_PAGE_SIZE,
+                current_offset
+            )
+            positions.extend(batch)
+            if len(batch) < _BUDGETED_PAGE_SIZE:
+                break
+            current_offset += _BUDGETED_PAGE_SIZE
     
     # Save to database
     saved_count = await save_positions_to_db(session, wallet_address, positions)
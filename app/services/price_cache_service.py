@@ -0,0 +1,170 @@
+"""
+Shared mark-to-market price cache for open positions.
+
+Position.cur_price / current_value / cash_pnl are only as fresh as each
+wallet's last /positions sync, yet thousands of wallets hold the same few
+hundred outcome tokens. Prices are cached once per token in token_prices:
+refresh_token_prices fetches CLOB midpoints for every distinct open asset in
+concurrent batches, and revalue_open_positions re-marks every open position
+from the cache with a single UPDATE ... FROM. One refresh updates the
+unrealized PnL of every wallet without re-syncing positions.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.bulk import execute_in_batches
+from app.db.models import Position, TokenPrice
+from app.services.data_fetcher import fetch_token_midpoints
+
+logger = logging.getLogger(__name__)
+
+# percent_pnl is Numeric(10, 4)
+_PERCENT_LIMIT = Decimal("999999.9999")
+
+
+async def get_open_position_assets(session: AsyncSession) -> List[str]:
+    """Distinct assets held in open (non-zero, unredeemed) positions across all wallets."""
+    result = await session.execute(
+        select(Position.asset)
+        .where(Position.size > 0, Position.redeemable.isnot(True))
+        .distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def refresh_token_prices(
+    session: AsyncSession,
+    assets: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> Dict:
+    """
+    Fetch midpoint prices for assets in batches and upsert them into token_prices.
+
+    Args:
+        session: Database session (committed here)
+        assets: Token IDs to refresh (every open position asset if not provided)
+        batch_size: Token IDs per request (settings.PRICE_REFRESH_BATCH_SIZE)
+        concurrency: Requests in flight (settings.PRICE_REFRESH_CONCURRENCY)
+
+    Returns:
+        Dictionary with requested, priced and failed_batches counts
+    """
+    if assets is None:
+        assets = await get_open_position_assets(session)
+    batch_size = batch_size or settings.PRICE_REFRESH_BATCH_SIZE
+    semaphore = asyncio.Semaphore(concurrency or settings.PRICE_REFRESH_CONCURRENCY)
+    batches = [assets[i:i + batch_size] for i in range(0, len(assets), batch_size)]
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        async def fetch_batch(batch):
+            async with semaphore:
+                return await fetch_token_midpoints(batch, client)
+
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+
+    prices: Dict[str, float] = {}
+    failed_batches = 0
+    for result in results:
+        if isinstance(result, Exception):
+            failed_batches += 1
+            logger.warning(f"Price refresh batch failed: {result}")
+            continue
+        prices.update(result)
+
+    if prices:
+        now = datetime.utcnow()
+
+        def upsert_prices(batch):
+            stmt = pg_insert(TokenPrice).values([
+                {"asset": asset, "price": Decimal(str(price)), "fetched_at": now, "created_at": now, "updated_at": now}
+                for asset, price in batch
+            ])
+            return stmt.on_conflict_do_update(
+                index_elements=["asset"],
+                set_={
+                    "price": stmt.excluded.price,
+                    "fetched_at": stmt.excluded.fetched_at,
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            )
+
+        await execute_in_batches(session, list(prices.items()), upsert_prices)
+        await session.commit()
+
+    return {"requested": len(assets), "priced": len(prices), "failed_batches": failed_batches}
+
+
+async def revalue_open_positions(session: AsyncSession, fetched_since: Optional[datetime] = None) -> int:
+    """
+    Re-mark every open position from token_prices in one UPDATE ... FROM.
+
+    Sets cur_price, current_value = size * price, cash_pnl = current_value -
+    initial_value and percent_pnl, so unrealized PnL (cash_pnl - realized_pnl)
+    reflects the cached price.
+
+    Args:
+        session: Database session (committed here)
+        fetched_since: Only apply prices fetched at or after this time
+
+    Returns:
+        Number of positions revalued
+    """
+    current_value = Position.size * TokenPrice.price
+    cash_pnl = current_value - Position.initial_value
+    # GREATEST / LEAST skip NULLs, so positions without a cost basis keep percent_pnl explicitly
+    percent_pnl = case(
+        (Position.initial_value == 0, Position.percent_pnl),
+        else_=func.greatest(
+            func.least(func.round(cash_pnl / Position.initial_value * 100, 4), _PERCENT_LIMIT),
+            -_PERCENT_LIMIT
+        )
+    )
+
+    stmt = (
+        update(Position)
+        .where(
+            Position.asset == TokenPrice.asset,
+            Position.size > 0,
+            Position.redeemable.isnot(True),
+            Position.cur_price.is_distinct_from(TokenPrice.price),
+        )
+        .values(
+            cur_price=TokenPrice.price,
+            current_value=current_value,
+            cash_pnl=cash_pnl,
+            percent_pnl=percent_pnl,
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if fetched_since is not None:
+        stmt = stmt.where(TokenPrice.fetched_at >= fetched_since)
+
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount or 0
+
+
+async def refresh_and_revalue(session: AsyncSession) -> Dict:
+    """
+    Refresh prices of every open asset and revalue all open positions.
+
+    Returns:
+        Dictionary with refresh counts and revalued_positions
+    """
+    started_at = datetime.utcnow()
+    refresh = await refresh_token_prices(session)
+    revalued = await revalue_open_positions(session, fetched_since=started_at)
+    logger.info(f"Price refresh: {refresh['priced']}/{refresh['requested']} assets priced, {revalued} positions revalued")
+    return {**refresh, "revalued_positions": revalued}
@@ -0,0 +1,157 @@
+"""
+Compact per-token price-history store.
+
+Each outcome token has one price_history row holding its whole series as two
+packed little-endian arrays: int64 timestamps and int32 prices in micro-USDC
+(12 bytes per point instead of one row per point). New points are appended
+to the packed arrays, so the store grows incrementally as the CLOB publishes
+new prices.
+"""
+
+import asyncio
+import logging
+import sys
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PriceHistory
+from app.services.data_fetcher import fetch_token_price_history
+from app.services.equity_curve import PriceSeries
+
+logger = logging.getLogger(__name__)
+
+PRICE_SCALE = 10 ** 6
+# Concurrent prices-history requests per refresh
+HISTORY_FETCH_CONCURRENCY = 4
+
+
+def pack_series(timestamps: Iterable[int], prices: Iterable[float]) -> Tuple[bytes, bytes]:
+    """Pack a price series into (timestamps, micro-prices) little-endian byte strings."""
+    ts = array('q', timestamps)
+    px = array('i', (round(p * PRICE_SCALE) for p in prices))
+    if sys.byteorder == "big":
+        ts.byteswap()
+        px.byteswap()
+    return ts.tobytes(), px.tobytes()
+
+
+def unpack_series(timestamps: bytes, prices: bytes) -> PriceSeries:
+    """Unpack byte strings from pack_series into (timestamps, prices)."""
+    ts = array('q')
+    ts.frombytes(timestamps or b"")
+    px = array('i')
+    px.frombytes(prices or b"")
+    if sys.byteorder == "big":
+        ts.byteswap()
+        px.byteswap()
+    return ts, [p / PRICE_SCALE for p in px]
+
+
+async def load_price_histories(session: AsyncSession, assets: Iterable[str]) -> Dict[str, PriceSeries]:
+    """
+    Load stored price series for assets.
+
+    Returns:
+        Dictionary mapping asset to (timestamps, prices); assets without history are omitted
+    """
+    assets = list(set(assets))
+    if not assets:
+        return {}
+    result = await session.execute(
+        select(PriceHistory.asset, PriceHistory.timestamps, PriceHistory.prices)
+        .where(PriceHistory.asset.in_(assets))
+    )
+    return {asset: unpack_series(ts, px) for asset, ts, px in result.all()}
+
+
+async def append_price_points(session: AsyncSession, asset: str, points: List[Dict]) -> int:
+    """
+    Append price points newer than the stored series (staged, committed by the caller).
+
+    Args:
+        session: Database session
+        asset: Token ID
+        points: [{"t": timestamp, "p": price}, ...] in any order
+
+    Returns:
+        Number of points appended
+    """
+    result = await session.execute(select(PriceHistory).where(PriceHistory.asset == asset))
+    history = result.scalar_one_or_none()
+    last_timestamp = history.last_timestamp if history is not None else None
+
+    new_points = sorted(
+        (int(p["t"]), float(p["p"])) for p in points
+        if p.get("t") is not None and p.get("p") is not None
+        and (last_timestamp is None or int(p["t"]) > last_timestamp)
+    )
+    if not new_points:
+        return 0
+
+    ts_bytes, px_bytes = pack_series((t for t, _ in new_points), (p for _, p in new_points))
+    if history is None:
+        stmt = pg_insert(PriceHistory).values(
+            asset=asset,
+            timestamps=ts_bytes,
+            prices=px_bytes,
+            point_count=len(new_points),
+            last_timestamp=new_points[-1][0]
+        )
+        stmt = stmt.on_conflict_do_nothing(index_elements=["asset"])
+        await session.execute(stmt)
+    else:
+        history.timestamps = (history.timestamps or b"") + ts_bytes
+        history.prices = (history.prices or b"") + px_bytes
+        history.point_count += len(new_points)
+        history.last_timestamp = new_points[-1][0]
+    return len(new_points)
+
+
+async def refresh_price_histories(
+    session: AsyncSession,
+    assets: Iterable[str],
+    fidelity_minutes: int = 60
+) -> Dict:
+    """
+    Fetch new CLOB price history for assets and append it to the store.
+
+    Each token is fetched from its stored last timestamp onwards; requests
+    run concurrently (HISTORY_FETCH_CONCURRENCY at a time).
+
+    Returns:
+        Dictionary with assets, appended_points and failed counts
+    """
+    assets = list(set(assets))
+    if not assets:
+        return {"assets": 0, "appended_points": 0, "failed": 0}
+
+    result = await session.execute(
+        select(PriceHistory.asset, PriceHistory.last_timestamp).where(PriceHistory.asset.in_(assets))
+    )
+    last_timestamps = dict(result.all())
+    semaphore = asyncio.Semaphore(HISTORY_FETCH_CONCURRENCY)
+
+    async def fetch(asset):
+        start_ts = last_timestamps.get(asset)
+        async with semaphore:
+            return await fetch_token_price_history(
+                asset, start_ts=start_ts + 1 if start_ts is not None else None, fidelity=fidelity_minutes
+            )
+
+    histories = await asyncio.gather(*(fetch(asset) for asset in assets), return_exceptions=True)
+
+    appended = 0
+    failed = 0
+    for asset, points in zip(assets, histories):
+        if isinstance(points, Exception):
+            failed += 1
+            logger.warning(f"Price history fetch failed for {asset}: {points}")
+            continue
+        appended += await append_price_points(session, asset, points)
+    await session.commit()
+
+    return {"assets": len(assets), "appended_points": appended, "failed": failed}
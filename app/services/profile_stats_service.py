@@ -1,5 +1,6 @@
 """Profile stats service for saving and retrieving profile statistics."""
 
+import asyncio
 from typing import Optional, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -131,7 +132,7 @@ async def fetch_and_save_profile_stats(
         Tuple of (api response dict, saved ProfileStats object)
     """
     # Fetch profile stats from API
-    stats_data = fetch_profile_stats(proxy_address, username=username)
+    stats_data = await asyncio.to_thread(fetch_profile_stats, proxy_address, username=username)
     
     if not stats_data:
         return None, None
@@ -0,0 +1,172 @@
+"""
+Mergeable KLL quantile sketch.
+
+Used to compute population medians and percentile anchors without keeping
+the whole sorted population in memory. Sketches built on different workers
+or partitions can be serialized, shipped and merged; the merged sketch has
+the same error guarantee as one built over the combined population.
+"""
+
+import math
+import random
+from typing import Dict, Iterable, List, Optional
+
+# Capacity decay between compactor levels (standard KLL choice)
+_CAPACITY_DECAY = 2.0 / 3.0
+# Approximate normalized rank error is _ERROR_CONSTANT / k
+_ERROR_CONSTANT = 1.7
+_MIN_K = 8
+
+
+def k_for_error(rank_error: float) -> int:
+    """Get the KLL accuracy parameter k for a target normalized rank error."""
+    if not (0 < rank_error < 1):
+        raise ValueError("rank_error must be in (0, 1)")
+    return max(_MIN_K, math.ceil(_ERROR_CONSTANT / rank_error))
+
+
+class KLLSketch:
+    """
+    KLL sketch (Karnin, Lang, Liberty) over float values.
+
+    Quantile answers are within roughly rank_error * n ranks of the exact
+    answer. While nothing has been compacted the sketch is exact and matches
+    sorted-list percentile interpolation.
+    """
+
+    def __init__(self, rank_error: float = 0.01, k: Optional[int] = None, seed: Optional[int] = None):
+        """
+        Args:
+            rank_error: Target normalized rank error (ignored if k is given)
+            k: KLL accuracy parameter (larger = more accurate, more memory)
+            seed: Seed for the compaction coin flips (for reproducible sketches)
+        """
+        self.k = k if k is not None else k_for_error(rank_error)
+        self.n = 0
+        self.compactors: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, value: float) -> None:
+        self.compactors[0].append(float(value))
+        self.n += 1
+        if self._retained() >= self._max_size():
+            self._compress()
+
+    def update(self, values: Iterable[float]) -> "KLLSketch":
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Merge another sketch into this one (in place)."""
+        if other.k != self.k:
+            # Keep the more accurate setting; error is bounded by the coarser input
+            self.k = max(self.k, other.k)
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        while self._retained() >= self._max_size():
+            self._compress()
+        return self
+
+    def _capacity(self, level: int) -> int:
+        height = len(self.compactors)
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** (height - level - 1))))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _retained(self) -> int:
+        return sum(len(items) for items in self.compactors)
+
+    def _compress(self) -> None:
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 >= len(self.compactors):
+                self.compactors.append([])
+            items.sort()
+            # Odd item stays behind so weights stay exact
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.randint(0, 1)
+            self.compactors[level + 1].extend(items[offset::2])
+            self.compactors[level] = leftover
+            return
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def is_exact(self) -> bool:
+        """True while no values have been compacted away."""
+        return all(not items for items in self.compactors[1:])
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _weighted_sorted(self) -> List[tuple]:
+        weighted = []
+        for level, items in enumerate(self.compactors):
+            weight = 1 << level
+            weighted.extend((value, weight) for value in items)
+        weighted.sort()
+        return weighted
+
+    def _value_at_rank(self, rank: float) -> float:
+        """Smallest value whose cumulative weight exceeds rank (0-based)."""
+        cumulative = 0
+        weighted = self._weighted_sorted()
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative > rank:
+                return value
+        return weighted[-1][0]
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Get the value at a percentile (0-100).
+
+        Matches get_percentile_value interpolation while the sketch is exact.
+        """
+        if self.n == 0:
+            return 0.0
+        k = (self.n - 1) * (percentile / 100.0)
+        if self.is_exact:
+            values = sorted(self.compactors[0])
+            f = math.floor(k)
+            c = math.ceil(k)
+            if f == c:
+                return values[int(k)]
+            return values[int(f)] * (c - k) + values[int(c)] * (k - f)
+        return self._value_at_rank(k)
+
+    def median(self) -> float:
+        """Median as the upper middle element (sorted(values)[n // 2])."""
+        if self.n == 0:
+            return 0.0
+        if self.is_exact:
+            return sorted(self.compactors[0])[self.n // 2]
+        return self._value_at_rank(self.n // 2)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable representation."""
+        return {"k": self.k, "n": self.n, "compactors": [list(items) for items in self.compactors]}
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: Optional[int] = None) -> "KLLSketch":
+        sketch = cls(k=int(data["k"]), seed=seed)
+        sketch.n = int(data["n"])
+        sketch.compactors = [[float(v) for v in items] for items in data["compactors"]] or [[]]
+        return sketch
@@ -2,15 +2,13 @@
 Scoring engine service for calculating trader performance metrics.
 """
 
-from typing import List, Dict, Tuple
+import heapq
+from typing import Iterable, List, Dict, Tuple, Union
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-from app.services.data_fetcher import (
-    get_market_resolution,
-    get_market_by_id,
-    get_market_category
-)
+from app.services.market_index import MarketIndex
+from app.services.trade_record import TradeRecord, normalize_trades
 from app.core.constants import (
     DEFAULT_CURRENT_VALUE,
     ROI_WEIGHT,
@@ -25,7 +23,7 @@ from app.core.constants import (
 )
 
 
-def calculate_trade_pnl(trade: Dict, market_resolution: str) -> Tuple[float, bool]:
+def calculate_trade_pnl(trade: Union[TradeRecord, Dict], market_resolution: str) -> Tuple[float, bool]:
     """
     Calculate profit/loss for a single trade.
     Returns (pnl_amount, is_win) tuple.
@@ -33,60 +31,15 @@ def calculate_trade_pnl(trade: Dict, market_resolution: str) -> Tuple[float, boo
     For winning trades: profit = size * (1 - price)
     For losing trades: loss = -size
     """
-    # Extract outcome/side - Dome orders use "side" field (BUY/SELL)
-    # For binary markets: BUY = YES outcome, SELL = NO outcome
-    side = (
-        trade.get("side") or
-        trade.get("outcome") or 
-        trade.get("outcomeYes") or
-        trade.get("outcome_yes") or
-        trade.get("outcomeIndex") or
-        trade.get("outcome_index") or
-        trade.get("position")
-    )
-    
-    # Handle boolean outcome
-    if isinstance(side, bool):
-        side = "YES" if side else "NO"
+    if not isinstance(trade, TradeRecord):
+        trade = TradeRecord.from_dict(trade)
     
+    side = trade.side
     if not side:
         return 0.0, False
     
-    side = str(side).upper()
-    
-    # Extract size - Dome orders use "shares" field (normalized or raw)
-    # shares_normalized is in dollars, shares is in raw units (divide by 1e6 to normalize)
-    raw_shares = trade.get("shares")
-    if raw_shares:
-        try:
-            size = float(trade.get("shares_normalized") or (float(raw_shares) / 1e6))
-        except:
-            size = float(trade.get("shares_normalized") or 0)
-    else:
-        size = float(
-            trade.get("shares_normalized") or 
-            trade.get("size") or 
-            trade.get("amount") or 
-            trade.get("quantity") or
-            trade.get("orderSize") or
-            trade.get("order_size") or
-            trade.get("filledSize") or
-            trade.get("filled_size") or
-            trade.get("volume") or
-            0
-        )
-    
-    # Extract price - Dome orders may use different field names
-    price = float(
-        trade.get("price") or 
-        trade.get("fillPrice") or 
-        trade.get("fill_price") or
-        trade.get("avgPrice") or
-        trade.get("avg_price") or
-        trade.get("executionPrice") or
-        trade.get("execution_price") or
-        0
-    )
+    size = trade.size
+    price = trade.price
     
     if size == 0:
         return 0.0, False
@@ -123,32 +76,26 @@ def calculate_trade_pnl(trade: Dict, market_resolution: str) -> Tuple[float, boo
         return loss, False
 
 
-def calculate_consistency(trades: List[Dict], markets: List[Dict]) -> float:
+def calculate_consistency(
+    trades: Iterable[Union[TradeRecord, Dict]],
+    markets: Union[MarketIndex, List[Dict]]
+) -> float:
     """
     Calculate consistency as weighted average of last 10 trades.
     Weights: 10, 9, 8, ..., 1 for most to least recent.
     """
-    if not trades:
+    records = normalize_trades(trades)
+    if not records:
         return 0.0
     
-    # Sort trades by timestamp (most recent first)
-    def get_timestamp(trade):
-        timestamp_str = trade.get("timestamp") or trade.get("createdAt") or trade.get("created_at") or trade.get("time")
-        if not timestamp_str:
-            return datetime.min
-        try:
-            # Handle various timestamp formats
-            if isinstance(timestamp_str, (int, float)):
-                return datetime.fromtimestamp(timestamp_str)
-            timestamp_str = str(timestamp_str).replace("Z", "+00:00")
-            return datetime.fromisoformat(timestamp_str)
-        except:
-            return datetime.min
-    
-    sorted_trades = sorted(trades, key=get_timestamp, reverse=True)
-    
-    # Take last N trades
-    recent_trades = sorted_trades[:MAX_CONSISTENCY_TRADES]
+    market_index = MarketIndex.of(markets)
+    
+    # Most recent first; trades without a timestamp sort last
+    recent_trades = heapq.nlargest(
+        MAX_CONSISTENCY_TRADES,
+        records,
+        key=lambda t: t.timestamp if t.timestamp is not None else float("-inf")
+    )
     
     if not recent_trades:
         return 0.0
@@ -158,18 +105,10 @@ def calculate_consistency(trades: List[Dict], markets: List[Dict]) -> float:
     
     for idx, trade in enumerate(recent_trades):
         weight = CONSISTENCY_WEIGHTS[idx]
-        market_id = (
-            trade.get("market_id") or 
-            trade.get("market") or 
-            trade.get("marketId") or
-            trade.get("market_slug") or
-            trade.get("marketSlug") or
-            trade.get("slug")
-        )
-        if not market_id:
+        if not trade.market_id:
             continue
         
-        market_resolution = get_market_resolution(market_id, markets)
+        market_resolution = market_index.resolution(trade.market_id)
         if not market_resolution:
             continue
         
@@ -183,37 +122,18 @@ def calculate_consistency(trades: List[Dict], markets: List[Dict]) -> float:
     return weighted_sum / total_weight
 
 
-def calculate_recency(trades: List[Dict]) -> float:
+def calculate_recency(trades: Iterable[Union[TradeRecord, Dict]]) -> float:
     """
     Calculate recency score as % of trades in last 7 days.
     """
-    if not trades:
+    records = normalize_trades(trades)
+    if not records:
         return 0.0
     
-    now = datetime.now()
-    seven_days_ago = now - timedelta(days=RECENCY_DAYS)
-    
-    recent_count = 0
-    
-    for trade in trades:
-        try:
-            timestamp_str = trade.get("timestamp") or trade.get("createdAt") or trade.get("created_at") or trade.get("time")
-            if not timestamp_str:
-                continue
-            
-            # Parse timestamp
-            if isinstance(timestamp_str, (int, float)):
-                timestamp = datetime.fromtimestamp(timestamp_str)
-            else:
-                timestamp_str = str(timestamp_str).replace("Z", "+00:00")
-                timestamp = datetime.fromisoformat(timestamp_str)
-            
-            if timestamp >= seven_days_ago:
-                recent_count += 1
-        except:
-            continue
+    cutoff = (datetime.now() - timedelta(days=RECENCY_DAYS)).timestamp()
+    recent_count = sum(1 for t in records if t.timestamp is not None and t.timestamp >= cutoff)
     
-    return recent_count / len(trades) if trades else 0.0
+    return recent_count / len(records)
 
 
 def calculate_roi(total_profit: float, total_volume: float) -> float:
@@ -223,10 +143,13 @@ def calculate_roi(total_profit: float, total_volume: float) -> float:
     return (total_profit / total_volume) * 100
 
 
-def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dict]) -> Dict:
+def calculate_metrics(wallet_address: str, trades: List[Union[TradeRecord, Dict]], markets: Union[MarketIndex, List[Dict]]) -> Dict:
     """
     Calculate all performance metrics for a wallet.
     Returns a dictionary with all metrics including category breakdown.
+    
+    markets may be a prebuilt MarketIndex (shared across wallets) or a list,
+    which is indexed once here.
     """
     if not trades:
         return {
@@ -244,6 +167,8 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
             "categories": {}
         }
     
+    market_index = MarketIndex.of(markets)
+    
     # Track positions (unique market_id)
     positions = set()
     active_positions = set()
@@ -270,16 +195,10 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
     trades_skipped_unresolved = 0
     trades_skipped_no_size = 0
     
-    for trade in trades:
-        # Extract market identifier - Dome orders may use market_slug, marketSlug, etc.
-        market_id = (
-            trade.get("market_id") or 
-            trade.get("market") or 
-            trade.get("marketId") or
-            trade.get("market_slug") or
-            trade.get("marketSlug") or
-            trade.get("slug")
-        )
+    records = normalize_trades(trades)
+    
+    for record in records:
+        market_id = record.market_id
         
         if not market_id:
             trades_skipped_no_market_id += 1
@@ -288,15 +207,15 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
         # Track positions even if market not found (so we know total unique markets traded)
         positions.add(market_id)
         
-        market = get_market_by_id(market_id, markets)
-        if not market:
+        market_entry = market_index.entry(market_id)
+        if not market_entry:
             trades_skipped_market_not_found += 1
             # Market not in our resolved markets list - treat as active/unresolved
             active_positions.add(market_id)
             continue
         
         # Check if market is resolved
-        market_resolution = get_market_resolution(market_id, markets)
+        market_resolution = market_entry.resolution
         is_resolved = market_resolution is not None
         
         if not is_resolved:
@@ -307,21 +226,7 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
             trades_skipped_unresolved += 1
             continue
         
-        # Extract size/amount - Dome orders use "shares" field (normalized or raw)
-        # shares_normalized is in dollars, shares is in raw units
-        size = float(
-            trade.get("shares_normalized") or  # Preferred: already normalized
-            (float(trade.get("shares") or 0) / 1e6) or  # Convert raw shares to normalized (divide by 1e6)
-            trade.get("size") or 
-            trade.get("amount") or 
-            trade.get("quantity") or
-            trade.get("orderSize") or
-            trade.get("order_size") or
-            trade.get("filledSize") or
-            trade.get("filled_size") or
-            trade.get("volume") or
-            0
-        )
+        size = record.size
         if size == 0:
             trades_skipped_no_size += 1
             continue
@@ -331,7 +236,7 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
         total_volume += size
         
         # Calculate PnL
-        pnl, is_win = calculate_trade_pnl(trade, market_resolution)
+        pnl, is_win = calculate_trade_pnl(record, market_resolution)
         
         if is_win:
             total_wins += pnl
@@ -341,7 +246,7 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
             losing_trades += 1
         
         # Category breakdown
-        category = get_market_category(market)
+        category = market_entry.category
         if is_win:
             category_stats[category]["total_wins"] += pnl
             category_stats[category]["win_count"] += 1
@@ -360,25 +265,21 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
         if len(trades) > 0:
             # Show sample trade structure for debugging
             sample_trade = trades[0]
-            print(f"  Sample trade keys: {list(sample_trade.keys())[:15]}")
-            market_id_sample = (
-                sample_trade.get("market_id") or 
-                sample_trade.get("market_slug") or 
-                sample_trade.get("slug") or
-                sample_trade.get("market") or
-                sample_trade.get("marketId")
-            )
+            sample_record = records[0]
+            if isinstance(sample_trade, dict):
+                print(f"  Sample trade keys: {list(sample_trade.keys())[:15]}")
+            market_id_sample = sample_record.market_id
             print(f"  Sample trade market identifier: {market_id_sample}")
-            print(f"  Sample trade size fields: shares={sample_trade.get('shares')}, shares_normalized={sample_trade.get('shares_normalized')}, size={sample_trade.get('size')}")
-            print(f"  Sample trade side: {sample_trade.get('side')}")
+            print(f"  Sample trade size: {sample_record.size}, price: {sample_record.price}")
+            print(f"  Sample trade side: {sample_record.side}")
             # Check if market exists in our markets list
             if market_id_sample:
-                found_market = get_market_by_id(market_id_sample, markets)
+                found_market = market_index.get(market_id_sample)
                 if found_market:
-                    resolution = get_market_resolution(market_id_sample, markets)
+                    resolution = market_index.resolution(market_id_sample)
                     print(f"  Market found: {found_market.get('slug') or found_market.get('id')}, resolution: {resolution}")
                 else:
-                    print(f"  Market NOT found in {len(markets)} markets")
+                    print(f"  Market NOT found in {len(market_index)} markets")
     elif trades_processed > 0:
         print(f"✓ Processed {trades_processed} trades with PnL calculation for wallet {wallet_address}")
         print(f"  - {trades_skipped_unresolved} trades skipped (unresolved markets)")
@@ -399,8 +300,8 @@ def calculate_metrics(wallet_address: str, trades: List[Dict], markets: List[Dic
     roi = calculate_roi(overall_pnl, total_volume)
     
     # Calculate consistency and recency
-    consistency = calculate_consistency(trades, markets)
-    recency = calculate_recency(trades)
+    consistency = calculate_consistency(records, market_index)
+    recency = calculate_recency(records)
     
     # Calculate final score
     win_rate_normalized = win_rate_percent / 100.0
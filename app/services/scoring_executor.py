@@ -0,0 +1,281 @@
+"""
+Process-pool scoring for large trader populations.
+
+calculate_scores_and_rank_with_percentiles is pure Python and, for hundreds
+of thousands of traders, blocks the event loop for seconds. ScoringExecutor
+splits the work:
+
+1. Worker processes each take a shard of wallets and build the per-wallet
+   feature rows that don't depend on the population (effective sample size,
+   shrunk win rate, adjusted PnL, risk). Shards are shipped as compact tuples
+   and come back as array('d') columns.
+2. The parent concatenates the columns, computes the population medians and
+   percentile anchors, and runs the final normalization - in a worker thread,
+   so the event loop stays free.
+
+Results are identical to calculate_scores_and_rank_with_percentiles. Small
+populations skip the process pool (the IPC cost outweighs the gain).
+"""
+
+import asyncio
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.scoring_config import ScoringConfig, default_scoring_config
+from app.services.leaderboard_service import (
+    calculate_risk_score,
+    calculate_scores_and_rank_with_percentiles,
+    clamp,
+    get_population_anchors,
+    get_population_median,
+)
+
+# Columns returned by build_feature_shard, in order
+FEATURE_COLUMNS = ("active", "n_eff", "W_shrunk", "roi", "pnl_adj", "score_risk")
+
+
+def _feature_row(t: Dict) -> Tuple:
+    """Compact, picklable input row for one trader."""
+    return (
+        t.get('total_trades', 0),
+        t.get('total_stakes', 0.0),
+        t.get('sum_sq_stakes', 0.0),
+        t.get('winning_stakes', 0.0),
+        t.get('roi', 0.0),
+        t.get('total_pnl', 0.0),
+        t.get('max_stake', 0.0),
+        t.get('worst_loss', 0.0),
+        t.get('all_losses', None),
+    )
+
+
+def build_feature_shard(rows: List[Tuple], config: ScoringConfig) -> Dict[str, array]:
+    """
+    Build population-independent feature columns for a shard of traders.
+
+    Runs in a worker process. Formulas match calculate_scores_and_rank.
+
+    Args:
+        rows: Input rows from _feature_row
+        config: Scoring configuration
+
+    Returns:
+        Dict of array('d') columns keyed by FEATURE_COLUMNS
+    """
+    columns = {name: array('d') for name in FEATURE_COLUMNS}
+    kw = config.shrink_kw
+    baseline = config.shrink_baseline_win_rate
+
+    for total_trades, S, sum_sq_s, s_w, roi_raw, pnl_total, max_s, worst_loss, all_losses in rows:
+        N_eff = (S**2) / sum_sq_s if sum_sq_s > 0 else 0.0
+        W = (s_w / S) if S > 0 else 0.0
+        ratio = (max_s / S) if S > 0 else 0.0
+
+        columns["active"].append(1.0 if total_trades >= config.min_trades_threshold else 0.0)
+        columns["n_eff"].append(N_eff)
+        columns["W_shrunk"].append((W * N_eff + baseline * kw) / (N_eff + kw))
+        columns["roi"].append(roi_raw)
+        columns["pnl_adj"].append(pnl_total / (1 + config.shrink_alpha * ratio))
+        columns["score_risk"].append(calculate_risk_score(worst_loss, S, config, all_losses))
+
+    return columns
+
+
+def finalize_scores(
+    traders_metrics: List[Dict],
+    columns: Dict[str, array],
+    config: ScoringConfig
+) -> Dict:
+    """
+    Global population step and final normalization over prebuilt feature columns.
+
+    Writes the same fields into the trader dicts as calculate_scores_and_rank
+    and returns the same shape as calculate_scores_and_rank_with_percentiles.
+    """
+    active = columns["active"]
+    population = [i for i in range(len(traders_metrics)) if active[i]]
+    if not population:
+        population = list(range(len(traders_metrics)))
+
+    n_eff = columns["n_eff"]
+    w_shrunk = columns["W_shrunk"]
+    rois = columns["roi"]
+    pnl_adjs = columns["pnl_adj"]
+    risks = columns["score_risk"]
+
+    pnl_m = get_population_median([pnl_adjs[i] for i in population], config)
+    roi_m = get_population_median([rois[i] for i in population], config)
+
+    kr, kp = config.shrink_kr, config.shrink_kp
+    roi_shrunk = [(r * n + roi_m * kr) / (n + kr) for r, n in zip(rois, n_eff)]
+    pnl_shrunk = [(p * n + pnl_m * kp) / (n + kp) for p, n in zip(pnl_adjs, n_eff)]
+
+    w_1, w_99 = get_population_anchors([w_shrunk[i] for i in population], config)
+    r_1, r_99 = get_population_anchors([roi_shrunk[i] for i in population], config)
+    p_1, p_99 = get_population_anchors([pnl_shrunk[i] for i in population], config)
+
+    for i, t in enumerate(traders_metrics):
+        t['W_shrunk'] = w_shrunk[i]
+        t['roi_shrunk'] = roi_shrunk[i]
+        t['pnl_shrunk'] = pnl_shrunk[i]
+        t['score_risk'] = risks[i]
+
+        w_score = clamp((w_shrunk[i] - w_1) / (w_99 - w_1), 0, 1) if w_99 - w_1 != 0 else 0.5
+        r_score = clamp((roi_shrunk[i] - r_1) / (r_99 - r_1), 0, 1) if r_99 - r_1 != 0 else 0.5
+        p_score = clamp((pnl_shrunk[i] - p_1) / (p_99 - p_1), 0, 1) if p_99 - p_1 != 0 else 0.5
+        t['score_win_rate'] = w_score
+        t['score_roi'] = r_score
+        t['score_pnl'] = p_score
+
+        final_score = 100.0 * (
+            config.weight_win_rate * w_score +
+            config.weight_roi * r_score +
+            config.weight_pnl * p_score +
+            config.weight_risk * (1.0 - risks[i])
+        )
+        t['final_score'] = clamp(final_score, 0, 100)
+
+    return {
+        "traders": traders_metrics,
+        "percentiles": {
+            f"w_shrunk_{config.percentile_lower}_percent": w_1,
+            f"w_shrunk_{config.percentile_upper}_percent": w_99,
+            f"roi_shrunk_{config.percentile_lower}_percent": r_1,
+            f"roi_shrunk_{config.percentile_upper}_percent": r_99,
+            f"pnl_shrunk_{config.percentile_lower}_percent": p_1,
+            f"pnl_shrunk_{config.percentile_upper}_percent": p_99,
+        },
+        "medians": {
+            "roi_median": roi_m,
+            "pnl_median": pnl_m,
+        },
+        "population_size": len(population),
+        "total_traders": len(traders_metrics)
+    }
+
+
+def _merge_columns(shards: List[Dict[str, array]]) -> Dict[str, array]:
+    merged = {name: array('d') for name in FEATURE_COLUMNS}
+    for shard in shards:
+        for name in FEATURE_COLUMNS:
+            merged[name].extend(shard[name])
+    return merged
+
+
+class ScoringExecutor:
+    """
+    Scores trader populations, sharding feature building across processes.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_parallel_traders: int = 50000,
+        shard_size: int = 25000
+    ):
+        """
+        Args:
+            max_workers: Worker processes (defaults to the CPU count)
+            min_parallel_traders: Populations smaller than this are scored in one thread
+            shard_size: Upper bound on traders per shard
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel_traders = min_parallel_traders
+        self.shard_size = shard_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and thread pools is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _shards(self, traders_metrics: List[Dict]) -> List[List[Tuple]]:
+        # At least one shard per worker, capped at shard_size traders each
+        per_shard = min(self.shard_size, -(-len(traders_metrics) // self.max_workers))
+        per_shard = max(1, per_shard)
+        return [
+            [_feature_row(t) for t in traders_metrics[start:start + per_shard]]
+            for start in range(0, len(traders_metrics), per_shard)
+        ]
+
+    def _use_pool(self, traders_metrics: List[Dict]) -> bool:
+        return self.max_workers > 1 and len(traders_metrics) >= self.min_parallel_traders
+
+    def score_with_percentiles_sync(
+        self,
+        traders_metrics: List[Dict],
+        config: Optional[ScoringConfig] = None
+    ) -> Dict:
+        """Blocking variant of score_with_percentiles (for scripts and jobs)."""
+        config = config or default_scoring_config
+        config.validate()
+        if not traders_metrics or not self._use_pool(traders_metrics):
+            return calculate_scores_and_rank_with_percentiles(traders_metrics, config)
+
+        shards = self._shards(traders_metrics)
+        pool = self._get_pool()
+        columns = _merge_columns(list(pool.map(build_feature_shard, shards, [config] * len(shards))))
+        return finalize_scores(traders_metrics, columns, config)
+
+    async def score_with_percentiles(
+        self,
+        traders_metrics: List[Dict],
+        config: Optional[ScoringConfig] = None
+    ) -> Dict:
+        """
+        Score traders without blocking the event loop.
+
+        Args:
+            traders_metrics: List of trader metrics dictionaries (scored in place)
+            config: Scoring configuration (uses default if not provided)
+
+        Returns:
+            Same dict as calculate_scores_and_rank_with_percentiles
+        """
+        config = config or default_scoring_config
+        config.validate()
+        if not traders_metrics or not self._use_pool(traders_metrics):
+            return await asyncio.to_thread(calculate_scores_and_rank_with_percentiles, traders_metrics, config)
+
+        loop = asyncio.get_running_loop()
+        shards = await asyncio.to_thread(self._shards, traders_metrics)
+        pool = self._get_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, build_feature_shard, shard, config)
+            for shard in shards
+        ])
+        columns = _merge_columns(results)
+        return await asyncio.to_thread(finalize_scores, traders_metrics, columns, config)
+
+    async def score(
+        self,
+        traders_metrics: List[Dict],
+        config: Optional[ScoringConfig] = None
+    ) -> List[Dict]:
+        """Async equivalent of calculate_scores_and_rank."""
+        if not traders_metrics:
+            return []
+        result = await self.score_with_percentiles(traders_metrics, config)
+        return result["traders"]
+
+    def shutdown(self) -> None:
+        """Stop worker processes (they are restarted lazily on next use)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Shared executor used by the API
+scoring_executor = ScoringExecutor(
+    max_workers=settings.SCORING_WORKERS or None,
+    min_parallel_traders=settings.SCORING_PARALLEL_MIN_TRADERS,
+    shard_size=settings.SCORING_SHARD_SIZE
+)
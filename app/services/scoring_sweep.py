@@ -0,0 +1,316 @@
+"""
+Multi-config scoring sweep.
+
+Evaluates many ScoringConfig variants over the same trader population in one
+pass. Per-trader features are extracted once into columns, and every
+intermediate result (population, medians, shrunk values, anchors, normalized
+scores, risk) is cached by the config parameters it depends on. Variants that
+only differ in weights therefore share everything except the final weighted
+sum, and variants that differ in one shrink constant only recompute that
+column.
+
+Scores are identical to calculate_scores_and_rank for the same config, and
+the input trader dicts are never modified.
+"""
+
+import itertools
+from dataclasses import asdict, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.scoring_config import ScoringConfig, default_scoring_config
+from app.services.leaderboard_service import (
+    calculate_risk_score,
+    clamp,
+    get_population_anchors,
+    get_population_median,
+)
+
+# Grid keys that set several ScoringConfig fields at once
+_GRID_GROUPS = {
+    "weights": ("weight_win_rate", "weight_roi", "weight_pnl", "weight_risk"),
+    "percentiles": ("percentile_lower", "percentile_upper"),
+}
+
+
+class ScoringSweep:
+    """
+    Shared feature columns for a trader population, scored under many configs.
+    """
+
+    def __init__(self, traders_metrics: List[Dict]):
+        self.wallets: List[str] = []
+        self._total_trades: List[int] = []
+        self._stakes: List[float] = []
+        self._n_eff: List[float] = []
+        self._win: List[float] = []
+        self._roi: List[float] = []
+        self._pnl: List[float] = []
+        self._max_ratio: List[float] = []
+        self._worst_loss: List[float] = []
+        self._all_losses: List[Optional[List[float]]] = []
+        self._cache: Dict[Tuple, Any] = {}
+
+        for t in traders_metrics:
+            S = t.get('total_stakes', 0.0)
+            sum_sq_s = t.get('sum_sq_stakes', 0.0)
+            self.wallets.append(t.get('wallet_address', ''))
+            self._total_trades.append(t.get('total_trades', 0))
+            self._stakes.append(S)
+            self._n_eff.append((S**2) / sum_sq_s if sum_sq_s > 0 else 0.0)
+            self._win.append((t.get('winning_stakes', 0.0) / S) if S > 0 else 0.0)
+            self._roi.append(t.get('roi', 0.0))
+            self._pnl.append(t.get('total_pnl', 0.0))
+            self._max_ratio.append((t.get('max_stake', 0.0) / S) if S > 0 else 0.0)
+            self._worst_loss.append(t.get('worst_loss', 0.0))
+            self._all_losses.append(t.get('all_losses', None))
+
+    def __len__(self) -> int:
+        return len(self.wallets)
+
+    def _cached(self, key: Tuple, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    # ------------------------------------------------------------------
+    # Cached intermediates
+    # ------------------------------------------------------------------
+
+    def _population(self, c: ScoringConfig) -> List[int]:
+        def compute():
+            active = [i for i, n in enumerate(self._total_trades) if n >= c.min_trades_threshold]
+            return active or list(range(len(self)))
+        return self._cached(("population", c.min_trades_threshold), compute)
+
+    def _pnl_adj(self, c: ScoringConfig) -> List[float]:
+        return self._cached(
+            ("pnl_adj", c.shrink_alpha),
+            lambda: [p / (1 + c.shrink_alpha * r) for p, r in zip(self._pnl, self._max_ratio)]
+        )
+
+    def _medians_key(self, c: ScoringConfig) -> Tuple:
+        return (c.min_trades_threshold, c.shrink_alpha, c.anchor_method, c.sketch_rank_error)
+
+    def _medians(self, c: ScoringConfig) -> Tuple[float, float]:
+        def compute():
+            population = self._population(c)
+            pnl_adj = self._pnl_adj(c)
+            pnl_m = get_population_median([pnl_adj[i] for i in population], c)
+            roi_m = get_population_median([self._roi[i] for i in population], c)
+            return roi_m, pnl_m
+        return self._cached(("medians",) + self._medians_key(c), compute)
+
+    def _shrunk_column(self, name: str, c: ScoringConfig) -> Tuple[Tuple, List[float]]:
+        """Get (cache key, values) of a shrunk column for a config."""
+        if name == "W_shrunk":
+            key = ("W_shrunk", c.shrink_kw, c.shrink_baseline_win_rate)
+            kw, base = c.shrink_kw, c.shrink_baseline_win_rate
+            compute = lambda: [
+                (w * n + base * kw) / (n + kw) for w, n in zip(self._win, self._n_eff)
+            ]
+        elif name == "roi_shrunk":
+            key = ("roi_shrunk", c.shrink_kr) + self._medians_key(c)
+            roi_m = self._medians(c)[0]
+            kr = c.shrink_kr
+            compute = lambda: [
+                (r * n + roi_m * kr) / (n + kr) for r, n in zip(self._roi, self._n_eff)
+            ]
+        else:
+            key = ("pnl_shrunk", c.shrink_kp) + self._medians_key(c)
+            pnl_m = self._medians(c)[1]
+            kp = c.shrink_kp
+            pnl_adj = self._pnl_adj(c)
+            compute = lambda: [
+                (p * n + pnl_m * kp) / (n + kp) for p, n in zip(pnl_adj, self._n_eff)
+            ]
+        return key, self._cached(key, compute)
+
+    def _normalized(self, name: str, c: ScoringConfig) -> List[float]:
+        """Shrunk column normalized between its population percentile anchors."""
+        column_key, values = self._shrunk_column(name, c)
+        anchor_key = (
+            c.min_trades_threshold, c.percentile_lower, c.percentile_upper,
+            c.anchor_method, c.sketch_rank_error
+        )
+
+        def compute():
+            population = self._population(c)
+            lower, upper = get_population_anchors([values[i] for i in population], c)
+            if upper - lower != 0:
+                return [clamp((v - lower) / (upper - lower), 0, 1) for v in values]
+            return [0.5] * len(values)
+        return self._cached(("normalized", column_key) + anchor_key, compute)
+
+    def _risk(self, c: ScoringConfig) -> List[float]:
+        return self._cached(
+            ("risk", c.risk_n_worst_losses),
+            lambda: [
+                calculate_risk_score(w, s, c, losses)
+                for w, s, losses in zip(self._worst_loss, self._stakes, self._all_losses)
+            ]
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def score(self, config: Optional[ScoringConfig] = None) -> List[float]:
+        """
+        Get final scores (0-100) for every trader under a config.
+
+        Returns:
+            Final scores in input order
+        """
+        c = config or default_scoring_config
+        c.validate()
+        if not self.wallets:
+            return []
+
+        w_scores = self._normalized("W_shrunk", c)
+        r_scores = self._normalized("roi_shrunk", c)
+        p_scores = self._normalized("pnl_shrunk", c)
+        risk = self._risk(c)
+        ww, wr, wp, wrisk = c.weight_win_rate, c.weight_roi, c.weight_pnl, c.weight_risk
+        return [
+            clamp(100.0 * (ww * w + wr * r + wp * p + wrisk * (1.0 - k)), 0, 100)
+            for w, r, p, k in zip(w_scores, r_scores, p_scores, risk)
+        ]
+
+
+def expand_config_grid(
+    grid: Dict[str, Sequence],
+    base: Optional[ScoringConfig] = None
+) -> List[ScoringConfig]:
+    """
+    Expand a parameter grid into ScoringConfig variants (cartesian product).
+
+    Keys are ScoringConfig field names, plus "weights" (lists of
+    [win_rate, roi, pnl, risk]) and "percentiles" (lists of [lower, upper]).
+
+    Example:
+        {"weights": [[0.3, 0.3, 0.3, 0.1], [0.4, 0.2, 0.3, 0.1]], "shrink_kr": [25, 50, 100]}
+
+    Raises:
+        ValueError: If a key is unknown or a variant fails validation
+    """
+    base = base or default_scoring_config
+    fields = set(asdict(base))
+    keys = list(grid)
+    for key in keys:
+        if key not in fields and key not in _GRID_GROUPS:
+            raise ValueError(f"Unknown scoring config parameter: {key}")
+
+    configs = []
+    for combo in itertools.product(*(grid[key] for key in keys)):
+        overrides = {}
+        for key, value in zip(keys, combo):
+            if key in _GRID_GROUPS:
+                group = _GRID_GROUPS[key]
+                if len(value) != len(group):
+                    raise ValueError(f"{key} needs {len(group)} values, got {len(value)}")
+                overrides.update(zip(group, value))
+            else:
+                overrides[key] = value
+        config = replace(base, **overrides)
+        config.validate()
+        configs.append(config)
+    return configs
+
+
+def _average_ranks(values: List[float]) -> List[float]:
+    """Ranks of values (descending, 1 = highest); ties get their average rank."""
+    order = sorted(range(len(values)), key=lambda i: -values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        average = (i + j) / 2.0 + 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = average
+        i = j + 1
+    return ranks
+
+
+def spearman_correlation(ranks_a: List[float], ranks_b: List[float]) -> float:
+    """Spearman rank correlation of two rank vectors (Pearson on ranks)."""
+    n = len(ranks_a)
+    if n < 2:
+        return 1.0
+    mean_a = sum(ranks_a) / n
+    mean_b = sum(ranks_b) / n
+    cov = sum((a - mean_a) * (b - mean_b) for a, b in zip(ranks_a, ranks_b))
+    var_a = sum((a - mean_a) ** 2 for a in ranks_a)
+    var_b = sum((b - mean_b) ** 2 for b in ranks_b)
+    if var_a == 0 or var_b == 0:
+        return 1.0 if ranks_a == ranks_b else 0.0
+    return cov / (var_a * var_b) ** 0.5
+
+
+def run_scoring_sweep(
+    traders_metrics: List[Dict],
+    configs: List[ScoringConfig],
+    top_k: int = 10,
+    include_scores: bool = False
+) -> Dict:
+    """
+    Score a population under every config and compare the resulting rankings.
+
+    Args:
+        traders_metrics: List of trader metrics dictionaries (not modified)
+        configs: Config variants to evaluate (first one is the baseline)
+        top_k: Size of the top list used for overlap and reported per variant
+        include_scores: Include every trader's final score per variant
+
+    Returns:
+        Dict containing:
+        - variants: Per-variant config, top wallets and (optionally) scores
+        - rank_correlation: Spearman correlation matrix between variants
+        - top_k_overlap: Fraction of shared top-K wallets between variants
+        - total_traders: Number of traders scored
+    """
+    if not configs:
+        raise ValueError("At least one config is required")
+
+    sweep = ScoringSweep(traders_metrics)
+    k = max(1, min(top_k, len(sweep))) if len(sweep) else 0
+
+    scores = [sweep.score(config) for config in configs]
+    ranks = [_average_ranks(s) for s in scores]
+    tops = [
+        sorted(range(len(s)), key=lambda i: -s[i])[:k]
+        for s in scores
+    ]
+
+    variants = []
+    for index, (config, variant_scores, top) in enumerate(zip(configs, scores, tops)):
+        variant = {
+            "index": index,
+            "config": asdict(config),
+            "top": [
+                {"wallet_address": sweep.wallets[i], "final_score": variant_scores[i]}
+                for i in top
+            ],
+        }
+        if include_scores:
+            variant["scores"] = dict(zip(sweep.wallets, variant_scores))
+        variants.append(variant)
+
+    top_sets = [set(top) for top in tops]
+    correlation = [
+        [spearman_correlation(ranks[a], ranks[b]) for b in range(len(configs))]
+        for a in range(len(configs))
+    ]
+    overlap = [
+        [len(top_sets[a] & top_sets[b]) / k if k else 1.0 for b in range(len(configs))]
+        for a in range(len(configs))
+    ]
+
+    return {
+        "total_traders": len(sweep),
+        "top_k": k,
+        "variants": variants,
+        "rank_correlation": correlation,
+        "top_k_overlap": overlap,
+    }
@@ -0,0 +1,167 @@
+"""
+Bounded in-memory cache for per-wallet trade lists.
+
+Replaces the unbounded _trader_orders_cache dict in trader_service, which
+had no size limit or expiry and served stale trades forever. LRUTTLCache
+keeps entries in least-recently-used order with a per-entry TTL, accounts
+their approximate size in bytes and evicts the least recently used entries
+once the byte budget is exceeded. Concurrent misses for the same key share
+one load, so a burst of trader page views causes a single upstream fetch.
+
+The cache is per process: with several workers each keeps its own copy,
+and the TTL bounds how stale any of them can be.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint in bytes of JSON-like data (dicts, lists, strings, numbers)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class LRUTTLCache:
+    """LRU cache bounded by total entry size in bytes, with a TTL per entry."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        max_entry_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # A single huge entry would flush everything else; such entries are not cached
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 4
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "expirations": 0, "rejected": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[2] <= self._clock():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """
+        Cache value under key, evicting least recently used entries to stay within max_bytes.
+
+        Returns:
+            False if the value is larger than max_entry_bytes and was not cached
+        """
+        size = estimate_size(value)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_entry_bytes or size > self.max_bytes:
+                self._stats["rejected"] += 1
+                return False
+            while self._entries and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+            self._entries[key] = (value, size, self._clock() + ttl)
+            self._bytes += size
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value, or the result of loader() (then cached).
+
+        Concurrent misses for the same key await one shared load; a failed load
+        is not cached and its error is raised to every waiter.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is loop:
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            self._stats["loads"] += 1
+            value = await loader()
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited failure is not logged as never retrieved
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, bytes used and hit / miss / eviction counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
+
+
+# Trades per wallet (lowercased address), shared by trader detail and basic info
+trader_trades_cache = LRUTTLCache(
+    max_bytes=settings.TRADER_TRADES_CACHE_MAX_BYTES,
+    ttl_seconds=settings.TRADER_TRADES_CACHE_TTL_SECONDS,
+)
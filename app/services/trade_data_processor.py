@@ -3,7 +3,7 @@ Service for reading, cleaning, and inserting trade data into database.
 Handles data cleaning, PnL calculation, and database insertion.
 """
 
-from typing import List, Dict, Optional, Set, Tuple
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
@@ -11,6 +11,9 @@ from decimal import Decimal
 from collections import defaultdict
 from app.db.models import Trader, Trade, AggregatedMetrics
 from app.services.data_fetcher import fetch_user_trades
+from app.services.lot_engine import FifoLotEngine
+from app.services.cost_basis_service import DEFAULT_METHODS, create_engines, run_cost_basis_pass, save_cost_basis_pnl
+from app.services.lot_state_service import load_lot_state, save_lot_state, next_watermark
 import logging
 
 logger = logging.getLogger(__name__)
@@ -92,11 +95,39 @@ def clean_trade_data(trades: List[Dict]) -> List[Dict]:
     return cleaned_trades
 
 
-def calculate_trade_pnl(trades: List[Dict]) -> List[Dict]:
+def calculate_trade_pnl(trades: List[Dict], engine: Optional[FifoLotEngine] = None) -> List[Dict]:
     """
     Calculate entry/exit prices and PnL for trades.
     Uses FIFO (First In First Out) method to match BUY and SELL trades.
     
+    Lots are matched by FifoLotEngine on integer micro-units; results are
+    converted back to Decimal.
+    
+    Args:
+        trades: List of cleaned trade dictionaries
+        engine: Lot engine holding previously opened lots (e.g. restored from
+            open_lots); a fresh engine is used if not provided. Updated in place.
+    
+    Returns:
+        List of trades with calculated entry_price, exit_price, and pnl
+    """
+    # Sort trades by timestamp
+    sorted_trades = sorted(trades, key=lambda x: x["timestamp"])
+    run_cost_basis_pass(sorted_trades, {"fifo": engine if engine is not None else FifoLotEngine()})
+    
+    # For remaining BUY positions, calculate unrealized PnL using current price
+    # (This would require market data, so we'll leave it as None for now)
+    
+    return sorted_trades
+
+
+def calculate_trade_pnl_decimal(trades: List[Dict]) -> List[Dict]:
+    """
+    Reference implementation of calculate_trade_pnl on Decimal dicts and lists.
+    
+    Kept for verification and benchmarking of the fixed-point lot engine;
+    consuming lots with list.pop(0) makes it O(n²) for many small buys.
+    
     Args:
         trades: List of cleaned trade dictionaries
     
@@ -314,26 +345,17 @@ async def insert_trades_to_db(
     return saved_count
 
 
-async def calculate_and_insert_aggregated_metrics(
-    session: AsyncSession,
-    trader: Trader
-) -> AggregatedMetrics:
+def aggregate_trade_metrics(trades: Iterable[Dict]) -> Dict:
     """
-    Calculate and insert/update aggregated metrics for a trader.
+    Calculate aggregated metrics values from trades.
     
     Args:
-        session: Database session
-        trader: Trader object
+        trades: Trade dicts with size, price, pnl and exit_price
     
     Returns:
-        AggregatedMetrics object
+        Dictionary of AggregatedMetrics column values
     """
-    # Get all trades for this trader
-    stmt = select(Trade).where(Trade.trader_id == trader.id)
-    result = await session.execute(stmt)
-    trades = result.scalars().all()
-    
-    # Calculate metrics
+    trades = list(trades)
     total_trades = len(trades)
     total_stake = Decimal('0')
     total_pnl = Decimal('0')
@@ -347,28 +369,28 @@ async def calculate_and_insert_aggregated_metrics(
     
     for trade in trades:
         # Total stake (sum of all trade sizes)
-        total_stake += trade.size
+        total_stake += trade["size"]
         
         # Total volume (size * price)
-        total_volume += trade.size * trade.price
+        total_volume += trade["size"] * trade["price"]
         
         # PnL calculations
-        if trade.pnl is not None:
-            total_pnl += trade.pnl
-            if trade.exit_price is not None:
+        if trade["pnl"] is not None:
+            total_pnl += trade["pnl"]
+            if trade["exit_price"] is not None:
                 # Realized PnL (has exit price)
-                realized_pnl += trade.pnl
-                if trade.pnl > 0:
+                realized_pnl += trade["pnl"]
+                if trade["pnl"] > 0:
                     win_count += 1
-                    if trade.pnl > largest_win:
-                        largest_win = trade.pnl
-                elif trade.pnl < 0:
+                    if trade["pnl"] > largest_win:
+                        largest_win = trade["pnl"]
+                elif trade["pnl"] < 0:
                     loss_count += 1
-                    if trade.pnl < largest_loss:
-                        largest_loss = trade.pnl
+                    if trade["pnl"] < largest_loss:
+                        largest_loss = trade["pnl"]
             else:
                 # Unrealized PnL (no exit price yet)
-                unrealized_pnl += trade.pnl
+                unrealized_pnl += trade["pnl"]
     
     # Calculate win rate
     total_closed_trades = win_count + loss_count
@@ -381,6 +403,111 @@ async def calculate_and_insert_aggregated_metrics(
     if total_trades > 0:
         avg_trade_size = total_stake / total_trades
     
+    return {
+        "total_trades": total_trades,
+        "total_stake": total_stake,
+        "total_pnl": total_pnl,
+        "realized_pnl": realized_pnl,
+        "unrealized_pnl": unrealized_pnl,
+        "win_count": win_count,
+        "loss_count": loss_count,
+        "win_rate": win_rate,
+        "avg_trade_size": avg_trade_size,
+        "largest_win": largest_win,
+        "largest_loss": largest_loss,
+        "total_volume": total_volume,
+    }
+
+
+def merge_trade_metrics(stored: Dict, new: Dict) -> Dict:
+    """
+    Combine aggregated metrics of two disjoint trade sets.
+    
+    merge_trade_metrics(aggregate_trade_metrics(a), aggregate_trade_metrics(b))
+    equals aggregate_trade_metrics(a + b).
+    
+    Args:
+        stored: Metrics of the trades already aggregated
+        new: Metrics of the trades to add
+    
+    Returns:
+        Dictionary of AggregatedMetrics column values
+    """
+    merged = {
+        field: stored[field] + new[field]
+        for field in (
+            "total_trades", "total_stake", "total_pnl", "realized_pnl", "unrealized_pnl",
+            "win_count", "loss_count", "total_volume",
+        )
+    }
+    merged["largest_win"] = max(stored["largest_win"], new["largest_win"])
+    merged["largest_loss"] = min(stored["largest_loss"], new["largest_loss"])
+    
+    total_closed_trades = merged["win_count"] + merged["loss_count"]
+    merged["win_rate"] = Decimal('0')
+    if total_closed_trades > 0:
+        merged["win_rate"] = (Decimal(str(merged["win_count"])) / Decimal(str(total_closed_trades))) * 100
+    merged["avg_trade_size"] = Decimal('0')
+    if merged["total_trades"] > 0:
+        merged["avg_trade_size"] = merged["total_stake"] / merged["total_trades"]
+    return merged
+
+
+async def add_trades_to_aggregated_metrics(
+    session: AsyncSession,
+    trader: Trader,
+    trades: List[Dict]
+) -> Optional[AggregatedMetrics]:
+    """
+    Add new trades to a trader's stored aggregated metrics (staged, committed by the caller).
+    
+    Args:
+        session: Database session
+        trader: Trader object
+        trades: Trades not yet counted in the stored metrics
+    
+    Returns:
+        Updated AggregatedMetrics, or None if the trader has none stored yet
+    """
+    result = await session.execute(select(AggregatedMetrics).where(AggregatedMetrics.trader_id == trader.id))
+    metrics = result.scalar_one_or_none()
+    if metrics is None:
+        return None
+    
+    stored = {field: getattr(metrics, field) for field in aggregate_trade_metrics([])}
+    new = aggregate_trade_metrics(
+        {"size": t["size"], "price": t["price"], "pnl": t.get("pnl"), "exit_price": t.get("exit_price")}
+        for t in trades
+    )
+    for field, value in merge_trade_metrics(stored, new).items():
+        setattr(metrics, field, value)
+    return metrics
+
+
+async def calculate_and_insert_aggregated_metrics(
+    session: AsyncSession,
+    trader: Trader
+) -> AggregatedMetrics:
+    """
+    Calculate and insert/update aggregated metrics for a trader.
+    
+    Args:
+        session: Database session
+        trader: Trader object
+    
+    Returns:
+        AggregatedMetrics object
+    """
+    # Get all trades for this trader
+    stmt = select(Trade).where(Trade.trader_id == trader.id)
+    result = await session.execute(stmt)
+    trades = result.scalars().all()
+    
+    metric_values = aggregate_trade_metrics(
+        {"size": t.size, "price": t.price, "pnl": t.pnl, "exit_price": t.exit_price}
+        for t in trades
+    )
+    
     # Get or create aggregated metrics
     stmt = select(AggregatedMetrics).where(AggregatedMetrics.trader_id == trader.id)
     result = await session.execute(stmt)
@@ -388,35 +515,11 @@ async def calculate_and_insert_aggregated_metrics(
     
     if metrics:
         # Update existing metrics
-        metrics.total_trades = total_trades
-        metrics.total_stake = total_stake
-        metrics.total_pnl = total_pnl
-        metrics.realized_pnl = realized_pnl
-        metrics.unrealized_pnl = unrealized_pnl
-        metrics.win_count = win_count
-        metrics.loss_count = loss_count
-        metrics.win_rate = win_rate
-        metrics.avg_trade_size = avg_trade_size
-        metrics.largest_win = largest_win
-        metrics.largest_loss = largest_loss
-        metrics.total_volume = total_volume
+        for field, value in metric_values.items():
+            setattr(metrics, field, value)
     else:
         # Create new metrics
-        metrics = AggregatedMetrics(
-            trader_id=trader.id,
-            total_trades=total_trades,
-            total_stake=total_stake,
-            total_pnl=total_pnl,
-            realized_pnl=realized_pnl,
-            unrealized_pnl=unrealized_pnl,
-            win_count=win_count,
-            loss_count=loss_count,
-            win_rate=win_rate,
-            avg_trade_size=avg_trade_size,
-            largest_win=largest_win,
-            largest_loss=largest_loss,
-            total_volume=total_volume
-        )
+        metrics = AggregatedMetrics(trader_id=trader.id, **metric_values)
         session.add(metrics)
     
     await session.commit()
@@ -425,7 +528,8 @@ async def calculate_and_insert_aggregated_metrics(
 
 async def process_and_insert_trade_data(
     session: AsyncSession,
-    wallet_address: str
+    wallet_address: str,
+    full_replay: bool = False
 ) -> Dict:
     """
     Main function to read, clean, and insert trade data for a wallet address.
@@ -433,14 +537,17 @@ async def process_and_insert_trade_data(
     This function:
     1. Fetches trade data from API
     2. Cleans data (removes duplicates, fixes missing values)
-    3. Calculates entry/exit prices and PnL
+    3. Calculates entry/exit prices and PnL (only for trades newer than the
+       stored open-lot watermark, when the stored state is consistent)
     4. Creates/updates Trader record
     5. Inserts trades into database
-    6. Calculates and inserts aggregated metrics
+    6. Calculates and inserts aggregated metrics (incremental runs add the
+       new trades to the stored metrics instead of re-reading every trade)
     
     Args:
         session: Database session
         wallet_address: Wallet address to process
+        full_replay: Ignore stored open lots and re-match the whole history
     
     Returns:
         Dictionary with processing results
@@ -477,12 +584,44 @@ async def process_and_insert_trade_data(
             }
         
         # Step 3: Calculate entry/exit prices and PnL
-        logger.info(f"Calculating PnL for {len(cleaned_trades)} trades")
-        trades_with_pnl = calculate_trade_pnl(cleaned_trades)
+        # Trades newer than the stored watermark are matched against the
+        # persisted open lots; otherwise the full history is replayed.
+        # FIFO results go on the trades; every cost-basis method is totalled
+        # in the same pass.
+        lot_state = None if full_replay else await load_lot_state(session, wallet_address)
+        if lot_state is not None and lot_state.is_consistent_with(cleaned_trades, DEFAULT_METHODS):
+            pnl_mode = "incremental"
+            engines = lot_state.engines
+            new_trades = [t for t in cleaned_trades if t["timestamp"] > lot_state.last_timestamp]
+        else:
+            if lot_state is not None:
+                logger.info(f"Stored lots out of date for {wallet_address}, replaying full history")
+            pnl_mode = "full_replay"
+            lot_state = None
+            engines = create_engines(DEFAULT_METHODS)
+            new_trades = cleaned_trades
+        
+        logger.info(f"Calculating PnL for {len(new_trades)} trades ({pnl_mode})")
+        trades_with_pnl = sorted(new_trades, key=lambda x: x["timestamp"])
+        cost_basis_totals = run_cost_basis_pass(trades_with_pnl, engines)
+        
+        last_timestamp, trade_count = next_watermark(lot_state, trades_with_pnl)
+        incremental = pnl_mode == "incremental"
+        await save_lot_state(
+            session,
+            wallet_address,
+            engines,
+            last_timestamp,
+            trade_count,
+            changed_assets={t["asset"] for t in trades_with_pnl} if incremental else None
+        )
+        await save_cost_basis_pnl(
+            session, wallet_address, cost_basis_totals, engines, last_timestamp, incremental=incremental
+        )
         
         # Step 4: Get or create trader
         # Extract trader info from first trade (if available)
-        first_trade = trades_with_pnl[0] if trades_with_pnl else {}
+        first_trade = trades_with_pnl[0] if trades_with_pnl else cleaned_trades[0]
         trader = await get_or_create_trader(
             session=session,
             wallet_address=wallet_address,
@@ -493,13 +632,20 @@ async def process_and_insert_trade_data(
             profile_image_optimized=first_trade.get("profileImageOptimized")
         )
         
+        # Step 6 (incremental): add the new trades to the stored metrics, staged so
+        # they are committed together with the trades and the lot watermark
+        metrics = None
+        if incremental:
+            metrics = await add_trades_to_aggregated_metrics(session, trader, trades_with_pnl)
+        
         # Step 5: Insert trades
         logger.info(f"Inserting {len(trades_with_pnl)} trades into database")
         saved_count = await insert_trades_to_db(session, trader, trades_with_pnl)
         
-        # Step 6: Calculate and insert aggregated metrics
-        logger.info(f"Calculating aggregated metrics for trader {trader.id}")
-        metrics = await calculate_and_insert_aggregated_metrics(session, trader)
+        # Step 6: Calculate and insert aggregated metrics from every stored trade
+        if metrics is None:
+            logger.info(f"Calculating aggregated metrics for trader {trader.id}")
+            metrics = await calculate_and_insert_aggregated_metrics(session, trader)
         
         logger.info(f"Successfully processed {saved_count} trades for wallet: {wallet_address}")
         
@@ -508,6 +654,7 @@ async def process_and_insert_trade_data(
             "raw_trades_count": len(raw_trades),
             "cleaned_trades_count": len(cleaned_trades),
             "saved_trades_count": saved_count,
+            "pnl_mode": pnl_mode,
             "trader_id": trader.id,
             "metrics": {
                 "total_trades": metrics.total_trades,
@@ -0,0 +1,112 @@
+"""
+Canonical trade record for scoring.
+
+Trades arrive from Dome, the Polymarket data API and the database with
+different field names (market_slug / marketSlug / market, shares /
+shares_normalized / size, ISO or epoch timestamps). normalize_trades probes
+those alternatives once per trade and produces compact TradeRecord objects
+with a typed market key, side, size, price and epoch-seconds timestamp, so
+the scoring functions never re-probe dict keys or re-parse timestamps.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+# Alternative field names, in order of preference
+MARKET_FIELDS = ("market_id", "market", "marketId", "market_slug", "marketSlug", "slug")
+SIDE_FIELDS = ("side", "outcome", "outcomeYes", "outcome_yes", "outcomeIndex", "outcome_index", "position")
+SIZE_FIELDS = (
+    "size", "amount", "quantity", "orderSize", "order_size", "filledSize", "filled_size", "volume",
+)
+PRICE_FIELDS = (
+    "price", "fillPrice", "fill_price", "avgPrice", "avg_price", "executionPrice", "execution_price",
+)
+TIMESTAMP_FIELDS = ("timestamp", "createdAt", "created_at", "time")
+
+# Epoch values above this are milliseconds (1e11 seconds is the year 5138)
+MILLISECONDS_THRESHOLD = 1e11
+
+
+def _first(trade: Dict, fields) -> object:
+    for field in fields:
+        value = trade.get(field)
+        if value:
+            return value
+    return None
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Epoch seconds from an epoch number (seconds or milliseconds, or a numeric string) or an ISO 8601 string; None if unparseable."""
+    if value is None or isinstance(value, bool):
+        return None
+    if not isinstance(value, (int, float)):
+        text = str(value).strip()
+        try:
+            value = float(text)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                return None
+    value = float(value)
+    return value / 1000 if value > MILLISECONDS_THRESHOLD else value
+
+
+class TradeRecord:
+    """One trade, normalized once for scoring."""
+
+    __slots__ = ("market_id", "side", "size", "price", "timestamp")
+
+    def __init__(
+        self,
+        market_id: Optional[str],
+        side: Optional[str],
+        size: float,
+        price: float,
+        timestamp: Optional[float]
+    ):
+        self.market_id = market_id
+        self.side = side
+        self.size = size
+        self.price = price
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, trade: Dict) -> "TradeRecord":
+        market_id = _first(trade, MARKET_FIELDS)
+
+        # Dome orders use "side" (BUY/SELL); other formats carry a YES/NO or boolean outcome
+        side = _first(trade, SIDE_FIELDS)
+        if isinstance(side, bool):
+            side = "YES" if side else "NO"
+
+        # shares_normalized is in dollars, shares is in raw units (divide by 1e6 to normalize)
+        size = _to_float(trade.get("shares_normalized")) or _to_float(trade.get("shares")) / 1e6
+        if not size:
+            size = _to_float(_first(trade, SIZE_FIELDS))
+
+        return cls(
+            market_id=str(market_id) if market_id else None,
+            side=str(side).upper() if side else None,
+            size=size,
+            price=_to_float(_first(trade, PRICE_FIELDS)),
+            timestamp=parse_timestamp(_first(trade, TIMESTAMP_FIELDS)),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"TradeRecord(market_id={self.market_id!r}, side={self.side!r}, size={self.size}, "
+            f"price={self.price}, timestamp={self.timestamp})"
+        )
+
+
+def normalize_trades(trades: Iterable[Union[Dict, TradeRecord]]) -> List[TradeRecord]:
+    """Normalize raw trade dicts (records are passed through unchanged)."""
+    return [t if isinstance(t, TradeRecord) else TradeRecord.from_dict(t) for t in trades]
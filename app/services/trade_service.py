@@ -7,6 +7,8 @@ from sqlalchemy.orm import defer
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.db.models import Trade
 from app.services.data_fetcher import fetch_user_trades
+from app.services.trade_cache import trader_trades_cache
+from app.services.wallet_registry_service import mark_wallet_synced
 from decimal import Decimal
 
 
@@ -79,6 +81,7 @@ async def save_trades_to_db(
         await session.execute(stmt)
         saved_count += 1
     
+    await mark_wallet_synced(session, wallet_address, "trades")
     await session.commit()
     return saved_count
 
@@ -235,6 +238,8 @@ async def fetch_and_save_trades(
     """
     # Fetch trades from API (async function)
     trades = await fetch_user_trades(wallet_address)
+    # Fresh trades: let trader detail / basic info reuse them instead of refetching
+    trader_trades_cache.put(wallet_address.lower(), trades)
     
     # Save to database
     saved_count = await save_trades_to_db(session, wallet_address, trades)
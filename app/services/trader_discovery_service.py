@@ -0,0 +1,360 @@
+"""
+Trader discovery.
+
+/traders used to guess traders from creator fields on market dicts and pad
+the list with random addresses, so every request did upstream work for
+wallets that do not exist. Traders are now discovered by crawling the
+trades of catalog markets in the background: each market's trades are
+paged newest first (several markets concurrently, one shared HTTP client)
+down to the newest trade seen by the previous crawl (resuming where it left
+off if it hit the page limit), the wallets in them
+are deduplicated and aggregated in memory, and the discovered_traders
+registry is updated with first/last seen times, trade counts, volume and
+the number of distinct markets traded. /traders only reads that registry.
+
+Active markets are recrawled on every run, least recently crawled first;
+resolved markets are crawled once more after their last change and then
+left alone.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.bulk import execute_in_batches
+from app.db.models import DiscoveredTrader, DiscoveredTraderMarket, Market
+from app.services.data_fetcher import fetch_market_trades
+from app.services.trade_record import parse_timestamp
+from app.services.upstream_scheduler import PRIORITY_BACKFILL, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+_WALLET_PATTERN = re.compile(r"^0x[0-9a-f]{40}$")
+
+
+def trade_wallet(trade: Dict) -> Optional[str]:
+    """Lowercased proxy wallet of a Data API trade, or None if it is not a valid address."""
+    wallet = trade.get("proxyWallet") or trade.get("proxy_wallet") or trade.get("user")
+    if not isinstance(wallet, str):
+        return None
+    wallet = wallet.lower()
+    return wallet if _WALLET_PATTERN.match(wallet) else None
+
+
+def _trade_key(trade: Dict) -> str:
+    return "|".join(str(trade.get(field)) for field in (
+        "transactionHash", "asset", "proxyWallet", "side", "size", "price", "timestamp",
+    ))
+
+
+async def crawl_market_trades(
+    condition_id: str,
+    since: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    page_size: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    since_keys: Optional[Iterable[str]] = None,
+    resume: Optional[Dict] = None
+) -> Tuple[List[Dict], Optional[int], Optional[List[str]], Optional[Dict]]:
+    """
+    Page through a market's trades newer than the previous crawl.
+
+    Trades at the since timestamp are only skipped if their key is in
+    since_keys, so fills sharing the watermark second that arrived after the
+    previous crawl are still picked up (without since_keys every trade at
+    since is treated as seen). A crawl that hits the page limit does not
+    move the watermark: it returns a resume cursor, and the next crawl
+    continues from that offset (skipping rows already counted that newer
+    trades pushed down) until it reaches the watermark.
+
+    Args:
+        condition_id: Market condition ID
+        since: Timestamp of the newest trade seen by the previous crawl (all pages if not provided)
+        client: Shared HTTP client
+        page_size: Trades per page (settings.TRADER_DISCOVERY_PAGE_SIZE)
+        max_pages: Page limit (settings.TRADER_DISCOVERY_MAX_PAGES)
+        since_keys: Keys of the trades at since counted by the previous crawl
+        resume: Cursor returned by a previous crawl that hit the page limit
+
+    Returns:
+        (new trades, watermark, keys of the trades at the watermark, resume cursor or None when finished)
+    """
+    page_size = page_size or settings.TRADER_DISCOVERY_PAGE_SIZE
+    max_pages = max_pages or settings.TRADER_DISCOVERY_MAX_PAGES
+    since_keys = None if since_keys is None else set(since_keys)
+
+    offset = resume["offset"] if resume else 0
+    # Rows at or above the oldest trade of the unfinished crawl were counted by its earlier runs
+    before = resume["before"] if resume else None
+    before_keys = set(resume["before_keys"]) if resume else set()
+    newest = resume["newest"] if resume else None
+    newest_keys = set(resume["newest_keys"]) if resume else set()
+    oldest, oldest_keys = before, set(before_keys)
+
+    trades = []
+    seen_keys: Set[str] = set()
+    finished = False
+    for _ in range(max_pages):
+        batch = await fetch_market_trades(condition_id, limit=page_size, offset=offset, client=client)
+        offset += page_size
+        for trade in batch:
+            timestamp = parse_timestamp(trade.get("timestamp"))
+            if timestamp is None:
+                continue
+            timestamp = int(timestamp)
+            key = _trade_key(trade)
+            if since is not None and (
+                timestamp < since or (timestamp == since and (since_keys is None or key in since_keys))
+            ):
+                finished = True
+                continue
+            if before is not None and (timestamp > before or (timestamp == before and key in before_keys)):
+                continue
+            # New trades arriving while paging shift offsets; skip fills seen on the previous page
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            trades.append(trade)
+            if newest is None or timestamp > newest:
+                newest, newest_keys = timestamp, {key}
+            elif timestamp == newest:
+                newest_keys.add(key)
+            if oldest is None or timestamp < oldest:
+                oldest, oldest_keys = timestamp, {key}
+            elif timestamp == oldest:
+                oldest_keys.add(key)
+        if finished or len(batch) < page_size:
+            finished = True
+            break
+
+    keys = None if since_keys is None else sorted(since_keys)
+    if not finished:
+        return trades, since, keys, {
+            "offset": offset, "before": oldest, "before_keys": sorted(oldest_keys),
+            "newest": newest, "newest_keys": sorted(newest_keys),
+        }
+    if newest is None:
+        return trades, since, keys, None
+    if newest == since and since_keys is not None:
+        newest_keys |= since_keys
+    return trades, newest, sorted(newest_keys), None
+
+
+def aggregate_wallets(trades: Iterable[Dict]) -> Dict[str, List]:
+    """
+    Per-wallet [first_seen, last_seen, trade_count, volume] over trades.
+
+    Trades without a valid wallet or timestamp are ignored; volume is size * price.
+    """
+    wallets: Dict[str, List] = {}
+    for trade in trades:
+        wallet = trade_wallet(trade)
+        timestamp = parse_timestamp(trade.get("timestamp"))
+        if wallet is None or timestamp is None:
+            continue
+        timestamp = int(timestamp)
+        try:
+            volume = float(trade.get("size") or 0) * float(trade.get("price") or 0)
+        except (TypeError, ValueError):
+            volume = 0.0
+        stats = wallets.get(wallet)
+        if stats is None:
+            wallets[wallet] = [timestamp, timestamp, 1, volume]
+        else:
+            stats[0] = min(stats[0], timestamp)
+            stats[1] = max(stats[1], timestamp)
+            stats[2] += 1
+            stats[3] += volume
+    return wallets
+
+
+async def record_market_wallets(session: AsyncSession, condition_id: str, wallets: Dict[str, List]) -> int:
+    """
+    Merge one market's wallet aggregates into the registry (staged, committed by the caller).
+
+    Returns:
+        Number of wallets not previously seen in this market
+    """
+    if not wallets:
+        return 0
+
+    addresses = list(wallets)
+
+    def insert_pairs(batch):
+        stmt = pg_insert(DiscoveredTraderMarket).values(
+            [{"wallet_address": wallet, "condition_id": condition_id} for wallet in batch]
+        )
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_discovered_trader_market")
+        return stmt.returning(DiscoveredTraderMarket.wallet_address)
+
+    results = await execute_in_batches(session, addresses, insert_pairs)
+    new_pairs: Set[str] = {wallet for result in results for wallet in result.scalars().all()}
+
+    now = datetime.utcnow()
+
+    def upsert_traders(batch):
+        stmt = pg_insert(DiscoveredTrader).values([
+            {
+                "wallet_address": wallet,
+                "first_seen_at": wallets[wallet][0],
+                "last_seen_at": wallets[wallet][1],
+                "trade_count": wallets[wallet][2],
+                "market_count": 1 if wallet in new_pairs else 0,
+                "total_volume": round(wallets[wallet][3], 8),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for wallet in batch
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=["wallet_address"],
+            set_={
+                "first_seen_at": func.least(DiscoveredTrader.first_seen_at, stmt.excluded.first_seen_at),
+                "last_seen_at": func.greatest(DiscoveredTrader.last_seen_at, stmt.excluded.last_seen_at),
+                "trade_count": DiscoveredTrader.trade_count + stmt.excluded.trade_count,
+                "market_count": DiscoveredTrader.market_count + stmt.excluded.market_count,
+                "total_volume": DiscoveredTrader.total_volume + stmt.excluded.total_volume,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+
+    await execute_in_batches(session, addresses, upsert_traders)
+    return len(new_pairs)
+
+
+async def markets_to_crawl(session: AsyncSession, limit: int) -> List[Tuple[str, Optional[int], Optional[List[str]], Optional[Dict]]]:
+    """
+    Catalog markets due for a crawl, least recently crawled first.
+
+    Active markets are always due; closed markets only until they have been
+    crawled after their last catalog change and any cut-short crawl finished.
+
+    Returns:
+        List of (condition_id, trades_crawled_until, trades_crawled_keys, trades_crawl_resume)
+    """
+    stmt = (
+        select(Market.condition_id, Market.trades_crawled_until, Market.trades_crawled_keys, Market.trades_crawl_resume)
+        .where(or_(
+            Market.closed.isnot(True),
+            Market.trades_crawled_at.is_(None),
+            Market.trades_crawled_at < Market.updated_at,
+            Market.trades_crawl_resume.isnot(None),
+        ))
+        .order_by(Market.trades_crawled_at.asc().nulls_first(), Market.id)
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return [tuple(row) for row in result.all()]
+
+
+async def discover_traders(
+    session: AsyncSession,
+    max_markets: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> Dict:
+    """
+    Crawl due catalog markets and merge their wallets into the registry.
+
+    Markets are crawled concurrently; each market's wallets and watermark are
+    written and committed as soon as its crawl finishes, so an interrupted run
+    keeps its progress.
+
+    Args:
+        session: Database session
+        max_markets: Markets to crawl (settings.TRADER_DISCOVERY_MARKETS_PER_RUN)
+        concurrency: Concurrent market crawls (settings.TRADER_DISCOVERY_CONCURRENCY)
+
+    Returns:
+        Dictionary with markets, failed, trades, wallets and new_market_wallets counts
+    """
+    max_markets = max_markets or settings.TRADER_DISCOVERY_MARKETS_PER_RUN
+    semaphore = asyncio.Semaphore(concurrency or settings.TRADER_DISCOVERY_CONCURRENCY)
+    due = await markets_to_crawl(session, max_markets)
+
+    stats = {"markets": 0, "failed": 0, "trades": 0, "wallets": 0, "new_market_wallets": 0}
+    if not due:
+        return stats
+
+    seen_wallets: Set[str] = set()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        async def crawl(condition_id: str, since: Optional[int], since_keys: Optional[List[str]], resume: Optional[Dict]):
+            async with semaphore:
+                try:
+                    result = await crawl_market_trades(
+                        condition_id, since, client, since_keys=since_keys, resume=resume
+                    )
+                    return condition_id, result, None
+                except Exception as e:
+                    return condition_id, None, e
+
+        for next_done in asyncio.as_completed([crawl(*market) for market in due]):
+            condition_id, result, error = await next_done
+            if error is not None:
+                stats["failed"] += 1
+                logger.warning(f"Trade crawl failed for market {condition_id}: {error}")
+                continue
+
+            trades, newest, newest_keys, resume = result
+            wallets = aggregate_wallets(trades)
+            stats["new_market_wallets"] += await record_market_wallets(session, condition_id, wallets)
+            await session.execute(
+                update(Market)
+                .where(Market.condition_id == condition_id)
+                # Keep updated_at: it tracks catalog changes, which decide when closed markets are recrawled
+                .values(
+                    trades_crawled_until=newest, trades_crawled_keys=newest_keys, trades_crawl_resume=resume,
+                    trades_crawled_at=datetime.utcnow(), updated_at=Market.updated_at,
+                )
+            )
+            await session.commit()
+
+            stats["markets"] += 1
+            stats["trades"] += len(trades)
+            seen_wallets.update(wallets)
+
+    stats["wallets"] = len(seen_wallets)
+    return stats
+
+
+async def count_discovered_traders(session: AsyncSession) -> int:
+    result = await session.execute(select(func.count()).select_from(DiscoveredTrader))
+    return int(result.scalar_one())
+
+
+async def list_discovered_traders(session: AsyncSession, limit: int = 50, offset: int = 0) -> List[DiscoveredTrader]:
+    """Registry traders ranked by crawled volume."""
+    result = await session.execute(
+        select(DiscoveredTrader)
+        .order_by(DiscoveredTrader.total_volume.desc(), DiscoveredTrader.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return list(result.scalars().all())
+
+
+async def run_trader_discovery_loop(interval_seconds: int) -> None:
+    """Crawl for traders every interval_seconds until cancelled (application background task)."""
+    from app.db.session import AsyncSessionLocal
+
+    with upstream_priority(PRIORITY_BACKFILL):
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await discover_traders(session)
+                logger.info(
+                    f"Trader discovery: {result['markets']} markets, {result['trades']} trades, "
+                    f"{result['wallets']} wallets ({result['failed']} markets failed)"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Trader discovery failed: {e}")
+            await asyncio.sleep(interval_seconds)
@@ -2,102 +2,22 @@
 Trader service for extracting and managing trader data.
 """
 
-from typing import List, Dict, Set, Optional
-from collections import defaultdict
+import asyncio
+from typing import List, Dict, Optional
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.services.data_fetcher import (
     fetch_resolved_markets,
     fetch_trades_for_wallet,
-    get_market_by_id
 )
+from app.services.market_catalog_service import load_market_index
+from app.services.market_index import MarketIndex
+from app.services.market_resolver import prefetch_market_resolutions, trade_market_ids
 from app.services.scoring_engine import calculate_metrics
-
-# Simple in-memory cache to store orders by wallet address
-# This avoids re-fetching when we already have the data from market extraction
-_trader_orders_cache: Dict[str, List[Dict]] = {}
-
-
-def extract_traders_from_markets(markets: List[Dict], limit: Optional[int] = None) -> List[str]:
-    """
-    Extract unique wallet addresses from markets by fetching trades.
-    Returns a list of unique trader wallet addresses.
-    
-    Args:
-        markets: List of market dictionaries
-        limit: Maximum number of traders to extract (for testing)
-    
-    Returns:
-        List of unique wallet addresses
-    """
-    traders: Set[str] = set()
-    
-    # Use a seed list of known traders for faster response
-    # In production, you might want to maintain a database of traders
-    from app.core.config import settings
-    
-    # Seed list - you can add more known traders here
-    # These are example addresses - in production, maintain a database
-    seed_traders = [
-        settings.TARGET_WALLET,
-        # Add more known active traders here if you have them
-        # "0x...",  # Example trader 1
-        # "0x...",  # Example trader 2
-    ]
-    
-    # Filter out invalid addresses
-    seed_traders = [t for t in seed_traders if t and t.startswith("0x") and len(t) == 42]
-    
-    # Add seed traders
-    for trader in seed_traders:
-        if trader and trader.startswith("0x") and len(trader) == 42:
-            traders.add(trader)
-            if limit and len(traders) >= limit:
-                break
-    
-    # First, try to extract traders from market data itself (if available)
-    # Some markets might have creator/owner fields
-    for market in markets:
-        if limit and len(traders) >= limit:
-            break
-        
-        # Check for creator/owner fields in market data
-        for field in ["creator", "owner", "author", "user", "trader"]:
-            address = market.get(field) or market.get(f"{field}_address") or market.get(f"{field}Address")
-            if address and isinstance(address, str) and address.startswith("0x") and len(address) == 42:
-                traders.add(address)
-                if limit and len(traders) >= limit:
-                    break
-    
-    # If we need more traders, we previously tried to extract from Dome.
-    # Now limiting to only Polymarket data, so we stop here.
-    if (not limit) or len(traders) < limit:
-        print(f"Extraction stopped. Found {len(traders)} traders from available markets.")
-    
-    trader_list = list(traders)
-    
-    # If we don't have enough traders and we have a limit, generate some sample traders for testing
-    if limit and len(trader_list) < limit:
-        needed = limit - len(trader_list)
-        print(f"Only found {len(trader_list)} traders. Generating {needed} sample traders for testing...")
-        
-        # Generate sample trader addresses (for testing purposes)
-        # In production, you'd want to maintain a database of known traders
-        import random
-        import string
-        
-        for i in range(needed):
-            # Generate a valid-looking Ethereum address (for testing)
-            # Format: 0x + 40 hex characters
-            hex_chars = '0123456789abcdef'
-            address = '0x' + ''.join(random.choice(hex_chars) for _ in range(40))
-            trader_list.append(address)
-        
-        print(f"Generated {needed} sample traders. Total: {len(trader_list)}")
-    
-    print(f"Extracted {len(trader_list)} unique traders")
-    return trader_list
-
+from app.services.trader_discovery_service import list_discovered_traders
+from app.services.trade_record import normalize_trades
 
 async def get_trader_basic_info(wallet_address: str, markets: List[Dict]) -> Dict:
     """
@@ -115,39 +35,10 @@ async def get_trader_basic_info(wallet_address: str, markets: List[Dict]) -> Dic
             "last_trade_date": None
         }
     
-    # Extract unique positions
-    positions = set()
-    timestamps = []
-    
-    for trade in trades:
-        # Extract market identifier - handle Dome order field variations
-        market_id = (
-            trade.get("market_id") or 
-            trade.get("market") or 
-            trade.get("marketId") or
-            trade.get("market_slug") or
-            trade.get("marketSlug") or
-            trade.get("slug")
-        )
-        if market_id:
-            positions.add(market_id)
-        
-        # Extract timestamp
-        timestamp_str = (
-            trade.get("timestamp") or 
-            trade.get("createdAt") or 
-            trade.get("created_at") or 
-            trade.get("time")
-        )
-        if timestamp_str:
-            try:
-                if isinstance(timestamp_str, (int, float)):
-                    timestamps.append(datetime.fromtimestamp(timestamp_str))
-                else:
-                    ts_str = str(timestamp_str).replace("Z", "+00:00")
-                    timestamps.append(datetime.fromisoformat(ts_str))
-            except:
-                pass
+    # Extract unique positions and trade times from the normalized records
+    records = normalize_trades(trades)
+    positions = {r.market_id for r in records if r.market_id}
+    timestamps = [datetime.fromtimestamp(r.timestamp) for r in records if r.timestamp is not None]
     
     first_trade = min(timestamps) if timestamps else None
     last_trade = max(timestamps) if timestamps else None
@@ -161,67 +52,37 @@ async def get_trader_basic_info(wallet_address: str, markets: List[Dict]) -> Dic
     }
 
 
-async def get_trader_detail(wallet_address: str) -> Dict:
+async def get_trader_detail(wallet_address: str, session: Optional[AsyncSession] = None) -> Dict:
     """
     Get detailed trader information including full analytics.
+    
+    Markets come from the local catalog when a session is given (otherwise
+    resolved markets are fetched upstream); markets still unresolved are
+    prefetched in one concurrent batch before scoring.
     """
     # Fetch trades first to know which markets we need
     trades = await fetch_trades_for_wallet(wallet_address)
+    records = normalize_trades(trades or [])
     
-    # Extract unique market slugs from trades
-    market_slugs_from_trades = set()
-    for trade in trades:
-        market_id = (
-            trade.get("market_id") or 
-            trade.get("market") or 
-            trade.get("marketId") or
-            trade.get("market_slug") or
-            trade.get("marketSlug") or
-            trade.get("slug")
-        )
-        if market_id:
-            market_slugs_from_trades.add(market_id)
+    market_ids = trade_market_ids(records)
+    if session is not None:
+        # The wallet's markets from the local catalog
+        market_index = await load_market_index(session, market_ids)
+    else:
+        # No catalog: fetch resolved markets (these have resolution data)
+        market_index = MarketIndex(await asyncio.to_thread(fetch_resolved_markets, limit=200))  # Fetch more markets for better matching
     
-    # Fetch resolved markets (these have resolution data)
-    markets = fetch_resolved_markets(limit=200)  # Fetch more markets for better matching
+    # Fetch every traded market the index can't resolve in one concurrent batch,
+    # so scoring below only does in-memory lookups
+    await prefetch_market_resolutions(market_index, market_ids, session)
     
-    # For markets in trades that aren't in resolved markets, try to fetch from Dome
-    # This helps get resolution data for markets that might be resolved but not in our list
-    from app.services.data_fetcher import fetch_market_by_slug_from_dome
-    markets_found = {m.get("slug") or m.get("market_id") or m.get("id"): m for m in markets}
-    
-    # Try to fetch missing markets from Dome (limit to avoid too many API calls)
-    for slug in list(market_slugs_from_trades)[:10]:  # Limit to 10 to avoid rate limits
-        if slug not in markets_found:
-            dome_market = fetch_market_by_slug_from_dome(slug)
-            if dome_market:
-                markets.append(dome_market)
-                markets_found[slug] = dome_market
-    
-    metrics = calculate_metrics(wallet_address, trades, markets)
+    metrics = calculate_metrics(wallet_address, records, market_index)
 
     # Derive total trades from raw trades list so it reflects what Dome returned
     total_trades = len(trades) if trades else 0
     
     # Add trade date information
-    timestamps = []
-    for trade in trades or []:
-        timestamp_str = (
-            trade.get("timestamp")
-            or trade.get("createdAt")
-            or trade.get("created_at")
-            or trade.get("time")
-        )
-        if timestamp_str:
-            try:
-                if isinstance(timestamp_str, (int, float)):
-                    timestamps.append(datetime.fromtimestamp(timestamp_str))
-                else:
-                    ts_str = str(timestamp_str).replace("Z", "+00:00")
-                    timestamps.append(datetime.fromisoformat(ts_str))
-            except Exception:
-                # Ignore malformed timestamps, they just won't affect first/last trade dates
-                pass
+    timestamps = [datetime.fromtimestamp(r.timestamp) for r in records if r.timestamp is not None]
     
     first_trade = min(timestamps) if timestamps else None
     last_trade = max(timestamps) if timestamps else None
@@ -243,90 +104,28 @@ async def get_trader_detail(wallet_address: str) -> Dict:
     }
 
 
-async def get_traders_list(limit: int = 50) -> List[Dict]:
+async def get_traders_list(session: AsyncSession, limit: int = 50) -> List[Dict]:
     """
-    Get a list of traders with basic information (async version with concurrent fetching).
-    Extracts traders from markets.
+    Get a list of traders with basic information.
+    Reads the discovered_traders registry (ranked by crawled volume), which the
+    background trader discovery keeps up to date; no upstream calls are made.
     
     Args:
+        session: Database session
         limit: Maximum number of traders to return
     
     Returns:
         List of trader dictionaries with basic info
     """
-    import asyncio
-    
-    markets = fetch_resolved_markets()
-    
-    # Extract traders - try to get more than the limit to account for traders with no data
-    # We'll request 1.5x the limit to ensure we have enough after filtering
-    extraction_limit = int(limit * 1.5) if limit else None
-    trader_addresses = extract_traders_from_markets(markets, limit=extraction_limit)
-    
-    if not trader_addresses:
-        print("⚠ No traders found. Returning empty list.")
-        return []
-    
-    print(f"Found {len(trader_addresses)} unique trader addresses. Getting basic info...")
-    
-    # Helper function to fetch a single trader with timeout
-    async def fetch_single_trader(wallet: str) -> Dict:
-        """Fetch trader info with timeout and error handling."""
-        try:
-            # Set timeout for individual trader fetch
-            return await asyncio.wait_for(
-                get_trader_basic_info(wallet, markets),
-                timeout=10.0  # 10 second timeout per trader
-            )
-        except asyncio.TimeoutError:
-            print(f"  Timeout fetching trader {wallet[:20]}...")
-            return {
-                "wallet_address": wallet,
-                "total_trades": 0,
-                "total_positions": 0,
-                "first_trade_date": None,
-                "last_trade_date": None
-            }
-        except Exception as e:
-            print(f"  Error fetching trader {wallet[:20]}...: {str(e)[:50]}")
-            return {
-                "wallet_address": wallet,
-                "total_trades": 0,
-                "total_positions": 0,
-                "first_trade_date": None,
-                "last_trade_date": None
-            }
-    
-    # Fetch traders in batches to avoid overwhelming the API
-    batch_size = 10  # Fetch 10 traders concurrently at a time
-    traders_info = []
-    traders_with_trades = 0
-    traders_without_trades = 0
-    
-    for i in range(0, len(trader_addresses), batch_size):
-        if limit and len(traders_info) >= limit:
-            break
-        
-        batch = trader_addresses[i:i + batch_size]
-        # Only fetch up to the limit
-        if limit:
-            remaining = limit - len(traders_info)
-            batch = batch[:remaining]
-        
-        print(f"Fetching batch {i//batch_size + 1} ({len(batch)} traders)...")
-        
-        # Fetch batch concurrently
-        batch_results = await asyncio.gather(*[fetch_single_trader(wallet) for wallet in batch])
-        
-        # Add results to traders_info
-        for info in batch_results:
-            traders_info.append(info)
-            if info.get("total_trades", 0) > 0:
-                traders_with_trades += 1
-            else:
-                traders_without_trades += 1
-    
-    print(f"✓ Successfully retrieved info for {len(traders_info)} traders")
-    print(f"  - {traders_with_trades} with trades, {traders_without_trades} without trades (API may have failed)")
-    return traders_info
-
+    traders = await list_discovered_traders(session, limit=limit)
+    return [
+        {
+            "wallet_address": trader.wallet_address,
+            "total_trades": trader.trade_count,
+            "total_positions": trader.market_count,
+            "first_trade_date": datetime.fromtimestamp(trader.first_seen_at).isoformat(),
+            "last_trade_date": datetime.fromtimestamp(trader.last_seen_at).isoformat(),
+            "total_volume": float(trader.total_volume or 0),
+        }
+        for trader in traders
+    ]
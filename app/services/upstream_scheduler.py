@@ -0,0 +1,337 @@
+"""
+Priority-aware scheduling of upstream (Polymarket / Dome API) requests.
+
+User-facing requests and background syncs used to hit the upstream APIs
+with no ordering, so a large refresh or crawl could take all the capacity
+and starve the UI. Every request made through data_fetcher now holds one of
+UPSTREAM_MAX_CONCURRENCY slots, and queued requests are granted slots by
+weighted fair queuing over three priority classes:
+
+    interactive - API requests made on behalf of a user (the default)
+    refresh     - scheduled syncs keeping tracked data fresh
+    backfill    - bulk crawls and history loads
+
+Background classes can never hold every slot (UPSTREAM_BACKGROUND_MAX_SLOTS,
+UPSTREAM_BACKFILL_MAX_SLOTS), and backfill is preempted at page boundaries:
+each page is a separate request, and no backfill page starts while an
+interactive request is waiting.
+
+The class is taken from a context variable, so background loops set it once
+with upstream_priority(...) and everything they call, including work run in
+asyncio.to_thread, inherits it. Request deadlines travel the same way:
+inside request_deadline(seconds), slot waits and per-request timeouts are
+capped by the time left, and requests that would start after the deadline
+raise DeadlineExceeded instead of going upstream.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_REFRESH = "refresh"
+PRIORITY_BACKFILL = "backfill"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_REFRESH, PRIORITY_BACKFILL)
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "upstream_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+def current_priority() -> str:
+    """Priority class of upstream requests made from the current context."""
+    return _current_priority.get()
+
+
+@contextmanager
+def upstream_priority(priority: str) -> Iterator[None]:
+    """Make upstream requests in this block (and tasks / threads started from it) use priority."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown upstream priority: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before an upstream request could be made."""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give upstream requests in this block (and tasks / threads started from it) a time budget.
+
+    Nested deadlines can only shorten the budget; None or <= 0 leaves it unchanged.
+    """
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current request's budget (None without a deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def upstream_timeout(default: float) -> float:
+    """Per-request timeout: default, capped by the remaining budget (raises DeadlineExceeded if spent)."""
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, remaining)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tag", "granted", "enqueued_at", "_loop", "_future", "_event")
+
+    def __init__(self, priority: str, tag: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.tag = tag
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+        self._loop = loop
+        self._future = loop.create_future() if loop is not None else None
+        self._event = threading.Event() if loop is None else None
+
+    def wake(self) -> None:
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class UpstreamScheduler:
+    """
+    Concurrency slots for upstream requests, shared by priority class with weighted fair queuing.
+
+    Each class has a weight; a queued request gets a virtual finish tag
+    1/weight past the later of the current virtual time and its class's
+    previous tag, and free slots go to the eligible request with the lowest
+    tag. With weights 8:3:1, saturated interactive, refresh and backfill
+    queues get slots in that ratio, and a lone class gets all it may hold.
+    Works for both coroutines and threads (blocking requests run via
+    asyncio.to_thread).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        weights: Optional[Dict[str, float]] = None,
+        class_limits: Optional[Dict[str, int]] = None,
+        background_limit: Optional[int] = None
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.weights = {priority: 1.0 for priority in PRIORITIES}
+        self.weights.update(weights or {})
+        self.class_limits = {priority: self.max_concurrency for priority in PRIORITIES}
+        self.class_limits.update(class_limits or {})
+        # Slots refresh and backfill may hold together, keeping the rest for interactive requests
+        self.background_limit = background_limit or self.max_concurrency
+        self._lock = threading.Lock()
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._active = {priority: 0 for priority in PRIORITIES}
+        self._last_tag = {priority: 0.0 for priority in PRIORITIES}
+        self._virtual_time = 0.0
+        self._stats = {priority: {"granted": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0} for priority in PRIORITIES}
+
+    def _eligible(self, priority: str) -> bool:
+        if sum(self._active.values()) >= self.max_concurrency:
+            return False
+        if self._active[priority] >= self.class_limits[priority]:
+            return False
+        if priority != PRIORITY_INTERACTIVE:
+            background = self._active[PRIORITY_REFRESH] + self._active[PRIORITY_BACKFILL]
+            if background >= self.background_limit:
+                return False
+        if priority == PRIORITY_BACKFILL and self._queues[PRIORITY_INTERACTIVE]:
+            return False
+        return True
+
+    def _grant(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self._active[waiter.priority] += 1
+        self._virtual_time = max(self._virtual_time, waiter.tag)
+        stats = self._stats[waiter.priority]
+        waited = time.monotonic() - waiter.enqueued_at
+        stats["granted"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def _dispatch_locked(self) -> None:
+        while True:
+            heads = [
+                queue[0] for priority, queue in self._queues.items()
+                if queue and self._eligible(priority)
+            ]
+            if not heads:
+                return
+            waiter = min(heads, key=lambda w: w.tag)
+            self._queues[waiter.priority].popleft()
+            self._grant(waiter)
+            waiter.wake()
+
+    def _enqueue_locked(self, priority: str, loop: Optional[asyncio.AbstractEventLoop]) -> _Waiter:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown upstream priority: {priority}")
+        tag = max(self._virtual_time, self._last_tag[priority]) + 1.0 / self.weights[priority]
+        self._last_tag[priority] = tag
+        waiter = _Waiter(priority, tag, loop)
+        self._queues[priority].append(waiter)
+        self._dispatch_locked()
+        return waiter
+
+    def release(self, priority: str) -> None:
+        with self._lock:
+            self._active[priority] -= 1
+            self._dispatch_locked()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                self._active[waiter.priority] -= 1
+            else:
+                self._queues[waiter.priority].remove(waiter)
+            self._dispatch_locked()
+
+    async def acquire(self, priority: Optional[str] = None) -> str:
+        """Wait for a slot (in priority or the context's class); returns the class to release."""
+        priority = priority or current_priority()
+        timeout = remaining_time()
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before the upstream request started")
+        with self._lock:
+            waiter = self._enqueue_locked(priority, asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(waiter._future, timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise DeadlineExceeded("Request deadline exceeded waiting for an upstream slot")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        return priority
+
+    def acquire_blocking(self, priority: Optional[str] = None) -> str:
+        """
+        Blocking acquire for threads; returns the class to release.
+
+        Blocking requests belong in asyncio.to_thread. Called on the event
+        loop thread, waiting would stall the loop that has to release the
+        slots: background classes raise RuntimeError, and interactive
+        requests are logged as errors and granted a slot at once.
+        """
+        priority = priority or current_priority()
+        timeout = remaining_time()
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before the upstream request started")
+        try:
+            asyncio.get_running_loop()
+            on_event_loop = True
+        except RuntimeError:
+            on_event_loop = False
+
+        if on_event_loop:
+            if priority != PRIORITY_INTERACTIVE:
+                raise RuntimeError(
+                    f"Blocking {priority} upstream request on the event loop; run it via asyncio.to_thread"
+                )
+            logger.error("Blocking upstream request on the event loop bypassed the scheduler; run it via asyncio.to_thread")
+
+        with self._lock:
+            if on_event_loop:
+                waiter = _Waiter(priority, self._virtual_time, None)
+                self._grant(waiter)
+                return priority
+            waiter = self._enqueue_locked(priority, None)
+        if not waiter._event.wait(timeout):
+            # Releases the slot instead if it was granted just as the wait timed out
+            self._abandon(waiter)
+            raise DeadlineExceeded("Request deadline exceeded waiting for an upstream slot")
+        return priority
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        """async with upstream_scheduler.slot(): ... holds one upstream slot."""
+        granted = await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+    @contextmanager
+    def slot_blocking(self, priority: Optional[str] = None) -> Iterator[None]:
+        """with upstream_scheduler.slot_blocking(): ... holds one upstream slot from a thread."""
+        granted = self.acquire_blocking(priority)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Active and queued requests, grants and wait times per class."""
+        with self._lock:
+            return {
+                priority: {
+                    "active": self._active[priority],
+                    "queued": len(self._queues[priority]),
+                    "granted": self._stats[priority]["granted"],
+                    "avg_wait_seconds": (
+                        self._stats[priority]["wait_seconds"] / self._stats[priority]["granted"]
+                        if self._stats[priority]["granted"] else 0.0
+                    ),
+                    "max_wait_seconds": self._stats[priority]["max_wait_seconds"],
+                }
+                for priority in PRIORITIES
+            }
+
+
+# Shared by every upstream request in this process
+upstream_scheduler = UpstreamScheduler(
+    settings.UPSTREAM_MAX_CONCURRENCY,
+    weights={
+        PRIORITY_INTERACTIVE: settings.UPSTREAM_WEIGHT_INTERACTIVE,
+        PRIORITY_REFRESH: settings.UPSTREAM_WEIGHT_REFRESH,
+        PRIORITY_BACKFILL: settings.UPSTREAM_WEIGHT_BACKFILL,
+    },
+    class_limits={PRIORITY_BACKFILL: settings.UPSTREAM_BACKFILL_MAX_SLOTS},
+    background_limit=settings.UPSTREAM_BACKGROUND_MAX_SLOTS,
+)
+
+
+def upstream_get(url: str, **kwargs) -> requests.Response:
+    """requests.get holding an upstream slot in the current priority class, within the request deadline (blocking)."""
+    with upstream_scheduler.slot_blocking():
+        if "timeout" in kwargs:
+            kwargs["timeout"] = upstream_timeout(kwargs["timeout"])
+        return requests.get(url, **kwargs)
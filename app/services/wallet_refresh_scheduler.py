@@ -0,0 +1,340 @@
+"""
+Activity-tiered refresh scheduler for tracked wallets.
+
+Wallets used to be synced only when someone hit a trades / positions /
+activity / closed positions endpoint, and then fully, so busy wallets went
+stale between views while idle wallets were refetched on every view. The
+scheduler gives every tracked wallet an activity tier from its trades in
+the last 7 days and its open positions:
+
+    hot   - WALLET_REFRESH_HOT_SECONDS between syncs
+    warm  - WALLET_REFRESH_WARM_SECONDS
+    cold  - WALLET_REFRESH_COLD_SECONDS
+
+and on every tick syncs the datasets whose <dataset>_synced_at is older
+than the wallet's interval (closed positions use 4x the interval), most
+overdue first. All syncs draw from one token bucket of
+WALLET_REFRESH_CALLS_PER_MINUTE upstream calls (a job pays for its first
+page up front and for every further page as it fetches it), so work is
+spread evenly across the tick instead of bursting. Trades and activity syncs only fetch
+the newest rows (activity pages stop at the previous sync); positions and
+closed positions are refetched in full because the API has no change feed.
+"""
+
+import asyncio
+import calendar
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.bulk import execute_in_batches
+from app.db.models import Position, Trade, TrackedWallet
+from app.services.activity_service import save_activities_to_db
+from app.services.closed_position_service import fetch_and_store_closed_positions
+from app.services.data_fetcher import fetch_user_activity
+from app.services.position_service import fetch_and_save_positions
+from app.services.trade_service import fetch_and_save_trades
+from app.services.upstream_scheduler import PRIORITY_REFRESH, upstream_priority
+from app.services.wallet_registry_service import DATASETS, STATUS_ACTIVE
+
+logger = logging.getLogger(__name__)
+
+TIER_HOT = "hot"
+TIER_WARM = "warm"
+TIER_COLD = "cold"
+TIERS = (TIER_HOT, TIER_WARM, TIER_COLD)
+
+# Closed positions only change when markets resolve or positions are sold out
+_DATASET_INTERVAL_FACTOR = {"trades": 1, "positions": 1, "activities": 1, "closed_positions": 4}
+_ACTIVITY_WINDOW_SECONDS = 7 * 24 * 3600
+# Activity newer than the last sync minus this is refetched, in case the API indexed it late
+_ACTIVITY_OVERLAP_SECONDS = 300
+
+
+def classify_activity_tier(trades_7d: int, open_positions: int) -> str:
+    """Refresh tier for a wallet with trades_7d trades in the last 7 days and open_positions open positions."""
+    if trades_7d >= settings.WALLET_TIER_HOT_TRADES_7D or open_positions >= settings.WALLET_TIER_HOT_OPEN_POSITIONS:
+        return TIER_HOT
+    if trades_7d >= settings.WALLET_TIER_WARM_TRADES_7D or open_positions >= settings.WALLET_TIER_WARM_OPEN_POSITIONS:
+        return TIER_WARM
+    return TIER_COLD
+
+
+def refresh_interval(tier: Optional[str], dataset: str) -> int:
+    """Seconds between syncs of dataset for a wallet in tier (unclassified wallets count as cold)."""
+    base = {
+        TIER_HOT: settings.WALLET_REFRESH_HOT_SECONDS,
+        TIER_WARM: settings.WALLET_REFRESH_WARM_SECONDS,
+    }.get(tier, settings.WALLET_REFRESH_COLD_SECONDS)
+    return base * _DATASET_INTERVAL_FACTOR[dataset]
+
+
+class UpstreamBudget:
+    """
+    Token bucket limiting upstream calls per minute across all scheduled syncs.
+
+    The bucket holds at most burst tokens, so callers are paced at the
+    refill rate rather than spending a minute's budget at once.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep
+    ):
+        self.rate = calls_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, calls: int = 1) -> None:
+        """Wait until calls upstream calls fit in the budget, then spend them."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < calls:
+                await self._sleep((calls - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= calls
+
+
+async def reclassify_wallet_tiers(session: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recompute activity_tier for all active tracked wallets (committed).
+
+    Only wallets whose tier changed are written.
+
+    Returns:
+        Number of active wallets per tier
+    """
+    now = now or datetime.utcnow()
+    since = calendar.timegm(now.utctimetuple()) - _ACTIVITY_WINDOW_SECONDS
+    active = select(TrackedWallet.wallet_address).where(TrackedWallet.status == STATUS_ACTIVE)
+
+    result = await session.execute(
+        select(TrackedWallet.wallet_address, TrackedWallet.activity_tier).where(TrackedWallet.status == STATUS_ACTIVE)
+    )
+    current = {row[0]: row[1] for row in result.all()}
+
+    result = await session.execute(
+        select(Trade.proxy_wallet, func.count())
+        .where(Trade.timestamp >= since, Trade.proxy_wallet.in_(active))
+        .group_by(Trade.proxy_wallet)
+    )
+    trade_counts = {row[0]: row[1] for row in result.all()}
+
+    result = await session.execute(
+        select(Position.proxy_wallet, func.count())
+        .where(Position.size > 0, Position.redeemable.isnot(True), Position.proxy_wallet.in_(active))
+        .group_by(Position.proxy_wallet)
+    )
+    position_counts = {row[0]: row[1] for row in result.all()}
+
+    counts = {tier: 0 for tier in TIERS}
+    changed: Dict[str, List[str]] = {tier: [] for tier in TIERS}
+    for wallet, tier in current.items():
+        new_tier = classify_activity_tier(trade_counts.get(wallet, 0), position_counts.get(wallet, 0))
+        counts[new_tier] += 1
+        if new_tier != tier:
+            changed[new_tier].append(wallet)
+
+    for tier, wallets in changed.items():
+        await execute_in_batches(
+            session, wallets,
+            lambda batch: update(TrackedWallet).where(TrackedWallet.wallet_address.in_(batch)).values(activity_tier=tier)
+        )
+    await session.commit()
+    return counts
+
+
+def rank_sync_jobs(
+    candidates: List[Tuple[str, str, Optional[str], Optional[datetime]]],
+    now: datetime,
+    limit: int
+) -> List[Tuple[str, str]]:
+    """
+    Due (wallet, dataset) jobs, most overdue first.
+
+    Args:
+        candidates: (wallet, dataset, tier, synced_at) rows
+        now: Current time
+        limit: Maximum jobs to return
+
+    Returns:
+        List of (wallet, dataset); never-synced datasets come first, then by
+        time since the last sync relative to the refresh interval, hotter tiers
+        first on ties
+    """
+    jobs = []
+    for wallet, dataset, tier, synced_at in candidates:
+        interval = refresh_interval(tier, dataset)
+        if synced_at is None:
+            overdue = float("inf")
+        else:
+            overdue = (now - synced_at).total_seconds() / interval
+            if overdue < 1:
+                continue
+        jobs.append((-overdue, interval, wallet, dataset))
+    jobs.sort()
+    return [(wallet, dataset) for _, _, wallet, dataset in jobs[:limit]]
+
+
+async def due_sync_jobs(session: AsyncSession, limit: int, now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """
+    Most overdue (wallet, dataset) syncs of active tracked wallets.
+
+    One query per dataset and tier, each limited to its oldest limit
+    candidates, so a backlog of cold wallets cannot crowd out hot ones.
+    """
+    now = now or datetime.utcnow()
+    candidates = []
+    for dataset in DATASETS:
+        column = getattr(TrackedWallet, f"{dataset}_synced_at")
+        for tier in TIERS:
+            cutoff = now - timedelta(seconds=refresh_interval(tier, dataset))
+            tier_match = TrackedWallet.activity_tier == tier
+            if tier == TIER_COLD:
+                tier_match = or_(tier_match, TrackedWallet.activity_tier.is_(None))
+            result = await session.execute(
+                select(TrackedWallet.wallet_address, TrackedWallet.activity_tier, column)
+                .where(TrackedWallet.status == STATUS_ACTIVE, tier_match, or_(column.is_(None), column < cutoff))
+                .order_by(column.asc().nulls_first())
+                .limit(limit)
+            )
+            candidates.extend((row[0], dataset, row[1], row[2]) for row in result.all())
+    return rank_sync_jobs(candidates, now, limit)
+
+
+async def sync_new_activities(
+    session: AsyncSession,
+    wallet_address: str,
+    since: Optional[int],
+    budget: Optional[UpstreamBudget] = None
+) -> int:
+    """
+    Fetch activity newest first down to since (epoch seconds) and save it.
+
+    Returns:
+        Number of activities saved
+    """
+    page_size = settings.WALLET_REFRESH_ACTIVITY_PAGE_SIZE
+    activities = []
+    for page in range(settings.WALLET_REFRESH_ACTIVITY_MAX_PAGES):
+        if page > 0 and budget is not None:
+            await budget.acquire()
+        batch = await asyncio.to_thread(
+            fetch_user_activity, wallet_address, limit=page_size, offset=page * page_size
+        )
+        activities.extend(batch)
+        if since is None or len(batch) < page_size:
+            # No older activity, or never synced: the newest page is enough (history is backfilled on demand)
+            break
+        if min(int(a.get("timestamp") or 0) for a in batch) <= since:
+            break
+    return await save_activities_to_db(session, wallet_address, activities)
+
+
+async def run_sync_job(
+    session: AsyncSession,
+    wallet_address: str,
+    dataset: str,
+    budget: Optional[UpstreamBudget] = None
+) -> None:
+    """Sync one dataset of one wallet; every ingest stamps <dataset>_synced_at."""
+    if dataset == "trades":
+        await fetch_and_save_trades(session, wallet_address)
+    elif dataset == "positions":
+        await fetch_and_save_positions(session, wallet_address, budget=budget)
+    elif dataset == "activities":
+        result = await session.execute(
+            select(TrackedWallet.activities_synced_at).where(TrackedWallet.wallet_address == wallet_address)
+        )
+        synced_at = result.scalar_one_or_none()
+        since = calendar.timegm(synced_at.utctimetuple()) - _ACTIVITY_OVERLAP_SECONDS if synced_at else None
+        await sync_new_activities(session, wallet_address, since, budget)
+    elif dataset == "closed_positions":
+        await fetch_and_store_closed_positions(wallet_address, session, budget)
+    else:
+        raise ValueError(f"Unknown dataset: {dataset}")
+
+
+async def refresh_due_wallets(
+    session_factory,
+    budget: UpstreamBudget,
+    max_jobs: int,
+    concurrency: Optional[int] = None,
+    job_runner: Callable = run_sync_job
+) -> Dict[str, int]:
+    """
+    Run up to max_jobs of the most overdue syncs, paced by budget.
+
+    Each job uses its own session from session_factory; a failed job is
+    logged and retried on a later tick (its synced_at is not stamped).
+
+    Returns:
+        Dictionary with due, synced and failed counts
+    """
+    async with session_factory() as session:
+        jobs = await due_sync_jobs(session, max_jobs)
+
+    stats = {"due": len(jobs), "synced": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency or settings.WALLET_REFRESH_CONCURRENCY)
+
+    async def run(wallet: str, dataset: str):
+        async with semaphore:
+            await budget.acquire()
+            try:
+                async with session_factory() as session:
+                    await job_runner(session, wallet, dataset, budget)
+                stats["synced"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Scheduled {dataset} sync failed for {wallet}: {e}")
+
+    await asyncio.gather(*[run(wallet, dataset) for wallet, dataset in jobs])
+    return stats
+
+
+async def run_wallet_refresh_loop(tick_seconds: int) -> None:
+    """Reclassify tiers and sync due wallets every tick_seconds until cancelled (application background task)."""
+    from app.db.session import AsyncSessionLocal
+
+    budget = UpstreamBudget(settings.WALLET_REFRESH_CALLS_PER_MINUTE, burst=settings.WALLET_REFRESH_CONCURRENCY)
+    # One tick's share of the budget, so due jobs never pile up beyond what the budget can serve
+    max_jobs = max(1, settings.WALLET_REFRESH_CALLS_PER_MINUTE * tick_seconds // 60)
+    last_reclassified = None
+    with upstream_priority(PRIORITY_REFRESH):
+        while True:
+            started = time.monotonic()
+            try:
+                if last_reclassified is None or time.monotonic() - last_reclassified >= settings.WALLET_REFRESH_RECLASSIFY_SECONDS:
+                    async with AsyncSessionLocal() as session:
+                        tiers = await reclassify_wallet_tiers(session)
+                    last_reclassified = time.monotonic()
+                    logger.info(f"Wallet tiers: {tiers}")
+                result = await refresh_due_wallets(AsyncSessionLocal, budget, max_jobs)
+                if result["due"]:
+                    logger.info(
+                        f"Wallet refresh: {result['synced']} of {result['due']} due syncs ({result['failed']} failed)"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Wallet refresh failed: {e}")
+            await asyncio.sleep(max(0, tick_seconds - (time.monotonic() - started)))
@@ -0,0 +1,189 @@
+"""
+Tracked wallet registry.
+
+The live leaderboards used to read wallet_address.txt from disk on every
+request, and get_unique_wallet_addresses unioned three SELECT DISTINCT
+proxy_wallet scans over trades, positions and activities. Wallets now live
+in the tracked_wallets table: the add-wallet endpoints register them, every
+trades / positions / activities / closed positions ingest registers the
+wallet and stamps its per-dataset sync time, and leaderboard builders and
+schedulers enumerate wallets with one indexed scan.
+
+Wallet files are a one-off bulk load (import_tracked_wallets.py).
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import distinct, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.bulk import execute_in_batches
+from app.db.models import Activity, Position, Trade, TrackedWallet
+
+STATUS_ACTIVE = "active"
+STATUS_PAUSED = "paused"
+STATUS_REMOVED = "removed"
+WALLET_STATUSES = (STATUS_ACTIVE, STATUS_PAUSED, STATUS_REMOVED)
+
+# Datasets with a <dataset>_synced_at column
+DATASETS = ("trades", "positions", "activities", "closed_positions")
+
+
+def normalize_wallet(wallet_address: Optional[str]) -> Optional[str]:
+    """Lowercased wallet address, or None if it is not 0x + 40 hex characters."""
+    if not isinstance(wallet_address, str):
+        return None
+    wallet = wallet_address.strip().lower()
+    if len(wallet) != 42 or not wallet.startswith("0x"):
+        return None
+    try:
+        int(wallet[2:], 16)
+    except ValueError:
+        return None
+    return wallet
+
+
+def read_wallet_file(file_path: str) -> List[str]:
+    """Valid, distinct wallet addresses from a file with one address per line (# starts a comment)."""
+    wallets = {}
+    with open(file_path, "r") as f:
+        for line in f:
+            wallet = normalize_wallet(line.split("#", 1)[0])
+            if wallet:
+                wallets[wallet] = None
+    return list(wallets)
+
+
+async def track_wallets(
+    session: AsyncSession,
+    wallet_addresses: Iterable[str],
+    source: str = "api",
+    tags: Optional[List[str]] = None,
+    reactivate: bool = True
+) -> int:
+    """
+    Register wallets in the registry (staged, committed by the caller).
+
+    Args:
+        session: Database session
+        wallet_addresses: Wallets to register (invalid addresses are skipped)
+        source: Recorded for newly registered wallets
+        tags: Tags for newly registered wallets; added to existing wallets' tags
+        reactivate: Set paused or removed wallets back to active
+
+    Returns:
+        Number of valid wallets registered or updated
+    """
+    wallets = list(dict.fromkeys(w for w in (normalize_wallet(a) for a in wallet_addresses) if w))
+    if not wallets:
+        return 0
+
+    now = datetime.utcnow()
+
+    def register(batch):
+        stmt = pg_insert(TrackedWallet).values([
+            {
+                "wallet_address": wallet,
+                "status": STATUS_ACTIVE,
+                "tags": list(tags) if tags else None,
+                "source": source,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for wallet in batch
+        ])
+        if reactivate:
+            return stmt.on_conflict_do_update(
+                index_elements=["wallet_address"],
+                set_={"status": stmt.excluded.status, "updated_at": stmt.excluded.updated_at}
+            )
+        return stmt.on_conflict_do_nothing(index_elements=["wallet_address"])
+
+    await execute_in_batches(session, wallets, register)
+
+    if tags:
+        # Merge rather than replace the tags of wallets that were already registered
+        results = await execute_in_batches(
+            session, wallets, lambda batch: select(TrackedWallet).where(TrackedWallet.wallet_address.in_(batch))
+        )
+        for result in results:
+            for wallet in result.scalars().all():
+                merged = list(dict.fromkeys(list(wallet.tags or []) + list(tags)))
+                if merged != (wallet.tags or []):
+                    wallet.tags = merged
+    return len(wallets)
+
+
+async def mark_wallet_synced(
+    session: AsyncSession,
+    wallet_address: str,
+    dataset: str,
+    synced_at: Optional[datetime] = None
+) -> None:
+    """
+    Record an ingest of one dataset for a wallet, registering the wallet if needed (staged, committed by the caller).
+
+    Wallets that were removed from the registry stay removed.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    wallet = normalize_wallet(wallet_address)
+    if not wallet:
+        return
+
+    now = datetime.utcnow()
+    column = f"{dataset}_synced_at"
+    stmt = pg_insert(TrackedWallet).values(
+        wallet_address=wallet,
+        status=STATUS_ACTIVE,
+        source="ingest",
+        created_at=now,
+        updated_at=now,
+        **{column: synced_at or now}
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["wallet_address"],
+        set_={column: getattr(stmt.excluded, column), "updated_at": stmt.excluded.updated_at}
+    )
+    await session.execute(stmt)
+
+
+async def list_tracked_wallets(
+    session: AsyncSession,
+    status: Optional[str] = STATUS_ACTIVE,
+    activity_tier: Optional[str] = None
+) -> List[str]:
+    """
+    Registered wallet addresses (one index scan on status, wallet_address).
+
+    Args:
+        session: Database session
+        status: Only wallets with this status (all statuses if None)
+        activity_tier: Only wallets in this refresh tier
+    """
+    stmt = select(TrackedWallet.wallet_address)
+    if status is not None:
+        stmt = stmt.where(TrackedWallet.status == status)
+    if activity_tier is not None:
+        stmt = stmt.where(TrackedWallet.activity_tier == activity_tier)
+    result = await session.execute(stmt.order_by(TrackedWallet.wallet_address))
+    return list(result.scalars().all())
+
+
+async def backfill_from_ingested_data(session: AsyncSession) -> int:
+    """
+    Register every wallet found in trades, positions and activities (one-off migration, staged).
+
+    Returns:
+        Number of wallets registered or already present
+    """
+    stmt = union(
+        select(distinct(Trade.proxy_wallet)),
+        select(distinct(Position.proxy_wallet)),
+        select(distinct(Activity.proxy_wallet)),
+    )
+    result = await session.execute(stmt)
+    wallets = [row[0] for row in result.all()]
+    return await track_wallets(session, wallets, source="ingest", reactivate=False)
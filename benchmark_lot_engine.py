@@ -0,0 +1,98 @@
+"""
+Benchmark the fixed-point FIFO lot engine against the Decimal/list reference.
+
+Generates synthetic fills (many small buys, fewer larger sells, spread over a
+handful of assets) and times:
+  - calculate_trade_pnl_decimal: reference implementation (Decimal, list.pop(0))
+  - calculate_trade_pnl: FifoLotEngine with Decimal conversion at the edges
+  - engine only: FifoLotEngine on pre-converted integer fills
+
+Usage:
+    python benchmark_lot_engine.py
+    python benchmark_lot_engine.py --fills 200000 --assets 5 --skip-reference
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from app.services.lot_engine import FifoLotEngine, to_micro
+from app.services.trade_data_processor import calculate_trade_pnl, calculate_trade_pnl_decimal
+
+
+def generate_fills(n: int, assets: int, buy_ratio: float, seed: int):
+    rng = random.Random(seed)
+    fills = []
+    for i in range(n):
+        is_buy = rng.random() < buy_ratio
+        size = rng.randint(1, 50) if is_buy else rng.randint(20, 400)
+        fills.append({
+            "asset": f"asset-{rng.randrange(assets)}",
+            "side": "BUY" if is_buy else "SELL",
+            "size": Decimal(size) / 10,
+            "price": Decimal(rng.randint(1, 999)) / 1000,
+            "timestamp": i,
+        })
+    return fills
+
+
+def time_it(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    duration = time.perf_counter() - start
+    print(f"  {label:<36} {duration:8.2f}s")
+    return duration, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FIFO lot matching")
+    parser.add_argument("--fills", type=int, default=1_000_000, help="Number of synthetic fills")
+    parser.add_argument("--assets", type=int, default=5, help="Number of distinct assets")
+    parser.add_argument("--buy-ratio", type=float, default=0.95, help="Share of fills that are buys")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-reference", action="store_true", help="Don't run the reference implementation")
+    args = parser.parse_args()
+
+    print(f"Generating {args.fills:,} fills over {args.assets} assets (buy ratio {args.buy_ratio})...")
+    fills = generate_fills(args.fills, args.assets, args.buy_ratio, args.seed)
+    print("Timing:")
+
+    reference_time = None
+    if not args.skip_reference:
+        reference_time, reference = time_it(
+            "calculate_trade_pnl_decimal", lambda: calculate_trade_pnl_decimal([dict(f) for f in fills])
+        )
+
+    engine_time, result = time_it(
+        "calculate_trade_pnl (lot engine)", lambda: calculate_trade_pnl([dict(f) for f in fills])
+    )
+
+    integer_fills = [
+        (f["asset"], f["side"] == "BUY", to_micro(f["size"]), to_micro(f["price"])) for f in fills
+    ]
+
+    def run_engine():
+        engine = FifoLotEngine()
+        for asset, is_buy, size, price in integer_fills:
+            if is_buy:
+                engine.buy(asset, size, price)
+            else:
+                engine.sell(asset, size)
+        return engine
+
+    core_time, _ = time_it("FifoLotEngine only (integer fills)", run_engine)
+
+    if reference_time is not None:
+        mismatches = sum(
+            1 for a, b in zip(reference, result)
+            if (a["pnl"] is None) != (b["pnl"] is None)
+            or (a["pnl"] is not None and abs(a["pnl"] - b["pnl"]) > Decimal("1e-8"))
+        )
+        print(f"\nPnL mismatches vs reference: {mismatches}")
+        print(f"Speedup (end to end): {reference_time / engine_time:.1f}x")
+        print(f"Speedup (matching core): {reference_time / core_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+One-off bulk load of wallets into the tracked_wallets registry.
+
+Reads wallet addresses (one per line) from a file such as wallet_address.txt,
+and optionally registers every wallet already present in the trades,
+positions and activities tables. Re-running is safe: registered wallets are
+left as they are (their tags are merged).
+
+Usage:
+    python import_tracked_wallets.py --file wallet_address.txt
+    python import_tracked_wallets.py --file whales.txt --tags whale
+    python import_tracked_wallets.py --from-db
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.db.session import AsyncSessionLocal, init_db
+from app.services.wallet_registry_service import backfill_from_ingested_data, read_wallet_file, track_wallets
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main(file_path, tags, from_db):
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        try:
+            imported = 0
+            if file_path:
+                wallets = read_wallet_file(file_path)
+                print(f"Importing {len(wallets)} wallets from {file_path}...")
+                imported = await track_wallets(session, wallets, source="import", tags=tags, reactivate=False)
+            backfilled = 0
+            if from_db:
+                print("Registering wallets from trades, positions and activities...")
+                backfilled = await backfill_from_ingested_data(session)
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Error importing tracked wallets: {e}", exc_info=True)
+            print(f"\n❌ Error: {e}")
+            sys.exit(1)
+
+    print(f"\n✅ Import complete:")
+    print(f"  - From file: {imported}")
+    print(f"  - From ingested data: {backfilled}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load wallets into the tracked_wallets registry")
+    parser.add_argument("--file", help="File with one wallet address per line")
+    parser.add_argument("--tags", nargs="*", help="Tags for the imported wallets")
+    parser.add_argument("--from-db", action="store_true", help="Also register wallets found in trades, positions and activities")
+    args = parser.parse_args()
+
+    if not args.file and not args.from_db:
+        parser.error("nothing to import: pass --file and/or --from-db")
+
+    asyncio.run(main(args.file, args.tags, args.from_db))
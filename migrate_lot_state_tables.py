@@ -0,0 +1,109 @@
+"""
+Migration script to add cost-basis method columns to open_lots and lot_watermarks.
+
+Databases created before multiple cost-basis methods were stored have one
+FIFO lot row per (wallet, asset) and no method columns; create_all does not
+alter existing tables. Existing rows are FIFO state, so the new columns are
+backfilled with 'fifo', and the open_lots unique constraint moves from
+(proxy_wallet, asset) to (proxy_wallet, asset, method). Safe to re-run.
+
+Usage:
+    python migrate_lot_state_tables.py
+"""
+
+import asyncio
+import sys
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+
+
+async def check_table_exists(conn, table_name: str) -> bool:
+    """Check if a table exists."""
+    query = text("""
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_name = :table_name
+    """)
+    result = await conn.execute(query, {"table_name": table_name})
+    return result.fetchone() is not None
+
+
+async def check_column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table."""
+    query = text("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_name = :table_name AND column_name = :column_name
+    """)
+    result = await conn.execute(query, {"table_name": table_name, "column_name": column_name})
+    return result.fetchone() is not None
+
+
+async def check_constraint_exists(conn, constraint_name: str) -> bool:
+    """Check if a named constraint exists."""
+    query = text("SELECT conname FROM pg_constraint WHERE conname = :constraint_name")
+    result = await conn.execute(query, {"constraint_name": constraint_name})
+    return result.fetchone() is not None
+
+
+async def migrate_lot_state_tables():
+    """Add and backfill the method columns if they don't exist."""
+    engine = create_async_engine(settings.DATABASE_URL, echo=True)
+
+    try:
+        async with engine.begin() as conn:
+            if await check_table_exists(conn, "open_lots"):
+                if not await check_column_exists(conn, "open_lots", "method"):
+                    print("Adding open_lots.method column (existing lots are FIFO)...")
+                    await conn.execute(text("""
+                        ALTER TABLE open_lots
+                        ADD COLUMN method VARCHAR(16) NOT NULL DEFAULT 'fifo'
+                    """))
+                    print("✓ Added open_lots.method column")
+
+                if await check_constraint_exists(conn, "uq_open_lot_wallet_asset"):
+                    print("Dropping uq_open_lot_wallet_asset...")
+                    await conn.execute(text("ALTER TABLE open_lots DROP CONSTRAINT uq_open_lot_wallet_asset"))
+                    print("✓ Dropped uq_open_lot_wallet_asset")
+
+                if not await check_constraint_exists(conn, "uq_open_lot_wallet_asset_method"):
+                    print("Adding uq_open_lot_wallet_asset_method...")
+                    await conn.execute(text("""
+                        ALTER TABLE open_lots
+                        ADD CONSTRAINT uq_open_lot_wallet_asset_method UNIQUE (proxy_wallet, asset, method)
+                    """))
+                    print("✓ Added uq_open_lot_wallet_asset_method")
+            else:
+                print("open_lots does not exist yet (created by init_database.py)")
+
+            if await check_table_exists(conn, "lot_watermarks"):
+                if not await check_column_exists(conn, "lot_watermarks", "methods"):
+                    print("Adding lot_watermarks.methods column (existing watermarks are FIFO)...")
+                    await conn.execute(text("""
+                        ALTER TABLE lot_watermarks
+                        ADD COLUMN methods VARCHAR(64) NOT NULL DEFAULT 'fifo'
+                    """))
+                    print("✓ Added lot_watermarks.methods column")
+            else:
+                print("lot_watermarks does not exist yet (created by init_database.py)")
+
+            print("\n✅ Migration complete! Lot state tables have method columns.")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        sys.exit(1)
+    finally:
+        await engine.dispose()
+
+
+async def main():
+    """Main function to run migration."""
+    print("Starting lot state tables migration...")
+    print(f"Database: {settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else 'hidden'}\n")
+
+    await migrate_lot_state_tables()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Migration script to copy legacy per-point user_pnl rows into the compact
+pnl_series_chunks store.
+
+Each (user_address, interval, fidelity) series is read from user_pnl and
+written as month chunks. Existing chunks are merged, so the script can be
+re-run safely. The user_pnl table is left in place.
+
+Usage:
+    python migrate_user_pnl_series.py
+"""
+
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import select
+
+from app.db.models import UserPnL
+from app.db.session import AsyncSessionLocal
+from app.services.pnl_series_store import save_series_points
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        try:
+            result = await session.execute(
+                select(UserPnL.user_address, UserPnL.interval, UserPnL.fidelity).distinct()
+            )
+            series_keys = result.all()
+            print(f"Migrating {len(series_keys)} PnL series...")
+
+            migrated_points = 0
+            for index, (user_address, interval, fidelity) in enumerate(series_keys, 1):
+                rows = await session.execute(
+                    select(UserPnL.timestamp, UserPnL.pnl).where(
+                        UserPnL.user_address == user_address,
+                        UserPnL.interval == interval,
+                        UserPnL.fidelity == fidelity
+                    )
+                )
+                migrated_points += await save_series_points(session, user_address, rows.all(), interval, fidelity)
+                if index % 100 == 0:
+                    print(f"  [{index}/{len(series_keys)}] {migrated_points} points migrated")
+        except Exception as e:
+            logger.error(f"Error migrating PnL series: {e}", exc_info=True)
+            print(f"\n❌ Error: {e}")
+            sys.exit(1)
+
+    print(f"\n✅ Migration complete:")
+    print(f"  - Series: {len(series_keys)}")
+    print(f"  - Points: {migrated_points}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -11,6 +11,8 @@ from typing import Dict, List, Optional
 import pandas as pd
 from decimal import Decimal
 
+from app.services.cost_basis_service import summarize_cost_basis
+
 class PolymarketWalletAnalyzer:
     def __init__(self):
         """Initialize with correct Polymarket endpoints"""
@@ -75,8 +77,8 @@ class PolymarketWalletAnalyzer:
             return []
 
     def get_wallet_activity(self, wallet_address: str, days: int = 30) -> List[Dict]:
-        Fetch user activity (alternative endpoint)
         """
+        Fetch user activity (alternative endpoint)
 
         Args:
             wallet_address: Polymarket wallet address
@@ -124,10 +126,28 @@ class PolymarketWalletAnalyzer:
             print(f"⚠️  Could not fetch activity: {e}")
             return []
 
+    def calculate_realized_pnl_by_method(self, trades: List[Dict]) -> Dict:
+        """Realized PnL per cost-basis method of Data API trades (asset / size)"""
+        fills = [
+            {
+                "asset": trade["asset"],
+                "side": str(trade.get("side", "")).upper(),
+                "size": trade["size"],
+                "price": trade["price"],
+                "timestamp": int(trade.get("timestamp") or 0)
+            }
+            for trade in trades
+            if trade.get("asset") and trade.get("size") is not None and trade.get("price") is not None
+        ]
+        return summarize_cost_basis(fills, as_float=True)
+
     def calculate_trade_pnl(self, trades: List[Dict]) -> Dict:
         """
         Calculate PnL from individual trades
 
+        Realized PnL is matched by cost basis (FIFO, with LIFO and average cost
+        alongside); buy cost and sell revenue are the cash flows.
+
         Args:
             trades: List of trade records
 
@@ -141,6 +161,7 @@ class PolymarketWalletAnalyzer:
                 "sell_volume": 0,
                 "total_fees": 0,
                 "realized_pnl": 0,
+                "realized_pnl_by_method": {},
                 "trades_by_side": {}
             }
 
@@ -195,7 +216,8 @@ class PolymarketWalletAnalyzer:
                 print(f"⚠️  Error processing trade: {e}")
                 continue
 
-        realized_pnl = total_sell_revenue - total_buy_cost
+        realized_pnl_by_method = self.calculate_realized_pnl_by_method(trades)
+        realized_pnl = realized_pnl_by_method["fifo"]["realized_pnl"]
 
         return {
             "total_trades": len(trades),
@@ -206,6 +228,7 @@ class PolymarketWalletAnalyzer:
             "total_fees": round(total_fees, 2),
             "realized_pnl": round(realized_pnl, 2),
             "roi_percent": round((realized_pnl / total_buy_cost * 100) if total_buy_cost > 0 else 0, 2),
+            "realized_pnl_by_method": realized_pnl_by_method,
             "buy_trades": buy_trades,
             "sell_trades": sell_trades
         }
@@ -249,6 +272,10 @@ class PolymarketWalletAnalyzer:
             print(f"  ❌ Realized PnL:      -${abs(pnl):,.2f}")
             print(f"  ❌ ROI:               {roi}%")
 
+        print(f"\n📒 REALIZED PnL BY COST BASIS")
+        for method, totals in pnl_data["realized_pnl_by_method"].items():
+            print(f"  {method.upper():<8}             ${totals['realized_pnl']:,.2f} ({totals['closed_trades']} closed)")
+
         print("\n" + "="*65)
 
     def export_to_csv(self, pnl_data: Dict, filename: str = "polymarket_pnl.csv"):
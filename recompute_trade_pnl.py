@@ -0,0 +1,51 @@
+"""
+Script to re-derive FIFO entry price, exit price and PnL for stored trades.
+
+Runs the set-based recompute inside Postgres (no trades are loaded into
+Python), one UPDATE per wallet hash partition.
+
+Usage:
+    python recompute_trade_pnl.py
+    python recompute_trade_pnl.py --partitions 64
+    python recompute_trade_pnl.py --wallet 0xdbade4c82fb72780a0db9a38f821d8671aba9c95
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.db.session import AsyncSessionLocal
+from app.services.pnl_recompute_service import DEFAULT_PARTITIONS, ensure_recompute_index, recompute_trade_pnl
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute trade PnL with set-based FIFO matching")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="Wallet hash partitions (one UPDATE each)")
+    parser.add_argument("--wallet", help="Only recompute this wallet")
+    args = parser.parse_args()
+
+    def report(partition, partitions, updated):
+        print(f"  [{partition + 1}/{partitions}] {updated} trades updated")
+
+    async with AsyncSessionLocal() as session:
+        try:
+            await ensure_recompute_index(session)
+            print(f"Recomputing trade PnL ({args.partitions} partitions)...")
+            result = await recompute_trade_pnl(session, args.partitions, args.wallet, progress=report)
+        except Exception as e:
+            logger.error(f"Error recomputing trade PnL: {e}", exc_info=True)
+            print(f"\n❌ Error: {e}")
+            sys.exit(1)
+
+    print(f"\n✅ Recompute complete:")
+    print(f"  - Partitions: {result['partitions']}")
+    print(f"  - Trades updated: {result['updated_trades']}")
+    print(f"  - Duration: {result['duration_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Script to re-derive trade PnL and aggregated metrics from the local database.
+
+Reruns cleaning, lot matching and aggregation for every wallet in the trades
+table without calling the API. Work is split across worker processes and the
+job can be resumed from its checkpoint file.
+
+Usage:
+    python rederive_pnl.py
+    python rederive_pnl.py --workers 8 --chunk-size 500
+    python rederive_pnl.py --checkpoint rederive_checkpoint.json --restart
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from app.services.pnl_rederive_service import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WRITE_BATCH_SIZE,
+    RederiveCheckpoint,
+    run_rederive_job,
+)
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def report(progress):
+    print(
+        f"  {progress['wallets']:,} wallets, {progress['trades']:,} trades "
+        f"({progress['updated_trades']:,} updated) | "
+        f"{progress['wallets_per_second']:.1f} wallets/s, {progress['trades_per_second']:.0f} trades/s | "
+        f"checkpoint: {progress['last_wallet']}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Re-derive PnL and aggregated metrics from stored trades")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Wallets per chunk")
+    parser.add_argument("--write-batch-size", type=int, default=DEFAULT_WRITE_BATCH_SIZE, help="Trade updates per write batch")
+    parser.add_argument("--checkpoint", default="rederive_checkpoint.json", help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first wallet")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    checkpoint = RederiveCheckpoint.load(args.checkpoint)
+    if checkpoint.last_wallet:
+        print(f"Resuming after {checkpoint.last_wallet} ({checkpoint.wallets_done:,} wallets already done)")
+
+    try:
+        result = await run_rederive_job(
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            write_batch_size=args.write_batch_size,
+            checkpoint=checkpoint,
+            progress=report
+        )
+    except Exception as e:
+        logger.error(f"Error re-deriving PnL: {e}", exc_info=True)
+        print(f"\n❌ Error: {e} (resume with the same --checkpoint)")
+        sys.exit(1)
+
+    print(f"\n✅ Re-derivation complete:")
+    print(f"  - Wallets: {result['wallets']:,}")
+    print(f"  - Trades: {result['trades']:,} ({result['updated_trades']:,} updated)")
+    print(f"  - Duration: {result['duration_seconds']:.1f}s")
+    print(f"  - Throughput: {result['wallets_per_second']} wallets/s, {result['trades_per_second']} trades/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
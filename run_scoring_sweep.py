@@ -0,0 +1,103 @@
+"""
+Scoring config sweep script.
+
+Scores the trader population under every ScoringConfig variant of a grid and
+prints rank correlation and top-K overlap against the baseline (first variant).
+
+Usage:
+    python run_scoring_sweep.py --grid sweep_grid.json
+    python run_scoring_sweep.py --grid sweep_grid.json --traders traders.json --top-k 20 --output sweep.json
+
+The grid file maps ScoringConfig fields (or "weights" / "percentiles") to lists
+of values, e.g.:
+    {"weights": [[0.3, 0.3, 0.3, 0.1], [0.4, 0.2, 0.3, 0.1]], "shrink_kr": [25, 50]}
+
+Without --traders, metrics are fetched live for the active tracked wallets
+(or the wallets listed in --wallets).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from app.services.scoring_sweep import expand_config_grid, run_scoring_sweep
+
+
+def load_traders(path: str):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    # Accept a plain list or a leaderboard-style {"traders": [...]} / {"entries": [...]}
+    if isinstance(data, dict):
+        data = data.get("traders") or data.get("entries") or []
+    return data
+
+
+async def fetch_live_traders(wallet_file: str = None):
+    from app.services.live_leaderboard_service import (
+        fetch_live_leaderboard_from_file,
+        fetch_live_leaderboard_from_registry,
+    )
+    if wallet_file:
+        return await fetch_live_leaderboard_from_file(wallet_file)
+
+    from app.db.session import AsyncSessionLocal
+    async with AsyncSessionLocal() as session:
+        return await fetch_live_leaderboard_from_registry(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate many scoring configs in one pass")
+    parser.add_argument("--grid", required=True, help="JSON file with the parameter grid")
+    parser.add_argument("--traders", help="JSON file with trader metrics (default: live fetch)")
+    parser.add_argument("--wallets", help="Wallet file for live fetch (default: tracked wallets registry)")
+    parser.add_argument("--top-k", type=int, default=10, help="Top-K size for overlap")
+    parser.add_argument("--output", help="Write the full sweep result as JSON")
+    args = parser.parse_args()
+
+    with open(args.grid, 'r') as f:
+        grid = json.load(f)
+
+    try:
+        configs = expand_config_grid(grid)
+    except ValueError as e:
+        print(f"Invalid grid: {e}")
+        sys.exit(1)
+
+    if args.traders:
+        traders = load_traders(args.traders)
+    else:
+        traders = asyncio.run(fetch_live_traders(args.wallets))
+
+    if not traders:
+        print("No traders to score")
+        sys.exit(1)
+
+    print(f"Scoring {len(traders)} traders under {len(configs)} configs...")
+    start = time.time()
+    result = run_scoring_sweep(traders, configs, top_k=args.top_k)
+    duration = time.time() - start
+    print(f"Done in {duration:.2f}s\n")
+
+    print(f"{'#':>3}  {'spearman':>8}  {'top-' + str(result['top_k']):>8}  overrides")
+    baseline = result["variants"][0]["config"]
+    for variant in result["variants"]:
+        index = variant["index"]
+        overrides = {
+            key: value for key, value in variant["config"].items()
+            if value != baseline[key]
+        }
+        print(
+            f"{index:>3}  {result['rank_correlation'][0][index]:>8.4f}  "
+            f"{result['top_k_overlap'][0][index]:>8.2%}  {overrides or '(baseline)'}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nFull results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
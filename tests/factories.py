@@ -0,0 +1,26 @@
+"""
+Shared test data factories.
+"""
+import random
+
+
+def random_trader(rng, i, total_trades=None):
+    """Trader metrics dict for wallet 0x{i:040x} as fed to the scoring functions."""
+    total_stakes = rng.uniform(10, 5000)
+    return {
+        "wallet_address": f"0x{i:040x}",
+        "total_pnl": rng.uniform(-2000, 2000),
+        "roi": rng.uniform(-80, 150),
+        "total_stakes": total_stakes,
+        "winning_stakes": rng.uniform(0, total_stakes),
+        "sum_sq_stakes": total_stakes ** 2 / rng.uniform(1, 200),
+        "max_stake": rng.uniform(1, total_stakes),
+        "worst_loss": -rng.uniform(0, 500),
+        "total_trades": rng.randint(0, 30) if total_trades is None else total_trades,
+    }
+
+
+def random_traders(n, seed):
+    """n random traders from a seeded generator."""
+    rng = random.Random(seed)
+    return [random_trader(rng, i) for i in range(n)]
@@ -0,0 +1,92 @@
+"""
+Test FIFO, LIFO and average-cost engines evaluated in one pass.
+"""
+from decimal import Decimal
+
+import pytest
+
+from app.services.cost_basis_service import create_engines, run_cost_basis_pass, summarize_cost_basis
+from app.services.lot_engine import AverageCostEngine, CostBasisEngine, LifoLotEngine, create_cost_basis_engine, to_micro
+from app.services.trade_data_processor import calculate_trade_pnl
+
+
+FILLS = [
+    {"asset": "a", "side": "BUY", "size": "10", "price": "0.2", "timestamp": 1},
+    {"asset": "a", "side": "BUY", "size": "10", "price": "0.6", "timestamp": 2},
+    {"asset": "a", "side": "SELL", "size": "5", "price": "0.5", "timestamp": 3},
+    {"asset": "b", "side": "SELL", "size": "1", "price": "0.9", "timestamp": 4},
+]
+
+
+def test_methods_realized_pnl():
+    """Each method charges the sell its own cost basis."""
+    summary = summarize_cost_basis(FILLS)
+
+    # FIFO: 5 @ 0.2, LIFO: 5 @ 0.6, average: 5 @ 0.4
+    assert summary["fifo"]["realized_pnl"] == Decimal("1.5")
+    assert summary["lifo"]["realized_pnl"] == Decimal("-0.5")
+    assert summary["average"]["realized_pnl"] == Decimal("0.5")
+    for method in ("fifo", "lifo", "average"):
+        assert summary[method]["closed_trades"] == 1
+        assert summary[method]["unmatched_sells"] == 1
+        assert summary[method]["open_positions"] == 1
+    assert summary["fifo"]["open_cost"] == Decimal("7")
+    assert summary["lifo"]["open_cost"] == Decimal("5")
+    assert summary["average"]["open_cost"] == Decimal("6")
+    print("✓ Test passed: FIFO, LIFO and average realized PnL")
+
+
+def test_summary_as_float_for_reports():
+    """Script reports get amounts as floats rounded to cents; counts stay integers."""
+    summary = summarize_cost_basis(FILLS, as_float=True)
+
+    assert summary["lifo"]["realized_pnl"] == -0.5 and isinstance(summary["lifo"]["realized_pnl"], float)
+    assert summary["average"]["open_cost"] == 6.0
+    assert summary["fifo"]["closed_trades"] == 1
+    print("✓ Test passed: float summary")
+
+
+def test_one_pass_keeps_fifo_on_trades():
+    """Trade-level entry price and PnL stay FIFO when other methods run alongside."""
+    fifo_only = calculate_trade_pnl([dict(f) for f in FILLS])
+    trades = [dict(f) for f in FILLS]
+    totals = run_cost_basis_pass(trades, create_engines())
+
+    assert [t["pnl"] for t in trades] == [t["pnl"] for t in fifo_only]
+    assert trades[2]["entry_price"] == Decimal("0.2")
+    assert totals["lifo"].losing_trades == 1
+    assert totals["fifo"].winning_trades == 1
+    print("✓ Test passed: one pass keeps FIFO trade PnL")
+
+
+def test_engine_snapshots_roundtrip():
+    """LIFO and average-cost state can be persisted and restored."""
+    lifo = LifoLotEngine()
+    average = AverageCostEngine()
+    for engine in (lifo, average):
+        engine.buy("a", to_micro("3"), to_micro("0.1"))
+        engine.buy("a", to_micro("1"), to_micro("0.5"))
+        engine.sell("a", to_micro("2"))
+
+    assert lifo.open_lots("a") == [(to_micro("2"), to_micro("0.1"))]
+    assert average.open_size("a") == to_micro("2")
+    assert average.open_cost("a") == to_micro("2") * to_micro("0.2")
+    for method, engine in (("lifo", lifo), ("average", average)):
+        restored = create_cost_basis_engine(method, engine.snapshot())
+        assert restored.snapshot() == engine.snapshot()
+
+    with pytest.raises(ValueError):
+        create_cost_basis_engine("hifo")
+    print("✓ Test passed: LIFO/average snapshots and unknown methods")
+
+
+def test_engine_interface_is_abstract():
+    """CostBasisEngine cannot be instantiated, nor can an engine missing part of the interface."""
+    class PartialEngine(CostBasisEngine):
+        def buy(self, asset, size, price):
+            pass
+
+    for engine_class in (CostBasisEngine, PartialEngine):
+        with pytest.raises(TypeError):
+            engine_class()
+    print("✓ Test passed: abstract engine interface")
@@ -0,0 +1,78 @@
+"""
+Test local equity-curve reconstruction.
+"""
+import pytest
+
+from app.services.equity_curve import (
+    EquityCurveEngine,
+    activity_event,
+    parse_resolution,
+    sample_grid,
+    sweep_equity_curve,
+    trade_event,
+)
+from app.services.price_history_service import pack_series, unpack_series
+
+
+def _events():
+    return [
+        trade_event({"asset": "yes", "condition_id": "c1", "side": "BUY", "size": 100, "price": 0.4, "timestamp": 100}),
+        trade_event({"asset": "no", "condition_id": "c2", "side": "BUY", "size": 10, "price": 0.5, "timestamp": 150}),
+        trade_event({"asset": "yes", "condition_id": "c1", "side": "SELL", "size": 50, "price": 0.6, "timestamp": 250}),
+        activity_event({"type": "REWARD", "condition_id": None, "usdc_size": 2, "timestamp": 260}),
+        activity_event({"type": "REDEEM", "condition_id": "c1", "usdc_size": 50, "timestamp": 400}),
+    ]
+
+
+HISTORY = {"yes": ([120, 220, 320], [0.5, 0.7, 0.9])}
+
+
+def test_curve_values():
+    """Cash flow plus marked holdings, with history prices and fill prices as marks."""
+    samples = sweep_equity_curve(EquityCurveEngine(), _events(), HISTORY, sample_grid(100, 400, 100))
+
+    assert [t for t, _ in samples] == [100, 200, 300, 400]
+    values = [round(p, 6) for _, p in samples]
+    # t=100: bought 100 @ 0.4, marked at 0.4
+    assert values[0] == 0.0
+    # t=200: yes marked 0.5 (history), no marked 0.5 (fill): -40 - 5 + 50 + 5
+    assert values[1] == 10.0
+    # t=300: sold 50 @ 0.6 (+30), reward +2, 50 yes @ 0.6 (fill after 0.7 history), no @ 0.5
+    assert values[2] == -45 + 30 + 2 + 30 + 5
+    # t=400: yes @ 0.9 then redeemed for 50; only "no" is still held
+    assert values[3] == -45 + 30 + 2 + 50 + 5
+    print("✓ Test passed: equity curve values")
+
+
+def test_incremental_extension_equals_full_sweep():
+    """Continuing from the stored state at a sample gives the same later samples."""
+    full = sweep_equity_curve(EquityCurveEngine(), _events(), HISTORY, sample_grid(100, 400, 50))
+
+    engine = EquityCurveEngine()
+    first = sweep_equity_curve(engine, [e for e in _events() if e[0] <= 200], HISTORY, sample_grid(100, 200, 50))
+    resumed = EquityCurveEngine.from_state(engine.to_state())
+    rest = sweep_equity_curve(
+        resumed, [e for e in _events() if e[0] > 200], HISTORY, sample_grid(250, 400, 50), prices_after=200
+    )
+    assert first + rest == full
+    print("✓ Test passed: incremental extension equals full sweep")
+
+
+def test_resolution_and_price_packing():
+    """Resolutions parse to seconds, sample grids are capped; packed price series round-trip at micro precision."""
+    assert parse_resolution("15m") == 900
+    assert parse_resolution("1d") == 86400
+    with pytest.raises(ValueError):
+        parse_resolution("1y")
+
+    assert len(sample_grid(0, 86400 * 365, 86400, max_samples=366)) == 366
+    # One-second samples over a year would be ~31.5M points
+    with pytest.raises(ValueError, match="coarser resolution"):
+        sample_grid(0, 86400 * 365, parse_resolution("1s"), max_samples=100000)
+
+    ts, px = pack_series([1, 2, 3], [0.123456, 0.5, 0.999999])
+    assert len(ts) == 24 and len(px) == 12
+    timestamps, prices = unpack_series(ts, px)
+    assert list(timestamps) == [1, 2, 3]
+    assert prices == [0.123456, 0.5, 0.999999]
+    print("✓ Test passed: resolution parsing and price packing")
@@ -0,0 +1,46 @@
+"""
+Test incremental leaderboard rescoring against exact full recomputation.
+"""
+import random
+
+from app.core.scoring_config import ScoringConfig
+from app.services.incremental_scoring_service import IncrementalScorer
+from tests.factories import random_trader
+
+
+def test_upserts_and_removals_match_exact_scoring():
+    """Random single-wallet changes must keep scores identical to a full recompute."""
+    rng = random.Random(42)
+    scorer = IncrementalScorer(ScoringConfig(percentile_lower=5.0, percentile_upper=95.0))
+    scorer.load([random_trader(rng, i) for i in range(200)])
+    assert scorer.verify()["mismatches"] == []
+
+    for step in range(150):
+        wallet_id = rng.randint(0, 260)
+        if step % 5 == 0 and len(scorer) > 1:
+            scorer.remove(f"0x{wallet_id:040x}")
+        else:
+            changed = scorer.upsert(random_trader(rng, wallet_id))
+            assert any(t["wallet_address"] == f"0x{wallet_id:040x}" for t in changed)
+
+    report = scorer.verify()
+    assert report["mismatches"] == [], report
+    print(f"✓ Test passed: incremental scores match exact (max diff {report['max_abs_diff']})")
+
+
+def test_inactive_fallback_population():
+    """When nobody meets the activity threshold, everyone forms the population."""
+    rng = random.Random(7)
+    scorer = IncrementalScorer()
+    scorer.load([random_trader(rng, i, total_trades=1) for i in range(20)])
+    assert scorer.population_size == 20
+
+    # First active trader switches the population to active traders only
+    scorer.upsert(random_trader(rng, 99, total_trades=50))
+    assert scorer.population_size == 1
+    assert scorer.verify()["mismatches"] == []
+
+    scorer.remove(f"0x{99:040x}")
+    assert scorer.population_size == 20
+    assert scorer.verify()["mismatches"] == []
+    print("✓ Test passed: fallback population handled incrementally")
@@ -0,0 +1,51 @@
+"""
+Test single-wallet rank lookups against the leaderboard snapshot.
+"""
+from app.services.leaderboard_service import calculate_scores_and_rank
+from app.services.leaderboard_snapshot import LeaderboardSnapshot, RANK_METRICS
+
+
+def _make_traders(n):
+    traders = []
+    for i in range(n):
+        traders.append({
+            "wallet_address": f"0x{i:040x}",
+            "total_pnl": float((i * 37) % 101 - 50),
+            "roi": float((i * 13) % 41 - 20),
+            "total_stakes": 100.0 + i,
+            "winning_stakes": float((i * 7) % 100),
+            "sum_sq_stakes": 1000.0 + i * 10,
+            "max_stake": 10.0 + i % 5,
+            "worst_loss": -float(i % 9),
+            "total_trades": 3 + i % 10,
+        })
+    return traders
+
+
+def test_lookup_matches_full_sort():
+    """Bisection ranks must equal the rank obtained by sorting the whole leaderboard."""
+    traders = calculate_scores_and_rank(_make_traders(60))
+    snapshot = LeaderboardSnapshot(traders)
+
+    assert snapshot.size == 60
+    for trader in traders[::7]:
+        ranks = snapshot.lookup(trader["wallet_address"].upper().replace("0X", "0x"))
+        for metric, descending in RANK_METRICS.items():
+            value = trader[metric]
+            if descending:
+                better = sum(1 for t in traders if t[metric] > value)
+            else:
+                better = sum(1 for t in traders if t[metric] < value)
+            worse = sum(1 for t in traders if (t[metric] < value if descending else t[metric] > value))
+            assert ranks[metric]["rank"] == better + 1
+            assert ranks[metric]["value"] == value
+            assert abs(ranks[metric]["percentile"] - 100.0 * worse / 60) < 1e-9
+    print("✓ Test passed: snapshot ranks match full sort")
+
+
+def test_lookup_unknown_wallet():
+    """Wallets outside the snapshot return None."""
+    snapshot = LeaderboardSnapshot(calculate_scores_and_rank(_make_traders(5)))
+    assert snapshot.lookup("0x" + "f" * 40) is None
+    assert "0x" + "f" * 40 not in snapshot
+    print("✓ Test passed: unknown wallet returns None")
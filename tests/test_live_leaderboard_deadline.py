@@ -0,0 +1,96 @@
+"""
+Test request deadlines and partial live leaderboard results.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.leaderboard import LiveFetchStatus
+from app.services import live_leaderboard_service
+from app.services.trade_cache import LRUTTLCache
+from app.services.upstream_scheduler import (
+    DeadlineExceeded,
+    PRIORITY_INTERACTIVE,
+    UpstreamScheduler,
+    remaining_time,
+    request_deadline,
+    upstream_timeout,
+)
+
+
+FAST = "0x" + "1" * 40
+SLOW_CACHED = "0x" + "2" * 40
+SLOW_UNCACHED = "0x" + "3" * 40
+
+
+def _stats(wallet, pnl):
+    return {
+        "user_address": wallet,
+        "pnl_metrics": {"total_pnl": pnl},
+        "performance_metrics": {"roi": 5.0, "win_rate": 50.0, "total_stakes": 100.0},
+        "positions_summary": {"closed_positions_count": 10},
+    }
+
+
+def test_deadline_caps_upstream_timeouts():
+    """Per-request timeouts shrink to the time left; nested deadlines only shorten; spent budgets raise."""
+    assert remaining_time() is None and upstream_timeout(30) == 30
+
+    with request_deadline(10):
+        assert upstream_timeout(30) <= 10 and upstream_timeout(2) == 2
+        with request_deadline(60):
+            assert remaining_time() <= 10
+        with request_deadline(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                upstream_timeout(30)
+    assert remaining_time() is None
+    print("✓ Test passed: deadline propagation")
+
+
+def test_slot_wait_gives_up_at_deadline():
+    """A request queued for a slot fails with DeadlineExceeded instead of waiting past its budget."""
+    scheduler = UpstreamScheduler(1)
+
+    async def scenario():
+        held = await scheduler.acquire(PRIORITY_INTERACTIVE)
+        with request_deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await scheduler.acquire(PRIORITY_INTERACTIVE)
+        scheduler.release(held)
+        return scheduler.stats()[PRIORITY_INTERACTIVE]
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+    print("✓ Test passed: slot wait deadline")
+
+
+def test_live_leaderboard_returns_partial_results_at_deadline(monkeypatch):
+    """Wallets that miss the deadline are filled from cache as stale or left out and reported as missing."""
+    def fake_portfolio_stats(wallet):
+        if wallet != FAST:
+            time.sleep(0.5)
+        return _stats(wallet, 100.0)
+
+    cache = LRUTTLCache(max_bytes=1_000_000, ttl_seconds=3600)
+    cached = live_leaderboard_service.transform_stats_for_scoring(_stats(SLOW_CACHED, 50.0))
+    cache.put(SLOW_CACHED, cached)
+    monkeypatch.setattr(live_leaderboard_service, "live_metrics_cache", cache)
+    monkeypatch.setattr(live_leaderboard_service.PolymarketService, "calculate_portfolio_stats", staticmethod(fake_portfolio_stats))
+    monkeypatch.setattr(live_leaderboard_service, "publish_snapshot", lambda traders: None)
+
+    started = time.monotonic()
+    entries, live_status = asyncio.run(
+        live_leaderboard_service.fetch_live_leaderboard_with_status([FAST, SLOW_CACHED, SLOW_UNCACHED], deadline_seconds=0.1)
+    )
+
+    by_wallet = {e["wallet_address"]: e for e in entries}
+    assert set(by_wallet) == {FAST, SLOW_CACHED}
+    assert by_wallet[FAST]["data_status"] == "fresh" and by_wallet[SLOW_CACHED]["data_status"] == "stale"
+    assert by_wallet[SLOW_CACHED]["total_pnl"] == 50.0
+    assert live_status["fresh"] == 1 and live_status["stale"] == 1 and live_status["missing"] == [SLOW_UNCACHED]
+    assert LiveFetchStatus(**live_status).missing == [SLOW_UNCACHED]
+    assert cache.get(FAST)["total_pnl"] == 100.0
+    assert time.monotonic() - started < 2
+    print("✓ Test passed: partial live leaderboard")
@@ -0,0 +1,69 @@
+"""
+Test the fixed-point FIFO lot engine against the Decimal reference matcher.
+"""
+import random
+from decimal import Decimal
+
+from app.services.lot_engine import FifoLotEngine, to_micro, from_micro
+from app.services.trade_data_processor import calculate_trade_pnl, calculate_trade_pnl_decimal
+
+
+def _random_fills(n, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "asset": f"asset-{rng.randrange(4)}",
+            "side": "BUY" if rng.random() < 0.7 else "SELL",
+            "size": Decimal(rng.randint(1, 5000)) / 100,
+            "price": Decimal(rng.randint(1, 999)) / 1000,
+            "timestamp": rng.randint(0, n),
+        }
+        for _ in range(n)
+    ]
+
+
+def test_engine_matches_reference():
+    """Entry price, exit price and PnL agree with the Decimal reference."""
+    fills = _random_fills(3000)
+    expected = calculate_trade_pnl_decimal([dict(f) for f in fills])
+    result = calculate_trade_pnl([dict(f) for f in fills])
+
+    for want, got in zip(expected, result):
+        assert got["exit_price"] == want["exit_price"]
+        for field in ("entry_price", "pnl"):
+            if want[field] is None:
+                assert got[field] is None
+            else:
+                assert abs(got[field] - want[field]) < Decimal("1e-12"), field
+    print("✓ Test passed: lot engine matches Decimal reference")
+
+
+def test_partial_lots_and_unmatched_sells():
+    """Partially consumed lots keep their price; sells beyond open size match what's there."""
+    engine = FifoLotEngine()
+    engine.buy("a", to_micro("10"), to_micro("0.4"))
+    engine.buy("a", to_micro("5"), to_micro("0.6"))
+
+    assert engine.sell("a", to_micro("12")) == (to_micro("12"), to_micro("10") * to_micro("0.4") + to_micro("2") * to_micro("0.6"))
+    assert engine.open_lots("a") == [(to_micro("3"), to_micro("0.6"))]
+
+    matched, _ = engine.sell("a", to_micro("7"))
+    assert matched == to_micro("3")
+    assert engine.assets() == []
+    assert engine.sell("b", to_micro("1")) == (0, 0)
+    print("✓ Test passed: partial lots and unmatched sells")
+
+
+def test_snapshot_roundtrip_and_conversion():
+    """Engine state can be persisted and restored; micro conversion is exact for 6 decimals."""
+    engine = FifoLotEngine()
+    engine.buy("a", to_micro("1.5"), to_micro("0.25"))
+    engine.buy("b", to_micro("2"), to_micro("0.75"))
+    restored = FifoLotEngine(engine.snapshot())
+    assert restored.snapshot() == engine.snapshot()
+
+    assert to_micro(Decimal("0.123456")) == 123456
+    assert to_micro("0.0000005") == 0
+    assert to_micro(0.1) == 100000
+    assert from_micro(123456) == Decimal("0.123456")
+    print("✓ Test passed: snapshot roundtrip and fixed-point conversion")
@@ -0,0 +1,191 @@
+"""
+Test the local market catalog sync.
+"""
+import asyncio
+
+from app.services import market_catalog_service
+from app.services.market_catalog_service import market_to_dict, normalize_market, sync_markets
+from app.db.models import Market
+from app.services.market_index import MarketIndex
+
+
+CLOB_MARKET = {
+    "condition_id": "0xc1",
+    "market_slug": "will-it-rain",
+    "question": "Will it rain?",
+    "tags": ["Weather"],
+    "closed": True,
+    "active": False,
+    "end_date_iso": "2024-11-05T00:00:00Z",
+    "tokens": [
+        {"token_id": "111", "outcome": "Yes", "winner": False},
+        {"token_id": "222", "outcome": "No", "winner": True},
+    ],
+}
+
+GAMMA_MARKET = {
+    "id": "512",
+    "conditionId": "0xc2",
+    "slug": "who-wins",
+    "outcomes": "[\"Yes\", \"No\"]",
+    "clobTokenIds": "[\"333\", \"444\"]",
+    "events": [{"slug": "election"}],
+    "category": "Politics",
+    "endDate": "2024-12-01",
+}
+
+
+def test_normalize_clob_and_gamma_markets():
+    """Both upstream shapes map to the same catalog columns; winners become resolutions."""
+    clob = normalize_market(CLOB_MARKET)
+    assert clob["slug"] == "will-it-rain"
+    assert clob["outcomes"] == ["Yes", "No"] and clob["token_ids"] == ["111", "222"]
+    assert clob["resolution"] == "NO" and clob["closed"] is True
+    assert clob["category"] == "Weather"
+
+    gamma = normalize_market(GAMMA_MARKET)
+    assert gamma["market_id"] == "512" and gamma["event_slug"] == "election"
+    assert gamma["outcomes"] == ["Yes", "No"] and gamma["token_ids"] == ["333", "444"]
+    assert gamma["resolution"] is None and gamma["closed"] is False
+
+    assert normalize_market({"slug": "no-condition"}) is None
+    assert normalize_market(dict(GAMMA_MARKET))["content_hash"] == gamma["content_hash"]
+    assert normalize_market({**GAMMA_MARKET, "closed": True})["content_hash"] != gamma["content_hash"]
+    print("✓ Test passed: market normalization")
+
+
+def test_catalog_rows_are_indexable():
+    """Catalog rows convert back into market dicts MarketIndex resolves by slug or condition id."""
+    row = normalize_market(CLOB_MARKET)
+    market = Market(**{k: v for k, v in row.items()})
+    index = MarketIndex([market_to_dict(market)])
+
+    assert index.resolution("will-it-rain") == "NO"
+    assert index.get("0xC1")["question"] == "Will it rain?"
+    assert index.entry("will-it-rain").category == "Weather"
+    print("✓ Test passed: catalog rows are indexable")
+
+
+class _Result:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class _Session:
+    def __init__(self, rowcounts):
+        self.rowcounts = list(rowcounts)
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        return _Result(self.rowcounts.pop(0))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_sync_stops_at_first_unchanged_resolved_page(monkeypatch):
+    """Active markets are paged until an empty page; resolved paging stops once a page brings nothing new."""
+    calls = []
+
+    def fake_fetch_markets_page(status, limit, offset):
+        calls.append((status, offset))
+        if status == "active" and offset >= 5:
+            return []
+        page = [{"condition_id": f"0x{status}-{offset + i}"} for i in range(limit)]
+        if status == "active" and offset >= 4:
+            page = page[:1]
+        return page
+
+    monkeypatch.setattr(market_catalog_service, "fetch_markets_page", fake_fetch_markets_page)
+    # active: 2, 2, 1 written; resolved: 2 written, then an unchanged page
+    session = _Session([2, 2, 1, 2, 0])
+    result = asyncio.run(sync_markets(session, page_size=2))
+
+    assert calls == [("active", 0), ("active", 2), ("active", 4), ("active", 5), ("resolved", 0), ("resolved", 2)]
+    assert result == {"fetched": 9, "written": 7}
+    assert session.commits == 5
+    print("✓ Test passed: incremental market sync")
+
+
+class _Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+UPSTREAM_MARKETS = [{"condition_id": f"0x{i}", "market_slug": f"m-{i}"} for i in range(3000)]
+
+
+def test_sync_pages_every_upstream_market(monkeypatch):
+    """With 3,000 upstream markets and page_size=500, every market is fetched exactly once."""
+    from app.services import data_fetcher
+
+    def fake_get(url, params=None, **kwargs):
+        offset, limit = params["offset"], params["limit"]
+        page = UPSTREAM_MARKETS[offset:offset + limit] if params["closed"] == "false" else []
+        return _Response(page)
+
+    written = []
+
+    async def fake_upsert(session, rows):
+        written.extend(row["condition_id"] for row in rows)
+        return len(rows)
+
+    monkeypatch.setattr(data_fetcher, "upstream_get", fake_get)
+    monkeypatch.setattr(market_catalog_service, "upsert_markets", fake_upsert)
+    result = asyncio.run(sync_markets(_Session([]), page_size=500))
+
+    assert result == {"fetched": 3000, "written": 3000}
+    assert written == [m["condition_id"] for m in UPSTREAM_MARKETS]
+    print("✓ Test passed: full upstream paging")
+
+
+def test_fetch_markets_slices_relative_to_first_fetched_page(monkeypatch):
+    """fetch_markets(offset, limit) returns exactly markets[offset:offset + limit] of a page-numbered upstream."""
+    from app.services import data_fetcher
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        start = (params["page"] - 1) * params["limit"]
+        return _Response(UPSTREAM_MARKETS[start:start + params["limit"]])
+
+    monkeypatch.setattr(data_fetcher, "upstream_get", fake_get)
+
+    markets, pagination = data_fetcher.fetch_markets("active", limit=500, offset=500)
+    assert markets == UPSTREAM_MARKETS[500:1000] and pagination["has_more"] is True
+
+    markets, pagination = data_fetcher.fetch_markets("active", limit=100, offset=2950)
+    assert markets == UPSTREAM_MARKETS[2950:] and pagination["has_more"] is False
+    assert pagination["total"] == 3000
+    print("✓ Test passed: fetch_markets offset slicing")
+
+
+def test_closed_gamma_market_resolution_from_outcome_prices():
+    """Closed Gamma markets resolve to the outcome priced at 1."""
+    row = normalize_market({**GAMMA_MARKET, "closed": True, "outcomePrices": "[\"0\", \"1\"]"})
+    assert row["resolution"] == "NO"
+    assert normalize_market({**GAMMA_MARKET, "outcomePrices": "[\"0\", \"1\"]"})["resolution"] is None
+    print("✓ Test passed: Gamma resolution")
+
+
+def test_resolved_markets_are_paged_by_close_time(monkeypatch):
+    """A long-open market that just closed comes first in the resolved paging, so the early stop reaches it."""
+    from app.services import data_fetcher
+
+    requested = []
+
+    def fake_get(url, params=None, **kwargs):
+        requested.append(dict(params))
+        return _Response([])
+
+    monkeypatch.setattr(data_fetcher, "upstream_get", fake_get)
+    data_fetcher.fetch_markets_page("active", 10, 0)
+    data_fetcher.fetch_markets_page("resolved", 10, 0)
+
+    assert requested[0]["order"] == "id"
+    assert requested[1]["order"] == "closedTime" and requested[1]["ascending"] == "false"
+    print("✓ Test passed: resolved paging order")
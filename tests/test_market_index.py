@@ -0,0 +1,73 @@
+"""
+Test the hash-indexed market catalog used by the scoring engine.
+"""
+from app.services import scoring_engine
+from app.services.data_fetcher import get_market_by_id, get_market_resolution
+from app.services.market_index import MarketIndex
+
+
+MARKETS = [
+    {"id": "Market-Yes", "slug": "market-yes", "condition_id": "0xAAA", "resolution": "YES", "category": "Sports"},
+    {"market_slug": "market-no", "conditionId": "0xbbb", "winningOutcome": "No", "tags": ["Politics"]},
+    {"id": "open-market", "status": "active"},
+    # Shares a slug with the first market: the earlier market keeps the key
+    {"id": "other", "slug": "market-yes", "resolution": "NO"},
+]
+
+
+def test_lookup_by_any_identifier_matches_linear_scan():
+    """Index lookups agree with get_market_by_id and also resolve slugs and condition ids."""
+    index = MarketIndex(MARKETS)
+
+    for key in ["market-yes", "MARKET-YES", "market-no", "open-market", "other", "missing"]:
+        assert index.get(key) is get_market_by_id(key, MARKETS)
+    assert index.get("0xaaa") is MARKETS[0]
+    assert index.get("0xBBB") is MARKETS[1]
+    assert index.get("") is None and index.get(None) is None
+    assert len(index) == 4 and "market-no" in index
+    print("✓ Test passed: lookup by any identifier")
+
+
+def test_resolution_and_category_are_precomputed():
+    """Each entry carries the same resolution get_market_resolution computes, plus its category."""
+    index = MarketIndex(MARKETS)
+
+    for key in ["market-yes", "market-no", "open-market", "other"]:
+        assert index.resolution(key) == get_market_resolution(key, list(MARKETS))
+    assert index.entry("market-yes").category == "Sports"
+    assert index.entry("market-no").category == "Politics"
+    assert index.entry("open-market").resolution is None
+    print("✓ Test passed: precomputed resolution and category")
+
+
+def test_added_markets_replace_stale_entries():
+    """Markets added later replace older entries for their identifiers and register the requested alias."""
+    index = MarketIndex(MARKETS)
+    assert index.resolution("open-market") is None
+
+    index.add({"id": "open-market", "condition_id": "0xccc", "resolution": "YES"}, alias="Open-Market-Alias")
+
+    assert index.resolution("open-market") == "YES"
+    assert index.resolution("0xCCC") == "YES"
+    assert index.resolution("open-market-alias") == "YES"
+    assert index.resolution("unknown") is None
+    print("✓ Test passed: added markets replace stale entries")
+
+
+def test_calculate_metrics_accepts_shared_index():
+    """calculate_metrics gives the same result for a markets list and a prebuilt index."""
+    trades = [
+        {"market_slug": "market-yes", "side": "BUY", "shares_normalized": 100.0, "price": 0.5, "timestamp": 1731489409},
+        {"market_slug": "0xbbb", "side": "SELL", "shares_normalized": 50.0, "price": 0.5, "timestamp": 1731489509},
+        {"market_slug": "open-market", "side": "BUY", "shares_normalized": 10.0, "price": 0.5, "timestamp": 1731489609},
+    ]
+    index = MarketIndex(MARKETS)
+
+    from_list = scoring_engine.calculate_metrics("0xabc", trades, MARKETS)
+    from_index = scoring_engine.calculate_metrics("0xabc", trades, index)
+
+    assert from_list == from_index
+    assert from_index["win_count"] == 2
+    assert from_index["active_positions"] == 1
+    assert set(from_index["categories"]) == {"Sports", "Politics"}
+    print("✓ Test passed: calculate_metrics with a shared index")
@@ -0,0 +1,88 @@
+"""
+Test batched prefetch of markets missing from the catalog.
+"""
+import asyncio
+
+from app.services import market_resolver as market_resolver_module
+from app.services.market_index import MarketIndex
+from app.services.market_resolver import MarketResolver, trade_market_ids
+
+
+KNOWN = [{"slug": "known-resolved", "condition_id": "0xk", "resolution": "YES"}]
+
+
+def _fake_fetch(calls, in_flight):
+    async def fetch(market_id, client=None):
+        calls.append(market_id)
+        market_id = market_id.lower()
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if market_id.startswith("boom"):
+            raise Exception("upstream error")
+        if market_id.startswith("resolved"):
+            return {"slug": market_id, "condition_id": f"0x{market_id}", "resolution": "NO"}
+        if market_id.startswith("open"):
+            return {"slug": market_id, "condition_id": f"0x{market_id}"}
+        return None
+    return fetch
+
+
+def test_prefetch_fetches_missing_markets_concurrently(monkeypatch):
+    """Only unresolvable ids are fetched, each once, with bounded concurrency; results land in the index."""
+    calls, in_flight = [], {"now": 0, "max": 0}
+    monkeypatch.setattr(market_resolver_module, "fetch_market_by_identifier", _fake_fetch(calls, in_flight))
+    resolver = MarketResolver(concurrency=2, negative_ttl=60)
+    index = MarketIndex(KNOWN)
+
+    trades = [{"market_slug": m} for m in
+              ["known-resolved", "resolved-1", "Resolved-1", "resolved-2", "open-1", "gone", "boom"]]
+    stats = asyncio.run(resolver.prefetch(index, trade_market_ids(trades)))
+
+    assert sorted(c.lower() for c in calls) == ["boom", "gone", "open-1", "resolved-1", "resolved-2"]
+    assert in_flight["max"] == 2
+    assert stats == {"requested": 5, "fetched": 3, "resolved": 2, "cached_misses": 0, "failed": 1}
+    assert index.resolution("resolved-1") == "NO" and index.resolution("RESOLVED-2") == "NO"
+    assert "open-1" in index and index.resolution("open-1") is None
+    print("✓ Test passed: concurrent prefetch of missing markets")
+
+
+def test_negative_cache_skips_recent_misses(monkeypatch):
+    """Not-found and still-open markets are not refetched within the TTL; failures are retried."""
+    calls, in_flight = [], {"now": 0, "max": 0}
+    monkeypatch.setattr(market_resolver_module, "fetch_market_by_identifier", _fake_fetch(calls, in_flight))
+    resolver = MarketResolver(concurrency=4, negative_ttl=60)
+
+    asyncio.run(resolver.prefetch(MarketIndex(), ["gone", "open-1", "boom"]))
+    calls.clear()
+    stats = asyncio.run(resolver.prefetch(MarketIndex(), ["gone", "open-1", "boom"]))
+
+    assert calls == ["boom"]
+    assert stats["cached_misses"] == 2 and stats["failed"] == 1
+
+    expired = MarketResolver(concurrency=4, negative_ttl=0)
+    asyncio.run(expired.prefetch(MarketIndex(), ["gone"]))
+    calls.clear()
+    asyncio.run(expired.prefetch(MarketIndex(), ["gone"]))
+    assert calls == ["gone"]
+    print("✓ Test passed: negative cache")
+
+
+def test_concurrent_prefetches_share_lookups(monkeypatch):
+    """Two wallets prefetching the same market at the same time cause one upstream lookup."""
+    calls, in_flight = [], {"now": 0, "max": 0}
+    monkeypatch.setattr(market_resolver_module, "fetch_market_by_identifier", _fake_fetch(calls, in_flight))
+    resolver = MarketResolver(concurrency=4, negative_ttl=60)
+    first, second = MarketIndex(), MarketIndex()
+
+    async def both():
+        await asyncio.gather(
+            resolver.prefetch(first, ["resolved-1", "resolved-2"]),
+            resolver.prefetch(second, ["resolved-1"]),
+        )
+
+    asyncio.run(both())
+    assert sorted(calls) == ["resolved-1", "resolved-2"]
+    assert first.resolution("resolved-1") == "NO" and second.resolution("resolved-1") == "NO"
+    print("✓ Test passed: concurrent prefetches share lookups")
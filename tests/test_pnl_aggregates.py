@@ -0,0 +1,207 @@
+"""
+Test the single-query PnL aggregation path.
+"""
+import asyncio
+import random
+import sqlite3
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import pnl_calculator_service
+from app.services.pnl_calculator_service import PNL_AGGREGATES_SQL, calculate_user_pnl, calculate_user_pnl_aggregated
+
+
+def _rows():
+    trades = []
+    for side, size, price, pnl in (("BUY", "10", "0.4", None), ("SELL", "5", "0.6", "1"), ("SELL", "2", "0.1", "-0.6")):
+        trade = MagicMock()
+        trade.side, trade.size, trade.price = side, Decimal(size), Decimal(price)
+        trade.pnl = Decimal(pnl) if pnl else None
+        trades.append(trade)
+    position = MagicMock()
+    position.initial_value, position.realized_pnl = Decimal("4"), Decimal("1")
+    position.cash_pnl, position.current_value = Decimal("1.5"), Decimal("2")
+    activity = MagicMock()
+    activity.type, activity.usdc_size = "REWARD", Decimal("0.25")
+    return trades, [position], [activity]
+
+
+# What PNL_AGGREGATES_SQL returns for _rows()
+AGGREGATES = {
+    "total_positions": 1, "active_positions": 1, "closed_positions": 0,
+    "total_invested": Decimal("4"), "total_realized_pnl": Decimal("1"),
+    "total_unrealized_pnl": Decimal("0.5"), "total_current_value": Decimal("2"),
+    "total_activities": 1, "total_rewards": Decimal("0.25"), "total_redemptions": Decimal("0"),
+    "total_trades": 3, "buy_trades": 1, "sell_trades": 2,
+    "total_trade_size": Decimal("17"), "total_stakes": Decimal("7.2"),
+    "total_trade_pnl": Decimal("0.4"), "total_trades_with_pnl": 2,
+    "winning_trades": 1, "stakes_of_wins": Decimal("3"),
+}
+
+
+def test_aggregated_matches_orm_path():
+    """SQL aggregates produce the same response as looping over ORM rows, in one query."""
+    trades, positions, activities = _rows()
+    load = AsyncMock(return_value=dict(AGGREGATES))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(pnl_calculator_service, "get_trades_from_db", AsyncMock(return_value=trades))
+        mp.setattr(pnl_calculator_service, "get_positions_from_db", AsyncMock(return_value=positions))
+        mp.setattr(pnl_calculator_service, "get_activities_from_db", AsyncMock(return_value=activities))
+        mp.setattr(pnl_calculator_service, "load_pnl_aggregates", load)
+        expected = asyncio.run(calculate_user_pnl(AsyncMock(), "0x123"))
+        result = asyncio.run(calculate_user_pnl_aggregated(AsyncMock(), "0x123"))
+
+    assert result == expected
+    assert load.await_count == 1
+    print("✓ Test passed: aggregated PnL matches ORM path")
+
+
+def test_missing_sources_backfilled_concurrently():
+    """Empty sources are fetched together, then aggregated once more."""
+    started = []
+
+    async def fetch_and_save_trades(session, wallet):
+        started.append("trades")
+        await asyncio.sleep(0.01)
+        assert "positions" in started  # both fetches in flight at once
+        return [{"id": 1}], 1
+
+    def fetch_positions(wallet):
+        started.append("positions")
+        return [{"id": 2}]
+
+    empty = {**AGGREGATES, "total_trades": 0, "total_positions": 0}
+    load = AsyncMock(side_effect=[empty, dict(AGGREGATES)])
+    save_positions = AsyncMock()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(pnl_calculator_service, "load_pnl_aggregates", load)
+        mp.setattr(pnl_calculator_service, "fetch_and_save_trades", fetch_and_save_trades)
+        mp.setattr(pnl_calculator_service, "fetch_positions_for_wallet", fetch_positions)
+        mp.setattr(pnl_calculator_service, "save_positions_to_db", save_positions)
+        result = asyncio.run(calculate_user_pnl_aggregated(AsyncMock(), "0x123"))
+
+    assert sorted(started) == ["positions", "trades"]
+    save_positions.assert_awaited_once()
+    assert load.await_count == 2
+    assert result["statistics"]["total_trades"] == 3
+    print("✓ Test passed: missing sources backfilled concurrently")
+
+
+class _SqliteResult:
+    def __init__(self, cursor):
+        columns = [c[0] for c in cursor.description]
+        # Postgres numeric sums come back as Decimal
+        self._rows = [
+            {c: Decimal(repr(v)) if isinstance(v, float) else v for c, v in zip(columns, row)}
+            for row in cursor.fetchall()
+        ]
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+    def one(self):
+        assert len(self._rows) == 1
+        return self._rows[0]
+
+
+class _SqliteSession:
+    """Runs text statements on an in-memory SQLite database (FILTER needs SQLite >= 3.30)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def execute(self, statement, params=None):
+        if "information_schema.columns" in statement.text:
+            return _SqliteResult(self.db.execute("SELECT name AS column_name FROM pragma_table_info('trades') WHERE name = 'pnl'"))
+        return _SqliteResult(self.db.execute(statement.text, params or {}))
+
+
+def _approx(value):
+    if isinstance(value, dict):
+        return {k: _approx(v) for k, v in value.items()}
+    if isinstance(value, float):
+        return pytest.approx(value, rel=1e-9, abs=1e-9)
+    return value
+
+
+def test_aggregates_sql_matches_orm_path_on_real_rows():
+    """PNL_AGGREGATES_SQL run on stored rows gives the same response as looping over them."""
+    wallet, other = "0x" + "1" * 40, "0x" + "2" * 40
+    rng = random.Random(11)
+
+    def amount(nullable=True):
+        if nullable and rng.random() < 0.15:
+            return None
+        return Decimal(rng.randint(-5000, 50000)) / 1000
+
+    positions = [
+        SimpleNamespace(proxy_wallet=rng.choice((wallet, wallet, other)), initial_value=amount(False),
+                        realized_pnl=amount(), cash_pnl=amount(),
+                        current_value=rng.choice((None, Decimal("0"), abs(amount(False)))))
+        for _ in range(60)
+    ]
+    activities = [
+        SimpleNamespace(proxy_wallet=rng.choice((wallet, other)), type=rng.choice(("REWARD", "REDEEM", "TRADE")),
+                        usdc_size=abs(amount(False)))
+        for _ in range(40)
+    ]
+    trades = [
+        SimpleNamespace(proxy_wallet=rng.choice((wallet, wallet, other)), side=rng.choice(("BUY", "SELL")),
+                        size=abs(amount(False)), price=Decimal(rng.randint(1, 999)) / 1000, pnl=amount())
+        for _ in range(200)
+    ]
+
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE positions (proxy_wallet TEXT, initial_value REAL, realized_pnl REAL, cash_pnl REAL, current_value REAL)")
+    db.execute("CREATE TABLE activities (proxy_wallet TEXT, type TEXT, usdc_size REAL)")
+    db.execute("CREATE TABLE trades (proxy_wallet TEXT, side TEXT, size REAL, price REAL, pnl REAL)")
+    columns = {
+        "positions": ("proxy_wallet", "initial_value", "realized_pnl", "cash_pnl", "current_value"),
+        "activities": ("proxy_wallet", "type", "usdc_size"),
+        "trades": ("proxy_wallet", "side", "size", "price", "pnl"),
+    }
+    for table, rows in (("positions", positions), ("activities", activities), ("trades", trades)):
+        db.executemany(
+            f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns[table])})",
+            [tuple(float(v) if isinstance(v, Decimal) else v for v in (getattr(r, c) for c in columns[table])) for r in rows]
+        )
+
+    def owned(rows):
+        return [r for r in rows if r.proxy_wallet == wallet]
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(pnl_calculator_service, "get_trades_from_db", AsyncMock(return_value=owned(trades)))
+        mp.setattr(pnl_calculator_service, "get_positions_from_db", AsyncMock(return_value=owned(positions)))
+        mp.setattr(pnl_calculator_service, "get_activities_from_db", AsyncMock(return_value=owned(activities)))
+        expected = asyncio.run(calculate_user_pnl(AsyncMock(), wallet))
+        mp.setattr(pnl_calculator_service, "_trades_have_pnl", False)
+        result = asyncio.run(calculate_user_pnl_aggregated(_SqliteSession(db), wallet))
+
+    assert result == _approx(expected)
+    assert result["statistics"]["total_trades"] == len(owned(trades))
+    assert 0 < result["statistics"]["closed_positions"] < result["statistics"]["total_positions"]
+    print("✓ Test passed: aggregate SQL matches ORM path on real rows")
+
+
+def test_aggregates_without_trade_pnl_column():
+    """Databases created before trades.pnl get NULL trade PnL instead of a failing query."""
+    wallet = "0x" + "1" * 40
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE positions (proxy_wallet TEXT, initial_value REAL, realized_pnl REAL, cash_pnl REAL, current_value REAL)")
+    db.execute("CREATE TABLE activities (proxy_wallet TEXT, type TEXT, usdc_size REAL)")
+    db.execute("CREATE TABLE trades (proxy_wallet TEXT, side TEXT, size REAL, price REAL)")
+    db.executemany("INSERT INTO trades VALUES (?, ?, ?, ?)", [(wallet, "BUY", 10, 0.4), (wallet, "SELL", 5, 0.6)])
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(pnl_calculator_service, "_trades_have_pnl", False)
+        totals = asyncio.run(pnl_calculator_service.load_pnl_aggregates(_SqliteSession(db), wallet))
+
+    assert totals["total_trades"] == 2 and totals["total_stakes"] == Decimal("7.0")
+    assert totals["total_trade_pnl"] == 0 and totals["total_trades_with_pnl"] == 0
+    print("✓ Test passed: aggregates without trades.pnl")
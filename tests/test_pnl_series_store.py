@@ -0,0 +1,176 @@
+"""
+Test the compact month-chunked PnL series store.
+"""
+import asyncio
+from decimal import Decimal
+
+from app.services.pnl_series_store import (
+    PYRAMID_FACTOR,
+    build_pyramid,
+    choose_pyramid_level,
+    decode_chunk,
+    encode_chunk,
+    estimate_points_in_range,
+    load_series_points,
+    lttb,
+    month_start,
+    save_series_points,
+    scale_value,
+    unscale_value,
+)
+
+JAN_2024 = 1704067200
+FEB_2024 = 1706745600
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, stored_rows):
+        self.stored_rows = stored_rows
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return _Result(self.stored_rows if len(self.statements) == 1 else [])
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_chunk_codec_round_trip_and_size():
+    """Delta varint encoding is lossless and regular minute series take ~1 byte per timestamp."""
+    points = [(JAN_2024 + 60 * i, scale_value(v)) for i, v in enumerate([0, 12.5, -3.25, 1e9, -1e9, 0.00000001])]
+    assert decode_chunk(*encode_chunk(points)) == points
+    assert unscale_value(points[2][1]) == Decimal("-3.25")
+
+    minutes = [(JAN_2024 + 60 * i, scale_value(i * 0.01)) for i in range(44640)]
+    timestamps, values = encode_chunk(minutes)
+    assert len(timestamps) < 44640 + 8
+    assert len(values) < 3 * 44640
+    print("✓ Test passed: chunk codec round trip")
+
+
+def test_month_chunks():
+    """Points group by UTC month."""
+    assert month_start(JAN_2024) == JAN_2024
+    assert month_start(FEB_2024 - 1) == JAN_2024
+    assert month_start(FEB_2024 + 86400 * 10) == FEB_2024
+    print("✓ Test passed: month chunks")
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """LTTB returns exactly threshold points, keeps both ends and picks spikes over flat points."""
+    points = [(t, 0) for t in range(1000)]
+    points[500] = (500, 10 ** 9)
+    points[700] = (700, -10 ** 9)
+
+    sampled = lttb(points, 20)
+    assert len(sampled) == 20
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (500, 10 ** 9) in sampled and (700, -10 ** 9) in sampled
+    assert [t for t, _ in sampled] == sorted(t for t, _ in sampled)
+    assert lttb(points[:5], 10) == points[:5]
+    print("✓ Test passed: LTTB keeps endpoints and extremes")
+
+
+def test_pyramid_levels_and_level_choice():
+    """Each level keeps 1/PYRAMID_FACTOR of the chunk; reads pick the coarsest level that oversamples."""
+    minutes = [(JAN_2024 + 60 * i, i) for i in range(44640)]
+    levels = build_pyramid(minutes)
+    assert sorted(levels) == [1, 2, 3, 4]
+    assert [len(levels[l]) for l in sorted(levels)] == [44640 // PYRAMID_FACTOR ** l for l in sorted(levels)]
+    assert build_pyramid(minutes[:30]) == {}
+
+    # 60 minute chunks with all levels, plus one short daily-like chunk without a pyramid
+    catalog = {
+        month: {level: (month * 10 + level, 44640 // PYRAMID_FACTOR ** level) for level in range(5)}
+        for month in range(60)
+    }
+    catalog[99] = {0: (990, 30)}
+    chosen = choose_pyramid_level(catalog, 500)
+    # Level 4 has 60 * 10 points (< 2000), level 3 has 60 * 87
+    assert chosen[0] == 3 and chosen[59] == 593
+    assert chosen[99] == 990
+    # Level 2 still has 60 * 697 >= 4 * 10000 points
+    assert set(choose_pyramid_level(catalog, 10000).values()) == {m * 10 + 2 for m in range(60)} | {990}
+    assert set(choose_pyramid_level(catalog, 100000).values()) == {m * 10 for m in range(60)} | {990}
+    print("✓ Test passed: pyramid levels and level choice")
+
+
+def test_level_choice_counts_only_points_in_range():
+    """A one-day read of a minute-resolution month reads raw points, not the coarser levels."""
+    first, last = JAN_2024, JAN_2024 + 60 * (43200 - 1)
+    day_from, day_to = JAN_2024 + 86400 * 10, JAN_2024 + 86400 * 11
+    catalog = {
+        JAN_2024: {
+            level: (level, estimate_points_in_range(43200 // PYRAMID_FACTOR ** level, first, last, day_from, day_to))
+            for level in range(5)
+        }
+    }
+    # Whole-chunk counts would pick level 1 (5400 >= 2000) and return ~180 points for the day
+    assert choose_pyramid_level(catalog, 500) == {JAN_2024: 0}
+    assert round(catalog[JAN_2024][0][1]) == 1440
+
+    # A month-long read still uses the pyramid
+    whole = {JAN_2024: {level: (level, estimate_points_in_range(43200 // PYRAMID_FACTOR ** level, first, last, None, None)) for level in range(5)}}
+    assert choose_pyramid_level(whole, 500) == {JAN_2024: 1}
+    assert estimate_points_in_range(100, first, last, last + 1, None) == 0.0
+    print("✓ Test passed: level choice for partial range")
+
+
+def test_save_merges_into_stored_chunk():
+    """New points merge with the stored chunk (same timestamp wins) and each month is one upserted row."""
+    stored = encode_chunk([(JAN_2024, scale_value(1)), (JAN_2024 + 60, scale_value(2))])
+    session = _Session([(JAN_2024, stored[0], stored[1])])
+
+    count = asyncio.run(save_series_points(
+        session, "0xabc", [(JAN_2024 + 60, 5), (JAN_2024 + 120, 6), (FEB_2024, 7)], "1m", "1d"
+    ))
+
+    assert count == 3
+    assert len(session.statements) == 2 and session.commits == 1
+    params = session.statements[1].compile().params
+    jan = decode_chunk(params["timestamps_m0"], params["pnl_values_m0"])
+    feb = decode_chunk(params["timestamps_m1"], params["pnl_values_m1"])
+    assert [(t, unscale_value(v)) for t, v in jan] == [
+        (JAN_2024, Decimal(1)), (JAN_2024 + 60, Decimal(5)), (JAN_2024 + 120, Decimal(6))
+    ]
+    assert feb == [(FEB_2024, scale_value(7))]
+    assert params["point_count_m0"] == 3
+    print("✓ Test passed: save merges into stored chunk")
+
+
+def test_polymarket_series_reads_leave_out_local_curves(monkeypatch):
+    """/pnl/from-db skips local equity curves unless interval=local is asked for."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routers import pnl
+    from app.services.equity_curve_service import LOCAL_INTERVAL
+
+    session = _Session([])
+    asyncio.run(load_series_points(session, "0xabc", exclude_intervals=[LOCAL_INTERVAL]))
+    assert "NOT IN" in str(session.statements[0]).upper()
+
+    calls = []
+
+    async def fake_get_pnl_from_db(session, user_address, **kwargs):
+        calls.append(kwargs)
+        return []
+
+    monkeypatch.setattr(pnl, "get_pnl_from_db", fake_get_pnl_from_db)
+    client = TestClient(app)
+    wallet = "0x" + "1" * 40
+    assert client.get(f"/pnl/from-db?user_address={wallet}").status_code == 200
+    assert client.get(f"/pnl/from-db?user_address={wallet}&interval={LOCAL_INTERVAL}").status_code == 200
+
+    assert list(calls[0]["exclude_intervals"]) == [LOCAL_INTERVAL]
+    assert list(calls[1]["exclude_intervals"]) == [] and calls[1]["interval"] == LOCAL_INTERVAL
+    print("✓ Test passed: local curves excluded from Polymarket series reads")
@@ -0,0 +1,135 @@
+"""
+Test batched token price refresh for the mark-to-market cache.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db.models import Position, TokenPrice
+from app.services import price_cache_service
+from app.services.price_cache_service import refresh_token_prices, revalue_open_positions
+
+
+class _Session:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_refresh_batches_and_skips_failed_batches():
+    """Assets are priced in bounded concurrent batches; a failed batch doesn't sink the refresh."""
+    requested = []
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_midpoints(batch, client=None):
+        requested.append(list(batch))
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if "t-4" in batch:
+            raise Exception("upstream error")
+        return {token: 0.5 for token in batch}
+
+    session = _Session()
+    assets = [f"t-{i}" for i in range(10)]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(price_cache_service, "fetch_token_midpoints", fake_midpoints)
+        result = asyncio.run(refresh_token_prices(session, assets, batch_size=3, concurrency=2))
+
+    assert [len(b) for b in requested] == [3, 3, 3, 1]
+    assert in_flight["max"] == 2
+    assert result == {"requested": 10, "priced": 7, "failed_batches": 1}
+    assert len(session.statements) == 1 and session.commits == 1
+    print("✓ Test passed: batched price refresh")
+
+
+def test_refresh_upserts_in_bounded_batches():
+    """Large refreshes are split into upserts that stay below the Postgres bind parameter limit."""
+    async def fake_midpoints(batch, client=None):
+        return {token: 0.5 for token in batch}
+
+    session = _Session()
+    assets = [f"t-{i}" for i in range(7000)]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(price_cache_service, "fetch_token_midpoints", fake_midpoints)
+        result = asyncio.run(refresh_token_prices(session, assets, batch_size=500, concurrency=4))
+
+    assert result == {"requested": 7000, "priced": 7000, "failed_batches": 0}
+    assert len(session.statements) == 4 and session.commits == 1
+    for statement in session.statements:
+        assert len(statement.compile(dialect=postgresql.asyncpg.dialect()).params) < 32767
+    print("✓ Test passed: batched price upserts")
+
+
+class _SyncSession:
+    """Async facade over a synchronous SQLite session."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement, params=None):
+        return self.session.execute(statement, params)
+
+    async def commit(self):
+        self.session.commit()
+
+
+def _position(asset, size, initial_value, cur_price, redeemable=False, percent_pnl=0):
+    return Position(
+        proxy_wallet=f"0x{size}{int(redeemable)}", asset=asset, condition_id="0xc", size=size, avg_price=0,
+        initial_value=initial_value, current_value=0, cash_pnl=0, percent_pnl=percent_pnl,
+        total_bought=initial_value, realized_pnl=0, percent_realized_pnl=0, cur_price=cur_price,
+        redeemable=redeemable
+    )
+
+
+def test_revalue_updates_open_positions_from_cached_prices():
+    """The UPDATE ... FROM re-marks open positions with a changed price and leaves the rest alone."""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _register_functions(connection, record):
+        # Postgres GREATEST / LEAST skip NULLs
+        for name, pick in (("greatest", max), ("least", min)):
+            connection.create_function(name, 2, lambda a, b, pick=pick: pick((v for v in (a, b) if v is not None), default=None))
+
+    Position.__table__.create(engine)
+    TokenPrice.__table__.create(engine)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all([
+            _position("a", 10, 4, 0.4),                    # revalued
+            _position("a", 10, 4, 0.4, redeemable=True),   # redeemable
+            _position("a", 0, 4, 0.4),                     # closed
+            _position("b", 10, 4, 0.5),                    # price unchanged
+            _position("c", 10, 4, 0.4),                    # no cached price
+            _position("d", 10, 0, 0.1, percent_pnl=12.5),  # no cost basis: percent kept
+            _position("e", 10, 4, 0.4),                    # stale price
+            TokenPrice(asset="a", price=0.7, fetched_at=now),
+            TokenPrice(asset="b", price=0.5, fetched_at=now),
+            TokenPrice(asset="d", price=0.2, fetched_at=now),
+            TokenPrice(asset="e", price=0.9, fetched_at=now - timedelta(hours=1)),
+        ])
+        session.commit()
+
+        revalued = asyncio.run(revalue_open_positions(_SyncSession(session), fetched_since=now - timedelta(minutes=1)))
+        rows = session.execute(select(Position).order_by(Position.id)).scalars().all()
+
+    assert revalued == 2
+    marks = [(float(p.cur_price), float(p.current_value), float(p.cash_pnl), float(p.percent_pnl)) for p in rows]
+    assert marks[0] == pytest.approx((0.7, 7.0, 3.0, 75.0))
+    assert marks[5] == pytest.approx((0.2, 2.0, 2.0, 12.5))
+    for i in (1, 2, 3, 4, 6):
+        assert float(rows[i].current_value) == 0 and float(rows[i].cash_pnl) == 0
+    print("✓ Test passed: UPDATE ... FROM revaluation")
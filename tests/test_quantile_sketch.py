@@ -0,0 +1,80 @@
+"""
+Test the KLL quantile sketch used for population medians and anchors.
+"""
+import random
+from bisect import bisect_left
+
+from app.core.scoring_config import ScoringConfig
+from app.services.leaderboard_service import (
+    build_population_sketches,
+    compare_sketch_anchors,
+    deserialize_population_sketches,
+    get_percentile_value,
+    merge_population_sketches,
+    serialize_population_sketches,
+)
+from app.services.quantile_sketch import KLLSketch
+
+
+def test_small_population_is_exact():
+    """Without compaction the sketch matches the exact median and percentiles."""
+    rng = random.Random(1)
+    values = [rng.uniform(-100, 100) for _ in range(50)]
+    sketch = KLLSketch(rank_error=0.01).update(values)
+
+    assert sketch.is_exact
+    assert sketch.median() == sorted(values)[len(values) // 2]
+    for p in (1, 5, 50, 95, 99):
+        assert abs(sketch.percentile(p) - get_percentile_value(values, p)) < 1e-9
+    print("✓ Test passed: small sketches are exact")
+
+
+def test_merged_shards_within_error_bound():
+    """Sketches built per shard and merged stay within the target rank error."""
+    rng = random.Random(2)
+    values = [rng.gauss(0, 50) for _ in range(20000)]
+    shards = [KLLSketch(rank_error=0.01, seed=i).update(values[i::4]) for i in range(4)]
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+
+    assert len(merged) == len(values)
+    ordered = sorted(values)
+    for p in (1, 5, 50, 95, 99):
+        estimate = merged.percentile(p)
+        target_rank = (len(values) - 1) * p / 100.0
+        rank_error = abs(bisect_left(ordered, estimate) - target_rank) / len(values)
+        assert rank_error <= 0.02, (p, rank_error)
+    print("✓ Test passed: merged shard sketches within error bound")
+
+
+def test_population_sketches_roundtrip_and_report():
+    """Population sketches survive serialization and the anchor report stays close."""
+    rng = random.Random(3)
+    traders = []
+    for i in range(3000):
+        total_stakes = rng.uniform(10, 5000)
+        traders.append({
+            "wallet_address": f"0x{i:040x}",
+            "total_pnl": rng.uniform(-2000, 2000),
+            "roi": rng.uniform(-80, 150),
+            "total_stakes": total_stakes,
+            "winning_stakes": rng.uniform(0, total_stakes),
+            "sum_sq_stakes": total_stakes ** 2 / rng.uniform(1, 200),
+            "max_stake": rng.uniform(1, total_stakes),
+            "worst_loss": -rng.uniform(0, 500),
+            "total_trades": rng.randint(0, 30),
+        })
+
+    config = ScoringConfig(sketch_rank_error=0.01)
+    partitions = [
+        serialize_population_sketches(build_population_sketches(traders[i::3], config))
+        for i in range(3)
+    ]
+    merged = merge_population_sketches([deserialize_population_sketches(p) for p in partitions])
+    whole = build_population_sketches(traders, config)
+    assert len(merged["roi"]) == len(whole["roi"])
+
+    report = compare_sketch_anchors(traders, config)
+    assert report["max_rank_error"] <= 0.02, report
+    print(f"✓ Test passed: anchor report max rank error {report['max_rank_error']:.4f}")
@@ -0,0 +1,42 @@
+"""
+Test sharded process-pool scoring against single-process scoring.
+"""
+import asyncio
+
+from app.core.scoring_config import ScoringConfig
+from app.services.leaderboard_service import calculate_scores_and_rank_with_percentiles
+from app.services.scoring_executor import ScoringExecutor
+from tests.factories import random_traders
+
+SCORE_FIELDS = ("W_shrunk", "roi_shrunk", "pnl_shrunk", "score_win_rate",
+                "score_roi", "score_pnl", "score_risk", "final_score")
+
+
+def test_sharded_scoring_matches_single_process():
+    """Worker-built features plus parent normalization equal the in-process result."""
+    config = ScoringConfig(percentile_lower=5.0, percentile_upper=95.0)
+    expected = calculate_scores_and_rank_with_percentiles(random_traders(400, seed=5), config)
+
+    executor = ScoringExecutor(max_workers=2, min_parallel_traders=1, shard_size=150)
+    try:
+        result = asyncio.run(executor.score_with_percentiles(random_traders(400, seed=5), config))
+    finally:
+        executor.shutdown()
+
+    assert result["medians"] == expected["medians"]
+    assert result["percentiles"] == expected["percentiles"]
+    assert result["population_size"] == expected["population_size"]
+    for got, want in zip(result["traders"], expected["traders"]):
+        for field in SCORE_FIELDS:
+            assert got[field] == want[field], field
+    print("✓ Test passed: sharded scoring matches single-process scoring")
+
+
+def test_small_population_skips_pool():
+    """Below the parallel threshold no worker processes are started."""
+    executor = ScoringExecutor(max_workers=4, min_parallel_traders=1000)
+    traders = asyncio.run(executor.score(random_traders(50, seed=5)))
+    assert len(traders) == 50
+    assert all("final_score" in t for t in traders)
+    assert executor._pool is None
+    print("✓ Test passed: small populations scored in-thread")
@@ -0,0 +1,55 @@
+"""
+Test the multi-config scoring sweep against per-config full scoring.
+"""
+import pytest
+
+from app.core.scoring_config import ScoringConfig
+from app.services.leaderboard_service import calculate_scores_and_rank
+from app.services.scoring_sweep import ScoringSweep, expand_config_grid, run_scoring_sweep
+from tests.factories import random_traders
+
+
+def test_sweep_matches_full_scoring():
+    """Every variant's scores equal calculate_scores_and_rank for that config."""
+    traders = random_traders(150, seed=11)
+    configs = expand_config_grid({
+        "weights": [[0.3, 0.3, 0.3, 0.1], [0.5, 0.2, 0.2, 0.1]],
+        "percentiles": [[1.0, 99.0], [5.0, 95.0]],
+        "shrink_kr": [25.0, 50.0],
+        "shrink_alpha": [2.0, 4.0],
+    })
+    assert len(configs) == 16
+
+    sweep = ScoringSweep(traders)
+    for config in configs:
+        expected = calculate_scores_and_rank([dict(t) for t in traders], config)
+        scores = sweep.score(config)
+        assert scores == [t["final_score"] for t in expected]
+
+    # Inputs are never mutated
+    assert "final_score" not in traders[0]
+    print("✓ Test passed: sweep scores match full scoring for every variant")
+
+
+def test_sweep_comparisons():
+    """Baseline compares perfectly with itself; the report has one row per variant."""
+    traders = random_traders(80, seed=11)
+    configs = [ScoringConfig(), ScoringConfig(weight_win_rate=0.1, weight_roi=0.1, weight_pnl=0.7)]
+    result = run_scoring_sweep(traders, configs, top_k=10)
+
+    assert result["total_traders"] == 80
+    assert len(result["variants"]) == 2
+    assert result["rank_correlation"][0][0] == pytest.approx(1.0)
+    assert result["top_k_overlap"][0][0] == 1.0
+    assert -1.0 <= result["rank_correlation"][0][1] <= 1.0
+    assert len(result["variants"][1]["top"]) == 10
+    print("✓ Test passed: sweep comparison matrices")
+
+
+def test_grid_rejects_unknown_or_invalid():
+    """Unknown keys and configs that fail validation are rejected."""
+    with pytest.raises(ValueError):
+        expand_config_grid({"not_a_field": [1]})
+    with pytest.raises(ValueError):
+        expand_config_grid({"weight_roi": [0.9]})
+    print("✓ Test passed: invalid grids rejected")
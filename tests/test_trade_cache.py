@@ -0,0 +1,86 @@
+"""
+Test the bounded LRU + TTL trades cache.
+"""
+import asyncio
+
+import pytest
+
+from app.services.trade_cache import LRUTTLCache, estimate_size
+
+
+def _trades():
+    return [{"side": "BUY", "size": 10.0, "price": 0.5, "timestamp": 1731489409}]
+
+
+TRADES = _trades()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used_within_byte_budget():
+    """Entries are evicted oldest-use first once the byte budget is exceeded; oversized entries are rejected."""
+    entry_size = estimate_size(TRADES)
+    cache = LRUTTLCache(max_bytes=entry_size * 2, ttl_seconds=60, max_entry_bytes=entry_size * 2)
+
+    cache.put("a", TRADES)
+    cache.put("b", _trades())
+    assert cache.get("a") is TRADES  # "a" becomes most recently used
+    cache.put("c", _trades())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is TRADES and cache.get("c") is not None
+    assert cache.stats()["bytes"] == entry_size * 2 and cache.stats()["evictions"] == 1
+
+    assert cache.put("huge", TRADES * 10) is False
+    assert cache.get("huge") is None and len(cache) == 2
+    print("✓ Test passed: LRU eviction by bytes")
+
+
+def test_entries_expire_after_ttl():
+    """Entries older than their TTL are dropped on lookup and their bytes released."""
+    clock = _Clock()
+    cache = LRUTTLCache(max_bytes=1_000_000, ttl_seconds=30, clock=clock)
+    cache.put("a", TRADES)
+
+    clock.now = 29
+    assert cache.get("a") is TRADES
+    clock.now = 30
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 0 and stats["bytes"] == 0
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["expirations"] == 1
+    print("✓ Test passed: TTL expiry")
+
+
+def test_concurrent_misses_share_one_load():
+    """Concurrent lookups of a missing key run the loader once; failed loads are not cached."""
+    cache = LRUTTLCache(max_bytes=1_000_000, ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return TRADES
+
+    async def burst():
+        return await asyncio.gather(*[cache.get_or_load("wallet", loader) for _ in range(5)])
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1 and all(r is TRADES for r in results)
+    assert asyncio.run(cache.get_or_load("wallet", loader)) is TRADES and len(calls) == 1
+
+    async def failing():
+        raise Exception("upstream error")
+
+    with pytest.raises(Exception, match="upstream error"):
+        asyncio.run(cache.get_or_load("other", failing))
+    assert cache.get("other") is None
+    assert cache.stats()["loads"] == 2
+    print("✓ Test passed: shared loads")
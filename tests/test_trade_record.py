@@ -0,0 +1,73 @@
+"""
+Test the canonical trade record used by the scoring engine.
+"""
+from datetime import datetime, timezone
+
+from app.services import scoring_engine
+from app.services.market_index import MarketIndex
+from app.services.trade_record import TradeRecord, normalize_trades, parse_timestamp
+
+
+MARKETS = [
+    {"slug": "market-yes", "resolution": "YES", "category": "Sports"},
+    {"slug": "market-no", "resolution": "NO", "category": "Politics"},
+    {"slug": "open-market"},
+]
+
+
+def test_from_dict_probes_field_variants():
+    """Market, side, size, price and timestamp are read from whichever field a source uses."""
+    dome = TradeRecord.from_dict({
+        "market_slug": "market-yes", "side": "buy", "shares": 2_500_000, "price": "0.4", "timestamp": 1731489409,
+    })
+    assert (dome.market_id, dome.side, dome.size, dome.price) == ("market-yes", "BUY", 2.5, 0.4)
+    assert dome.timestamp == 1731489409.0
+
+    other = TradeRecord.from_dict({
+        "marketId": 42, "outcomeYes": True, "filledSize": "7", "avgPrice": 0.25, "createdAt": "2024-11-13T09:16:49Z",
+    })
+    assert (other.market_id, other.side, other.size, other.price) == ("42", "YES", 7.0, 0.25)
+
+    normalized = TradeRecord.from_dict({"market": "m", "shares_normalized": 3.0, "shares": 9_000_000})
+    assert normalized.size == 3.0 and normalized.side is None and normalized.timestamp is None
+
+    records = normalize_trades([dome, {"slug": "x"}])
+    assert records[0] is dome and records[1].market_id == "x"
+    print("✓ Test passed: field probing")
+
+
+def test_parse_timestamp_formats():
+    """Epoch numbers, numeric strings, milliseconds and ISO strings all become epoch seconds."""
+    expected = datetime(2024, 11, 13, 9, 16, 49, tzinfo=timezone.utc).timestamp()
+
+    assert parse_timestamp(1731489409) == expected
+    assert parse_timestamp("1731489409") == expected
+    assert parse_timestamp(1731489409000) == expected
+    assert parse_timestamp("2024-11-13T09:16:49Z") == expected
+    assert parse_timestamp("2024-11-13T09:16:49+00:00") == expected
+    assert parse_timestamp("not a date") is None
+    assert parse_timestamp(None) is None and parse_timestamp(True) is None
+    print("✓ Test passed: timestamp parsing")
+
+
+def test_metrics_match_for_dicts_and_records():
+    """Scoring gives identical results for raw dicts and pre-normalized records, including mixed timestamp formats."""
+    trades = [
+        {"market_slug": "market-yes", "side": "BUY", "shares_normalized": 100.0, "price": 0.5, "timestamp": 1731489409},
+        {"market_slug": "market-no", "side": "BUY", "shares_normalized": 40.0, "price": 0.3,
+         "createdAt": "2024-11-14T10:00:00Z"},
+        {"marketSlug": "market-no", "outcome": "No", "size": 10, "price": 0.6, "time": "1731400000"},
+        {"market_slug": "open-market", "side": "SELL", "shares_normalized": 5.0, "price": 0.5, "timestamp": 1731489509},
+        {"side": "BUY", "shares_normalized": 1.0},
+    ]
+    index = MarketIndex(MARKETS)
+
+    from_dicts = scoring_engine.calculate_metrics("0xabc", trades, index)
+    from_records = scoring_engine.calculate_metrics("0xabc", normalize_trades(trades), index)
+
+    assert from_dicts == from_records
+    assert from_dicts["win_count"] == 2 and from_dicts["loss_count"] == 1
+    assert from_dicts["total_positions"] == 3 and from_dicts["active_positions"] == 1
+    # The ISO-dated loss is the most recent trade; the unresolved and undated trades carry no weight
+    assert scoring_engine.calculate_consistency(trades, index) == (8 + 7) / (10 + 8 + 7)
+    print("✓ Test passed: metrics parity for dicts and records")
@@ -0,0 +1,151 @@
+"""
+Test trader discovery from market trades.
+"""
+import asyncio
+
+from app.services import trader_discovery_service
+from app.services.trader_discovery_service import aggregate_wallets, crawl_market_trades, discover_traders
+
+
+WALLET_A = "0x" + "a" * 40
+WALLET_B = "0x" + "b" * 40
+
+
+def _trade(wallet, timestamp, size=10.0, price=0.5, tx=None):
+    return {
+        "proxyWallet": wallet, "timestamp": timestamp, "size": size, "price": price,
+        "side": "BUY", "asset": "1", "transactionHash": tx or f"0x{timestamp}",
+    }
+
+
+def _fake_pages(pages, calls):
+    async def fetch(condition_id, limit=500, offset=0, client=None):
+        calls.append((condition_id, offset))
+        return pages.get(condition_id, [])[offset:offset + limit]
+    return fetch
+
+
+def test_crawl_stops_at_watermark_and_skips_repeated_fills(monkeypatch):
+    """Paging stops at the previous crawl's newest trade; fills repeated across pages are counted once."""
+    calls = []
+    trades = [_trade(WALLET_A, 105), _trade(WALLET_B, 104), _trade(WALLET_B, 104),
+              _trade(WALLET_A, 103), _trade(WALLET_A, 100), _trade(WALLET_B, 99)]
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", _fake_pages({"0xm": trades}, calls))
+
+    new_trades, newest, keys, resume = asyncio.run(crawl_market_trades("0xm", since=100, page_size=2, max_pages=10))
+
+    assert [t["timestamp"] for t in new_trades] == [105, 104, 103]
+    assert newest == 105 and len(keys) == 1 and resume is None
+    assert calls == [("0xm", 0), ("0xm", 2), ("0xm", 4)]
+
+    unchanged, newest, _, resume = asyncio.run(
+        crawl_market_trades("0xm", since=105, page_size=2, max_pages=10, since_keys=keys)
+    )
+    assert unchanged == [] and newest == 105 and resume is None
+    print("✓ Test passed: incremental market crawl")
+
+
+def test_crawl_picks_up_later_fills_at_the_watermark_second(monkeypatch):
+    """A fill with the watermark's timestamp that arrived after the last crawl is counted once."""
+    first = [_trade(WALLET_A, 200, tx="0x1"), _trade(WALLET_B, 150)]
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", _fake_pages({"0xm": first}, []))
+    trades, newest, keys, _ = asyncio.run(crawl_market_trades("0xm", page_size=10))
+    assert len(trades) == 2 and newest == 200
+
+    later = [_trade(WALLET_B, 200, tx="0x2")] + first
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", _fake_pages({"0xm": later}, []))
+    trades, newest, keys, _ = asyncio.run(crawl_market_trades("0xm", since=newest, page_size=10, since_keys=keys))
+    assert [t["transactionHash"] for t in trades] == ["0x2"]
+    assert newest == 200 and len(keys) == 2
+
+    trades, _, _, _ = asyncio.run(crawl_market_trades("0xm", since=newest, page_size=10, since_keys=keys))
+    assert trades == []
+    print("✓ Test passed: same-second fills")
+
+
+def test_page_limit_keeps_watermark_and_resumes(monkeypatch):
+    """A crawl cut short by the page limit keeps the watermark and the next run continues below it."""
+    history = [_trade(WALLET_A, ts) for ts in range(110, 100, -1)] + [_trade(WALLET_B, 100)]
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", _fake_pages({"0xm": history}, []))
+
+    trades, newest, keys, resume = asyncio.run(
+        crawl_market_trades("0xm", since=100, page_size=2, max_pages=2, since_keys=[])
+    )
+    assert [t["timestamp"] for t in trades] == [110, 109, 108, 107]
+    assert newest == 100 and resume["offset"] == 4 and resume["newest"] == 110
+
+    # Two new trades push the unfinished rows down; they are skipped, not counted twice
+    history = [_trade(WALLET_B, 112), _trade(WALLET_B, 111)] + history
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", _fake_pages({"0xm": history}, []))
+    crawled = [t["timestamp"] for t in trades]
+    while resume is not None:
+        trades, newest, keys, resume = asyncio.run(
+            crawl_market_trades("0xm", since=newest, page_size=2, max_pages=2, since_keys=keys, resume=resume)
+        )
+        crawled += [t["timestamp"] for t in trades]
+    assert crawled == list(range(110, 100, -1)) + [100]
+    assert newest == 110
+
+    trades, newest, _, _ = asyncio.run(crawl_market_trades("0xm", since=newest, page_size=2, since_keys=keys))
+    assert [t["timestamp"] for t in trades] == [112, 111] and newest == 112
+    print("✓ Test passed: page limit resume")
+
+
+def test_aggregate_wallets():
+    """Wallets are lowercased and deduplicated with first/last seen, trade count and volume; invalid ones dropped."""
+    wallets = aggregate_wallets([
+        _trade(WALLET_A.upper().replace("0X", "0x"), 200, size=10, price=0.5),
+        _trade(WALLET_A, 100, size=4, price=0.25),
+        _trade(WALLET_B, "2024-11-13T09:16:49Z"),
+        _trade("not-a-wallet", 100),
+        _trade(WALLET_B, None),
+    ])
+
+    assert set(wallets) == {WALLET_A, WALLET_B}
+    assert wallets[WALLET_A] == [100, 200, 2, 6.0]
+    assert wallets[WALLET_B][0] == wallets[WALLET_B][1] == 1731489409
+    print("✓ Test passed: wallet aggregation")
+
+
+class _Session:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.executed.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_discover_records_wallets_and_watermarks(monkeypatch):
+    """Each crawled market's wallets are recorded and its watermark committed; failed markets are skipped."""
+    pages = {"0xm1": [_trade(WALLET_A, 300), _trade(WALLET_B, 200)], "0xm2": [_trade(WALLET_A, 150)]}
+    fetch = _fake_pages(pages, [])
+
+    async def failing_fetch(condition_id, limit=500, offset=0, client=None):
+        if condition_id == "0xbroken":
+            raise Exception("upstream error")
+        return await fetch(condition_id, limit, offset, client)
+
+    async def fake_markets_to_crawl(session, limit):
+        return [("0xm1", None, None, None), ("0xm2", 100, None, None), ("0xbroken", None, None, None)]
+
+    recorded = {}
+
+    async def fake_record(session, condition_id, wallets):
+        recorded[condition_id] = wallets
+        return len(wallets)
+
+    monkeypatch.setattr(trader_discovery_service, "fetch_market_trades", failing_fetch)
+    monkeypatch.setattr(trader_discovery_service, "markets_to_crawl", fake_markets_to_crawl)
+    monkeypatch.setattr(trader_discovery_service, "record_market_wallets", fake_record)
+
+    session = _Session()
+    stats = asyncio.run(discover_traders(session, max_markets=10, concurrency=2))
+
+    assert stats == {"markets": 2, "failed": 1, "trades": 3, "wallets": 2, "new_market_wallets": 3}
+    assert set(recorded["0xm1"]) == {WALLET_A, WALLET_B} and set(recorded["0xm2"]) == {WALLET_A}
+    assert session.commits == 2 and len(session.executed) == 2
+    print("✓ Test passed: discovery run")
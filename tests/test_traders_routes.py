@@ -24,7 +24,7 @@ def test_get_traders_list(monkeypatch):
         }
     ]
 
-    def fake_fetch_traders_list(limit=None):
+    async def fake_fetch_traders_list(session=None, limit=None):
         return fake_traders_list
 
     monkeypatch.setattr(traders, "fetch_traders_list", fake_fetch_traders_list)
@@ -45,8 +45,9 @@ def test_get_trader_detail(monkeypatch):
     wallet = "0x56687bf447db6ffa42ffe2204a05edaa20f55839"
 
     # Fake detail from service
-    def fake_get_trader_detail(addr: str):
+    async def fake_get_trader_detail(addr: str, session=None):
         assert addr == wallet
+        assert session is not None
         return {
             "wallet_address": wallet,
             "total_trades": 100,
@@ -115,9 +116,11 @@ def test_get_trader_invalid_wallet():
 
 def test_get_trader_not_found(monkeypatch):
     """Test GET /traders/{wallet} when trader has no trades."""
+    from app.routers import traders
+
     wallet = "0x0000000000000000000000000000000000000000"
 
-    def fake_get_trader_detail(addr: str):
+    async def fake_get_trader_detail(addr: str, session=None):
         return {
             "wallet_address": addr,
             "total_trades": 0,  # No trades
@@ -133,7 +136,7 @@ def test_get_trader_not_found(monkeypatch):
             "categories": {},
         }
 
-    monkeypatch.setattr(trader_service, "get_trader_detail", fake_get_trader_detail)
+    monkeypatch.setattr(traders, "get_trader_detail", fake_get_trader_detail)
 
     resp = client.get(f"/traders/{wallet}")
     assert resp.status_code == 404
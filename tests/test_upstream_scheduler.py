@@ -0,0 +1,114 @@
+"""
+Test priority-aware scheduling of upstream requests.
+"""
+import asyncio
+import logging
+
+import pytest
+
+from app.services.upstream_scheduler import (
+    PRIORITY_BACKFILL,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+    UpstreamScheduler,
+    current_priority,
+    upstream_priority,
+)
+
+
+async def _drain(scheduler, priorities):
+    """Queue one request per priority behind a held slot, release it, and return the grant order."""
+    order = []
+    held = await scheduler.acquire(PRIORITY_INTERACTIVE)
+
+    async def request(priority):
+        async with scheduler.slot(priority):
+            order.append(priority)
+
+    tasks = [asyncio.create_task(request(priority)) for priority in priorities]
+    await asyncio.sleep(0)
+    scheduler.release(held)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_weighted_fair_queuing_shares_slots_by_weight():
+    """With weights 2:1, queued interactive and refresh requests are granted in a 2:1 pattern."""
+    scheduler = UpstreamScheduler(1, weights={PRIORITY_INTERACTIVE: 2, PRIORITY_REFRESH: 1})
+    queued = [PRIORITY_REFRESH] * 4 + [PRIORITY_INTERACTIVE] * 4
+
+    order = asyncio.run(_drain(scheduler, queued))
+
+    i, r = PRIORITY_INTERACTIVE, PRIORITY_REFRESH
+    assert order == [i, i, r, i, i, r, r, r]
+    assert scheduler.stats()[PRIORITY_REFRESH]["granted"] == 4
+    print("✓ Test passed: weighted fair queuing")
+
+
+def test_backfill_yields_to_waiting_interactive_requests():
+    """A backfill page never starts while an interactive request waits, even with a lower tag."""
+    scheduler = UpstreamScheduler(1, weights={PRIORITY_INTERACTIVE: 0.1, PRIORITY_BACKFILL: 10})
+
+    order = asyncio.run(_drain(scheduler, [PRIORITY_BACKFILL, PRIORITY_BACKFILL, PRIORITY_INTERACTIVE]))
+
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_BACKFILL, PRIORITY_BACKFILL]
+    print("✓ Test passed: backfill preemption")
+
+
+def test_background_classes_leave_slots_for_interactive():
+    """Refresh requests cannot take the slots reserved for interactive requests."""
+    scheduler = UpstreamScheduler(3, background_limit=2)
+
+    async def scenario():
+        await scheduler.acquire(PRIORITY_REFRESH)
+        await scheduler.acquire(PRIORITY_REFRESH)
+        blocked = asyncio.create_task(scheduler.acquire(PRIORITY_REFRESH))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=1)
+        stats = scheduler.stats()
+        blocked.cancel()
+        await asyncio.sleep(0)
+        return stats, scheduler.stats()
+
+    stats, after_cancel = asyncio.run(scenario())
+    assert stats[PRIORITY_REFRESH]["active"] == 2 and stats[PRIORITY_REFRESH]["queued"] == 1
+    assert stats[PRIORITY_INTERACTIVE]["active"] == 1
+    assert after_cancel[PRIORITY_REFRESH]["queued"] == 0
+    print("✓ Test passed: interactive reserve")
+
+
+def test_priority_propagates_to_threads():
+    """Work run via asyncio.to_thread inherits the priority class and can take slots blocking."""
+    scheduler = UpstreamScheduler(2)
+
+    def blocking_request():
+        with scheduler.slot_blocking():
+            return current_priority()
+
+    async def scenario():
+        with upstream_priority(PRIORITY_REFRESH):
+            return await asyncio.to_thread(blocking_request)
+
+    assert asyncio.run(scenario()) == PRIORITY_REFRESH
+    assert current_priority() == PRIORITY_INTERACTIVE
+    assert scheduler.stats()[PRIORITY_REFRESH]["granted"] == 1
+    assert scheduler.stats()[PRIORITY_REFRESH]["active"] == 0
+    print("✓ Test passed: priority context")
+
+
+def test_blocking_acquire_on_event_loop_is_not_silent(caplog):
+    """On the loop thread, background blocking requests are refused and interactive ones logged."""
+    scheduler = UpstreamScheduler(1)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            scheduler.acquire_blocking(PRIORITY_REFRESH)
+        with caplog.at_level(logging.ERROR):
+            granted = scheduler.acquire_blocking(PRIORITY_INTERACTIVE)
+        scheduler.release(granted)
+
+    asyncio.run(scenario())
+    assert "event loop" in caplog.text
+    assert scheduler.stats()[PRIORITY_REFRESH]["granted"] == 0
+    assert scheduler.stats()[PRIORITY_INTERACTIVE]["active"] == 0
+    print("✓ Test passed: on-loop blocking acquire")
@@ -0,0 +1,178 @@
+"""
+Test the activity-tiered wallet refresh scheduler.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.services.wallet_refresh_scheduler import (
+    TIER_COLD,
+    TIER_HOT,
+    TIER_WARM,
+    UpstreamBudget,
+    classify_activity_tier,
+    rank_sync_jobs,
+    refresh_due_wallets,
+    refresh_interval,
+    run_sync_job,
+)
+
+
+HOT = "0x" + "1" * 40
+WARM = "0x" + "2" * 40
+COLD = "0x" + "3" * 40
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_tiers_follow_trade_frequency_and_open_positions():
+    """Frequent traders or wallets with many open positions are hot; idle wallets are cold."""
+    assert classify_activity_tier(settings.WALLET_TIER_HOT_TRADES_7D, 0) == TIER_HOT
+    assert classify_activity_tier(0, settings.WALLET_TIER_HOT_OPEN_POSITIONS) == TIER_HOT
+    assert classify_activity_tier(1, 0) == TIER_WARM
+    assert classify_activity_tier(0, 0) == TIER_COLD
+
+    assert refresh_interval(TIER_HOT, "trades") < refresh_interval(TIER_WARM, "trades") < refresh_interval(TIER_COLD, "trades")
+    assert refresh_interval(None, "trades") == refresh_interval(TIER_COLD, "trades")
+    assert refresh_interval(TIER_HOT, "closed_positions") == 4 * refresh_interval(TIER_HOT, "trades")
+    print("✓ Test passed: activity tiers")
+
+
+def test_jobs_ranked_by_how_overdue_they_are():
+    """Never-synced datasets first, then by staleness relative to the tier interval; fresh datasets are skipped."""
+    hot_interval = refresh_interval(TIER_HOT, "trades")
+    cold_interval = refresh_interval(TIER_COLD, "trades")
+    candidates = [
+        (COLD, "trades", TIER_COLD, NOW - timedelta(seconds=cold_interval * 1.5)),
+        (HOT, "trades", TIER_HOT, NOW - timedelta(seconds=hot_interval * 3)),
+        (WARM, "trades", TIER_WARM, None),
+        (HOT, "positions", TIER_HOT, NOW - timedelta(seconds=hot_interval / 2)),
+    ]
+
+    assert rank_sync_jobs(candidates, NOW, limit=10) == [(WARM, "trades"), (HOT, "trades"), (COLD, "trades")]
+    assert rank_sync_jobs(candidates, NOW, limit=2) == [(WARM, "trades"), (HOT, "trades")]
+    print("✓ Test passed: job ranking")
+
+
+def test_budget_paces_calls_at_refill_rate():
+    """With a 60 calls/minute budget and no burst, the fourth call waits three seconds."""
+    clock = _Clock()
+    budget = UpstreamBudget(60, burst=1, clock=clock, sleep=clock.sleep)
+
+    async def spend():
+        for _ in range(4):
+            await budget.acquire()
+
+    asyncio.run(spend())
+    assert clock.now == 3.0 and clock.sleeps == [1.0, 1.0, 1.0]
+    print("✓ Test passed: upstream budget pacing")
+
+
+def test_refresh_runs_due_jobs_and_isolates_failures(monkeypatch):
+    """Due jobs run through the budget, each in its own session; a failing job does not stop the rest."""
+    import app.services.wallet_refresh_scheduler as scheduler
+
+    async def fake_due_sync_jobs(session, limit, now=None):
+        return [(HOT, "trades"), (HOT, "positions"), (COLD, "activities")][:limit]
+
+    monkeypatch.setattr(scheduler, "due_sync_jobs", fake_due_sync_jobs)
+
+    sessions = []
+
+    @asynccontextmanager
+    async def session_factory():
+        sessions.append(object())
+        yield sessions[-1]
+
+    ran = []
+
+    async def job_runner(session, wallet, dataset, budget):
+        if dataset == "positions":
+            raise Exception("upstream error")
+        ran.append((wallet, dataset))
+
+    clock = _Clock()
+    budget = UpstreamBudget(60, burst=1, clock=clock, sleep=clock.sleep)
+    stats = asyncio.run(refresh_due_wallets(session_factory, budget, max_jobs=3, concurrency=2, job_runner=job_runner))
+
+    assert stats == {"due": 3, "synced": 2, "failed": 1}
+    assert sorted(ran) == [(HOT, "trades"), (COLD, "activities")]
+    assert len(sessions) == 4 and clock.now == 2.0
+    print("✓ Test passed: scheduled refresh")
+
+
+class _Scalars:
+    def first(self):
+        return None
+
+    def all(self):
+        return []
+
+
+class _Result:
+    def scalars(self):
+        return _Scalars()
+
+
+class _Session:
+    def __init__(self):
+        self.added = []
+
+    async def execute(self, statement):
+        return _Result()
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def commit(self):
+        pass
+
+
+def test_paged_syncs_pay_for_every_page(monkeypatch):
+    """Positions and closed positions charge the budget for each page after the first."""
+    from app.services import closed_position_service, data_fetcher, position_service
+
+    positions = [{"asset": str(i)} for i in range(250)]
+    closed = [{"proxyWallet": HOT, "asset": str(i), "timestamp": i} for i in range(2500)]
+
+    def fake_positions_page(wallet, sort_by, sort_direction, size_threshold, limit, offset):
+        return positions[offset:offset + limit]
+
+    async def fake_save_positions(session, wallet, rows):
+        return len(rows)
+
+    async def fake_mark_synced(session, wallet, dataset):
+        pass
+
+    monkeypatch.setattr(data_fetcher, "fetch_positions_for_wallet", fake_positions_page)
+    monkeypatch.setattr(position_service, "save_positions_to_db", fake_save_positions)
+    monkeypatch.setattr(closed_position_service, "mark_wallet_synced", fake_mark_synced)
+    monkeypatch.setattr(
+        closed_position_service, "_fetch_closed_positions_page",
+        lambda wallet, limit, offset: closed[offset:offset + limit]
+    )
+
+    clock = _Clock()
+    budget = UpstreamBudget(60, burst=1, clock=clock, sleep=clock.sleep)
+    # Pages of 100 positions: 3 pages, the first paid by the scheduler
+    asyncio.run(run_sync_job(None, HOT, "positions", budget))
+    assert clock.now == 1.0
+
+    # Pages of 1000 closed positions plus the empty page that ends paging: 4 pages
+    session = _Session()
+    asyncio.run(run_sync_job(session, HOT, "closed_positions", budget))
+    assert clock.now == 4.0 and len(session.added) == 2500
+    print("✓ Test passed: per-page budget")
@@ -0,0 +1,93 @@
+"""
+Test the tracked wallet registry.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.leaderboard_service import get_unique_wallet_addresses
+from app.services.wallet_registry_service import (
+    mark_wallet_synced,
+    normalize_wallet,
+    read_wallet_file,
+    track_wallets,
+)
+
+
+WALLET = "0x17db3fcd93ba12d38382a0cade24b200185c5f6d"
+
+
+class _Result:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _Session:
+    def __init__(self, rows=()):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return _Result(self.rows)
+
+    def sql(self, index=0):
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))
+
+
+def test_wallet_file_is_normalized_and_deduplicated(tmp_path):
+    """Wallet files are lowercased and deduplicated; comments, blanks and invalid lines are skipped."""
+    path = tmp_path / "wallets.txt"
+    path.write_text(f"{WALLET.upper().replace('0X', '0x')}\n\n# comment\n{WALLET}  # again\nnot-a-wallet\n0x123\n")
+
+    assert read_wallet_file(str(path)) == [WALLET]
+    assert normalize_wallet(" " + WALLET.upper().replace("0X", "0x") + " ") == WALLET
+    assert normalize_wallet("0x" + "g" * 40) is None and normalize_wallet(None) is None
+    print("✓ Test passed: wallet file import")
+
+
+def test_track_wallets_upserts_in_one_statement():
+    """Registering wallets is one multi-row upsert; imports leave existing wallets alone."""
+    session = _Session()
+    count = asyncio.run(track_wallets(session, [WALLET, WALLET.upper().replace("0X", "0x"), "bad", "0x" + "1" * 40]))
+
+    assert count == 2 and len(session.statements) == 1
+    assert "ON CONFLICT (wallet_address) DO UPDATE SET status" in session.sql()
+
+    session = _Session()
+    asyncio.run(track_wallets(session, [WALLET], source="import", reactivate=False))
+    assert "ON CONFLICT (wallet_address) DO NOTHING" in session.sql()
+    print("✓ Test passed: wallet registration")
+
+
+def test_ingest_stamps_dataset_sync_time():
+    """Ingest registers the wallet and only updates that dataset's sync time."""
+    session = _Session()
+    asyncio.run(mark_wallet_synced(session, WALLET, "positions"))
+
+    sql = session.sql()
+    assert "positions_synced_at = excluded.positions_synced_at" in sql
+    assert "trades_synced_at" not in sql and "status =" not in sql.split("DO UPDATE")[1]
+
+    with pytest.raises(ValueError):
+        asyncio.run(mark_wallet_synced(session, WALLET, "orders"))
+    print("✓ Test passed: per-dataset sync times")
+
+
+def test_leaderboard_wallets_come_from_one_registry_scan():
+    """get_unique_wallet_addresses runs one query against tracked_wallets instead of three DISTINCT scans."""
+    session = _Session(rows=[WALLET])
+    wallets = asyncio.run(get_unique_wallet_addresses(session))
+
+    assert wallets == [WALLET]
+    assert len(session.statements) == 1
+    sql = session.sql()
+    assert "FROM tracked_wallets" in sql and "DISTINCT" not in sql
+    print("✓ Test passed: single registry scan")
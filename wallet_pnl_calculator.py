@@ -18,6 +18,8 @@ from datetime import datetime
 import time
 import os
 
+from app.services.cost_basis_service import summarize_cost_basis
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -140,6 +142,22 @@ def calculate_trade_pnl(trade, winning_token_id):
     return pnl
 
 
+def calculate_realized_pnl_by_method(trades):
+    """Realized PnL per cost-basis method of Dome trades (token_id / shares_normalized)"""
+    fills = [
+        {
+            'asset': trade['token_id'],
+            'side': str(trade.get('side', '')).upper(),
+            'size': trade['shares_normalized'],
+            'price': trade['price'],
+            'timestamp': trade.get('timestamp', 0)
+        }
+        for trade in trades
+        if trade.get('token_id') and trade.get('shares_normalized') is not None and trade.get('price') is not None
+    ]
+    return summarize_cost_basis(fills, as_float=True)
+
+
 def calculate_wallet_pnl_roi(wallet_address):
     """
     Calculate complete PnL and ROI for a wallet
@@ -232,6 +250,7 @@ def calculate_wallet_pnl_roi(wallet_address):
         'roi_percent': round(roi, 2),
         'markets_traded': len(market_slugs),
         'resolved_markets': len(market_resolutions),
+        'realized_pnl_by_method': calculate_realized_pnl_by_method(trades),
         'analysis_date': datetime.now().isoformat()
     }
     
@@ -246,6 +265,9 @@ def calculate_wallet_pnl_roi(wallet_address):
     print(f"Total Volume: ${result['total_volume']:,.2f}")
     print(f"Total PnL: ${result['total_pnl']:,.2f}")
     print(f"ROI: {result['roi_percent']}%")
+    print(f"\n📒 Realized PnL by cost basis:")
+    for method, totals in result['realized_pnl_by_method'].items():
+        print(f"  {method.upper():<8} ${totals['realized_pnl']:,.2f} ({totals['closed_trades']} closed)")
     print(f"{'='*80}")
     
     return result